@@ -0,0 +1,284 @@
+"""
+爬虫守护进程 —— 常驻进程 + 预热的浏览器池，替代每次调度都启动 spider_v2.py 子进程
+
+调度器（ProcessService）通过本地 Unix socket 把任务运行交给守护进程：
+- 每次运行从 config.json 重新读取任务配置，在浏览器池借出的浏览器上新建隔离的 BrowserContext
+  （各自的登录态 storage_state），运行结束关闭 context、归还浏览器
+- 每次运行的输出写入该任务的日志文件（与子进程模式相同的 logs/ 路径）
+- 协议：每个连接一行 JSON 请求
+    {"op": "run", "task_id", "task_name", "log_path"} → {"event": "started"} ... {"event": "finished", "returncode"}
+    {"op": "stop", "task_id"} → {"ok": bool}
+    {"op": "status"} → {"pid", "running", "pool"}
+
+用法:
+  python scraper_worker.py                  # 启动守护进程（监听 SCRAPER_WORKER_SOCKET）
+  python scraper_worker.py --benchmark 10   # 对比子进程模式与浏览器池模式的每分钟运行次数
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Dict, Optional, TextIO
+
+from spider_v2 import load_prompt_text
+from src.browser_pool import BrowserPool, open_browser
+from src.infrastructure.config.settings import scraper_settings
+from src.infrastructure.persistence.sqlite_manager import close_pools
+from src.scraper import scrape_xianyu
+from src.scraper_mercari import scrape_mercari
+
+# 平台爬虫分发映射
+PLATFORM_SCRAPERS = {
+    "xianyu": scrape_xianyu,
+    "mercari": scrape_mercari,
+}
+
+# 当前协程所属运行的日志文件（运行内创建的子任务继承该上下文）
+_run_log: ContextVar[Optional[TextIO]] = ContextVar("scraper_worker_run_log", default=None)
+
+
+class _RunOutput(io.TextIOBase):
+    """替换 sys.stdout / sys.stderr：运行中的输出写入各自的任务日志，其余写回原始流"""
+
+    def __init__(self, fallback: TextIO):
+        self._fallback = fallback
+
+    @property
+    def encoding(self) -> str:
+        return getattr(self._fallback, "encoding", "utf-8")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        target = _run_log.get() or self._fallback
+        target.write(text)
+        if target is not self._fallback:
+            target.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        (_run_log.get() or self._fallback).flush()
+
+
+class ScraperWorker:
+    """守护进程的运行管理：同一任务同时只运行一次，运行之间共享浏览器池"""
+
+    def __init__(
+        self,
+        config_path: str = "config.json",
+        pool: Optional[BrowserPool] = None,
+        scrapers=None,
+        stop_timeout: Optional[float] = None,
+    ):
+        self.config_path = config_path
+        self.pool = pool or BrowserPool()
+        self.scrapers = scrapers or PLATFORM_SCRAPERS
+        self.stop_timeout = scraper_settings.worker_stop_timeout_seconds if stop_timeout is None else stop_timeout
+        self.runs: Dict[int, asyncio.Task] = {}
+
+    def _load_task(self, task_name: str) -> dict:
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            tasks_config = json.load(f)
+        task = next((t for t in tasks_config if t.get("task_name") == task_name), None)
+        if task is None:
+            raise LookupError(f"在配置文件中未找到名为 '{task_name}' 的任务")
+        if not task.get("enabled", False):
+            raise LookupError(f"任务 '{task_name}' 已被禁用")
+        load_prompt_text(task)
+        return task
+
+    async def _execute(self, task_name: str, log_path: str) -> int:
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as log:
+            _run_log.set(log)
+            print(f"--- 爬虫守护进程 (PID: {os.getpid()}) 开始执行任务 '{task_name}' ---")
+            try:
+                task_conf = self._load_task(task_name)
+                platform = task_conf.get("platform", "xianyu")
+                scraper_fn = self.scrapers.get(platform)
+                if not scraper_fn:
+                    print(f"-> 任务 '{task_name}' 平台 '{platform}' 暂不支持，跳过。")
+                    return 1
+                processed = await scraper_fn(task_config=task_conf, debug_limit=0, browser_pool=self.pool)
+                print(f"任务 '{task_name}' 正常结束，本次运行共处理了 {processed} 个新商品。")
+                return 0
+            except asyncio.CancelledError:
+                print("收到终止请求，已取消当前爬虫任务。")
+                raise
+            except Exception as e:
+                print(f"任务 '{task_name}' 因异常而终止: {e}")
+                traceback.print_exc()
+                return 1
+
+    async def stop(self, task_id: int) -> bool:
+        run = self.runs.get(task_id)
+        if run is None or run.done():
+            return False
+        run.cancel()
+        done, _ = await asyncio.wait([run], timeout=self.stop_timeout)
+        if not done:
+            print(f"[ScraperWorker] 任务 {task_id} 取消后 {self.stop_timeout:g} 秒内未结束，放弃等待")
+            return False
+        return True
+
+    async def _serve_run(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        task_id = int(request["task_id"])
+        if task_id in self.runs:
+            await _send(writer, {"event": "rejected", "reason": "任务已在守护进程中运行"})
+            return
+        run = asyncio.create_task(self._execute(request["task_name"], request["log_path"]))
+        self.runs[task_id] = run
+        run.add_done_callback(lambda _: self.runs.pop(task_id, None))
+        await _send(writer, {"event": "started", "pid": os.getpid()})
+
+        # 运行与连接相互独立：调度方断开不影响运行，运行被 stop 取消时返回码同 SIGTERM
+        await asyncio.wait([run])
+        if run.cancelled():
+            returncode = -signal.SIGTERM
+        else:
+            returncode = 1 if run.exception() else run.result()
+        await _send(writer, {"event": "finished", "returncode": returncode})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(await reader.readline() or b"{}")
+            op = request.get("op")
+            if op == "run":
+                await self._serve_run(request, writer)
+            elif op == "stop":
+                await _send(writer, {"ok": await self.stop(int(request["task_id"]))})
+            elif op == "status":
+                await _send(writer, {"pid": os.getpid(), "running": sorted(self.runs), "pool": self.pool.snapshot()})
+            else:
+                await _send(writer, {"error": f"未知操作: {op}"})
+        except (ConnectionError, json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"[ScraperWorker] 请求处理失败: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: str) -> asyncio.AbstractServer:
+        os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+        if os.path.exists(socket_path):
+            try:
+                _, writer = await asyncio.open_unix_connection(socket_path)
+                writer.close()
+                raise RuntimeError(f"已有爬虫守护进程监听 {socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(socket_path)  # 上次异常退出遗留的 socket 文件
+        return await asyncio.start_unix_server(self.handle, path=socket_path)
+
+    async def shutdown(self) -> None:
+        # 并发取消，总等待时间不超过一个 stop_timeout；未收尾的运行归还浏览器时由池停止 Playwright
+        await asyncio.gather(*(self.stop(task_id) for task_id in list(self.runs)))
+        await self.pool.close()
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+async def serve_forever(socket_path: str, config_path: str = "config.json") -> None:
+    sys.stdout = _RunOutput(sys.stdout)
+    sys.stderr = _RunOutput(sys.stderr)
+    worker = ScraperWorker(config_path)
+    server = await worker.serve(socket_path)
+    print(f"爬虫守护进程已启动 (PID: {os.getpid()})，监听 {socket_path}，浏览器池大小 {worker.pool.size}")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+    try:
+        await stop_event.wait()
+    finally:
+        print("\n收到终止信号，正在停止运行中的任务并关闭浏览器池...")
+        server.close()
+        await worker.shutdown()
+        await close_pools()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+# ----------------------------------------------------------------------
+# 基准：子进程模式 vs 浏览器池模式的每分钟运行次数
+# ----------------------------------------------------------------------
+
+_BENCH_LAUNCH = {"headless": True, "args": ["--no-sandbox", "--disable-dev-shm-usage"]}
+
+
+async def _synthetic_run(browser) -> None:
+    """一次不访问网络的"运行"：新建 context 打开页面后关闭，只衡量进程 / 浏览器开销"""
+    context = await browser.new_context()
+    page = await context.new_page()
+    await page.goto("data:text/html,<title>ok</title>")
+    await context.close()
+
+
+async def _standalone_run() -> None:
+    async with open_browser(_BENCH_LAUNCH) as browser:
+        await _synthetic_run(browser)
+
+
+async def benchmark(runs: int = 10) -> Dict[str, dict]:
+    """
+    子进程模式：每次运行启动一个与 spider_v2.py 导入相同模块的 Python 进程，现启动浏览器；
+    浏览器池模式：同一进程内从预热的池中借浏览器（首次启动不计时）。
+    """
+    results = {}
+    started = time.perf_counter()
+    for _ in range(runs):
+        proc = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), "--synthetic-run")
+        if await proc.wait() != 0:
+            raise RuntimeError("子进程运行失败")
+    elapsed = time.perf_counter() - started
+    results["subprocess"] = {"seconds": round(elapsed, 2), "runs_per_min": round(runs * 60 / elapsed, 1)}
+
+    pool = BrowserPool(size=1, max_runs=runs + 1)
+    try:
+        async with pool.browser(_BENCH_LAUNCH) as browser:
+            await _synthetic_run(browser)
+        started = time.perf_counter()
+        for _ in range(runs):
+            async with pool.browser(_BENCH_LAUNCH) as browser:
+                await _synthetic_run(browser)
+        elapsed = time.perf_counter() - started
+        results["pool"] = {"seconds": round(elapsed, 2), "runs_per_min": round(runs * 60 / elapsed, 1)}
+        results["pool_stats"] = pool.snapshot()
+    finally:
+        await pool.close()
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="爬虫守护进程：常驻浏览器池，经本地 socket 接收任务运行")
+    parser.add_argument("--socket", default=scraper_settings.worker_socket, help="监听的 Unix socket 路径")
+    parser.add_argument("--config", default="config.json", help="任务配置文件路径（默认为 config.json）")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="各运行 N 次，对比子进程模式与浏览器池模式")
+    parser.add_argument("--synthetic-run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.synthetic_run:
+        await _standalone_run()
+    elif args.benchmark:
+        results = await benchmark(args.benchmark)
+        for mode in ("subprocess", "pool"):
+            r = results[mode]
+            print(f"[ScraperWorker] {mode}: {args.benchmark} 次 {r['seconds']:.2f} s, {r['runs_per_min']:.1f} 次/分钟")
+        print(f"[ScraperWorker] 浏览器池: {results['pool_stats']}")
+    else:
+        await serve_forever(args.socket, args.config)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -9,6 +9,46 @@ import contextlib
 from src.config import STATE_FILE
 from src.scraper import scrape_xianyu
 from src.scraper_mercari import scrape_mercari
+from src.infrastructure.persistence.sqlite_manager import close_pools
+
+
+def load_prompt_text(task: dict) -> None:
+    """读取任务的 prompt 文件，组合后写入 task['ai_prompt_text']（仅处理已启用的任务）"""
+    if task.get("enabled", False) and task.get("ai_prompt_base_file") and task.get("ai_prompt_criteria_file"):
+        try:
+            with open(task["ai_prompt_base_file"], 'r', encoding='utf-8') as f_base:
+                base_prompt = f_base.read()
+            with open(task["ai_prompt_criteria_file"], 'r', encoding='utf-8') as f_criteria:
+                criteria_text = f_criteria.read()
+            
+            # 动态组合成最终的Prompt
+            task['ai_prompt_text'] = base_prompt.replace("{{CRITERIA_SECTION}}", criteria_text)
+            
+            # 验证生成的prompt是否有效
+            if len(task['ai_prompt_text']) < 100:
+                print(f"警告: 任务 '{task['task_name']}' 生成的prompt过短 ({len(task['ai_prompt_text'])} 字符)，可能存在问题。")
+            elif "{{CRITERIA_SECTION}}" in task['ai_prompt_text']:
+                print(f"警告: 任务 '{task['task_name']}' 的prompt中仍包含占位符，替换可能失败。")
+            else:
+                print(f"✅ 任务 '{task['task_name']}' 的prompt生成成功，长度: {len(task['ai_prompt_text'])} 字符")
+
+        except FileNotFoundError as e:
+            print(f"警告: 任务 '{task['task_name']}' 的prompt文件缺失: {e}，该任务的AI分析将被跳过。")
+            task['ai_prompt_text'] = ""
+        except Exception as e:
+            print(f"错误: 任务 '{task['task_name']}' 处理prompt文件时发生异常: {e}，该任务的AI分析将被跳过。")
+            task['ai_prompt_text'] = ""
+    elif task.get("enabled", False) and task.get("ai_prompt_file"):
+        try:
+            with open(task["ai_prompt_file"], 'r', encoding='utf-8') as f:
+                task['ai_prompt_text'] = f.read()
+            print(f"✅ 任务 '{task['task_name']}' 的prompt文件读取成功，长度: {len(task['ai_prompt_text'])} 字符")
+        except FileNotFoundError:
+            print(f"警告: 任务 '{task['task_name']}' 的prompt文件 '{task['ai_prompt_file']}' 未找到，该任务的AI分析将被跳过。")
+            task['ai_prompt_text'] = ""
+        except Exception as e:
+            print(f"错误: 任务 '{task['task_name']}' 读取prompt文件时发生异常: {e}，该任务的AI分析将被跳过。")
+            task['ai_prompt_text'] = ""
 
 
 async def main():
@@ -75,41 +115,7 @@ async def main():
 
     # 读取所有prompt文件内容
     for task in tasks_config:
-        if task.get("enabled", False) and task.get("ai_prompt_base_file") and task.get("ai_prompt_criteria_file"):
-            try:
-                with open(task["ai_prompt_base_file"], 'r', encoding='utf-8') as f_base:
-                    base_prompt = f_base.read()
-                with open(task["ai_prompt_criteria_file"], 'r', encoding='utf-8') as f_criteria:
-                    criteria_text = f_criteria.read()
-                
-                # 动态组合成最终的Prompt
-                task['ai_prompt_text'] = base_prompt.replace("{{CRITERIA_SECTION}}", criteria_text)
-                
-                # 验证生成的prompt是否有效
-                if len(task['ai_prompt_text']) < 100:
-                    print(f"警告: 任务 '{task['task_name']}' 生成的prompt过短 ({len(task['ai_prompt_text'])} 字符)，可能存在问题。")
-                elif "{{CRITERIA_SECTION}}" in task['ai_prompt_text']:
-                    print(f"警告: 任务 '{task['task_name']}' 的prompt中仍包含占位符，替换可能失败。")
-                else:
-                    print(f"✅ 任务 '{task['task_name']}' 的prompt生成成功，长度: {len(task['ai_prompt_text'])} 字符")
-
-            except FileNotFoundError as e:
-                print(f"警告: 任务 '{task['task_name']}' 的prompt文件缺失: {e}，该任务的AI分析将被跳过。")
-                task['ai_prompt_text'] = ""
-            except Exception as e:
-                print(f"错误: 任务 '{task['task_name']}' 处理prompt文件时发生异常: {e}，该任务的AI分析将被跳过。")
-                task['ai_prompt_text'] = ""
-        elif task.get("enabled", False) and task.get("ai_prompt_file"):
-            try:
-                with open(task["ai_prompt_file"], 'r', encoding='utf-8') as f:
-                    task['ai_prompt_text'] = f.read()
-                print(f"✅ 任务 '{task['task_name']}' 的prompt文件读取成功，长度: {len(task['ai_prompt_text'])} 字符")
-            except FileNotFoundError:
-                print(f"警告: 任务 '{task['task_name']}' 的prompt文件 '{task['ai_prompt_file']}' 未找到，该任务的AI分析将被跳过。")
-                task['ai_prompt_text'] = ""
-            except Exception as e:
-                print(f"错误: 任务 '{task['task_name']}' 读取prompt文件时发生异常: {e}，该任务的AI分析将被跳过。")
-                task['ai_prompt_text'] = ""
+        load_prompt_text(task)
 
     print("\n--- 开始执行监控任务 ---")
     if args.debug_limit > 0:
@@ -181,6 +187,7 @@ async def main():
         shutdown_task.cancel()
         with contextlib.suppress(asyncio.CancelledError):
             await shutdown_task
+        await close_pools()
 
     print("\n--- 所有任务执行完毕 ---")
     for i, result in enumerate(results):
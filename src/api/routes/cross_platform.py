@@ -32,14 +32,19 @@ async def get_cross_platform_items(
     sort_by: str = Query("converted_price"),
     platforms: Optional[str] = Query(None, description="逗号分隔的平台列表"),
     limit: int = Query(200, ge=1, le=1000),
+    q: Optional[str] = Query(None, description="标题 / 描述全文检索，空格分隔的词须同时命中"),
 ):
-    """获取跨平台混排商品列表"""
+    """
+    获取跨平台混排商品列表（sort_by 可选 converted_price/vs_category_avg/price/relevance）。
+    只覆盖热库中的快照，已归档（超过 ITEM_ARCHIVE_AFTER_DAYS 天未出现）的商品不在其中。
+    """
     platform_list = platforms.split(",") if platforms else None
     return await service.get_cross_platform_items(
         category_id=category_id,
         sort_by=sort_by,
         platforms=platform_list,
         limit=limit,
+        q=q,
     )
 
 
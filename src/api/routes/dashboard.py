@@ -55,3 +55,10 @@ async def get_bargain_leaderboard(
 ):
     """获取捡漏排行榜 Top N（按溢价率从低到高）"""
     return await dashboard_service.get_bargain_leaderboard(limit=limit)
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats():
+    """获取 SQLite 连接池指标（连接数、获取等待耗时）"""
+    from src.infrastructure.persistence.sqlite_manager import get_pool_stats
+    return {"pools": get_pool_stats()}
@@ -9,16 +9,6 @@ import json
 router = APIRouter(prefix="/api/premium-map", tags=["premium-map"])
 
 
-def _extract_price(item: dict) -> float:
-    """从商品记录中提取价格"""
-    price_str = str(item.get('商品信息', {}).get('当前售价', '0'))
-    price_str = price_str.replace('¥', '').replace(',', '').strip()
-    try:
-        return float(price_str)
-    except (ValueError, TypeError):
-        return 0.0
-
-
 @router.get("/categories/{category_id}/items")
 async def get_category_items(
     category_id: str,
@@ -29,90 +19,25 @@ async def get_category_items(
 ):
     """
     获取指定品类的商品列表。
-    通过 PriceBookService 获取品类关键词和价格区间，
-    从数据库查询商品后按价格区间动态计算评估状态。
+    每个商品的最新快照按落库的评估列（category_id / evaluation_status / 预估利润）
+    筛选、排序；价格本变更后由后台任务重算，见 item_evaluation。
     """
-    from src.services.price_book_service import PriceBookService
     from src.infrastructure.persistence.item_repository import ItemRepository
 
-    pb_service = PriceBookService()
-    entry = await pb_service.get_by_id(category_id)
-    if not entry:
-        return {'items': [], 'total': 0}
-
-    keywords = entry.get("keywords", [])
-    if not keywords:
-        return {'items': [], 'total': 0}
-
-    purchase_ideal = entry.get("purchase_ideal")
-    purchase_upper = entry.get("purchase_upper")
-    target_sell = entry.get("target_sell_price")
-    total_fees = entry.get("total_fees", 0)
-
-    # 从数据库查询该品类所有关键词的商品
-    item_repo = ItemRepository()
-    all_items = []
-    for kw in keywords:
-        data = await item_repo.query(keyword=kw, page=1, limit=10000)
-        all_items.extend(data.get("items", []))
-
-    # 动态计算评估状态和利润
-    enriched = []
-    for item in all_items:
-        price = _extract_price(item)
-        if price <= 0:
-            continue
-
-        # 计算评估状态（与概览的 good_deal_count 逻辑一致）
-        if purchase_ideal is not None and price <= purchase_ideal:
-            eval_status = 'great_deal'
-        elif purchase_upper is not None and price <= purchase_upper:
-            eval_status = 'good_deal'
-        else:
-            eval_status = 'overpriced'
-
-        # 计算预估利润（基于目标售价和费用，与 evaluate_item 一致）
-        est_profit = None
-        est_profit_rate = None
-        if target_sell and target_sell > 0:
-            total_cost = price + total_fees
-            est_profit = round(target_sell - total_cost, 2)
-            est_profit_rate = round((target_sell - total_cost) / target_sell, 4)
-
-        item['evaluation_status'] = eval_status
-        item['estimated_profit'] = est_profit
-        item['estimated_profit_rate'] = est_profit_rate
-        enriched.append(item)
-
-    # 状态筛选
     if status and status != 'all':
-        if status == 'good_deal':
-            # "可收"包含 good_deal 和 great_deal
-            enriched = [i for i in enriched if i['evaluation_status'] in ('good_deal', 'great_deal')]
-        else:
-            enriched = [i for i in enriched if i['evaluation_status'] == status]
-
-    # 平台筛选
-    if platform and platform != 'all':
-        enriched = [i for i in enriched if i.get('platform', 'xianyu') == platform]
-
-    # 排序
-    if sort_by == 'profit_rate':
-        enriched.sort(key=lambda x: x.get('estimated_profit_rate') or 0, reverse=True)
-    elif sort_by == 'profit':
-        enriched.sort(key=lambda x: x.get('estimated_profit') or 0, reverse=True)
-    elif sort_by == 'price':
-        enriched.sort(key=lambda x: _extract_price(x))
-    else:  # crawl_time
-        enriched.sort(key=lambda x: x.get('爬取时间', ''), reverse=True)
-
-    total = len(enriched)
-    enriched = enriched[:limit]
-
-    return {
-        'items': enriched,
-        'total': total
-    }
+        # "可收"包含 good_deal 和 great_deal
+        statuses = ['good_deal', 'great_deal'] if status == 'good_deal' else [status]
+    else:
+        statuses = None
+
+    return await ItemRepository().query_latest_evaluated(
+        category_id=category_id,
+        statuses=statuses,
+        platform=platform if platform and platform != 'all' else None,
+        priced_only=True,
+        order_by=sort_by,
+        limit=limit,
+    )
 
 
 @router.post("/categories/{category_id}/items/batch-purchase")
@@ -3,17 +3,21 @@
 """
 import csv
 import io
-import statistics as _statistics
-from collections import defaultdict as _defaultdict
-from datetime import datetime as _datetime, timedelta as _timedelta
+import json
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.price_rollup_repository import (
+    PriceRollupRepository,
+    RollupBucket,
+    since_day,
+)
 
 router = APIRouter(prefix="/api/results", tags=["results"])
 item_repo = ItemRepository()
+rollup_repo = PriceRollupRepository()
 
 
 @router.get("/keywords")
@@ -23,55 +27,84 @@ async def get_keywords():
     return {"keywords": keywords}
 
 
+# 导出列：参数名 → (CSV 表头, 从 summary 记录取值)；默认导出前 12 列
+EXPORT_COLUMNS = {
+    "item_id": ("商品ID", lambda r: r["商品信息"].get("商品ID", "")),
+    "title": ("商品标题", lambda r: r["商品信息"].get("商品标题", "")),
+    "price": ("当前售价", lambda r: r["商品信息"].get("当前售价", "")),
+    "region": ("发货地区", lambda r: r["商品信息"].get("发货地区", "")),
+    "publish_time": ("发布时间", lambda r: r["商品信息"].get("发布时间", "")),
+    "crawl_time": ("爬取时间", lambda r: r.get("爬取时间", "")),
+    "recommended": ("AI推荐", lambda r: "是" if r["ai_analysis"].get("is_recommended") else "否"),
+    "reason": ("推荐理由", lambda r: r["ai_analysis"].get("reason", "")),
+    "seller_name": ("卖家昵称", lambda r: r["卖家信息"].get("卖家昵称", "")),
+    "seller_credit": ("卖家信用", lambda r: r["卖家信息"].get("卖家信用等级", "")),
+    "item_link": ("商品链接", lambda r: r["商品信息"].get("商品链接", "")),
+    "image_url": ("主图链接", lambda r: r["商品信息"].get("商品主图链接", "")),
+    "platform": ("平台", lambda r: r.get("platform", "")),
+    "currency": ("货币", lambda r: r.get("currency", "")),
+    "evaluation_status": ("评估状态", lambda r: r.get("evaluation_status")),
+    "estimated_profit": ("预估利润", lambda r: r.get("estimated_profit")),
+    "premium_rate": ("溢价率", lambda r: r.get("premium_rate")),
+}
+_DEFAULT_EXPORT_COLUMNS = list(EXPORT_COLUMNS)[:12]
+
+
+async def _export_chunks(first: list, rest, fmt: str, columns: list):
+    """逐块编码为 CSV（首块前带 BOM 与表头）或 NDJSON，边读边发送"""
+    getters = [EXPORT_COLUMNS[c][1] for c in columns]
+    if fmt == "csv":
+        # 添加 BOM 让 Excel 正确识别 UTF-8
+        yield b"\xef\xbb\xbf" + _csv_lines([[EXPORT_COLUMNS[c][0] for c in columns]])
+    chunk = first
+    while chunk is not None:
+        rows = [[get(item) for get in getters] for item in chunk]
+        if fmt == "csv":
+            yield _csv_lines(rows)
+        else:
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+            ).encode("utf-8")
+        chunk = await anext(rest, None)
+
+
+def _csv_lines(rows: list) -> bytes:
+    output = io.StringIO()
+    csv.writer(output).writerows(rows)
+    return output.getvalue().encode("utf-8")
+
+
 @router.get("/export")
-async def export_result_csv(keyword: str = Query(..., description="搜索关键词")):
-    """导出指定关键词的商品数据为 CSV 文件"""
-    data = await item_repo.query(keyword=keyword, page=1, limit=10000)
-    items = data.get("items", [])
+async def export_result_csv(
+    keyword: str = Query(..., description="搜索关键词"),
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv / ndjson"),
+    columns: Optional[str] = Query(None, description="逗号分隔的导出列，默认商品基础信息 12 列"),
+    since: Optional[str] = Query(None, description="爬取时间下限（含），如 2026-01-01"),
+    until: Optional[str] = Query(None, description="爬取时间上限（不含），如 2026-02-01"),
+):
+    """流式导出指定关键词的全部商品快照（不限条数，分块读取、边读边发送）"""
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else _DEFAULT_EXPORT_COLUMNS
+    unknown = [c for c in selected if c not in EXPORT_COLUMNS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"未知的导出列: {', '.join(unknown)}；可选: {', '.join(EXPORT_COLUMNS)}",
+        )
 
-    if not items:
+    chunks = item_repo.iter_export(keyword, since=since, until=until)
+    # 先取第一块：无数据时还能返回 404，而不是一个空文件
+    first = await anext(chunks, None)
+    if first is None:
         raise HTTPException(status_code=404, detail="没有可导出的数据")
 
-    # 构建 CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "商品ID", "商品标题", "当前售价", "发货地区", "发布时间",
-        "爬取时间", "AI推荐", "推荐理由", "卖家昵称", "卖家信用",
-        "商品链接", "主图链接",
-    ])
-    for item in items:
-        info = item.get("商品信息", {})
-        ai = item.get("ai_analysis", {})
-        seller = item.get("卖家信息", {})
-        writer.writerow([
-            info.get("商品ID", ""),
-            info.get("商品标题", ""),
-            info.get("当前售价", ""),
-            info.get("发货地区", ""),
-            info.get("发布时间", ""),
-            item.get("爬取时间", ""),
-            "是" if ai.get("is_recommended") else "否",
-            ai.get("reason", ""),
-            seller.get("卖家昵称", ""),
-            seller.get("卖家信用等级", ""),
-            info.get("商品链接", ""),
-            info.get("商品主图链接", ""),
-        ])
-
-    csv_filename = f"{keyword.replace(' ', '_')}_export.csv"
-    output.seek(0)
-    # 添加 BOM 让 Excel 正确识别 UTF-8
-    bom = b'\xef\xbb\xbf'
-    content = bom + output.getvalue().encode("utf-8")
-
+    filename = f"{keyword.replace(' ', '_')}_export.{format}"
     # RFC 5987 编码中文文件名
     from urllib.parse import quote
-    encoded_filename = quote(csv_filename)
+    encoded_filename = quote(filename)
 
     return StreamingResponse(
-        io.BytesIO(content),
-        media_type="text/csv; charset=utf-8",
+        _export_chunks(first, chunks, format, selected),
+        media_type="text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson",
         headers={
             "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
         },
@@ -91,139 +124,85 @@ async def get_results(
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     recommended_only: bool = Query(False),
-    sort_by: str = Query("crawl_time"),
+    sort_by: Optional[str] = Query(None, description="crawl_time/publish_time/price/relevance，默认 crawl_time（传 q 时默认 relevance）"),
     sort_order: str = Query("desc"),
+    after: Optional[str] = Query(None, description="游标分页：上一页返回的 next_cursor，传入后忽略 page"),
+    q: Optional[str] = Query(None, description="标题 / 描述全文检索，空格分隔的词须同时命中，可跨关键词"),
 ):
     """
-    查询指定关键词的商品数据，支持分页、筛选和排序。
-    数据源：SQLite items 表。返回时动态评估价格本，确保始终使用最新配置。
+    查询指定关键词的商品数据，支持分页、筛选、排序和标题全文检索。
+    数据源：SQLite items 表（热库，只含最近 ITEM_ARCHIVE_AFTER_DAYS 天出现过的快照；
+    更早的快照已按月归档，见导出接口与商品详情）。评估字段为落库结果（价格本变更后由后台任务重算）。
     """
-    from src.services.price_book_service import PriceBookService
+    if sort_by is None:
+        sort_by = "relevance" if q and q.strip() else "crawl_time"
+    try:
+        return await item_repo.query(
+            keyword=keyword,
+            recommended_only=recommended_only,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            limit=limit,
+            after=after,
+            q=q,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    data = await item_repo.query(
-        keyword=keyword,
-        recommended_only=recommended_only,
-        sort_by=sort_by,
-        sort_order=sort_order,
-        page=page,
-        limit=limit,
-    )
 
-    # 动态评估价格本：用当前最新的价格本配置实时计算评估字段
-    items = data.get("items", [])
-    if items:
-        pb_service = PriceBookService()
-        all_entries = await pb_service.get_all()
-        # 构建 keyword -> entry 映射
-        keyword_map: dict = {}
-        for entry in all_entries:
-            for kw in entry.get("keywords", []):
-                keyword_map[kw] = entry
-
-        for item in items:
-            item_keyword = item.get("搜索关键字", "")
-            entry = keyword_map.get(item_keyword)
-            if not entry or not entry.get("target_sell_price"):
-                # 确实未配置，保持原样
-                continue
-
-            # 提取商品价格
-            price_str = item.get("商品信息", {}).get("当前售价", "")
-            try:
-                item_price = float(str(price_str).replace("¥", "").replace(",", "").strip() or "0")
-            except (ValueError, TypeError):
-                continue
-            if item_price <= 0:
-                continue
-
-            target = entry["target_sell_price"]
-            ideal = entry.get("purchase_ideal")
-            upper = entry.get("purchase_upper")
-            total_fees = entry.get("total_fees", 0)
-            total_cost = item_price + total_fees
-            profit = target - total_cost
-            profit_rate = round(profit / target, 4) if target > 0 else 0
-
-            if ideal is None or upper is None:
-                status = "no_config"
-            elif item_price <= ideal:
-                status = "great_deal"
-            elif item_price <= upper:
-                status = "good_deal"
-            else:
-                status = "overpriced"
-
-            premium_rate = None
-            market_price = entry.get("market_price")
-            if market_price and market_price > 0:
-                premium_rate = round((item_price - market_price) / market_price, 4)
-
-            # 注入评估字段（覆盖数据库中可能为空的旧值）
-            item["category_id"] = entry["id"]
-            item["category_name"] = entry.get("category_name", "")
-            item["evaluation_status"] = status
-            item["purchase_range_low"] = ideal
-            item["purchase_range_high"] = upper
-            item["estimated_profit"] = round(profit, 2)
-            item["estimated_profit_rate"] = profit_rate
-            item["premium_rate"] = premium_rate
-
-    return data
+@router.get("/items/{item_id}")
+async def get_result_item(item_id: str):
+    """商品详情：按需加载完整的商品 / 卖家 / AI 分析原始信息（列表接口只返回轻量投影；热库中没有时查归档）"""
+    item = await item_repo.get_item(item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="商品不存在")
+    return item
 
 
 @router.get("/premium-map/overview")
-async def get_premium_map_overview():
-    """品类溢价概览"""
+async def get_premium_map_overview(
+    days: int = Query(30, ge=1, le=365, description="统计最近N天的价格日汇总"),
+):
+    """品类溢价概览（读 price_daily_rollup，按天合并，不扫描原始快照）"""
     from src.services.price_book_service import PriceBookService
 
     pb_service = PriceBookService()
     entries = await pb_service.get_all()
+    since = since_day(days)
     result = []
     for entry in entries:
         keywords = entry.get("keywords", [])
         if not keywords:
             continue
-        all_prices = []
-        total_items = 0
-        platform_stats: dict = {}  # {platform: {count, prices}}
-        for kw in keywords:
-            data = await item_repo.query(keyword=kw, page=1, limit=10000)
-            items = data.get("items", [])
-            total_items += len(items)
-            for item in items:
-                price_str = item.get("商品信息", {}).get("当前售价", "")
-                price = float(str(price_str).replace("¥", "").replace(",", "").strip() or "0")
-                if price > 0:
-                    all_prices.append(price)
-                    plat = item.get("platform", "xianyu")
-                    if plat not in platform_stats:
-                        platform_stats[plat] = {"count": 0, "prices": []}
-                    platform_stats[plat]["count"] += 1
-                    platform_stats[plat]["prices"].append(price)
-        if not all_prices:
+        by_platform = await rollup_repo.get_by_platform(keywords, since=since)
+        overall = RollupBucket()
+        for bucket in by_platform.values():
+            overall.merge(bucket)
+        if not overall.count:
             continue
-        median_price = round(_statistics.median(all_prices), 2)
+        median_price = round(overall.median, 2)
         market_price = entry.get("market_price") or median_price
         avg_premium = round((median_price - market_price) / market_price * 100, 2) if market_price > 0 else 0
         purchase_upper = entry.get("purchase_upper")
-        good_deal_count = sum(1 for p in all_prices if purchase_upper and p <= purchase_upper)
+        good_deal_count = overall.count_at_most(purchase_upper) if purchase_upper else 0
 
-        # 计算每个平台的中位价
+        # 每个平台的中位价
         platform_summary = {}
-        for plat, stats in platform_stats.items():
-            plat_median = round(_statistics.median(stats["prices"]), 2) if stats["prices"] else 0
+        for plat, bucket in by_platform.items():
+            stats = bucket.to_stats()
             platform_summary[plat] = {
                 "count": stats["count"],
-                "median_price": plat_median,
-                "min_price": round(min(stats["prices"]), 2) if stats["prices"] else 0,
-                "max_price": round(max(stats["prices"]), 2) if stats["prices"] else 0,
+                "median_price": stats["median_price"],
+                "min_price": stats["min_price"],
+                "max_price": stats["max_price"],
             }
 
         result.append({
             "id": entry["id"],
             "category_name": entry["category_name"],
             "keywords": keywords,
-            "total_items": total_items,
+            "total_items": overall.count,
             "market_price": market_price,
             "median_price": median_price,
             "avg_premium_rate": avg_premium,
@@ -237,29 +216,14 @@ async def get_premium_map_overview():
 
 @router.get("/premium-map/distribution")
 async def get_premium_distribution_detail(keyword: str = Query(...)):
-    """选中品类的价格分布直方图"""
+    """选中品类的价格分布直方图（items_latest 上 SQL 分桶计数）"""
     from src.services.price_book_service import PriceBookService
     pb_service = PriceBookService()
     entry = await pb_service.get_by_keyword(keyword)
-    data = await item_repo.query(keyword=keyword, page=1, limit=10000)
-    items = data.get("items", [])
-    prices = []
-    for item in items:
-        price_str = item.get("商品信息", {}).get("当前售价", "")
-        price = float(str(price_str).replace("¥", "").replace(",", "").strip() or "0")
-        if price > 0:
-            prices.append(price)
-    if not prices:
+    histogram = await item_repo.get_price_histogram([keyword])
+    if not histogram["total"]:
         return {"bins": [], "reference_lines": {}}
-    min_p, max_p = min(prices), max(prices)
-    bin_count = min(20, max(5, len(prices) // 3))
-    bin_width = (max_p - min_p) / bin_count if bin_count > 0 else 1
-    bins = []
-    for i in range(bin_count):
-        low = round(min_p + i * bin_width, 0)
-        high = round(min_p + (i + 1) * bin_width, 0)
-        count = sum(1 for p in prices if low <= p < high) if i < bin_count - 1 else sum(1 for p in prices if low <= p <= high)
-        bins.append({"range_low": low, "range_high": high, "count": count, "label": f"¥{int(low)}-{int(high)}"})
+    bins = histogram["bins"]
     reference_lines = {}
     if entry:
         reference_lines["market_price"] = entry.get("market_price")
@@ -275,79 +239,16 @@ async def get_market_trend(
     keyword: str = Query(...),
     days: int = Query(30, ge=7, le=90),
 ):
-    """指定品类最近N天的价格走势"""
-    from src.infrastructure.persistence.sqlite_manager import get_db as get_raw_db
-    since = (_datetime.now() - _timedelta(days=days)).isoformat()
-    db = await get_raw_db()
-    try:
-        cursor = await db.execute(
-            "SELECT date(crawl_time) as day, price FROM items WHERE keyword = ? AND crawl_time >= ? AND price > 0 ORDER BY day",
-            (keyword, since),
-        )
-        rows = await cursor.fetchall()
-    finally:
-        await db.close()
-    daily = _defaultdict(list)
-    for row in rows:
-        r = dict(row)
-        daily[r["day"]].append(r["price"])
-    trend = []
-    for day in sorted(daily.keys()):
-        prices = daily[day]
-        trend.append({
-            "date": day,
-            "avg_price": round(_statistics.mean(prices), 2),
-            "median_price": round(_statistics.median(prices), 2),
-            "min_price": round(min(prices), 2),
-            "max_price": round(max(prices), 2),
-            "count": len(prices),
-        })
+    """指定品类最近N天的价格走势（读 price_daily_rollup，每天一行）"""
+    trend = await rollup_repo.get_daily([keyword], since=since_day(days))
     return {"keyword": keyword, "days": days, "trend": trend}
 
 
 @router.get("/competitor-analysis")
-async def get_competitor_analysis(keyword: str = Query(...)):
-    """指定品类的卖家定价分布"""
-    data = await item_repo.query(keyword=keyword, page=1, limit=10000)
-    items = data.get("items", [])
-    seller_map = {}
-    price_distribution = []
-    for item in items:
-        info = item.get("商品信息", {})
-        seller = item.get("卖家信息", {})
-        seller_name = seller.get("卖家昵称") or info.get("卖家昵称") or "未知卖家"
-        price_str = info.get("当前售价", "")
-        price = float(str(price_str).replace("¥", "").replace(",", "").strip() or "0")
-        if price <= 0:
-            continue
-        price_distribution.append(price)
-        if seller_name not in seller_map:
-            seller_map[seller_name] = []
-        seller_map[seller_name].append({
-            "title": info.get("商品标题", ""),
-            "price": price,
-            "item_link": info.get("商品链接", ""),
-            "crawl_time": item.get("爬取时间", ""),
-        })
-    sellers = []
-    for name, items_list in sorted(seller_map.items(), key=lambda x: len(x[1]), reverse=True):
-        prices = [x["price"] for x in items_list]
-        sellers.append({
-            "seller_name": name,
-            "item_count": len(items_list),
-            "avg_price": round(sum(prices) / len(prices), 2),
-            "min_price": min(prices),
-            "max_price": max(prices),
-            "items": items_list[:5],
-        })
-    return {
-        "keyword": keyword,
-        "total_sellers": len(sellers),
-        "total_items": len(price_distribution),
-        "sellers": sellers,
-        "price_stats": {
-            "avg": round(sum(price_distribution) / len(price_distribution), 2) if price_distribution else 0,
-            "min": min(price_distribution) if price_distribution else 0,
-            "max": max(price_distribution) if price_distribution else 0,
-        },
-    }
+async def get_competitor_analysis(
+    keyword: str = Query(...),
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=500, description="每页卖家数"),
+):
+    """指定品类的卖家定价分布（按卖家分组统计，卖家按商品数倒序分页）"""
+    return await item_repo.get_competitor_analysis(keyword, page=page, limit=limit)
@@ -2,6 +2,7 @@
 新架构的主应用入口
 整合所有路由和服务
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -13,7 +14,10 @@ from src.api.routes import price_book, purchases, inventory, profit, team, premi
 from src.api.routes import bargain, seller_credit, cross_platform, categories
 from src.api.routes.product_match import router as product_match_router
 from src.api.dependencies import set_process_service, set_scheduler_service
-from src.infrastructure.persistence.sqlite_manager import init_db
+from src.infrastructure.persistence.sqlite_manager import init_db, close_pools, run_checkpoint_periodically
+from src.infrastructure.persistence.item_archive import run_archive_periodically
+from src.infrastructure.persistence.item_compaction import run_compaction_periodically
+from src.infrastructure.persistence.item_evaluation import run_reevaluation_periodically
 from src.services.task_service import TaskService
 from src.services.process_service import ProcessService
 from src.services.scheduler_service import SchedulerService
@@ -64,6 +68,14 @@ async def lifespan(app: FastAPI):
     await scheduler_service.reload_jobs(tasks_list)
     scheduler_service.start()
 
+    # 冷热分层：定期把旧快照归档到 data/archive/；定期合并状态未变的连续快照
+    archive_task = asyncio.create_task(run_archive_periodically())
+    compaction_task = asyncio.create_task(run_compaction_periodically())
+    # 价格本变更后的评估字段重算（处理上次退出时遗留的队列，并兜底轮询）
+    reevaluation_task = asyncio.create_task(run_reevaluation_periodically())
+    # WAL 检查点：定期写回主库，WAL 文件过大时截断
+    checkpoint_task = asyncio.create_task(run_checkpoint_periodically())
+
     print("应用启动完成")
 
     yield
@@ -71,7 +83,13 @@ async def lifespan(app: FastAPI):
     # 关闭时
     print("正在关闭应用...")
     scheduler_service.stop()
+    background_tasks = (archive_task, compaction_task, reevaluation_task, checkpoint_task)
+    for task in background_tasks:
+        task.cancel()
+    # 等后台任务真正退出（回滚进行中的写事务）后再关闭连接池
+    await asyncio.gather(*background_tasks, return_exceptions=True)
     await process_service.stop_all()
+    await close_pools()
     print("应用已关闭")
 
 
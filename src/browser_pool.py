@@ -0,0 +1,181 @@
+"""
+浏览器池 —— 常驻 Playwright + 预热的 Chromium 实例，供爬虫守护进程复用
+
+- 按启动参数（代理 / channel / headless 等）分组复用浏览器，每次运行只新建一个隔离的 BrowserContext
+- 同时借出的浏览器数不超过 size；需要新的启动参数而池已满时，关闭最久未用的空闲浏览器
+- 浏览器运行 max_runs 次、断开连接、或浏览器进程树总内存超过 max_rss_mb 时回收重启
+- 归还时关闭该浏览器上残留的全部 context，下一次运行拿到的是干净的浏览器
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import psutil
+from playwright.async_api import Browser, Playwright, async_playwright
+
+from src.infrastructure.config.settings import scraper_settings
+
+# 浏览器进程名关键字（chromium / chrome / msedge / headless_shell）
+_BROWSER_PROCESS_NAMES = ("chrom", "msedge", "headless_shell")
+
+
+class _PooledBrowser:
+    def __init__(self, key: str, browser: Browser):
+        self.key = key
+        self.browser = browser
+        self.runs = 0
+        self.last_used = time.monotonic()
+
+
+def browser_rss_mb() -> float:
+    """本进程启动的全部浏览器进程的常驻内存之和（MB）"""
+    total = 0
+    try:
+        children = psutil.Process().children(recursive=True)
+    except psutil.Error:
+        return 0.0
+    for proc in children:
+        try:
+            if any(name in proc.name().lower() for name in _BROWSER_PROCESS_NAMES):
+                total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """Chromium 浏览器池（绑定到创建它的事件循环）"""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_runs: Optional[int] = None,
+        max_rss_mb: Optional[float] = None,
+    ):
+        cfg = scraper_settings
+        self.size = max(1, size or cfg.browser_pool_size)
+        self.max_runs = max(1, max_runs or cfg.browser_max_runs)
+        self.max_rss_mb = max_rss_mb if max_rss_mb is not None else cfg.browser_max_rss_mb
+        self._playwright: Optional[Playwright] = None
+        self._start_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle: List[_PooledBrowser] = []
+        self._in_use = 0
+        self._closed = False
+        self.stats: Dict[str, int] = {"launched": 0, "reused": 0, "recycled": 0, "evicted": 0}
+
+    async def _ensure_playwright(self) -> Playwright:
+        async with self._start_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            return self._playwright
+
+    async def _launch(self, key: str, launch_kwargs: dict) -> _PooledBrowser:
+        playwright = await self._ensure_playwright()
+        browser = await playwright.chromium.launch(**launch_kwargs)
+        self.stats["launched"] += 1
+        return _PooledBrowser(key, browser)
+
+    def _take_idle(self, key: str) -> Optional[_PooledBrowser]:
+        for pooled in reversed(self._idle):
+            if pooled.key == key:
+                self._idle.remove(pooled)
+                if pooled.browser.is_connected():
+                    return pooled
+        return None
+
+    async def _retire(self, pooled: _PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            print(f"[BrowserPool] 关闭浏览器失败: {e}")
+
+    def _should_recycle(self, pooled: _PooledBrowser) -> bool:
+        if self._closed or not pooled.browser.is_connected() or pooled.runs >= self.max_runs:
+            return True
+        return self.max_rss_mb > 0 and browser_rss_mb() > self.max_rss_mb
+
+    @asynccontextmanager
+    async def browser(self, launch_kwargs: dict) -> AsyncIterator[Browser]:
+        """借出一个按 launch_kwargs 启动的浏览器；调用方在其上新建并关闭自己的 context"""
+        if self._closed:
+            raise RuntimeError("BrowserPool 已关闭")
+        key = json.dumps(launch_kwargs, sort_keys=True, default=str)
+        async with self._slots:
+            pooled = self._take_idle(key)
+            if pooled is not None:
+                self.stats["reused"] += 1
+            else:
+                # 池满时腾出最久未用的空闲浏览器（借出中的浏览器数 < size，必然有空闲的）
+                while self._idle and self._in_use + len(self._idle) >= self.size:
+                    oldest = min(self._idle, key=lambda p: p.last_used)
+                    self._idle.remove(oldest)
+                    self.stats["evicted"] += 1
+                    await self._retire(oldest)
+                pooled = await self._launch(key, launch_kwargs)
+
+            self._in_use += 1
+            try:
+                yield pooled.browser
+            finally:
+                self._in_use -= 1
+                pooled.runs += 1
+                pooled.last_used = time.monotonic()
+                # shield: 运行被取消时仍要把浏览器收拾干净再归还
+                await asyncio.shield(self._release(pooled))
+
+    async def _release(self, pooled: _PooledBrowser) -> None:
+        for context in list(pooled.browser.contexts):
+            try:
+                await context.close()
+            except Exception:
+                pass
+        if self._should_recycle(pooled):
+            self.stats["recycled"] += 1
+            await self._retire(pooled)
+        else:
+            self._idle.append(pooled)
+        # close() 时仍有借出的浏览器：最后一个归还后再停止 Playwright
+        await self._stop_playwright_if_unused()
+
+    async def _stop_playwright_if_unused(self) -> None:
+        if self._closed and self._in_use == 0 and self._playwright is not None:
+            playwright, self._playwright = self._playwright, None
+            await playwright.stop()
+
+    def snapshot(self) -> dict:
+        return {
+            "size": self.size,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "browser_rss_mb": round(browser_rss_mb(), 1),
+            **self.stats,
+        }
+
+    async def close(self) -> None:
+        """关闭全部空闲浏览器并停止 Playwright（借出中的浏览器归还时随之关闭）"""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._retire(pooled)
+        await self._stop_playwright_if_unused()
+
+
+@asynccontextmanager
+async def open_browser(launch_kwargs: dict, browser_pool: Optional[BrowserPool] = None) -> AsyncIterator[Browser]:
+    """
+    传入 browser_pool（守护进程模式）时从池中借出预热的浏览器，用完归还；
+    否则为本次运行单独启动 Playwright 与浏览器，结束时关闭。
+    """
+    if browser_pool is not None:
+        async with browser_pool.browser(launch_kwargs) as browser:
+            yield browser
+        return
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(**launch_kwargs)
+        try:
+            yield browser
+        finally:
+            await browser.close()
@@ -44,6 +44,7 @@ class Task(BaseModel):
     monitor_mode: str = "cron"  # cron | high_frequency
     monitor_interval: int = 60  # 高频模式下的轮询间隔（秒），最低30秒
     instant_notify: bool = False  # 新品秒推：发现新商品先推通知，再补AI分析
+    load_all_resources: bool = False  # 调试用：不拦截图片 / 字体等页面资源
 
     class Config:
         use_enum_values = True
@@ -83,6 +84,7 @@ class TaskCreate(BaseModel):
     monitor_mode: str = "cron"
     monitor_interval: int = 60
     instant_notify: bool = False
+    load_all_resources: bool = False
 
     @validator('min_price', 'max_price', pre=True)
     def convert_price_to_str(cls, v):
@@ -115,6 +117,7 @@ class TaskUpdate(BaseModel):
     monitor_mode: Optional[str] = None
     monitor_interval: Optional[int] = None
     instant_notify: Optional[bool] = None
+    load_all_resources: Optional[bool] = None
     
     @validator('min_price', 'max_price', pre=True)
     def convert_price_to_str(cls, v):
@@ -87,6 +87,59 @@ class ScraperSettings(_EnvSettings):
     login_is_edge: bool = _env_field(False, "LOGIN_IS_EDGE")
     running_in_docker: bool = _env_field(False, "RUNNING_IN_DOCKER")
     state_file: str = _env_field("xianyu_state.json", "STATE_FILE")
+    # 爬虫守护进程：调度器通过本地 socket 把任务交给常驻进程执行（未启动时退回子进程模式）
+    worker_enabled: bool = _env_field(False, "SCRAPER_WORKER_ENABLED")
+    worker_socket: str = _env_field("data/scraper_worker.sock", "SCRAPER_WORKER_SOCKET")
+    # 停止运行时等待其收尾的最长秒数（超时则放弃等待，不阻塞 stop 请求与守护进程退出）
+    worker_stop_timeout_seconds: float = _env_field(30.0, "SCRAPER_WORKER_STOP_TIMEOUT_SECONDS")
+    # 浏览器池：预热浏览器数 / 单个浏览器运行 N 次后重启 / 浏览器进程总内存超过该值（MB，0 不限）时重启
+    browser_pool_size: int = _env_field(2, "SCRAPER_BROWSER_POOL_SIZE")
+    browser_max_runs: int = _env_field(20, "SCRAPER_BROWSER_MAX_RUNS")
+    browser_max_rss_mb: float = _env_field(1500.0, "SCRAPER_BROWSER_MAX_RSS_MB")
+    # 详情页之后的逐商品处理流水线：阶段间队列长度 / 图片下载、AI 分析、落库通知各阶段并发数
+    pipeline_queue_size: int = _env_field(4, "SCRAPER_PIPELINE_QUEUE_SIZE")
+    image_concurrency: int = _env_field(2, "SCRAPER_IMAGE_CONCURRENCY")
+    ai_concurrency: int = _env_field(2, "SCRAPER_AI_CONCURRENCY")
+    persist_concurrency: int = _env_field(1, "SCRAPER_PERSIST_CONCURRENCY")
+    # 卖家档案缓存：TTL 内同一卖家不重复打开主页采集
+    seller_profile_ttl_hours: float = _env_field(24.0, "SELLER_PROFILE_TTL_HOURS")
+    seller_profile_cache_size: int = _env_field(512, "SELLER_PROFILE_CACHE_SIZE")
+    # 过期卖家增量刷新：商品 / 评价列表只翻到上次已采集的条目为止
+    seller_profile_incremental: bool = _env_field(True, "SELLER_PROFILE_INCREMENTAL")
+    # 距上次完整采集超过 N 个 TTL 时强制完整采集一次，校正已知商品的在售 / 已售状态（0 表示不强制）
+    seller_profile_full_refresh_ttls: int = _env_field(7, "SELLER_PROFILE_FULL_REFRESH_TTLS")
+    # 网络资源策略：按页面类型拦截的资源类型（"页面类型:类型,类型;..."，* 为全部页面）与 URL 通配符（逗号分隔）
+    resource_policy_enabled: bool = _env_field(True, "SCRAPER_RESOURCE_POLICY_ENABLED")
+    resource_block_types: str = _env_field("*:image,media,font;detail:stylesheet", "SCRAPER_RESOURCE_BLOCK_TYPES")
+    resource_block_urls: str = _env_field("*mmstat.com*,*/alilog/*,*arms-retcode*", "SCRAPER_RESOURCE_BLOCK_URLS")
+
+
+class DatabaseSettings(_EnvSettings):
+    """SQLite 连接池与 PRAGMA 配置"""
+    read_pool_size: int = _env_field(4, "SQLITE_READ_POOL_SIZE")
+    busy_timeout_ms: int = _env_field(5000, "SQLITE_BUSY_TIMEOUT_MS")
+    mmap_size: int = _env_field(256 * 1024 * 1024, "SQLITE_MMAP_SIZE")
+    cache_size_kb: int = _env_field(16 * 1024, "SQLITE_CACHE_SIZE_KB")
+    ingest_chunk_size: int = _env_field(500, "SQLITE_INGEST_CHUNK_SIZE")
+    write_buffer_size: int = _env_field(50, "SQLITE_WRITE_BUFFER_SIZE")
+    write_buffer_flush_seconds: float = _env_field(5.0, "SQLITE_WRITE_BUFFER_FLUSH_SECONDS")
+    # 入库队列：同一进程内排队的写缓冲批次合并进一个事务，单个事务最多合并的记录数
+    ingest_group_max_records: int = _env_field(2000, "SQLITE_INGEST_GROUP_MAX_RECORDS")
+    # WAL：写连接自动检查点页数；后台检查点间隔（0 表示不启动）；WAL 文件超过该大小时截断
+    wal_autocheckpoint_pages: int = _env_field(1000, "SQLITE_WAL_AUTOCHECKPOINT_PAGES")
+    wal_checkpoint_interval_seconds: float = _env_field(60.0, "SQLITE_WAL_CHECKPOINT_INTERVAL_SECONDS")
+    wal_size_limit_mb: int = _env_field(64, "SQLITE_WAL_SIZE_LIMIT_MB")
+    # 冷热分层：超过 N 天的快照按月归档到 data/archive/（0 表示不归档）
+    archive_after_days: int = _env_field(90, "ITEM_ARCHIVE_AFTER_DAYS")
+    archive_interval_hours: float = _env_field(24.0, "ITEM_ARCHIVE_INTERVAL_HOURS")
+    # 归档每批搬移的行数：每批一个短事务，期间其它写入只需等这一批
+    archive_batch_size: int = _env_field(2000, "ITEM_ARCHIVE_BATCH_SIZE")
+    # 快照合并：状态未变的连续快照只保留一行（高频任务写入时总是合并）
+    compact_on_ingest: bool = _env_field(False, "ITEM_COMPACT_ON_INGEST")
+    compact_interval_hours: float = _env_field(6.0, "ITEM_COMPACT_INTERVAL_HOURS")
+    # 价格本变更后的后台重评估：每个写事务更新的快照行数 / 兜底轮询间隔（0 表示只在变更时触发）
+    reevaluate_chunk_size: int = _env_field(2000, "PRICE_BOOK_REEVALUATE_CHUNK_SIZE")
+    reevaluate_interval_seconds: float = _env_field(60.0, "PRICE_BOOK_REEVALUATE_INTERVAL_SECONDS")
 
 
 class AppSettings(_EnvSettings):
@@ -119,7 +172,7 @@ def get_settings() -> AppSettings:
 
 def reload_settings() -> None:
     """重新加载全局配置实例"""
-    global _settings_instance, settings, ai_settings, notification_settings, scraper_settings
+    global _settings_instance, settings, ai_settings, notification_settings, scraper_settings, database_settings
     from dotenv import load_dotenv
     from src.infrastructure.config.env_manager import env_manager
 
@@ -129,6 +182,7 @@ def reload_settings() -> None:
     ai_settings = AISettings()
     notification_settings = NotificationSettings()
     scraper_settings = ScraperSettings()
+    database_settings = DatabaseSettings()
 
 
 # 导出便捷访问的配置实例
@@ -136,3 +190,4 @@ settings = get_settings()
 ai_settings = AISettings()
 notification_settings = NotificationSettings()
 scraper_settings = ScraperSettings()
+database_settings = DatabaseSettings()
@@ -0,0 +1,332 @@
+"""
+商品快照冷热分层 —— 超过保留期的 items 行按月归档到独立的 SQLite 文件
+
+- 热库只保留最近 N 天（ITEM_ARCHIVE_AFTER_DAYS，默认 90）看到过的快照
+  （按 last_seen：合并后仍在持续出现的快照不会被归档），
+  items 表、索引与页缓存停留在工作集大小
+- 更早的快照连同其引用的原始 JSON blob 整月搬进 <数据目录>/archive/items_YYYY_MM.db，
+  已归档月份记在热库 item_archives 表
+- 价格趋势 / 行情统计读 price_daily_rollup，单品价格历史读 item_price_events，都不随归档删除；
+  汇总重建、结果导出、商品详情（iter_archive_rows）与按关键词删除会逐个打开归档文件
+- 结果列表、跨平台混排与全文检索只查热库，不含已归档的快照
+- 手动归档:
+  python -m src.infrastructure.persistence.item_archive [--days N]
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+
+import aiosqlite
+
+from src.infrastructure.config.settings import database_settings
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_blob_store import BLOB_FIELDS, PRUNE_BLOBS_SQL
+from src.infrastructure.persistence.sqlite_manager import exclusive_write, read_db, write_db
+
+ARCHIVE_DIR_NAME = "archive"
+_FETCH_CHUNK = 5000
+
+_ARCHIVE_INDEXES = (
+    ("idx_items_item_time", "item_id, crawl_time"),
+    ("idx_items_keyword_crawl_time", "keyword, crawl_time"),
+)
+
+
+def archive_dir() -> str:
+    return os.path.join(os.path.dirname(sqlite_manager.DB_PATH) or ".", ARCHIVE_DIR_NAME)
+
+
+def archive_file_name(month: str) -> str:
+    return f"items_{month.replace('-', '_')}.db"
+
+
+def _next_month(month: str) -> str:
+    year, mon = (int(p) for p in month.split("-"))
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def _is_month(value: Optional[str]) -> bool:
+    return bool(value) and len(value) == 7 and value[4] == "-" and (value[:4] + value[5:]).isdigit()
+
+
+async def _connect(path: str) -> aiosqlite.Connection:
+    """独立连接（不经过连接池）：ATTACH / DETACH 会改变连接状态，不能用池内连接"""
+    db = await aiosqlite.connect(path, isolation_level=None)
+    db.row_factory = aiosqlite.Row
+    await db.execute(f"PRAGMA busy_timeout = {int(database_settings.busy_timeout_ms)}")
+    return db
+
+
+async def list_archives(since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+    """
+    已归档月份（按月份升序）：[{month, path, row_count}]。
+    since / until（YYYY-MM-DD）给出时只返回可能包含 [since, until) 内数据的月份；文件缺失的月份跳过。
+    """
+    sql = "SELECT month, file_name, row_count FROM item_archives"
+    conditions, params = [], []
+    if since:
+        conditions.append("month >= ?")
+        params.append(since[:7])
+    if until:
+        conditions.append("month <= ?")
+        params.append(until[:7])
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    async with read_db() as db:
+        cursor = await db.execute(sql + " ORDER BY month", params)
+        rows = [dict(r) for r in await cursor.fetchall()]
+
+    archives = []
+    for row in rows:
+        path = os.path.join(archive_dir(), row["file_name"])
+        if not os.path.exists(path):
+            print(f"[ItemArchive] 归档文件缺失，已跳过: {path}")
+            continue
+        archives.append({"month": row["month"], "path": path, "row_count": row["row_count"]})
+    return archives
+
+
+async def _ensure_archive_schema(db: aiosqlite.Connection, schema: str, columns: List[tuple]) -> None:
+    """在已 ATTACH 的归档库中建表；热库 items 新增的列同步补到归档表"""
+    cursor = await db.execute(f"PRAGMA {schema}.table_info(items)")
+    existing = {r["name"] for r in await cursor.fetchall()}
+    if not existing:
+        ddl = ", ".join(
+            "id INTEGER PRIMARY KEY" if name == "id" else f"{name} {col_type}".strip()
+            for name, col_type in columns
+        )
+        await db.execute(f"CREATE TABLE {schema}.items ({ddl})")
+    else:
+        for name, col_type in columns:
+            if name not in existing:
+                await db.execute(f"ALTER TABLE {schema}.items ADD COLUMN {name} {col_type}".strip())
+    for index, index_columns in _ARCHIVE_INDEXES:
+        await db.execute(f"CREATE INDEX IF NOT EXISTS {schema}.{index} ON items({index_columns})")
+    await db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.item_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            data BLOB NOT NULL,
+            raw_size INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+
+
+async def _archive_month(
+    db: aiosqlite.Connection, month: str, cutoff: str, columns: List[tuple]
+) -> int:
+    """
+    把某月最后一次出现早于 cutoff 的快照搬进该月归档文件，返回搬移行数。
+    按 id 分批（ITEM_ARCHIVE_BATCH_SIZE）搬移，每批持有连接池写锁、一个短事务，
+    入库写者与写缓冲只需等待一批而不会因 busy_timeout 失败。
+    """
+    file_name = archive_file_name(month)
+    where = "crawl_time >= ? AND crawl_time < ? AND COALESCE(last_seen, crawl_time) < ?"
+    params = (month, min(cutoff, _next_month(month)), cutoff)
+    batch_size = max(1, database_settings.archive_batch_size)
+
+    await db.execute("ATTACH DATABASE ? AS arch", (os.path.join(archive_dir(), file_name),))
+    try:
+        await _ensure_archive_schema(db, "arch", columns)
+        moved, last_id = 0, 0
+        while True:
+            cursor = await db.execute(
+                f"SELECT id FROM main.items WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+                params + (last_id, batch_size),
+            )
+            ids = [r[0] for r in await cursor.fetchall()]
+            if not ids:
+                break
+            moved += await _move_batch(
+                db, month, file_name, f"{where} AND id BETWEEN ? AND ?", params + (ids[0], ids[-1]), columns
+            )
+            last_id = ids[-1]
+    finally:
+        # DETACH 必须在事务之外执行
+        await db.execute("DETACH DATABASE arch")
+    return moved
+
+
+async def _move_batch(
+    db: aiosqlite.Connection, month: str, file_name: str, where: str, params: tuple, columns: List[tuple]
+) -> int:
+    column_list = ", ".join(name for name, _ in columns)
+    refs = " UNION ".join(
+        f"SELECT {ref} FROM main.items WHERE {where} AND {ref} IS NOT NULL" for _, ref in BLOB_FIELDS
+    )
+    async with exclusive_write():
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await db.execute(
+                f"""
+                INSERT OR IGNORE INTO arch.item_blobs (hash, codec, data, raw_size)
+                SELECT hash, codec, data, raw_size FROM main.item_blobs WHERE hash IN ({refs})
+                """,
+                params * len(BLOB_FIELDS),
+            )
+            # 按 id 去重：WAL 模式下跨库提交不保证原子，中断后重跑不会产生重复行
+            await db.execute(
+                f"""
+                INSERT OR IGNORE INTO arch.items ({column_list})
+                SELECT {column_list} FROM main.items WHERE {where}
+                """,
+                params,
+            )
+            # 删除触发 item_counts / items_latest 的同步维护；price_daily_rollup 保留
+            cursor = await db.execute(f"DELETE FROM main.items WHERE {where}", params)
+            moved = cursor.rowcount
+            await db.execute(
+                """
+                INSERT INTO main.item_archives (month, file_name, row_count, archived_at)
+                VALUES (?, ?, ?, datetime('now'))
+                ON CONFLICT(month) DO UPDATE SET
+                    row_count = row_count + excluded.row_count,
+                    archived_at = excluded.archived_at
+                """,
+                (month, file_name, moved),
+            )
+            await db.execute("COMMIT")
+        except BaseException:
+            await db.execute("ROLLBACK")
+            raise
+    return moved
+
+
+async def archive_old_items(days: Optional[int] = None) -> Dict[str, int]:
+    """
+    把最后一次出现早于 days 天前的快照按 crawl_time 月份归档，返回 {月份: 搬移行数}。
+    每月按批搬移、每批一个事务；days 缺省取 ITEM_ARCHIVE_AFTER_DAYS，≤ 0 时不归档。
+    """
+    days = database_settings.archive_after_days if days is None else days
+    if days <= 0:
+        return {}
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+
+    os.makedirs(archive_dir(), exist_ok=True)
+    db = await _connect(sqlite_manager.DB_PATH)
+    try:
+        cursor = await db.execute("PRAGMA table_info(items)")
+        columns = [(r["name"], r["type"]) for r in await cursor.fetchall()]
+        cursor = await db.execute(
+            """
+            SELECT DISTINCT substr(crawl_time, 1, 7) FROM items
+            WHERE crawl_time < ? AND COALESCE(last_seen, crawl_time) < ?
+            """,
+            (cutoff, cutoff),
+        )
+        months = sorted(r[0] for r in await cursor.fetchall() if _is_month(r[0]))
+
+        moved: Dict[str, int] = {}
+        for month in months:
+            count = await _archive_month(db, month, cutoff, columns)
+            if count:
+                moved[month] = count
+        if moved:
+            async with write_db() as main_db:
+                await main_db.execute(PRUNE_BLOBS_SQL)
+        return moved
+    finally:
+        await db.close()
+
+
+async def iter_archive_rows(
+    sql: str,
+    params: Sequence = (),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    newest_first: bool = False,
+    as_dict: bool = False,
+    chunk_size: int = _FETCH_CHUNK,
+) -> AsyncIterator[list]:
+    """
+    逐个归档文件执行 SELECT（表名直接写 items），分块产出行（供汇总重建、导出等全量扫描使用）。
+    since / until 只用于挑选月份（见 list_archives），行过滤写在 sql 里；
+    newest_first 时从最近的月份开始，as_dict 时每行为 dict（否则为 tuple）。
+    """
+    archives = await list_archives(since, until)
+    if newest_first:
+        archives.reverse()
+    for archive in archives:
+        db = await _connect(archive["path"])
+        try:
+            cursor = await db.execute(sql, params)
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(r) if as_dict else tuple(r) for r in rows]
+        finally:
+            await db.close()
+
+
+async def delete_keyword_from_archives(keyword: str) -> int:
+    """删除归档文件中某关键词的快照（及不再引用的 blob），返回删除行数"""
+    total = 0
+    for archive in await list_archives():
+        db = await _connect(archive["path"])
+        try:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = await db.execute("DELETE FROM items WHERE keyword = ?", (keyword,))
+                deleted = cursor.rowcount
+                if deleted:
+                    await db.execute(PRUNE_BLOBS_SQL)
+                await db.execute("COMMIT")
+            except BaseException:
+                await db.execute("ROLLBACK")
+                raise
+        finally:
+            await db.close()
+        if deleted:
+            total += deleted
+            async with write_db() as main_db:
+                await main_db.execute(
+                    "UPDATE item_archives SET row_count = MAX(row_count - ?, 0) WHERE month = ?",
+                    (deleted, archive["month"]),
+                )
+    return total
+
+
+async def run_archive_periodically(interval_hours: Optional[float] = None) -> None:
+    """后台任务：按间隔执行归档（应用生命周期内运行，取消即停止）"""
+    interval = (
+        interval_hours if interval_hours is not None else database_settings.archive_interval_hours
+    )
+    if interval <= 0 or database_settings.archive_after_days <= 0:
+        return
+    while True:
+        try:
+            moved = await archive_old_items()
+            if moved:
+                print(f"[ItemArchive] 已归档: {moved}")
+        except Exception as e:
+            print(f"[ItemArchive] 归档失败: {e}")
+        await asyncio.sleep(interval * 3600)
+
+
+async def _main() -> None:
+    from src.infrastructure.persistence.sqlite_manager import close_pools, init_db
+
+    parser = argparse.ArgumentParser(description="把旧的商品快照按月归档到 archive/ 目录")
+    parser.add_argument(
+        "--days", type=int, default=None,
+        help=f"归档早于 N 天的快照（默认 {database_settings.archive_after_days}）",
+    )
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        moved = await archive_old_items(args.days)
+        for month, count in moved.items():
+            print(f"[ItemArchive] {month}: {count} 行 → {archive_file_name(month)}")
+        print(f"[ItemArchive] 完成，共归档 {sum(moved.values())} 行")
+    finally:
+        await close_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
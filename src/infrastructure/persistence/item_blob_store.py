@@ -0,0 +1,192 @@
+"""
+商品原始 JSON 的内容寻址存储 —— item_blobs 表
+
+- 商品 / 卖家 / AI 三块原始 JSON 以文本的 sha256 为键、zlib 压缩后只存一份，
+  同一商品反复抓取得到的相同内容天然去重
+- items 行只保存 item_blob / seller_blob / ai_blob 三个哈希引用，热查询扫描的页更小
+- 只有完整投影（row_to_record）才 JOIN 并解压；空对象 "{}" 不落表，引用为 NULL
+- 老库迁移 / 清理孤儿 blob:
+  python -m src.infrastructure.persistence.item_blob_store migrate [--vacuum]
+  python -m src.infrastructure.persistence.item_blob_store prune
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+CODEC_ZLIB = "zlib"
+_ZLIB_LEVEL = 6
+_MIGRATE_CHUNK = 500
+
+# (items 内联列, items 引用列)
+BLOB_FIELDS = (
+    ("raw_item_info", "item_blob"),
+    ("raw_seller_info", "seller_blob"),
+    ("raw_ai_analysis", "ai_blob"),
+)
+
+# 完整投影：items 全部列 + 三块 blob 的编码与数据（列名 <引用列>_codec / <引用列>_data）
+FULL_COLUMNS = "items.*, " + ", ".join(
+    f"{alias}.codec AS {ref}_codec, {alias}.data AS {ref}_data"
+    for alias, (_, ref) in zip(("bi", "bs", "ba"), BLOB_FIELDS)
+)
+FULL_JOINS = " ".join(
+    f"LEFT JOIN item_blobs {alias} ON {alias}.hash = items.{ref}"
+    for alias, (_, ref) in zip(("bi", "bs", "ba"), BLOB_FIELDS)
+)
+
+INSERT_BLOB_SQL = (
+    "INSERT OR IGNORE INTO item_blobs (hash, codec, data, raw_size) VALUES (?, ?, ?, ?)"
+)
+
+
+def blob_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_blob(text: str) -> Tuple[str, bytes]:
+    return CODEC_ZLIB, zlib.compress(text.encode("utf-8"), _ZLIB_LEVEL)
+
+
+def decode_blob(codec: Optional[str], data: bytes) -> str:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"未知的 blob 编码: {codec}")
+
+
+def load_raw_json(row: dict, column: str) -> dict:
+    """
+    读取一行中某块原始 JSON：优先使用 JOIN 出的 blob 数据，
+    兼容尚未迁移的老行（内联在 raw_* 列）。column 为 raw_* 列名。
+    """
+    ref = dict(BLOB_FIELDS)[column]
+    data = row.get(f"{ref}_data")
+    if data is not None:
+        return json.loads(decode_blob(row.get(f"{ref}_codec"), data))
+    return json.loads(row.get(column) or "{}")
+
+
+def externalize_rows(rows: List[dict]) -> List[tuple]:
+    """
+    把 items 行中的原始 JSON 换成哈希引用（原地修改），
+    返回需要写入 item_blobs 的 (hash, codec, data, raw_size) 列表（批内已去重）。
+    """
+    blobs: Dict[str, tuple] = {}
+    for row in rows:
+        for column, ref in BLOB_FIELDS:
+            text = row.get(column)
+            row[column] = None
+            if not text or text == "{}":
+                row[ref] = None
+                continue
+            key = blob_key(text)
+            row[ref] = key
+            if key not in blobs:
+                codec, data = encode_blob(text)
+                blobs[key] = (key, codec, data, len(text.encode("utf-8")))
+    return list(blobs.values())
+
+
+def summary_fields(info: dict, seller: dict) -> Dict[str, Optional[str]]:
+    """列表投影所需的少量原始字段（与 json_extract 多路径的结果格式一致）"""
+    return {
+        "summary_extras": json.dumps(
+            [info.get("当前售价"), info.get("商品原价"), info.get("商品标签")],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ),
+        "seller_good_rate": seller.get("作为卖家的好评率"),
+    }
+
+
+# 删除不再被任何 items 行引用的 blob（热库与归档文件共用）
+PRUNE_BLOBS_SQL = "DELETE FROM item_blobs WHERE hash NOT IN ({})".format(
+    " UNION ".join(f"SELECT {ref} FROM items WHERE {ref} IS NOT NULL" for _, ref in BLOB_FIELDS)
+)
+
+
+async def prune_orphan_blobs() -> int:
+    """删除不再被任何 items 行引用的 blob，返回删除条数"""
+    async with write_db() as db:
+        cursor = await db.execute(PRUNE_BLOBS_SQL)
+        return cursor.rowcount
+
+
+async def migrate_legacy_rows(chunk_size: int = _MIGRATE_CHUNK) -> int:
+    """把老行内联的 raw_* JSON 搬进 item_blobs，返回迁移行数（每块一个事务，可中断后重跑）"""
+    migrated, last_id = 0, 0
+    while True:
+        async with write_db() as db:
+            cursor = await db.execute(
+                f"""
+                SELECT id, {", ".join(c for c, _ in BLOB_FIELDS)} FROM items
+                WHERE id > ? AND (raw_item_info IS NOT NULL OR raw_seller_info IS NOT NULL
+                                  OR raw_ai_analysis IS NOT NULL)
+                ORDER BY id LIMIT ?
+                """,
+                (last_id, chunk_size),
+            )
+            rows = [dict(r) for r in await cursor.fetchall()]
+            if not rows:
+                return migrated
+            last_id = rows[-1]["id"]
+            for row in rows:
+                row.update(summary_fields(
+                    json.loads(row["raw_item_info"] or "{}"),
+                    json.loads(row["raw_seller_info"] or "{}"),
+                ))
+            await db.executemany(INSERT_BLOB_SQL, externalize_rows(rows))
+            await db.executemany(
+                """
+                UPDATE items SET
+                    item_blob = :item_blob, seller_blob = :seller_blob, ai_blob = :ai_blob,
+                    summary_extras = :summary_extras, seller_good_rate = :seller_good_rate,
+                    raw_item_info = NULL, raw_seller_info = NULL, raw_ai_analysis = NULL
+                WHERE id = :id
+                """,
+                rows,
+            )
+            migrated += len(rows)
+
+
+async def blob_stats() -> dict:
+    async with read_db() as db:
+        cursor = await db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM item_blobs"
+        )
+        count, raw_bytes, stored_bytes = await cursor.fetchone()
+    return {"blobs": count, "raw_bytes": raw_bytes, "stored_bytes": stored_bytes}
+
+
+async def _main() -> None:
+    from src.infrastructure.persistence.sqlite_manager import close_pools, get_db, init_db
+
+    parser = argparse.ArgumentParser(description="item_blobs 维护")
+    parser.add_argument("command", choices=["migrate", "prune"])
+    parser.add_argument("--vacuum", action="store_true", help="完成后 VACUUM 回收空间")
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        if args.command == "migrate":
+            print(f"[ItemBlobStore] 已迁移 {await migrate_legacy_rows()} 行")
+        else:
+            print(f"[ItemBlobStore] 已删除 {await prune_orphan_blobs()} 个孤儿 blob")
+        print(f"[ItemBlobStore] {await blob_stats()}")
+    finally:
+        await close_pools()
+
+    if args.vacuum:
+        db = await get_db()
+        try:
+            await db.execute("VACUUM")
+        finally:
+            await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,258 @@
+"""
+商品快照合并 —— 状态未变化的连续快照只保留一行
+
+高频监控（monitor_mode=high_frequency，30 秒一轮）会把同一个没有变化的商品反复写入 items。
+同一 item_id 按 crawl_time 相邻、且价格 / 评估状态 / AI 推荐结论都相同的快照合并为一行：
+crawl_time 为该状态首次出现的时间，last_seen 为最后一次看到的时间。
+商品级的 first_seen / last_seen 见 items_latest，价格变化见 item_price_events。
+
+- 写入时合并：ItemRepository.insert_batch(compact=True)
+  （高频任务默认开启，其它任务由 ITEM_COMPACT_ON_INGEST 控制）
+- 存量合并 / 重建价格变动日志:
+  python -m src.infrastructure.persistence.item_compaction compact [--keyword KW]
+  python -m src.infrastructure.persistence.item_compaction rebuild-events
+"""
+import argparse
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import aiosqlite
+
+from src.infrastructure.config.settings import database_settings
+from src.infrastructure.persistence.item_archive import iter_archive_rows
+from src.infrastructure.persistence.item_blob_store import prune_orphan_blobs
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+# 判断"状态未变"的列：价格 / 价格本评估状态 / AI 推荐结论
+STATE_COLUMNS = ("price", "evaluation_status", "is_recommended")
+_IN_CHUNK = 500
+
+_EVENT_COLUMNS = "item_id, event_time, keyword, platform, task_name, title, price"
+# 每个 item_id 的首条快照与价格变化的快照
+_EVENT_CANDIDATES_SQL = """
+    SELECT item_id, crawl_time, keyword, COALESCE(platform, 'xianyu'), task_name, title, price
+    FROM (
+        SELECT item_id, crawl_time, keyword, platform, task_name, title, price,
+               LAG(id) OVER w AS prev_id, LAG(price) OVER w AS prev_price
+        FROM items
+        WINDOW w AS (PARTITION BY item_id ORDER BY crawl_time, id)
+    )
+    WHERE prev_id IS NULL OR prev_price IS NOT price
+"""
+
+
+def same_state(a: dict, b: dict) -> bool:
+    return all(a.get(c) == b.get(c) for c in STATE_COLUMNS)
+
+
+async def _latest_states(db: aiosqlite.Connection, item_ids: List[str]) -> Dict[str, dict]:
+    states: Dict[str, dict] = {}
+    for i in range(0, len(item_ids), _IN_CHUNK):
+        part = item_ids[i:i + _IN_CHUNK]
+        cursor = await db.execute(
+            f"""
+            SELECT item_id, snapshot_id, crawl_time, last_seen, {", ".join(STATE_COLUMNS)}
+            FROM items_latest WHERE item_id IN ({",".join("?" * len(part))})
+            """,
+            part,
+        )
+        for row in await cursor.fetchall():
+            states[row["item_id"]] = dict(row)
+    return states
+
+
+async def compact_incoming(db: aiosqlite.Connection, rows: List[dict]) -> Tuple[List[dict], int]:
+    """
+    写入时合并（在写事务内调用）：与该商品最新快照（或本批内前一条）状态相同的记录不再插入，
+    只把那一行的 last_seen 推后。返回 (仍需插入的行, 被合并的条数)。
+    已被现有快照覆盖的重复记录（crawl_time 不晚于 last_seen）直接丢弃，不计入合并。
+    """
+    states = await _latest_states(db, list({r["item_id"] for r in rows}))
+    inserts: List[dict] = []
+    touched: Dict[int, str] = {}
+    merged: List[dict] = []
+    for row in sorted(rows, key=lambda r: r["crawl_time"] or ""):
+        prev = states.get(row["item_id"])
+        crawl_time = row["crawl_time"] or ""
+        if prev is None or not same_state(prev, row) or crawl_time < (prev["crawl_time"] or ""):
+            inserts.append(row)
+            states[row["item_id"]] = row
+            continue
+        last_seen = prev.get("last_seen") or prev["crawl_time"] or ""
+        if crawl_time <= last_seen:
+            continue
+        prev["last_seen"] = crawl_time
+        if "snapshot_id" in prev:
+            touched[prev["snapshot_id"]] = crawl_time
+        merged.append(row)
+
+    if touched:
+        await db.executemany(
+            "UPDATE items SET last_seen = ? WHERE id = ? AND COALESCE(last_seen, crawl_time) < ?",
+            [(seen, snapshot_id, seen) for snapshot_id, seen in touched.items()],
+        )
+    # 被合并的观测仍计入价格日汇总，样本数与逐条写入时一致
+    await db.executemany(
+        """
+        INSERT INTO price_rollup_pending (keyword, platform, day, price)
+        SELECT ?, ?, DATE(?), ? WHERE ? > 0 AND DATE(?) IS NOT NULL
+        """,
+        [
+            (r["keyword"], r["platform"] or "xianyu", r["crawl_time"], r["price"],
+             r["price"], r["crawl_time"])
+            for r in merged
+        ],
+    )
+    return inserts, len(merged)
+
+
+async def _compact_keyword(keyword: str) -> int:
+    async with write_db() as db:
+        await db.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS compact_runs (
+                id INTEGER PRIMARY KEY,
+                is_head INTEGER NOT NULL,
+                run_last_seen TEXT
+            )
+            """
+        )
+        await db.execute("DELETE FROM temp.compact_runs")
+        # 相邻快照状态相同则归入同一段（run），每段保留最早一行，last_seen 取段内最晚
+        await db.execute(
+            """
+            INSERT INTO temp.compact_runs (id, is_head, run_last_seen)
+            SELECT id, is_head, MAX(seen) OVER (PARTITION BY item_id, run_no)
+            FROM (
+                SELECT *, SUM(is_head) OVER (PARTITION BY item_id ORDER BY crawl_time, id) AS run_no
+                FROM (
+                    SELECT id, item_id, crawl_time, COALESCE(last_seen, crawl_time) AS seen,
+                           CASE WHEN LAG(id) OVER w IS NOT NULL
+                                     AND LAG(price) OVER w IS price
+                                     AND LAG(evaluation_status) OVER w IS evaluation_status
+                                     AND LAG(is_recommended) OVER w IS is_recommended
+                                THEN 0 ELSE 1 END AS is_head
+                    FROM items WHERE keyword = ?
+                    WINDOW w AS (PARTITION BY item_id ORDER BY crawl_time, id)
+                )
+            )
+            """,
+            (keyword,),
+        )
+        # 先延长段首的 last_seen，再删段内其余行：items_latest 回退到段首时带上最新的 last_seen
+        await db.execute(
+            """
+            UPDATE items SET last_seen = r.run_last_seen
+            FROM temp.compact_runs AS r
+            WHERE items.id = r.id AND r.is_head = 1 AND items.last_seen IS NOT r.run_last_seen
+            """
+        )
+        cursor = await db.execute(
+            "DELETE FROM items WHERE id IN (SELECT id FROM temp.compact_runs WHERE is_head = 0)"
+        )
+        removed = cursor.rowcount
+        await db.execute("DELETE FROM temp.compact_runs")
+        return removed
+
+
+async def compact_snapshots(keyword: Optional[str] = None) -> Dict[str, int]:
+    """
+    存量合并：逐个关键词（每个一个事务）合并状态未变的连续快照，返回 {关键词: 删除行数}。
+    价格日汇总保持合并前的样本数；价格变动日志不受影响。
+    """
+    if keyword is not None:
+        keywords = [keyword]
+    else:
+        async with read_db() as db:
+            cursor = await db.execute("SELECT DISTINCT keyword FROM item_counts WHERE cnt > 0")
+            keywords = [r[0] for r in await cursor.fetchall()]
+
+    removed: Dict[str, int] = {}
+    for kw in keywords:
+        count = await _compact_keyword(kw)
+        if count:
+            removed[kw] = count
+    if removed:
+        await prune_orphan_blobs()
+    return removed
+
+
+async def rebuild_price_events() -> int:
+    """从 items 及归档文件全量重建价格变动日志，返回事件条数"""
+    async with write_db() as db:
+        await db.execute("DELETE FROM item_price_events")
+        await db.execute(
+            f"INSERT OR IGNORE INTO item_price_events ({_EVENT_COLUMNS}) {_EVENT_CANDIDATES_SQL}"
+        )
+        async for rows in iter_archive_rows(_EVENT_CANDIDATES_SQL):
+            await db.executemany(
+                f"INSERT OR IGNORE INTO item_price_events ({_EVENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        # 各文件分别计算，跨文件相邻的同价快照会多出候选：按时间顺序去掉价格未变的事件
+        await db.execute(
+            """
+            DELETE FROM item_price_events WHERE rowid IN (
+                SELECT rid FROM (
+                    SELECT rowid AS rid, price,
+                           LAG(item_id) OVER w AS prev_item, LAG(price) OVER w AS prev_price
+                    FROM item_price_events
+                    WINDOW w AS (PARTITION BY item_id ORDER BY event_time)
+                )
+                WHERE prev_item IS NOT NULL AND prev_price IS price
+            )
+            """
+        )
+        await db.execute(
+            """
+            UPDATE item_price_events SET prev_price = w.prev_price
+            FROM (
+                SELECT rowid AS rid,
+                       LAG(price) OVER (PARTITION BY item_id ORDER BY event_time) AS prev_price
+                FROM item_price_events
+            ) AS w
+            WHERE item_price_events.rowid = w.rid
+            """
+        )
+        cursor = await db.execute("SELECT COUNT(*) FROM item_price_events")
+        return (await cursor.fetchone())[0]
+
+
+async def run_compaction_periodically(interval_hours: Optional[float] = None) -> None:
+    """后台任务：按间隔执行存量合并（应用生命周期内运行，取消即停止）"""
+    interval = (
+        interval_hours if interval_hours is not None else database_settings.compact_interval_hours
+    )
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval * 3600)
+        try:
+            removed = await compact_snapshots()
+            if removed:
+                print(f"[ItemCompaction] 已合并: {removed}")
+        except Exception as e:
+            print(f"[ItemCompaction] 合并失败: {e}")
+
+
+async def _main() -> None:
+    from src.infrastructure.persistence.sqlite_manager import close_pools, init_db
+
+    parser = argparse.ArgumentParser(description="items 快照合并 / 价格变动日志重建")
+    parser.add_argument("command", choices=["compact", "rebuild-events"])
+    parser.add_argument("--keyword", help="只合并指定关键词（默认全部）")
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        if args.command == "compact":
+            removed = await compact_snapshots(args.keyword)
+            print(f"[ItemCompaction] 合并完成，共删除 {sum(removed.values())} 行: {removed}")
+        else:
+            print(f"[ItemCompaction] 重建完成: {await rebuild_price_events()} 条价格变动")
+    finally:
+        await close_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
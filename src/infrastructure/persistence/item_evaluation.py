@@ -0,0 +1,401 @@
+"""
+价格本评估字段落库 —— items 上的评估列（evaluation_status / 预估利润等）即权威结果
+
+- 写入时：ItemRepository.insert_batch 按当前价格本为新快照填好评估列
+- 价格本新增 / 修改 / 批量修改 / 删除时：price_book 上的触发器把涉及的关键词（修改前后）
+  写入 price_book_reevaluation_pending，后台任务按关键词分块在 SQL 中重算这些快照
+- 读接口（结果列表 / 捡漏雷达 / 溢价地图）直接按评估列筛选排序，不再逐条实时计算
+
+关键词 → 价格本条目与收购区间见视图 price_book_keywords；归档文件中的快照不重算。
+评估规则只有一份：evaluate_rows 批量计算（入库、PriceMatchingService、
+PriceBookService 的评估接口共用），_EVALUATE_SQL 是它在 SQL 中的等价写法。
+
+手动全量重算 / 评估微基准:
+  python -m src.infrastructure.persistence.item_evaluation [--keyword KW]
+  python -m src.infrastructure.persistence.item_evaluation --benchmark 100000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import aiosqlite
+
+from src.infrastructure.config.settings import database_settings
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+EVALUATION_COLUMNS = (
+    "category_id", "category_name", "evaluation_status",
+    "purchase_range_low", "purchase_range_high",
+    "estimated_profit", "estimated_profit_rate", "premium_rate",
+)
+_IN_CHUNK = 500
+
+# 与 evaluate_price 相同的规则，参数取自该关键词的 price_book_keywords 行；
+# 关键词未配置价格本时参数全为 NULL，评估列整组清空
+_OK = "(COALESCE(:target_sell_price, 0) > 0 AND COALESCE(price, 0) > 0)"
+_EVALUATE_SQL = f"""
+    UPDATE items SET
+        category_id = :entry_id,
+        category_name = :category_name,
+        evaluation_status = CASE
+            WHEN :entry_id IS NULL THEN NULL
+            WHEN NOT {_OK} THEN 'no_config'
+            WHEN price <= :purchase_ideal THEN 'great_deal'
+            WHEN price <= :purchase_upper THEN 'good_deal'
+            ELSE 'overpriced' END,
+        purchase_range_low = CASE WHEN {_OK} THEN :purchase_ideal END,
+        purchase_range_high = CASE WHEN {_OK} THEN :purchase_upper END,
+        estimated_profit = CASE WHEN {_OK}
+            THEN ROUND(:target_sell_price - (price + :total_fees), 2) END,
+        estimated_profit_rate = CASE WHEN {_OK}
+            THEN ROUND((:target_sell_price - (price + :total_fees)) / :target_sell_price, 4) END,
+        premium_rate = CASE WHEN {_OK} AND :market_price > 0
+            THEN ROUND((price - :market_price) / :market_price, 4) END
+    WHERE id IN ({{ids}})
+"""
+_CONFIG_KEYS = (
+    "entry_id", "category_name", "target_sell_price", "total_fees",
+    "purchase_ideal", "purchase_upper", "market_price",
+)
+
+_reevaluation_task: Optional[asyncio.Task] = None
+
+
+def config_from_entry(entry: dict) -> dict:
+    """PriceBookService 条目 → 评估参数（与 price_book_keywords 的一行同构）"""
+    return {
+        "entry_id": entry["id"],
+        "category_name": entry.get("category_name"),
+        "target_sell_price": entry.get("target_sell_price"),
+        "market_price": entry.get("market_price"),
+        "total_fees": entry.get("total_fees") or 0,
+        "purchase_ideal": entry.get("purchase_ideal"),
+        "purchase_upper": entry.get("purchase_upper"),
+    }
+
+
+def _compile(config: dict) -> tuple:
+    """配置 → 评估用的常量元组；没有目标售价时 target 为 None（只标记品类，状态为 no_config）"""
+    target = config.get("target_sell_price") or 0
+    market_price = config.get("market_price")
+    return (
+        config["entry_id"],
+        config.get("category_name"),
+        target if target > 0 else None,
+        config["total_fees"],
+        config["purchase_ideal"],
+        config["purchase_upper"],
+        market_price if market_price and market_price > 0 else None,
+    )
+
+
+def evaluate_rows(
+    rows: Sequence[dict],
+    prices: Sequence[Optional[float]],
+    config_keys: Sequence[Hashable],
+    configs: Dict[Hashable, dict],
+    rounded: bool = True,
+) -> None:
+    """
+    批量评估并就地写入：rows[i] 按 configs[config_keys[i]] 评估 prices[i]，评估列（EVALUATION_COLUMNS）
+    直接写进 rows[i]；键不在 configs 中（未配置价格本）的行保持不变。
+
+    每个配置只解析一次（目标售价 / 费用 / 收购区间 / 市场价），逐条只做比较、算术与写字段，
+    不构建中间列表；rounded=False 时利润、利润率、溢价率不取整（由调用方按各自接口的精度取整）。
+    """
+    compiled: Dict[Hashable, Optional[tuple]] = {}
+    for row, price, key in zip(rows, prices, config_keys):
+        try:
+            params = compiled[key]
+        except KeyError:
+            config = configs.get(key)
+            params = compiled[key] = _compile(config) if config is not None else None
+        if params is None:
+            continue
+        entry_id, name, target, fees, ideal, upper, market_price = params
+        row["category_id"] = entry_id
+        row["category_name"] = name
+        if target is None or not price or price <= 0:
+            row["evaluation_status"] = "no_config"
+            row["purchase_range_low"] = row["purchase_range_high"] = None
+            row["estimated_profit"] = row["estimated_profit_rate"] = row["premium_rate"] = None
+            continue
+        row["evaluation_status"] = (
+            "great_deal" if price <= ideal else "good_deal" if price <= upper else "overpriced"
+        )
+        row["purchase_range_low"] = ideal
+        row["purchase_range_high"] = upper
+        profit = target - (price + fees)
+        premium = None if market_price is None else (price - market_price) / market_price
+        if rounded:
+            row["estimated_profit"] = round(profit, 2)
+            row["estimated_profit_rate"] = round(profit / target, 4)
+            row["premium_rate"] = None if premium is None else round(premium, 4)
+        else:
+            row["estimated_profit"] = profit
+            row["estimated_profit_rate"] = profit / target
+            row["premium_rate"] = premium
+
+
+def evaluate_prices(
+    prices: Sequence[Optional[float]],
+    config_keys: Sequence[Hashable],
+    configs: Dict[Hashable, dict],
+    rounded: bool = True,
+) -> List[Optional[dict]]:
+    """evaluate_rows 的返回值形式：与 prices 一一对应的评估列字典，未配置价格本时为 None"""
+    rows: List[dict] = [{} for _ in prices]
+    evaluate_rows(rows, prices, config_keys, configs, rounded)
+    return [row or None for row in rows]
+
+
+def evaluate_price(config: Optional[dict], price: Optional[float]) -> Dict[str, object]:
+    """按 price_book_keywords 的一行评估单个价格，返回评估列（未配置价格本时全部为 None）"""
+    evaluation = evaluate_prices([price], [0], {0: config} if config else {})[0]
+    return evaluation if evaluation is not None else dict.fromkeys(EVALUATION_COLUMNS)
+
+
+async def keyword_configs(db: aiosqlite.Connection, keywords: List[str]) -> Dict[str, dict]:
+    """关键词 → price_book_keywords 行（未配置的关键词不在结果中）"""
+    configs: Dict[str, dict] = {}
+    for i in range(0, len(keywords), _IN_CHUNK):
+        part = keywords[i:i + _IN_CHUNK]
+        cursor = await db.execute(
+            f"SELECT * FROM price_book_keywords WHERE keyword IN ({','.join('?' * len(part))})",
+            part,
+        )
+        for row in await cursor.fetchall():
+            configs[row["keyword"]] = dict(row)
+    return configs
+
+
+async def evaluate_incoming(db: aiosqlite.Connection, rows: List[dict]) -> None:
+    """写入时评估（在写事务内调用）：已配置价格本的关键词按当前配置覆盖评估列"""
+    configs = await keyword_configs(db, list({r["keyword"] for r in rows}))
+    if not configs:
+        return
+    evaluate_rows(rows, [r.get("price") for r in rows], [r["keyword"] for r in rows], configs)
+
+
+async def reevaluate_keyword(keyword: str, chunk_size: Optional[int] = None) -> int:
+    """按当前价格本重算某关键词在热库中的全部快照，每块一个写事务；返回更新行数"""
+    chunk = chunk_size or database_settings.reevaluate_chunk_size
+    async with read_db() as db:
+        cursor = await db.execute("SELECT id FROM items WHERE keyword = ?", (keyword,))
+        ids = [r[0] for r in await cursor.fetchall()]
+    # 之后新写入的快照在写入时已按新配置评估
+    for i in range(0, len(ids), chunk):
+        part = ids[i:i + chunk]
+        async with write_db() as db:
+            # 配置在写事务内读取：并发的另一轮重算（或处理中途价格本又被修改）
+            # 不会用旧配置覆盖新结果
+            config = (await keyword_configs(db, [keyword])).get(keyword) or {}
+            params = {k: config.get(k) for k in _CONFIG_KEYS}
+            await db.execute(
+                _EVALUATE_SQL.format(ids=",".join(f":id{n}" for n in range(len(part)))),
+                {**params, **{f"id{n}": item_id for n, item_id in enumerate(part)}},
+            )
+    return len(ids)
+
+
+async def drain_reevaluation_queue() -> Dict[str, int]:
+    """处理待重评估队列直到为空，返回 {关键词: 更新行数}"""
+    done: Dict[str, int] = {}
+    while True:
+        async with read_db() as db:
+            cursor = await db.execute(
+                "SELECT id, keyword FROM price_book_reevaluation_pending ORDER BY id LIMIT 1"
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return done
+        queue_id, keyword = row["id"], row["keyword"]
+        done[keyword] = done.get(keyword, 0) + await reevaluate_keyword(keyword)
+        async with write_db() as db:
+            # 处理期间再次入队的关键词 id 已变，保留到下一轮
+            await db.execute("DELETE FROM price_book_reevaluation_pending WHERE id = ?", (queue_id,))
+
+
+def schedule_reevaluation() -> None:
+    """价格本变更后调用：在当前事件循环后台处理队列（已有任务在跑时由它继续处理）"""
+    global _reevaluation_task
+    loop = asyncio.get_running_loop()
+    task = _reevaluation_task
+    if task is not None and not task.done() and task.get_loop() is loop:
+        return
+    _reevaluation_task = loop.create_task(_drain_logged())
+
+
+async def _drain_logged() -> None:
+    try:
+        done = await drain_reevaluation_queue()
+        if done:
+            print(f"[ItemEvaluation] 已按价格本重新评估: {done}")
+    except Exception as e:
+        print(f"[ItemEvaluation] 重新评估失败: {e}")
+
+
+async def run_reevaluation_periodically(interval_seconds: Optional[float] = None) -> None:
+    """
+    后台任务：启动时处理遗留队列，之后按间隔兜底轮询
+    （其它进程修改价格本、或进程在处理中途退出时由此补上）
+    """
+    interval = (
+        interval_seconds if interval_seconds is not None
+        else database_settings.reevaluate_interval_seconds
+    )
+    while True:
+        await _drain_logged()
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
+
+
+def _legacy_evaluate_items(items: List[dict], all_entries: List[dict]) -> List[dict]:
+    """
+    基准对照：evaluate_prices 之前逐条处理商品字典的评估写法（原捡漏雷达 / 结果列表路由中的
+    _evaluate_items_with_price_book），逐条解析价格字符串、查价格本、计算并注入评估字段。
+    """
+    keyword_map: dict = {}
+    for entry in all_entries:
+        for kw in entry.get("keywords", []):
+            keyword_map[kw] = entry
+
+    for item in items:
+        entry = keyword_map.get(item.get("搜索关键字", ""))
+        if not entry or not entry.get("target_sell_price"):
+            continue
+        price_str = item.get("商品信息", {}).get("当前售价", "")
+        try:
+            item_price = float(str(price_str).replace("¥", "").replace(",", "").strip() or "0")
+        except (ValueError, TypeError):
+            continue
+        if item_price <= 0:
+            continue
+
+        target = entry["target_sell_price"]
+        ideal = entry.get("purchase_ideal")
+        upper = entry.get("purchase_upper")
+        profit = target - (item_price + entry.get("total_fees", 0))
+        if ideal is None or upper is None:
+            status = "no_config"
+        elif item_price <= ideal:
+            status = "great_deal"
+        elif item_price <= upper:
+            status = "good_deal"
+        else:
+            status = "overpriced"
+        premium_rate = None
+        market_price = entry.get("market_price")
+        if market_price and market_price > 0:
+            premium_rate = round((item_price - market_price) / market_price, 4)
+
+        item["category_id"] = entry["id"]
+        item["category_name"] = entry.get("category_name", "")
+        item["evaluation_status"] = status
+        item["purchase_range_low"] = ideal
+        item["purchase_range_high"] = upper
+        item["estimated_profit"] = round(profit, 2)
+        item["estimated_profit_rate"] = round(profit / target, 4) if target > 0 else 0
+        item["premium_rate"] = premium_rate
+    return items
+
+
+def _parse_price(text: str) -> Optional[float]:
+    try:
+        return float(str(text).replace("¥", "").replace(",", "").strip() or "0")
+    except (ValueError, TypeError):
+        return None
+
+
+def benchmark(n: int = 100_000, n_configs: int = 50, seed: int = 7) -> Dict[str, float]:
+    """
+    微基准：同一批商品字典分别用旧的逐条写法（_legacy_evaluate_items）与批量 evaluate_rows 评估，
+    两边都包含解析价格与把评估列写回商品字典，返回耗时（秒）
+    """
+    rng = random.Random(seed)
+    configs, entries = {}, []
+    for k in range(n_configs):
+        target = rng.uniform(500, 20000)
+        fees = round(target * 0.05 + rng.uniform(0, 100), 2)
+        config = {
+            "entry_id": f"e{k}", "category_name": f"c{k}", "target_sell_price": target,
+            "market_price": target * 0.9, "total_fees": fees,
+            "purchase_ideal": round(target - fees - target * 0.25, 2),
+            "purchase_upper": round(target - fees - target * 0.15, 2),
+        }
+        configs[f"kw{k}"] = config
+        entries.append({**config, "id": config["entry_id"], "keywords": [f"kw{k}"]})
+    items = [
+        {
+            "搜索关键字": f"kw{rng.randrange(n_configs + 5)}",  # 部分关键词未配置
+            "商品信息": {"当前售价": f"¥{rng.uniform(0, 20000):,.2f}" if rng.random() > 0.02 else ""},
+        }
+        for _ in range(n)
+    ]
+    legacy_items = [dict(item) for item in items]
+    batch_items = [dict(item) for item in items]
+
+    started = time.perf_counter()
+    _legacy_evaluate_items(legacy_items, entries)
+    per_row = time.perf_counter() - started
+
+    started = time.perf_counter()
+    evaluate_rows(
+        batch_items,
+        [_parse_price(item["商品信息"]["当前售价"]) for item in batch_items],
+        [item["搜索关键字"] for item in batch_items],
+        configs,
+    )
+    batch = time.perf_counter() - started
+
+    # 旧写法跳过的商品（未配置 / 价格 ≤ 0）不比较，其余评估结果应一致
+    assert all(
+        new[c] == old[c]
+        for old, new in zip(legacy_items, batch_items) if "evaluation_status" in old
+        for c in EVALUATION_COLUMNS
+    )
+    return {"per_row": per_row, "batch": batch}
+
+
+async def _main() -> None:
+    from src.infrastructure.persistence.sqlite_manager import close_pools, init_db
+
+    parser = argparse.ArgumentParser(description="按当前价格本重算 items 评估字段")
+    parser.add_argument("--keyword", help="只重算指定关键词（默认所有已配置的关键词）")
+    parser.add_argument(
+        "--benchmark", type=int, metavar="N", help="不访问数据库，对 N 个随机商品比较旧的逐条评估与批量评估的耗时"
+    )
+    args = parser.parse_args()
+
+    if args.benchmark:
+        timings = benchmark(args.benchmark)
+        print(
+            f"[ItemEvaluation] {args.benchmark} 条: 逐条 {timings['per_row'] * 1000:.1f} ms, "
+            f"批量 {timings['batch'] * 1000:.1f} ms "
+            f"({timings['per_row'] / timings['batch']:.1f}x)"
+        )
+        return
+
+    await init_db()
+    try:
+        async with write_db() as db:
+            if args.keyword:
+                keywords = [args.keyword]
+            else:
+                cursor = await db.execute("SELECT keyword FROM price_book_keywords")
+                keywords = [r[0] for r in await cursor.fetchall()]
+            await db.executemany(
+                "INSERT OR REPLACE INTO price_book_reevaluation_pending (keyword) VALUES (?)",
+                [(kw,) for kw in keywords],
+            )
+        done = await drain_reevaluation_queue()
+        print(f"[ItemEvaluation] 重算完成，共 {sum(done.values())} 行: {done}")
+    finally:
+        await close_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
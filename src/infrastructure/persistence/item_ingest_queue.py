@@ -0,0 +1,238 @@
+"""
+商品入库队列 —— 进程内唯一的写入通道
+
+写缓冲（ItemWriteBuffer）刷新时不再各自抢写连接，而是把批次交给本队列：
+- 每个事件循环 / 数据库文件一个队列，由单个后台任务按提交顺序串行写入
+- 排队中的多个批次合并进同一个写事务（组提交），减少 BEGIN/COMMIT 与写锁交接次数
+- 合并事务失败时逐批重试，单个坏批次不影响其它批次
+- 队列空闲时后台任务自行退出，下次提交时再启动
+
+读路径（分析接口）走连接池的只读连接，与入库互不阻塞（WAL）。
+
+基准：python -m src.infrastructure.persistence.item_ingest_queue --benchmark 20000
+比较空闲时与其它进程并发分析查询下的入库吞吐。
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from src.infrastructure.config.settings import database_settings
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.sqlite_manager import get_pool, write_db
+
+# (记录, compact, 仓储, 结果 Future)
+_Job = Tuple[List[dict], Optional[bool], ItemRepository, asyncio.Future]
+
+
+class ItemIngestQueue:
+    """单个数据库文件的入库队列（绑定到创建它的事件循环）"""
+
+    def __init__(self, db_path: str, max_group_records: Optional[int] = None):
+        self.db_path = db_path
+        self.max_group_records = max(1, max_group_records or database_settings.ingest_group_max_records)
+        self._jobs: "asyncio.Queue[_Job]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {"batches": 0, "transactions": 0, "retried": 0, "failed": 0}
+
+    @property
+    def pending(self) -> int:
+        return self._jobs.qsize()
+
+    async def submit(
+        self, records: List[dict], compact: Optional[bool] = None, repo: Optional[ItemRepository] = None
+    ) -> Dict[str, int]:
+        """排队写入一批记录，返回该批次的 insert_batch 结果；调用方被取消时批次仍会写入"""
+        future = asyncio.get_running_loop().create_future()
+        self._jobs.put_nowait((records, compact, repo or ItemRepository(), future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return await asyncio.shield(future)
+
+    async def _run(self) -> None:
+        while not self._jobs.empty():
+            group = [self._jobs.get_nowait()]
+            size = len(group[0][0])
+            while not self._jobs.empty() and size < self.max_group_records:
+                job = self._jobs.get_nowait()
+                group.append(job)
+                size += len(job[0])
+            await self._commit(group)
+
+    async def _commit(self, group: List[_Job]) -> None:
+        try:
+            async with write_db(self.db_path):
+                # 嵌套的 insert_batch 复用同一事务，各批次结果分别返回
+                results = [await repo.insert_batch(records, compact=compact) for records, compact, repo, _ in group]
+        except Exception as e:
+            if len(group) > 1:
+                self.stats["retried"] += len(group)
+                for job in group:
+                    await self._commit([job])
+                return
+            self.stats["failed"] += 1
+            if not group[0][3].done():
+                group[0][3].set_exception(e)
+            return
+
+        self.stats["transactions"] += 1
+        self.stats["batches"] += len(group)
+        for (_, _, _, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# 进程级注册表：{event_loop: {db_path: ItemIngestQueue}}
+_queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, ItemIngestQueue]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_ingest_queue(db_path: Optional[str] = None) -> ItemIngestQueue:
+    """获取当前事件循环下指定数据库文件的入库队列（不存在则创建）"""
+    db_path = db_path or sqlite_manager.DB_PATH
+    queues = _queues.setdefault(asyncio.get_running_loop(), {})
+    queue = queues.get(db_path)
+    if queue is None:
+        queue = queues[db_path] = ItemIngestQueue(db_path)
+    return queue
+
+
+async def ingest(
+    records: List[dict], compact: Optional[bool] = None, repo: Optional[ItemRepository] = None
+) -> Dict[str, int]:
+    """经入库队列写入一批商品记录（返回值同 ItemRepository.insert_batch）"""
+    return await get_ingest_queue().submit(records, compact=compact, repo=repo)
+
+
+# ----------------------------------------------------------------------
+# 基准：并发分析查询下的入库吞吐
+# ----------------------------------------------------------------------
+
+def _bench_record(n: int, keywords: int) -> dict:
+    return {
+        "爬取时间": f"2026-01-{1 + n % 28:02d}T10:{n % 60:02d}:00",
+        "搜索关键字": f"kw{n % keywords}",
+        "任务名称": f"kw{n % keywords}",
+        "商品信息": {
+            "商品ID": str(n),
+            "商品标题": f"商品 {n}",
+            "当前售价": str(random.randint(50, 5000)),
+        },
+        "卖家信息": {"卖家昵称": f"seller{n % 300}"},
+        "ai_analysis": {},
+    }
+
+
+def _analytics_process(db_path: str, keywords: int, stop, queries) -> None:
+    """独立进程（模拟 API 进程）：循环执行分析接口的读查询直到 stop，累计完成的查询数"""
+    sqlite_manager.DB_PATH = db_path
+
+    async def run() -> None:
+        repo = ItemRepository()
+        rounds = 0
+        try:
+            while not stop.is_set():
+                kw = f"kw{rounds % keywords}"
+                await repo.get_price_histogram([kw])
+                await repo.get_competitor_analysis(kw)
+                await repo.get_bargain_leaderboard()
+                await repo.get_top_keywords()
+                rounds += 1
+                with queries.get_lock():
+                    queries.value += 4
+        finally:
+            await sqlite_manager.close_pools()
+
+    asyncio.run(run())
+
+
+async def benchmark(
+    n: int = 20_000, batch_size: int = 50, writers: int = 4, readers: int = 4, keywords: int = 20
+) -> Dict[str, dict]:
+    """
+    在临时库上先无负载写入 n 条，再在 readers 个并发分析查询进程下写入另外 n 条。
+    writers 个写缓冲协程各自按 batch_size 提交批次。
+    返回 {"idle": {...}, "under_load": {...}}，含耗时、吞吐与分析查询数。
+    """
+    random.seed(7)
+    original = sqlite_manager.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "monitor.db")
+        sqlite_manager.DB_PATH = db_path
+        repo = ItemRepository()
+        try:
+            await sqlite_manager.init_db()
+
+            async def produce(offset: int) -> None:
+                ids = range(offset, offset + n)
+                batches = [
+                    [_bench_record(i, keywords) for i in ids[j:j + batch_size]]
+                    for j in range(0, n, batch_size)
+                ]
+
+                async def writer(mine: list) -> None:
+                    for batch in mine:
+                        await ingest(batch, repo=repo)
+
+                await asyncio.gather(*(writer(batches[w::writers]) for w in range(writers)))
+
+            results = {}
+            ctx = multiprocessing.get_context("spawn")
+            for phase, offset, load in (("idle", 0, 0), ("under_load", n, readers)):
+                stop, queries = ctx.Event(), ctx.Value("i", 0)
+                loaders = [
+                    ctx.Process(target=_analytics_process, args=(db_path, keywords, stop, queries))
+                    for _ in range(load)
+                ]
+                for proc in loaders:
+                    proc.start()
+                # 等各读进程完成首轮查询后再计时
+                while queries.value < 4 * load:
+                    await asyncio.sleep(0.05)
+                counted = queries.value
+                started = time.perf_counter()
+                await produce(offset)
+                elapsed = time.perf_counter() - started
+                stop.set()
+                for proc in loaders:
+                    await asyncio.to_thread(proc.join)
+                results[phase] = {
+                    "seconds": round(elapsed, 3),
+                    "items_per_sec": round(n / elapsed, 1),
+                    "analytics_queries": queries.value - counted,
+                }
+            results["under_load"]["write_wait_max_ms"] = get_pool(db_path).stats()["write"]["wait_max_ms"]
+            results["queue"] = dict(get_ingest_queue(db_path).stats)
+            return results
+        finally:
+            await get_pool(db_path).close()
+            sqlite_manager.DB_PATH = original
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="入库队列基准：并发分析查询下的写入吞吐")
+    parser.add_argument("--benchmark", type=int, metavar="N", default=20_000, help="每个阶段写入的记录数")
+    parser.add_argument("--batch-size", type=int, default=50, help="每个写缓冲批次的记录数")
+    parser.add_argument("--writers", type=int, default=4, help="并发提交批次的协程数")
+    parser.add_argument("--readers", type=int, default=4, help="并发分析查询的进程数")
+    args = parser.parse_args()
+
+    results = await benchmark(args.benchmark, args.batch_size, args.writers, args.readers)
+    for phase in ("idle", "under_load"):
+        r = results[phase]
+        print(
+            f"[ItemIngestQueue] {phase}: {args.benchmark} 条 {r['seconds']:.2f} s, "
+            f"{r['items_per_sec']:.0f} 条/s, 分析查询 {r['analytics_queries']} 次"
+        )
+    print(f"[ItemIngestQueue] 写锁最长等待 {results['under_load']['write_wait_max_ms']} ms, 队列 {results['queue']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,7 +1,24 @@
 """商品数据仓储 —— items 表的读写操作"""
+import base64
 import json
-from typing import List, Dict, Any, Optional
-from src.infrastructure.persistence.sqlite_manager import get_db
+from contextlib import aclosing
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from src.infrastructure.config.settings import database_settings
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+from src.infrastructure.persistence.item_blob_store import (
+    FULL_COLUMNS,
+    FULL_JOINS,
+    INSERT_BLOB_SQL,
+    externalize_rows,
+    load_raw_json,
+    prune_orphan_blobs,
+    summary_fields,
+)
+from src.infrastructure.persistence.item_archive import delete_keyword_from_archives, iter_archive_rows
+from src.infrastructure.persistence.item_compaction import compact_incoming
+from src.infrastructure.persistence.item_evaluation import evaluate_incoming
+from src.infrastructure.persistence.item_search import like_conditions, split_search_terms
+from src.infrastructure.persistence.price_rollup_repository import PriceRollupRepository, since_day
 from src.domain.models.platform import PLATFORMS
 
 
@@ -44,11 +61,13 @@ def record_to_row(record: dict) -> dict:
         "keyword": record.get("搜索关键字", ""),
         "platform": record.get("platform", "xianyu"),
         "title": info.get("商品标题", ""),
+        "description": info.get("商品描述", ""),
         "price": price,
         "original_price": original_price if original_price > 0 else None,
         "region": info.get("发货地区", ""),
         "publish_time": info.get("发布时间", ""),
         "crawl_time": record.get("爬取时间", ""),
+        "last_seen": record.get("爬取时间", ""),
         "item_link": info.get("商品链接", ""),
         "image_url": info.get("商品主图链接", "") or (
             (info.get("商品图片列表") or [None])[0] or ""
@@ -73,6 +92,7 @@ def record_to_row(record: dict) -> dict:
         "raw_item_info": json.dumps(info, ensure_ascii=False),
         "raw_seller_info": json.dumps(seller, ensure_ascii=False),
         "raw_ai_analysis": json.dumps(ai, ensure_ascii=False),
+        **summary_fields(info, seller),
         "currency": record.get("currency") or _infer_currency(record.get("platform", "xianyu")),
     }
 
@@ -87,10 +107,11 @@ def row_to_record(row: dict) -> dict:
     """
     将 items 表的一行数据还原为前端期望的 JSONL 格式。
     保持与原 JSONL 格式完全一致，前端零改动。
+    原始 JSON 取自完整投影 JOIN 出的压缩 blob（老数据取内联 raw_* 列）。
     """
-    raw_item = json.loads(row.get("raw_item_info") or "{}")
-    raw_seller = json.loads(row.get("raw_seller_info") or "{}")
-    raw_ai = json.loads(row.get("raw_ai_analysis") or "{}")
+    raw_item = load_raw_json(row, "raw_item_info")
+    raw_seller = load_raw_json(row, "raw_seller_info")
+    raw_ai = load_raw_json(row, "raw_ai_analysis")
 
     platform = row.get("platform", "xianyu")
     return {
@@ -114,104 +135,232 @@ def row_to_record(row: dict) -> dict:
     }
 
 
+# 列表视图投影：只取标量列，展示所需的几个原始值在写入时已抽到 summary_extras /
+# seller_good_rate，不读取、不解压原始 JSON（老数据仍从内联 raw_* 用 json_extract 兜底）
+SUMMARY_COLUMNS = """
+    id, item_id, task_name, keyword, platform, currency,
+    title, price, original_price, region, publish_time, crawl_time,
+    item_link, image_url, want_count, view_count,
+    is_recommended, ai_reason, risk_tags,
+    category_id, category_name, evaluation_status,
+    purchase_range_low, purchase_range_high,
+    estimated_profit, estimated_profit_rate, premium_rate,
+    seller_name, seller_credit, seller_registration,
+    COALESCE(summary_extras,
+             json_extract(raw_item_info, '$.当前售价', '$.商品原价', '$.商品标签')) AS item_extras,
+    COALESCE(seller_good_rate,
+             json_extract(raw_seller_info, '$.作为卖家的好评率')) AS seller_good_rate
+"""
+
+PROJECTIONS = ("summary", "full")
+
+# 价格区间分布的分档：(名称, 价格/均价 下限, 上限)，上限为 None 表示不封顶
+_PREMIUM_BRACKETS = (
+    ("极低价 (<50%均价)", 0, 0.5),
+    ("低价 (50%-80%均价)", 0.5, 0.8),
+    ("合理价 (80%-120%均价)", 0.8, 1.2),
+    ("偏高 (120%-150%均价)", 1.2, 1.5),
+    ("高价 (>150%均价)", 1.5, None),
+)
+
+
+def _projection(projection: str) -> Tuple[str, str]:
+    """返回 (SELECT 列, FROM items 之后的 JOIN 子句)"""
+    if projection not in PROJECTIONS:
+        raise ValueError(f"未知的投影模式: {projection}")
+    return (SUMMARY_COLUMNS, "") if projection == "summary" else (FULL_COLUMNS, FULL_JOINS)
+
+
+def row_to_summary(row: dict) -> dict:
+    """
+    将 SUMMARY_COLUMNS 查询出的一行还原为前端列表所需的 JSONL 结构（字段子集）。
+    完整的商品/卖家/AI 原始信息通过 ItemRepository.get_item 按需加载。
+    """
+    extras = json.loads(row.get("item_extras") or "[]") or []
+    price_text, original_text, tags = (list(extras) + [None, None, None])[:3]
+    image_url = row.get("image_url") or ""
+    seller_name = row.get("seller_name") or ""
+
+    info = {
+        "商品ID": row.get("item_id", ""),
+        "商品标题": row.get("title", ""),
+        "当前售价": price_text if price_text is not None else str(row.get("price") or ""),
+        "商品原价": original_text if original_text is not None else "",
+        "商品标签": tags or [],
+        "「想要」人数": row.get("want_count", 0),
+        "浏览量": row.get("view_count", 0),
+        "发货地区": row.get("region", ""),
+        "卖家昵称": seller_name,
+        "商品链接": row.get("item_link", ""),
+        "发布时间": row.get("publish_time", ""),
+        "商品主图链接": image_url,
+        "商品图片列表": [image_url] if image_url else [],
+    }
+    seller = {
+        "卖家昵称": seller_name,
+        "卖家信用等级": row.get("seller_credit", ""),
+        "卖家注册时长": row.get("seller_registration", ""),
+    }
+    if row.get("seller_good_rate") is not None:
+        seller["作为卖家的好评率"] = row["seller_good_rate"]
+    ai = {
+        "is_recommended": bool(row.get("is_recommended")),
+        "reason": row.get("ai_reason", ""),
+        "risk_tags": json.loads(row.get("risk_tags") or "[]"),
+    }
+
+    platform = row.get("platform", "xianyu")
+    return {
+        "爬取时间": row.get("crawl_time", ""),
+        "搜索关键字": row.get("keyword", ""),
+        "任务名称": row.get("task_name", ""),
+        "商品信息": info,
+        "卖家信息": seller,
+        "ai_analysis": ai,
+        "platform": platform,
+        "currency": row.get("currency") or _infer_currency(platform),
+        # 价格本评估字段
+        "category_id": row.get("category_id"),
+        "category_name": row.get("category_name"),
+        "evaluation_status": row.get("evaluation_status"),
+        "purchase_range_low": row.get("purchase_range_low"),
+        "purchase_range_high": row.get("purchase_range_high"),
+        "estimated_profit": row.get("estimated_profit"),
+        "estimated_profit_rate": row.get("estimated_profit_rate"),
+        "premium_rate": row.get("premium_rate"),
+    }
+
+
+def _to_record(row: dict, projection: str) -> dict:
+    return row_to_summary(row) if projection == "summary" else row_to_record(row)
+
+
+def encode_cursor(sort_col: str, order: str, sort_value: Any, row_id: int) -> str:
+    """将 (排序列值, id) 编码为不透明的分页游标"""
+    payload = json.dumps([sort_col, order, sort_value, row_id], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort_col: str, order: str) -> Tuple[Any, int]:
+    """解析分页游标，返回 (排序列值, id)；游标无效或与当前排序不一致时抛出 ValueError"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        col, cur_order, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as e:
+        raise ValueError("无效的分页游标") from e
+    if col != sort_col or cur_order != order or not isinstance(row_id, int):
+        raise ValueError("分页游标与当前排序方式不一致")
+    return sort_value, row_id
+
+
+def _keyset_condition(sort_col: str, order: str, sort_value: Any, row_id: int, id_col: str = "id") -> Tuple[str, list]:
+    """
+    游标之后的键集条件。排序列可能为 NULL（publish_time / price）：SQLite 中 NULL 最小，
+    ORDER BY ... DESC 时排在最后、ASC 时排在最前，条件须与之一致，否则 NULL 行会从后续页中丢失。
+    """
+    if order == "DESC":
+        if sort_value is None:
+            return f"({sort_col} IS NULL AND {id_col} < ?)", [row_id]
+        return f"(({sort_col}, {id_col}) < (?, ?) OR {sort_col} IS NULL)", [sort_value, row_id]
+    if sort_value is None:
+        return f"(({sort_col} IS NULL AND {id_col} > ?) OR {sort_col} IS NOT NULL)", [row_id]
+    return f"({sort_col}, {id_col}) > (?, ?)", [sort_value, row_id]
+
+
+_INSERT_ITEM_SQL = """
+INSERT OR IGNORE INTO items (
+    item_id, task_name, keyword, platform, currency,
+    title, description, price, original_price, region,
+    publish_time, crawl_time, last_seen, item_link, image_url,
+    want_count, view_count,
+    is_recommended, ai_reason, risk_tags,
+    category_id, category_name, evaluation_status,
+    purchase_range_low, purchase_range_high,
+    estimated_profit, estimated_profit_rate, premium_rate,
+    seller_name, seller_credit, seller_registration,
+    item_blob, seller_blob, ai_blob, summary_extras, seller_good_rate,
+    raw_item_info, raw_seller_info, raw_ai_analysis
+) VALUES (
+    :item_id, :task_name, :keyword, :platform, :currency,
+    :title, :description, :price, :original_price, :region,
+    :publish_time, :crawl_time, :last_seen, :item_link, :image_url,
+    :want_count, :view_count,
+    :is_recommended, :ai_reason, :risk_tags,
+    :category_id, :category_name, :evaluation_status,
+    :purchase_range_low, :purchase_range_high,
+    :estimated_profit, :estimated_profit_rate, :premium_rate,
+    :seller_name, :seller_credit, :seller_registration,
+    :item_blob, :seller_blob, :ai_blob, :summary_extras, :seller_good_rate,
+    :raw_item_info, :raw_seller_info, :raw_ai_analysis
+)
+"""
+
+
 class ItemRepository:
     """items 表数据操作"""
 
-    async def insert(self, record: dict) -> bool:
-        """插入一条商品记录（INSERT OR IGNORE 去重）"""
+    def __init__(self):
+        self.rollups = PriceRollupRepository()
+
+    async def insert(self, record: dict, compact: Optional[bool] = None) -> bool:
+        """插入一条商品记录（INSERT OR IGNORE 去重；compact 时状态未变只推后 last_seen）"""
         row = record_to_row(record)
         if not row["item_id"]:
             return False
+        compact = database_settings.compact_on_ingest if compact is None else compact
 
-        db = await get_db()
         try:
-            await db.execute(
-                """
-                INSERT OR IGNORE INTO items (
-                    item_id, task_name, keyword, platform, currency,
-                    title, price, original_price, region,
-                    publish_time, crawl_time, item_link, image_url,
-                    want_count, view_count,
-                    is_recommended, ai_reason, risk_tags,
-                    category_id, category_name, evaluation_status,
-                    purchase_range_low, purchase_range_high,
-                    estimated_profit, estimated_profit_rate, premium_rate,
-                    seller_name, seller_credit, seller_registration,
-                    raw_item_info, raw_seller_info, raw_ai_analysis
-                ) VALUES (
-                    :item_id, :task_name, :keyword, :platform, :currency,
-                    :title, :price, :original_price, :region,
-                    :publish_time, :crawl_time, :item_link, :image_url,
-                    :want_count, :view_count,
-                    :is_recommended, :ai_reason, :risk_tags,
-                    :category_id, :category_name, :evaluation_status,
-                    :purchase_range_low, :purchase_range_high,
-                    :estimated_profit, :estimated_profit_rate, :premium_rate,
-                    :seller_name, :seller_credit, :seller_registration,
-                    :raw_item_info, :raw_seller_info, :raw_ai_analysis
-                )
-                """,
-                row,
-            )
-            await db.commit()
+            async with write_db() as db:
+                rows = [row]
+                await evaluate_incoming(db, rows)
+                if compact:
+                    rows, _ = await compact_incoming(db, rows)
+                await db.executemany(INSERT_BLOB_SQL, externalize_rows(rows))
+                await db.executemany(_INSERT_ITEM_SQL, rows)
+                await self.rollups.apply_pending()
             return True
         except Exception as e:
             print(f"[ItemRepository] insert 失败: {e}")
             return False
-        finally:
-            await db.close()
 
-    async def insert_batch(self, records: List[dict]) -> int:
-        """批量插入，返回成功条数"""
+    async def insert_batch(
+        self, records: List[dict], chunk_size: Optional[int] = None, compact: Optional[bool] = None
+    ) -> Dict[str, int]:
+        """
+        批量插入：全部记录在同一个事务内按块 executemany，评估列按当前价格本填写。
+        compact（缺省取 ITEM_COMPACT_ON_INGEST）时与最新快照状态相同的记录只推后其 last_seen。
+        返回 {"inserted": 实际写入条数, "compacted": 被合并条数,
+              "ignored": 被去重忽略条数, "invalid": 缺少商品ID条数}
+        """
+        chunk_size = max(1, chunk_size or database_settings.ingest_chunk_size)
+        compact = database_settings.compact_on_ingest if compact is None else compact
         rows = []
         for r in records:
             row = record_to_row(r)
             if row["item_id"]:
                 rows.append(row)
 
+        result = {"inserted": 0, "compacted": 0, "ignored": 0, "invalid": len(records) - len(rows)}
         if not rows:
-            return 0
+            return result
 
-        db = await get_db()
-        inserted = 0
-        try:
-            for row in rows:
-                try:
-                    await db.execute(
-                        """
-                        INSERT OR IGNORE INTO items (
-                            item_id, task_name, keyword, platform, currency,
-                            title, price, original_price, region,
-                            publish_time, crawl_time, item_link, image_url,
-                            want_count, view_count,
-                            is_recommended, ai_reason, risk_tags,
-                            category_id, category_name, evaluation_status,
-                            purchase_range_low, purchase_range_high,
-                            estimated_profit, estimated_profit_rate, premium_rate,
-                            seller_name, seller_credit, seller_registration,
-                            raw_item_info, raw_seller_info, raw_ai_analysis
-                        ) VALUES (
-                            :item_id, :task_name, :keyword, :platform, :currency,
-                            :title, :price, :original_price, :region,
-                            :publish_time, :crawl_time, :item_link, :image_url,
-                            :want_count, :view_count,
-                            :is_recommended, :ai_reason, :risk_tags,
-                            :category_id, :category_name, :evaluation_status,
-                            :purchase_range_low, :purchase_range_high,
-                            :estimated_profit, :estimated_profit_rate, :premium_rate,
-                            :seller_name, :seller_credit, :seller_registration,
-                            :raw_item_info, :raw_seller_info, :raw_ai_analysis
-                        )
-                        """,
-                        row,
-                    )
-                    inserted += 1
-                except Exception:
-                    continue
-            await db.commit()
-        finally:
-            await db.close()
-        return inserted
+        async with write_db() as db:
+            for i in range(0, len(rows), chunk_size):
+                chunk = rows[i:i + chunk_size]
+                # 按当前价格本填评估列（先于合并：评估状态参与"状态未变"的判断）
+                await evaluate_incoming(db, chunk)
+                if compact:
+                    chunk, merged = await compact_incoming(db, chunk)
+                    result["compacted"] += merged
+                # 原始 JSON 压缩去重写入 item_blobs，items 行只留哈希引用
+                await db.executemany(INSERT_BLOB_SQL, externalize_rows(chunk))
+                # executemany 的 rowcount 为各条语句 changes() 之和（不含触发器写入）
+                cursor = await db.executemany(_INSERT_ITEM_SQL, chunk)
+                result["inserted"] += max(cursor.rowcount, 0)
+            # 新价格在同一事务内并入日汇总
+            await self.rollups.apply_pending()
+        result["ignored"] = len(rows) - result["inserted"] - result["compacted"]
+        return result
 
     async def query(
         self,
@@ -222,11 +371,29 @@ class ItemRepository:
         sort_order: str = "desc",
         page: int = 1,
         limit: int = 20,
+        after: Optional[str] = None,
+        projection: str = "summary",
+        q: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
-        通用查询，返回 {total_items, page, limit, items}。
-        items 以前端期望的 JSONL 格式返回。
+        通用查询，返回 {total_items, page, limit, items, next_cursor}。
+        items 以前端期望的 JSONL 格式返回；projection="summary" 为列表轻量投影，
+        "full" 时还原完整原始信息。
+
+        传入 after（上一页返回的 next_cursor）时按 (排序列, id) 键集分页，
+        不再使用 OFFSET；不传时保持 page/limit 兼容模式。
+        total_items 取自触发器增量维护的 item_counts 计数表，不再每页 COUNT(*)。
+
+        q 为标题 / 描述全文检索（items_fts，可与 keyword / task_name 组合），
+        sort_by="relevance" 时按 bm25 相关度排序（仅支持 page 分页），
+        total_items 为命中条数。
         """
+        if q and q.strip():
+            return await self._search(
+                q, keyword, task_name, recommended_only, sort_by, sort_order,
+                page, limit, after, projection,
+            )
+
         conditions = []
         params: list = []
 
@@ -239,8 +406,6 @@ class ItemRepository:
         if recommended_only:
             conditions.append("is_recommended = 1")
 
-        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
-
         # 安全排序字段映射
         sort_map = {
             "crawl_time": "crawl_time",
@@ -250,152 +415,300 @@ class ItemRepository:
         sort_col = sort_map.get(sort_by, "crawl_time")
         order = "DESC" if sort_order == "desc" else "ASC"
 
-        db = await get_db()
-        try:
-            # 总数
-            cursor = await db.execute(
-                f"SELECT COUNT(*) as cnt FROM items {where}", params
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if after:
+            sort_value, last_id = decode_cursor(after, sort_col, order)
+            condition, condition_params = _keyset_condition(sort_col, order, sort_value, last_id)
+            page_conditions.append(condition)
+            page_params += condition_params
+
+        where = ("WHERE " + " AND ".join(page_conditions)) if page_conditions else ""
+
+        columns, joins = _projection(projection)
+        async with read_db() as db:
+            total = await self._cached_total(db, keyword, task_name, recommended_only)
+
+            sql = f"SELECT {columns} FROM items {joins} {where} ORDER BY {sort_col} {order}, id {order} LIMIT ?"
+            if after:
+                cursor = await db.execute(sql, page_params + [limit + 1])
+            else:
+                offset = (page - 1) * limit
+                cursor = await db.execute(sql + " OFFSET ?", page_params + [limit + 1, offset])
+            rows = [dict(r) for r in await cursor.fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort_col, order, last[sort_col], last["id"])
+
+        return {
+            "total_items": total,
+            "page": page,
+            "limit": limit,
+            "items": [_to_record(r, projection) for r in rows],
+            "next_cursor": next_cursor,
+        }
+
+    async def _search(
+        self,
+        q: str,
+        keyword: Optional[str],
+        task_name: Optional[str],
+        recommended_only: bool,
+        sort_by: str,
+        sort_order: str,
+        page: int,
+        limit: int,
+        after: Optional[str],
+        projection: str,
+    ) -> Dict[str, Any]:
+        """全文检索版 query：先在 items_fts 上取命中的 rowid，再回表过滤 / 排序"""
+        match, short_terms = split_search_terms(q)
+        conditions, params = like_conditions(short_terms, ["items.title", "items.description"])
+        if keyword:
+            conditions.append("keyword = ?")
+            params.append(keyword)
+        if task_name:
+            conditions.append("task_name = ?")
+            params.append(task_name)
+        if recommended_only:
+            conditions.append("is_recommended = 1")
+
+        if match:
+            source = (
+                "(SELECT rowid AS hit_id, rank AS score FROM items_fts WHERE items_fts MATCH ?) AS hits "
+                "CROSS JOIN items ON items.id = hits.hit_id"
             )
-            row = await cursor.fetchone()
-            total = dict(row)["cnt"] if row else 0
+            source_params: list = [match]
+        else:
+            # 全部是不足 3 字的短词：trigram 无法索引，退化为 LIKE 过滤
+            source = "(SELECT 0.0 AS score) AS hits CROSS JOIN items"
+            source_params = []
+
+        if sort_by == "relevance":
+            if after:
+                raise ValueError("按相关度排序不支持游标分页，请使用 page 分页")
+            sort_col, order = "score", "ASC"
+            order_clause = "score ASC, items.id DESC"
+        else:
+            sort_map = {
+                "crawl_time": "crawl_time",
+                "publish_time": "publish_time",
+                "price": "price",
+            }
+            sort_col = sort_map.get(sort_by, "crawl_time")
+            order = "DESC" if sort_order == "desc" else "ASC"
+            order_clause = f"{sort_col} {order}, items.id {order}"
+
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        page_conditions = list(conditions)
+        page_params = list(params)
+        if after:
+            sort_value, last_id = decode_cursor(after, sort_col, order)
+            condition, condition_params = _keyset_condition(sort_col, order, sort_value, last_id, "items.id")
+            page_conditions.append(condition)
+            page_params += condition_params
+        page_where = ("WHERE " + " AND ".join(page_conditions)) if page_conditions else ""
 
-            # 分页数据
-            offset = (page - 1) * limit
+        columns, joins = _projection(projection)
+        async with read_db() as db:
             cursor = await db.execute(
-                f"""
-                SELECT * FROM items {where}
-                ORDER BY {sort_col} {order}
-                LIMIT ? OFFSET ?
-                """,
-                params + [limit, offset],
+                f"SELECT COUNT(*) FROM {source} {where}", source_params + params
             )
-            rows = await cursor.fetchall()
-            items = [row_to_record(dict(r)) for r in rows]
+            total = (await cursor.fetchone())[0]
 
-            return {
-                "total_items": total,
-                "page": page,
-                "limit": limit,
-                "items": items,
-            }
-        finally:
-            await db.close()
+            sql = f"SELECT {columns}, score FROM {source} {joins} {page_where} ORDER BY {order_clause} LIMIT ?"
+            if after:
+                cursor = await db.execute(sql, source_params + page_params + [limit + 1])
+            else:
+                cursor = await db.execute(
+                    sql + " OFFSET ?",
+                    source_params + page_params + [limit + 1, (page - 1) * limit],
+                )
+            rows = [dict(r) for r in await cursor.fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            if sort_col != "score":
+                last = rows[-1]
+                next_cursor = encode_cursor(sort_col, order, last[sort_col], last["id"])
+
+        return {
+            "total_items": total,
+            "page": page,
+            "limit": limit,
+            "items": [_to_record(r, projection) for r in rows],
+            "next_cursor": next_cursor,
+        }
+
+    @staticmethod
+    async def _cached_total(
+        db, keyword: Optional[str], task_name: Optional[str], recommended_only: bool
+    ) -> int:
+        """从 item_counts 汇总计数（按 keyword / task_name / is_recommended 维度增量维护）"""
+        conditions = []
+        params: list = []
+        if keyword:
+            conditions.append("keyword = ?")
+            params.append(keyword)
+        if task_name:
+            conditions.append("task_name = ?")
+            params.append(task_name)
+        if recommended_only:
+            conditions.append("is_recommended = 1")
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        cursor = await db.execute(f"SELECT COALESCE(SUM(cnt), 0) FROM item_counts {where}", params)
+        row = await cursor.fetchone()
+        return row[0] if row else 0
 
     async def get_keywords(self) -> List[str]:
-        """获取所有不同的关键词"""
-        db = await get_db()
-        try:
+        """获取所有不同的关键词（读 item_counts，不扫描 items）"""
+        async with read_db() as db:
             cursor = await db.execute(
-                "SELECT DISTINCT keyword FROM items ORDER BY keyword"
+                "SELECT keyword FROM item_counts GROUP BY keyword HAVING SUM(cnt) > 0 ORDER BY keyword"
             )
             rows = await cursor.fetchall()
             return [dict(r)["keyword"] for r in rows]
-        finally:
-            await db.close()
+
+    async def get_seen_item_ids(self, keyword: str, platform: str = "xianyu") -> List[str]:
+        """获取某关键词下已入库的全部商品ID（走 keyword+platform+item_id 覆盖索引）"""
+        async with read_db() as db:
+            cursor = await db.execute(
+                "SELECT DISTINCT item_id FROM items WHERE keyword = ? AND platform = ?",
+                (keyword, platform),
+            )
+            rows = await cursor.fetchall()
+            return [r[0] for r in rows]
 
     async def get_stats(self) -> Dict[str, Any]:
-        """获取汇总统计"""
-        db = await get_db()
-        try:
+        """获取汇总统计（计数表 + 最新快照表，不扫描 items）"""
+        async with read_db() as db:
             cursor = await db.execute(
                 """
                 SELECT
-                    COUNT(*) as total_items,
-                    COUNT(DISTINCT keyword) as result_files,
-                    COUNT(DISTINCT item_id) as unique_items
-                FROM items
+                    (SELECT COALESCE(SUM(cnt), 0) FROM item_counts) as total_items,
+                    (SELECT COUNT(*) FROM (
+                        SELECT keyword FROM item_counts GROUP BY keyword HAVING SUM(cnt) > 0
+                    )) as result_files,
+                    (SELECT COUNT(*) FROM items_latest) as unique_items
                 """
             )
             row = await cursor.fetchone()
             return dict(row) if row else {"total_items": 0, "result_files": 0, "unique_items": 0}
-        finally:
-            await db.close()
 
     async def get_price_trend(
         self, keyword: str, days: int = 30
     ) -> List[Dict[str, Any]]:
-        """按日期聚合某关键词的价格趋势"""
-        from datetime import datetime, timedelta
-
-        since = (datetime.now() - timedelta(days=days)).isoformat()
-        db = await get_db()
-        try:
-            cursor = await db.execute(
-                """
-                SELECT
-                    DATE(crawl_time) as date,
-                    ROUND(AVG(price), 2) as avg_price,
-                    ROUND(MIN(price), 2) as min_price,
-                    ROUND(MAX(price), 2) as max_price,
-                    COUNT(*) as count
-                FROM items
-                WHERE keyword = ? AND crawl_time >= ? AND price > 0
-                GROUP BY DATE(crawl_time)
-                ORDER BY date ASC
-                """,
-                (keyword, since),
-            )
-            rows = await cursor.fetchall()
-            return [dict(r) for r in rows]
-        finally:
-            await db.close()
+        """按日期聚合某关键词的价格趋势（读 price_daily_rollup，每天一行）"""
+        daily = await self.rollups.get_daily([keyword], since=since_day(days))
+        return [
+            {
+                "date": d["date"],
+                "avg_price": d["avg_price"],
+                "min_price": d["min_price"],
+                "max_price": d["max_price"],
+                "count": d["count"],
+            }
+            for d in daily
+        ]
 
     async def get_premium_distribution(self, keyword: str) -> Dict[str, Any]:
-        """获取某关键词的价格区间分布"""
-        db = await get_db()
-        try:
+        """获取某关键词的价格区间分布（相对均价分档，SQL 一次扫描计数）"""
+        bracket_sums = ", ".join(
+            f"SUM(price / s.avg_price >= {low} AND price / s.avg_price < {high}) AS b{i}"
+            if high is not None else f"SUM(price / s.avg_price >= {low}) AS b{i}"
+            for i, (_, low, high) in enumerate(_PREMIUM_BRACKETS)
+        )
+        async with read_db() as db:
             cursor = await db.execute(
-                "SELECT price FROM items WHERE keyword = ? AND price > 0",
-                (keyword,),
+                f"""
+                WITH s AS (SELECT AVG(price) AS avg_price FROM items WHERE keyword = ? AND price > 0)
+                SELECT COUNT(*) AS total, s.avg_price, {bracket_sums}
+                FROM items, s
+                WHERE items.keyword = ? AND items.price > 0
+                """,
+                (keyword, keyword),
             )
-            rows = await cursor.fetchall()
-            prices = [dict(r)["price"] for r in rows]
-        finally:
-            await db.close()
+            row = dict(await cursor.fetchone())
 
-        if not prices:
+        total = row["total"]
+        if not total:
             return {"total": 0, "distribution": []}
 
-        avg_price = sum(prices) / len(prices)
-        brackets = [
-            {"label": "极低价 (<50%均价)", "min_ratio": 0, "max_ratio": 0.5, "count": 0},
-            {"label": "低价 (50%-80%均价)", "min_ratio": 0.5, "max_ratio": 0.8, "count": 0},
-            {"label": "合理价 (80%-120%均价)", "min_ratio": 0.8, "max_ratio": 1.2, "count": 0},
-            {"label": "偏高 (120%-150%均价)", "min_ratio": 1.2, "max_ratio": 1.5, "count": 0},
-            {"label": "高价 (>150%均价)", "min_ratio": 1.5, "max_ratio": float("inf"), "count": 0},
-        ]
-
-        for p in prices:
-            ratio = p / avg_price if avg_price > 0 else 0
-            for bracket in brackets:
-                if bracket["min_ratio"] <= ratio < bracket["max_ratio"]:
-                    bracket["count"] += 1
-                    break
-
         distribution = [
             {
-                "label": b["label"],
-                "count": b["count"],
-                "percentage": round(b["count"] / len(prices) * 100, 1),
+                "label": label,
+                "count": row[f"b{i}"],
+                "percentage": round(row[f"b{i}"] / total * 100, 1),
             }
-            for b in brackets
+            for i, (label, _, _) in enumerate(_PREMIUM_BRACKETS)
         ]
 
         return {
-            "total": len(prices),
-            "avg_price": round(avg_price, 2),
+            "total": total,
+            "avg_price": round(row["avg_price"], 2),
             "distribution": distribution,
         }
 
+    async def get_price_histogram(
+        self, keywords: List[str], max_bins: int = 20, min_bins: int = 5
+    ) -> Dict[str, Any]:
+        """
+        若干关键词下商品当前价格的等宽直方图：{total, bins: [{range_low, range_high, count, label}]}。
+        读 items_latest 的 (keyword, price) 索引，先取计数 / 最值定桶宽，再 GROUP BY 桶号计数，
+        不把价格逐条取回内存。
+        """
+        if not keywords:
+            return {"total": 0, "bins": []}
+        placeholders = ",".join("?" * len(keywords))
+        where = f"keyword IN ({placeholders}) AND price > 0"
+        async with read_db() as db:
+            cursor = await db.execute(
+                f"SELECT COUNT(*), MIN(price), MAX(price) FROM items_latest WHERE {where}",
+                list(keywords),
+            )
+            total, min_p, max_p = await cursor.fetchone()
+            if not total:
+                return {"total": 0, "bins": []}
+
+            bin_count = min(max_bins, max(min_bins, total // 3))
+            width = (max_p - min_p) / bin_count
+            # 每个价格落入 floor((price - min) / width) 号桶，最大值归入最后一桶
+            cursor = await db.execute(
+                f"""
+                SELECT CASE WHEN ? > 0 THEN MIN(CAST((price - ?) / ? AS INTEGER), ?) ELSE ? END AS bucket,
+                       COUNT(*) AS cnt
+                FROM items_latest WHERE {where}
+                GROUP BY bucket
+                """,
+                [width, min_p, width or 1, bin_count - 1, bin_count - 1, *keywords],
+            )
+            counts = {r["bucket"]: r["cnt"] for r in await cursor.fetchall()}
+
+        bins = []
+        for i in range(bin_count):
+            low = round(min_p + i * width, 0)
+            high = round(min_p + (i + 1) * width, 0)
+            bins.append({
+                "range_low": low,
+                "range_high": high,
+                "count": counts.get(i, 0),
+                "label": f"¥{int(low)}-{int(high)}",
+            })
+        return {"total": total, "bins": bins}
+
     async def get_top_keywords(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """热门关键词统计"""
-        db = await get_db()
-        try:
+        """热门关键词统计（读 item_counts）"""
+        async with read_db() as db:
             cursor = await db.execute(
                 """
-                SELECT keyword, COUNT(*) as count
-                FROM items
+                SELECT keyword, SUM(cnt) as count
+                FROM item_counts
                 GROUP BY keyword
+                HAVING count > 0
                 ORDER BY count DESC
                 LIMIT ?
                 """,
@@ -403,94 +716,330 @@ class ItemRepository:
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
-    async def get_all_for_keyword(self, keyword: str) -> List[Dict[str, Any]]:
-        """获取某关键词的全部原始记录（用于 pricing 分析）"""
-        db = await get_db()
-        try:
+    async def get_all_for_keyword(
+        self, keyword: str, projection: str = "summary"
+    ) -> List[Dict[str, Any]]:
+        """获取某关键词的全部记录（用于 pricing 分析）"""
+        columns, joins = _projection(projection)
+        async with read_db() as db:
             cursor = await db.execute(
-                "SELECT * FROM items WHERE keyword = ? ORDER BY crawl_time DESC",
+                f"SELECT {columns} FROM items {joins} WHERE keyword = ? ORDER BY crawl_time DESC",
                 (keyword,),
             )
             rows = await cursor.fetchall()
-            return [row_to_record(dict(r)) for r in rows]
-        finally:
-            await db.close()
+            return [_to_record(dict(r), projection) for r in rows]
+
+    async def iter_export(
+        self,
+        keyword: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        分块读取某关键词的全部快照（summary 投影，按爬取时间倒序），供流式导出。
+        since / until 按 crawl_time 过滤 [since, until)。
+
+        热库按 (crawl_time, id) 键集翻页，每块单独借还读连接：客户端下载再慢也不会长时间
+        占住连接和 WAL 读快照，内存只保留一块。热库读完后接着按月份从新到旧读取
+        范围内的归档文件（见 item_archive），已归档的快照同样导出。
+        """
+        conditions = ["keyword = ?"]
+        params: list = [keyword]
+        if since:
+            conditions.append("crawl_time >= ?")
+            params.append(since)
+        if until:
+            conditions.append("crawl_time < ?")
+            params.append(until)
+
+        last: Optional[Tuple[str, int]] = None
+        while True:
+            page_conditions = list(conditions)
+            page_params = list(params)
+            if last is not None:
+                page_conditions.append("(crawl_time, id) < (?, ?)")
+                page_params += list(last)
+            async with read_db() as db:
+                cursor = await db.execute(
+                    f"SELECT {SUMMARY_COLUMNS} FROM items WHERE {' AND '.join(page_conditions)} "
+                    "ORDER BY crawl_time DESC, id DESC LIMIT ?",
+                    page_params + [chunk_size],
+                )
+                rows = [dict(r) for r in await cursor.fetchall()]
+            if rows:
+                yield [row_to_summary(r) for r in rows]
+            if len(rows) < chunk_size:
+                break
+            last = (rows[-1]["crawl_time"], rows[-1]["id"])
+
+        # 归档文件是只读的冷数据，不占热库连接，按块读取即可
+        async for rows in iter_archive_rows(
+            f"SELECT {SUMMARY_COLUMNS} FROM items WHERE {' AND '.join(conditions)} "
+            "ORDER BY crawl_time DESC, id DESC",
+            params,
+            since=since,
+            until=until,
+            newest_first=True,
+            as_dict=True,
+            chunk_size=chunk_size,
+        ):
+            yield [row_to_summary(r) for r in rows]
+
+    async def get_latest_for_keywords(
+        self, keywords: List[str], projection: str = "summary"
+    ) -> List[Dict[str, Any]]:
+        """获取若干关键词下每个商品的最新快照（按 items_latest 去重，不随抓取历史增长；不保证顺序）"""
+        if not keywords:
+            return []
+        columns, joins = _projection(projection)
+        placeholders = ",".join("?" * len(keywords))
+        async with read_db() as db:
+            cursor = await db.execute(
+                f"""
+                SELECT {columns} FROM items {joins}
+                WHERE id IN (SELECT snapshot_id FROM items_latest WHERE keyword IN ({placeholders}))
+                """,
+                list(keywords),
+            )
+            rows = await cursor.fetchall()
+            return [_to_record(dict(r), projection) for r in rows]
+
+    async def get_competitor_analysis(
+        self, keyword: str, page: int = 1, limit: int = 50, samples: int = 5
+    ) -> Dict[str, Any]:
+        """
+        某关键词下按卖家分组的定价统计（读 items_latest，每个商品按当前价格计一次）。
+        卖家按商品数倒序分页；每个卖家附最新抓取的 samples 条商品（窗口函数取前 N）。
+        """
+        where = "keyword = ? AND price > 0"
+        offset = (max(page, 1) - 1) * limit
+        async with read_db() as db:
+            cursor = await db.execute(
+                f"""
+                SELECT COUNT(*) AS total_items, AVG(price) AS avg_price,
+                       MIN(price) AS min_price, MAX(price) AS max_price,
+                       (SELECT COUNT(*) FROM (
+                           SELECT 1 FROM items_latest WHERE {where} GROUP BY seller_name
+                       )) AS total_sellers
+                FROM items_latest WHERE {where}
+                """,
+                (keyword, keyword),
+            )
+            stats = dict(await cursor.fetchone())
+
+            cursor = await db.execute(
+                f"""
+                SELECT seller_name, COUNT(*) AS item_count, AVG(price) AS avg_price,
+                       MIN(price) AS min_price, MAX(price) AS max_price
+                FROM items_latest WHERE {where}
+                GROUP BY seller_name
+                ORDER BY item_count DESC, seller_name
+                LIMIT ? OFFSET ?
+                """,
+                (keyword, limit, offset),
+            )
+            groups = [dict(r) for r in await cursor.fetchall()]
+
+            listings: Dict[Optional[str], List[dict]] = {g["seller_name"]: [] for g in groups}
+            if groups:
+                names = list(listings)
+                cursor = await db.execute(
+                    f"""
+                    SELECT seller_name, title, price, item_link, crawl_time FROM (
+                        SELECT seller_name, title, price, item_link, crawl_time,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY seller_name ORDER BY crawl_time DESC
+                               ) AS rn
+                        FROM items_latest
+                        WHERE {where} AND seller_name IN ({",".join("?" * len(names))})
+                    )
+                    WHERE rn <= ?
+                    ORDER BY seller_name, rn
+                    """,
+                    (keyword, *names, samples),
+                )
+                for r in await cursor.fetchall():
+                    listings[r["seller_name"]].append({
+                        "title": r["title"] or "",
+                        "price": r["price"],
+                        "item_link": r["item_link"] or "",
+                        "crawl_time": r["crawl_time"] or "",
+                    })
+
+        sellers = [
+            {
+                "seller_name": g["seller_name"] or "未知卖家",
+                "item_count": g["item_count"],
+                "avg_price": round(g["avg_price"], 2),
+                "min_price": g["min_price"],
+                "max_price": g["max_price"],
+                "items": listings[g["seller_name"]],
+            }
+            for g in groups
+        ]
+        total_items = stats["total_items"]
+        return {
+            "keyword": keyword,
+            "total_sellers": stats["total_sellers"],
+            "total_items": total_items,
+            "page": page,
+            "limit": limit,
+            "sellers": sellers,
+            "price_stats": {
+                "avg": round(stats["avg_price"], 2) if total_items else 0,
+                "min": stats["min_price"] if total_items else 0,
+                "max": stats["max_price"] if total_items else 0,
+            },
+        }
+
+    async def get_bargain_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        按相对基准价（market_prices）的溢价率从低到高取当前商品 Top N。
+
+        基准价关键词不区分大小写（同一关键词取最早录入的一条，有二手公允价时优先用它）；
+        同一关键词内溢价率随价格单调，所以每个关键词只需沿 (LOWER(keyword), price)
+        表达式索引取最便宜的 N 条，再对这些候选整体排序取前 N，与历史 / 商品总量无关。
+        """
+        async with read_db() as db:
+            cursor = await db.execute(
+                """
+                WITH refs AS (
+                    SELECT kw, ref FROM (
+                        SELECT LOWER(TRIM(keyword)) AS kw,
+                               COALESCE(NULLIF(fair_used_price, 0), reference_price) AS ref,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY LOWER(TRIM(keyword)) ORDER BY created_at
+                               ) AS rn
+                        FROM market_prices
+                    )
+                    WHERE rn = 1
+                )
+                SELECT l.title, l.price, refs.ref AS reference_price,
+                       CASE WHEN refs.ref > 0
+                            THEN ROUND((l.price - refs.ref) / refs.ref * 100, 2)
+                            ELSE 0.0 END AS premium_rate,
+                       l.item_link, l.image_url, l.platform, l.keyword
+                FROM refs
+                JOIN items_latest AS l ON l.rowid IN (
+                    SELECT rowid FROM items_latest
+                    WHERE LOWER(keyword) = refs.kw AND price > 0
+                    ORDER BY price
+                    LIMIT :limit
+                )
+                ORDER BY premium_rate, l.price
+                LIMIT :limit
+                """,
+                {"limit": limit},
+            )
+            return [dict(r) for r in await cursor.fetchall()]
+
+    async def get_latest_prices(self, keywords: List[str]) -> List[Dict[str, Any]]:
+        """若干关键词下每个商品的当前价格：[{item_id, keyword, platform, price}]，只读 items_latest"""
+        if not keywords:
+            return []
+        placeholders = ",".join("?" * len(keywords))
+        async with read_db() as db:
+            cursor = await db.execute(
+                f"""
+                SELECT item_id, keyword, platform, price FROM items_latest
+                WHERE keyword IN ({placeholders})
+                """,
+                list(keywords),
+            )
+            rows = await cursor.fetchall()
+            return [dict(r) for r in rows]
+
+    async def get_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取单个商品最新一次抓取的完整记录（详情视图按需加载原始信息）。
+        热库中没有时按月份从新到旧查找归档文件（商品的快照可能已全部归档）。
+        """
+        sql = (
+            f"SELECT {FULL_COLUMNS} FROM items {FULL_JOINS} "
+            "WHERE item_id = ? ORDER BY crawl_time DESC LIMIT 1"
+        )
+        async with read_db() as db:
+            cursor = await db.execute(sql, (item_id,))
+            row = await cursor.fetchone()
+        if row:
+            return row_to_record(dict(row))
+        async with aclosing(iter_archive_rows(sql, (item_id,), newest_first=True, as_dict=True)) as chunks:
+            async for rows in chunks:
+                return row_to_record(rows[0])
+        return None
 
     async def get_item_price_history(
         self, item_id: str, limit: int = 100
     ) -> List[Dict[str, Any]]:
-        """获取某商品的价格历史"""
-        db = await get_db()
-        try:
+        """获取某商品的价格历史（价格变动日志，每次变价一条）"""
+        async with read_db() as db:
             cursor = await db.execute(
                 """
-                SELECT item_id, task_name, title, price, crawl_time
-                FROM items
+                SELECT item_id, task_name, title, price, event_time AS crawl_time
+                FROM item_price_events
                 WHERE item_id = ?
-                ORDER BY crawl_time ASC
+                ORDER BY event_time ASC
                 LIMIT ?
                 """,
                 (item_id, limit),
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def get_batch_price_history(
         self, item_ids: List[str], limit_per_item: int = 50
     ) -> Dict[str, List[Dict[str, Any]]]:
         """批量获取多个商品的价格历史"""
-        result: Dict[str, List[Dict[str, Any]]] = {}
-        db = await get_db()
-        try:
-            for item_id in item_ids:
-                cursor = await db.execute(
-                    """
-                    SELECT item_id, task_name, title, price, crawl_time
-                    FROM items
-                    WHERE item_id = ?
-                    ORDER BY crawl_time ASC
-                    LIMIT ?
-                    """,
-                    (item_id, limit_per_item),
-                )
-                rows = await cursor.fetchall()
-                result[item_id] = [dict(r) for r in rows]
-        finally:
-            await db.close()
+        result: Dict[str, List[Dict[str, Any]]] = {item_id: [] for item_id in item_ids}
+        if not item_ids:
+            return result
+        placeholders = ",".join("?" * len(item_ids))
+        async with read_db() as db:
+            cursor = await db.execute(
+                f"""
+                SELECT item_id, task_name, title, price, crawl_time FROM (
+                    SELECT item_id, task_name, title, price, event_time AS crawl_time,
+                           ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY event_time ASC) AS rn
+                    FROM item_price_events
+                    WHERE item_id IN ({placeholders})
+                ) WHERE rn <= ?
+                """,
+                (*item_ids, limit_per_item),
+            )
+            for row in await cursor.fetchall():
+                result[row["item_id"]].append(dict(row))
+        for history in result.values():
+            history.sort(key=lambda r: r["crawl_time"])
         return result
 
     async def delete_by_keyword(self, keyword: str) -> int:
-        """删除某关键词的所有数据"""
-        db = await get_db()
-        try:
+        """删除某关键词的所有数据（含归档快照、价格日汇总、价格变动日志与不再被引用的原始 JSON）"""
+        async with write_db() as db:
             cursor = await db.execute(
                 "DELETE FROM items WHERE keyword = ?", (keyword,)
             )
-            await db.commit()
-            return cursor.rowcount
-        finally:
-            await db.close()
+            deleted = cursor.rowcount
+            await db.execute("DELETE FROM item_price_events WHERE keyword = ?", (keyword,))
+            await self.rollups.delete_keyword(keyword)
+            await prune_orphan_blobs()
+        return deleted + await delete_keyword_from_archives(keyword)
 
     async def count(self) -> int:
-        """总记录数"""
-        db = await get_db()
-        try:
-            cursor = await db.execute("SELECT COUNT(*) as cnt FROM items")
+        """总记录数（读 item_counts）"""
+        async with read_db() as db:
+            cursor = await db.execute("SELECT COALESCE(SUM(cnt), 0) as cnt FROM item_counts")
             row = await cursor.fetchone()
             return dict(row)["cnt"] if row else 0
-        finally:
-            await db.close()
     
     async def query_items(
         self,
         filters: Optional[Dict[str, Any]] = None,
         order_by: str = "crawl_time",
-        limit: int = 500
+        limit: int = 500,
+        projection: str = "summary",
+        latest_only: bool = False,
     ) -> List[dict]:
         """
         通用查询方法，支持多种筛选和排序
@@ -499,6 +1048,8 @@ class ItemRepository:
             filters: 筛选条件字典 {字段名: 值}
             order_by: 排序字段 (crawl_time/price/profit_rate/profit)
             limit: 最大数量
+            projection: summary（列表轻量投影）/ full（完整原始信息）
+            latest_only: 只返回每个商品的最新快照（筛选走 items_latest）
             
         Returns:
             商品列表（JSONL 格式）
@@ -521,21 +1072,89 @@ class ItemRepository:
             "profit": "estimated_profit DESC"
         }
         order_clause = order_map.get(order_by, "crawl_time DESC")
+        columns, joins = _projection(projection)
+
+        if latest_only:
+            # 先在 items_latest 上按索引筛选、排序、截断，再按 snapshot_id 取回快照行；
+            # CROSS JOIN 固定 picked 为外层循环，输出即 picked 的顺序
+            sql = f"""
+                WITH picked AS (
+                    SELECT snapshot_id FROM items_latest {where}
+                    ORDER BY {order_clause}
+                    LIMIT ?
+                )
+                SELECT {columns} FROM picked CROSS JOIN items ON items.id = picked.snapshot_id {joins}
+            """
+        else:
+            sql = f"""
+                SELECT {columns} FROM items {joins} {where}
+                ORDER BY {order_clause}
+                LIMIT ?
+            """
         
-        db = await get_db()
-        try:
+        async with read_db() as db:
+            cursor = await db.execute(sql, params + [limit])
+            rows = await cursor.fetchall()
+            return [_to_record(dict(r), projection) for r in rows]
+
+    async def query_latest_evaluated(
+        self,
+        keyword: Optional[str] = None,
+        category_id: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        platform: Optional[str] = None,
+        recommended_only: bool = False,
+        priced_only: bool = False,
+        order_by: str = "profit_rate",
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        每个商品的最新快照按已落库的价格本评估列筛选 / 排序，返回 {items, total}。
+        order_by: profit_rate / profit / price / crawl_time
+        """
+        conditions = []
+        params: list = []
+        if keyword:
+            conditions.append("keyword = ?")
+            params.append(keyword)
+        if category_id:
+            conditions.append("category_id = ?")
+            params.append(category_id)
+        if statuses:
+            conditions.append(f"evaluation_status IN ({','.join('?' * len(statuses))})")
+            params += list(statuses)
+        if platform:
+            conditions.append("platform = ?")
+            params.append(platform)
+        if recommended_only:
+            conditions.append("is_recommended = 1")
+        if priced_only:
+            conditions.append("price > 0")
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+        order_map = {
+            "profit_rate": "estimated_profit_rate DESC",
+            "profit": "estimated_profit DESC",
+            "price": "price ASC",
+            "crawl_time": "crawl_time DESC",
+        }
+        order_clause = order_map.get(order_by, "estimated_profit_rate DESC")
+        async with read_db() as db:
+            cursor = await db.execute(f"SELECT COUNT(*) FROM items_latest {where}", params)
+            total = (await cursor.fetchone())[0]
             cursor = await db.execute(
                 f"""
-                SELECT * FROM items {where}
-                ORDER BY {order_clause}
-                LIMIT ?
+                WITH picked AS (
+                    SELECT snapshot_id FROM items_latest {where}
+                    ORDER BY {order_clause}
+                    LIMIT ?
+                )
+                SELECT {SUMMARY_COLUMNS} FROM picked CROSS JOIN items ON items.id = picked.snapshot_id
                 """,
-                params + [limit]
+                params + [limit],
             )
             rows = await cursor.fetchall()
-            return [row_to_record(dict(r)) for r in rows]
-        finally:
-            await db.close()
+        return {"items": [row_to_summary(dict(r)) for r in rows], "total": total}
 
     async def get_similar_prices(
         self, keyword: str, days: int = 30, limit: int = 100
@@ -551,8 +1170,7 @@ class ItemRepository:
         Returns:
             价格列表（浮点数）
         """
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 """
                 SELECT price FROM items
@@ -566,5 +1184,3 @@ class ItemRepository:
             )
             rows = await cursor.fetchall()
             return [float(r["price"]) for r in rows]
-        finally:
-            await db.close()
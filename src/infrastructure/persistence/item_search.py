@@ -0,0 +1,42 @@
+"""
+商品标题全文检索 —— items_fts（FTS5 trigram）
+
+items_fts 以 items 为外部内容表（content_rowid = items.id），索引 title / description，
+由 sqlite_manager 中的触发器随 items 增删改同步；归档出热库的快照不在索引内。
+
+trigram 分词按连续 3 个字符切分，不依赖空格分词，中文 / 日文标题与英文型号（A7M4）
+都能做子串匹配。检索词按空白切分、各词之间为 AND：
+- 不少于 3 个字符的词走 MATCH（可用 bm25 排序）
+- 不足 3 个字符的词 trigram 无法索引，改用 LIKE 在命中结果上补充过滤；
+  全部是短词时只能 LIKE 扫描（调用方应同时带上关键词等条件缩小范围）
+"""
+from typing import List, Optional, Tuple
+
+# trigram 可索引的最短检索词
+MIN_MATCH_CHARS = 3
+# 检索词数量上限，避免拼出过长的查询
+_MAX_TERMS = 8
+
+
+def split_search_terms(q: str) -> Tuple[Optional[str], List[str]]:
+    """
+    将检索串拆成 (FTS5 MATCH 表达式, 短词列表)。
+    每个长词作为短语加双引号，避免 AND / OR / NEAR / 括号等被解析为 FTS5 语法。
+    """
+    terms = [t for t in (q or "").split() if t][:_MAX_TERMS]
+    phrases = ['"' + t.replace('"', '""') + '"' for t in terms if len(t) >= MIN_MATCH_CHARS]
+    short_terms = [t for t in terms if len(t) < MIN_MATCH_CHARS]
+    return (" ".join(phrases) or None), short_terms
+
+
+def like_conditions(terms: List[str], columns: List[str]) -> Tuple[List[str], list]:
+    """短词的 LIKE 条件：每个词需出现在任一列中"""
+    conditions: List[str] = []
+    params: list = []
+    for term in terms:
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conditions.append(
+            "(" + " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in columns) + ")"
+        )
+        params += [pattern] * len(columns)
+    return conditions, params
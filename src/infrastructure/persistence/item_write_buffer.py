@@ -0,0 +1,94 @@
+"""
+商品写缓冲（write-behind）
+
+爬虫逐条产出商品记录，缓冲区累积后交给入库队列（item_ingest_queue）一次事务批量落库：
+- 条数达到 max_items 时立即刷新
+- 距上次刷新超过 flush_interval 秒时由后台任务刷新
+- close() 时刷新剩余记录（爬虫结束 / 被取消时调用）
+"""
+import asyncio
+from typing import Dict, List, Optional
+
+from src.infrastructure.config.settings import database_settings
+from src.infrastructure.persistence.item_ingest_queue import ingest
+from src.infrastructure.persistence.item_repository import ItemRepository
+
+
+class ItemWriteBuffer:
+    """items 表写缓冲"""
+
+    def __init__(
+        self,
+        repo: Optional[ItemRepository] = None,
+        max_items: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        compact: Optional[bool] = None,
+    ):
+        self.repo = repo or ItemRepository()
+        self.max_items = max(1, max_items or database_settings.write_buffer_size)
+        self.flush_interval = (
+            flush_interval if flush_interval is not None
+            else database_settings.write_buffer_flush_seconds
+        )
+        # 写入时合并状态未变的快照（None 时按 ITEM_COMPACT_ON_INGEST）
+        self.compact = compact
+        self._pending: List[dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._closed = False
+        self.stats: Dict[str, int] = {"inserted": 0, "compacted": 0, "ignored": 0, "invalid": 0, "failed": 0, "flushes": 0}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def add(self, record: dict) -> None:
+        """加入一条记录；缓冲区已满时立即刷新"""
+        if self._closed:
+            raise RuntimeError("ItemWriteBuffer 已关闭")
+        self._pending.append(record)
+        if self._timer is None and self.flush_interval > 0:
+            self._timer = asyncio.create_task(self._flush_periodically())
+        if len(self._pending) >= self.max_items:
+            await self.flush()
+
+    async def flush(self) -> int:
+        """将缓冲区中的记录写入数据库，返回实际写入条数"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, []
+            try:
+                result = await ingest(batch, compact=self.compact, repo=self.repo)
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                print(f"[ItemWriteBuffer] 批量写入 {len(batch)} 条失败: {e}")
+                return 0
+            self.stats["flushes"] += 1
+            for key in ("inserted", "compacted", "ignored", "invalid"):
+                self.stats[key] += result.get(key, 0)
+            return result.get("inserted", 0)
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            # shield: close() 取消定时任务时不打断进行中的写入
+            await asyncio.shield(self.flush())
+
+    async def close(self) -> None:
+        """停止定时刷新并写入剩余记录"""
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+            self._timer = None
+        await self.flush()
+
+    async def __aenter__(self) -> "ItemWriteBuffer":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
@@ -0,0 +1,312 @@
+"""
+价格日汇总（rollup）—— 按 (keyword, platform, day) 增量维护的价格统计
+
+- items 插入时由触发器把 (keyword, platform, day, price) 记入 price_rollup_pending
+- 写入方在同一事务内调用 apply_pending()，折叠进 price_daily_rollup：
+  count / sum / min / max + 可合并的分位数草图（中位数等）
+- 价格趋势、溢价概览、自动行情价直接读汇总行，每天一行，不再扫描原始快照
+- 全量重建会同时扫描归档文件（item_archive），已归档月份的汇总不会丢失
+- 全量重建（升级老库 / 修复数据）:
+  python -m src.infrastructure.persistence.price_rollup_repository [--keyword KW]
+"""
+import argparse
+import asyncio
+import json
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.infrastructure.persistence.item_archive import iter_archive_rows
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+# 草图相对误差：估计的分位数与真实值相差不超过 1%
+SKETCH_ALPHA = 0.01
+_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+
+_FETCH_CHUNK = 5000
+
+
+class PriceSketch:
+    """
+    对数分桶的分位数草图（DDSketch 思路）。
+    桶 i 覆盖 (gamma^(i-1), gamma^i]，只记计数；两个草图按桶相加即可合并。
+    """
+
+    def __init__(self, bins: Optional[Dict[int, int]] = None):
+        self.bins: Dict[int, int] = dict(bins or {})
+
+    @classmethod
+    def from_json(cls, text: Optional[str]) -> "PriceSketch":
+        return cls({int(k): v for k, v in json.loads(text or "{}").items()})
+
+    def to_json(self) -> str:
+        return json.dumps({str(k): v for k, v in sorted(self.bins.items())}, separators=(",", ":"))
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    @staticmethod
+    def _index(value: float) -> int:
+        return math.ceil(math.log(value) / _LOG_GAMMA)
+
+    def add(self, value: float, n: int = 1) -> None:
+        if value is None or value <= 0:
+            return
+        idx = self._index(value)
+        self.bins[idx] = self.bins.get(idx, 0) + n
+
+    def merge(self, other: "PriceSketch") -> "PriceSketch":
+        for idx, n in other.bins.items():
+            self.bins[idx] = self.bins.get(idx, 0) + n
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """估计第 q 分位数（0~1），空草图返回 None"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for idx in sorted(self.bins):
+            seen += self.bins[idx]
+            if seen > rank:
+                return 2 * _GAMMA ** idx / (_GAMMA + 1)
+        return None
+
+    def count_at_most(self, value: float) -> int:
+        """估计 ≤ value 的样本数（按 value 所在桶的上界计）"""
+        if value is None or value <= 0:
+            return 0
+        limit = self._index(value)
+        return sum(n for idx, n in self.bins.items() if idx <= limit)
+
+
+class RollupBucket:
+    """单个汇总单元（一天 / 一个平台 / 若干关键词合并后）的统计量"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sketch = PriceSketch()
+
+    @classmethod
+    def from_row(cls, row: dict) -> "RollupBucket":
+        bucket = cls()
+        bucket.count = row["cnt"]
+        bucket.total = row["price_sum"]
+        bucket.min = row["price_min"]
+        bucket.max = row["price_max"]
+        bucket.sketch = PriceSketch.from_json(row["sketch"])
+        return bucket
+
+    def add(self, price: float) -> None:
+        self.count += 1
+        self.total += price
+        self.min = price if self.min is None else min(self.min, price)
+        self.max = price if self.max is None else max(self.max, price)
+        self.sketch.add(price)
+
+    def merge(self, other: "RollupBucket") -> "RollupBucket":
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def avg(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """草图估计值夹在真实 min / max 之间（单一价格时即为精确值）"""
+        estimate = self.sketch.quantile(q)
+        if estimate is None:
+            return None
+        return min(max(estimate, self.min), self.max)
+
+    @property
+    def median(self) -> Optional[float]:
+        return self.quantile(0.5)
+
+    def count_at_most(self, value: Optional[float]) -> int:
+        if value is None or self.min is None or value < self.min:
+            return 0
+        if value >= self.max:
+            return self.count
+        return self.sketch.count_at_most(value)
+
+    def to_stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_price": round(self.avg, 2) if self.count else 0,
+            "median_price": round(self.median, 2) if self.count else 0,
+            "min_price": round(self.min, 2) if self.count else 0,
+            "max_price": round(self.max, 2) if self.count else 0,
+        }
+
+
+BucketKey = Tuple[str, str, str]  # (keyword, platform, day)
+
+
+def since_day(days: int) -> str:
+    """最近 days 天窗口的起始日期（YYYY-MM-DD）"""
+    return (datetime.now() - timedelta(days=days)).date().isoformat()
+
+
+def _aggregate(rows: Iterable[Tuple[str, str, str, float]], buckets: Dict[BucketKey, RollupBucket]) -> None:
+    for keyword, platform, day, price in rows:
+        key = (keyword, platform or "xianyu", day)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = RollupBucket()
+        bucket.add(price)
+
+
+async def _save_buckets(db, buckets: Dict[BucketKey, RollupBucket], merge_existing: bool) -> None:
+    for (keyword, platform, day), bucket in buckets.items():
+        if merge_existing:
+            cursor = await db.execute(
+                "SELECT * FROM price_daily_rollup WHERE keyword = ? AND platform = ? AND day = ?",
+                (keyword, platform, day),
+            )
+            row = await cursor.fetchone()
+            if row:
+                bucket = RollupBucket.from_row(dict(row)).merge(bucket)
+        await db.execute(
+            """
+            INSERT OR REPLACE INTO price_daily_rollup
+                (keyword, platform, day, cnt, price_sum, price_min, price_max, sketch)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (keyword, platform, day, bucket.count, bucket.total,
+             bucket.min, bucket.max, bucket.sketch.to_json()),
+        )
+
+
+class PriceRollupRepository:
+    """price_daily_rollup 表的维护与查询"""
+
+    async def apply_pending(self) -> int:
+        """
+        把触发器记录的新价格折叠进日汇总，返回处理的价格条数。
+        在写事务内调用（ItemRepository 写入后），与 items 的插入一起提交。
+        """
+        async with write_db() as db:
+            cursor = await db.execute(
+                "SELECT keyword, platform, day, price FROM price_rollup_pending"
+            )
+            rows = await cursor.fetchall()
+            if not rows:
+                return 0
+            buckets: Dict[BucketKey, RollupBucket] = {}
+            _aggregate((tuple(r) for r in rows), buckets)
+            await _save_buckets(db, buckets, merge_existing=True)
+            await db.execute("DELETE FROM price_rollup_pending")
+            return len(rows)
+
+    async def rebuild(self, keyword: Optional[str] = None) -> int:
+        """从 items 及归档文件全量重建日汇总（可只重建一个关键词），返回汇总行数"""
+        where = "WHERE price > 0 AND DATE(crawl_time) IS NOT NULL"
+        params: list = []
+        if keyword is not None:
+            where += " AND keyword = ?"
+            params.append(keyword)
+
+        buckets: Dict[BucketKey, RollupBucket] = {}
+        async with write_db() as db:
+            if keyword is not None:
+                await db.execute("DELETE FROM price_daily_rollup WHERE keyword = ?", (keyword,))
+                await db.execute("DELETE FROM price_rollup_pending WHERE keyword = ?", (keyword,))
+            else:
+                await db.execute("DELETE FROM price_daily_rollup")
+                await db.execute("DELETE FROM price_rollup_pending")
+
+            cursor = await db.execute(
+                f"""
+                SELECT keyword, COALESCE(platform, 'xianyu'), DATE(crawl_time), price
+                FROM items {where}
+                """,
+                params,
+            )
+            while True:
+                rows = await cursor.fetchmany(_FETCH_CHUNK)
+                if not rows:
+                    break
+                _aggregate((tuple(r) for r in rows), buckets)
+            async for rows in iter_archive_rows(
+                f"SELECT keyword, COALESCE(platform, 'xianyu'), DATE(crawl_time), price FROM items {where}",
+                params,
+            ):
+                _aggregate(rows, buckets)
+            await _save_buckets(db, buckets, merge_existing=False)
+        return len(buckets)
+
+    async def delete_keyword(self, keyword: str) -> None:
+        async with write_db() as db:
+            await db.execute("DELETE FROM price_daily_rollup WHERE keyword = ?", (keyword,))
+            await db.execute("DELETE FROM price_rollup_pending WHERE keyword = ?", (keyword,))
+
+    async def _fetch(
+        self, keywords: List[str], since: Optional[str], platform: Optional[str] = None
+    ) -> List[dict]:
+        if not keywords:
+            return []
+        placeholders = ",".join("?" * len(keywords))
+        conditions = [f"keyword IN ({placeholders})"]
+        params: list = list(keywords)
+        if since:
+            conditions.append("day >= ?")
+            params.append(since)
+        if platform:
+            conditions.append("platform = ?")
+            params.append(platform)
+        async with read_db() as db:
+            cursor = await db.execute(
+                f"SELECT * FROM price_daily_rollup WHERE {' AND '.join(conditions)}",
+                params,
+            )
+            return [dict(r) for r in await cursor.fetchall()]
+
+    async def get_daily(
+        self, keywords: List[str], since: Optional[str] = None, platform: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """按天合并若干关键词（及各平台）的汇总：[{date, count, avg/median/min/max_price}]"""
+        by_day: Dict[str, RollupBucket] = {}
+        for row in await self._fetch(keywords, since, platform):
+            by_day.setdefault(row["day"], RollupBucket()).merge(RollupBucket.from_row(row))
+        return [{"date": day, **bucket.to_stats()} for day, bucket in sorted(by_day.items())]
+
+    async def get_by_platform(
+        self, keywords: List[str], since: Optional[str] = None
+    ) -> Dict[str, RollupBucket]:
+        """窗口内若干关键词按平台合并的汇总：{platform: RollupBucket}"""
+        by_platform: Dict[str, RollupBucket] = {}
+        for row in await self._fetch(keywords, since):
+            by_platform.setdefault(row["platform"], RollupBucket()).merge(RollupBucket.from_row(row))
+        return by_platform
+
+
+async def _main() -> None:
+    from src.infrastructure.persistence.sqlite_manager import close_pools, init_db
+
+    parser = argparse.ArgumentParser(description="重建价格日汇总 price_daily_rollup")
+    parser.add_argument("--keyword", help="只重建指定关键词（默认全部）")
+    args = parser.parse_args()
+
+    await init_db()
+    try:
+        count = await PriceRollupRepository().rebuild(args.keyword)
+        print(f"[PriceRollup] 重建完成: {count} 个 (keyword, platform, day) 汇总行")
+    finally:
+        await close_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
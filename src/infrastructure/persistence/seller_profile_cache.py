@@ -0,0 +1,201 @@
+"""
+卖家档案缓存 —— 同一卖家的主页（商品列表 + 全部评价）在 TTL 内只采集一次
+
+- 两级缓存：进程内 LRU + seller_profiles 表（profile_json 列保存完整档案），
+  同一页面上同一卖家的多件商品、以及之后的运行（子进程 / 守护进程）都直接复用
+- 只有缺失或超过 TTL 的卖家才调用采集函数打开主页；过期档案作为 previous 传给采集函数，
+  供其增量采集（只翻到已知的商品 / 评价为止，见 scraper.scrape_user_profile）；
+  增量采集不会更新已知商品的在售 / 已售状态，距上次完整采集超过
+  SELLER_PROFILE_FULL_REFRESH_TTLS 个 TTL 时要求采集函数完整采集一次
+- 同一卖家的并发请求合并为一次采集（守护进程中多个任务同时遇到同一卖家）；
+  发起采集的运行失败或被取消时，其它等待方改用各自的采集函数重新获取
+- 采集结果为空（主页打不开 / 未捕获到头部信息）时不写入缓存，下次仍会重试；
+  只刷新了一部分、其余沿用旧档案的结果（PartialProfile）按旧档案的存在时长保存，不续期 TTL
+"""
+import asyncio
+import json
+import time
+import weakref
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from src.infrastructure.config.settings import scraper_settings
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+# 采集函数：参数为上次保存的（已过期）档案（没有时为 None）与是否需要完整采集
+ProfileFetcher = Callable[[Optional[dict], bool], Awaitable[dict]]
+
+_UPSERT_SQL = """
+    INSERT INTO seller_profiles (seller_id, seller_name, profile_json, last_updated, full_refreshed_at)
+    VALUES (?, ?, ?, datetime('now', ?), CASE WHEN ? THEN datetime('now') END)
+    ON CONFLICT(seller_id) DO UPDATE SET
+        seller_name = excluded.seller_name,
+        profile_json = excluded.profile_json,
+        last_updated = excluded.last_updated,
+        full_refreshed_at = COALESCE(excluded.full_refreshed_at, seller_profiles.full_refreshed_at)
+"""
+
+
+class PartialProfile(dict):
+    """未能完整刷新（部分字段沿用上次档案）的采集结果：缓存保存它但不刷新 last_updated"""
+
+
+class SellerProfileCache:
+    """单个数据库文件的卖家档案缓存（绑定到创建它的事件循环）"""
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        full_refresh_ttls: Optional[int] = None,
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = (
+            scraper_settings.seller_profile_ttl_hours * 3600 if ttl_seconds is None else ttl_seconds
+        )
+        self.full_refresh_ttls = (
+            scraper_settings.seller_profile_full_refresh_ttls if full_refresh_ttls is None else full_refresh_ttls
+        )
+        self.max_entries = max(1, max_entries or scraper_settings.seller_profile_cache_size)
+        # {seller_id: (过期时刻 time.time(), 档案)}，按最近使用排序
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0, "db_hits": 0, "fetched": 0, "full_fetched": 0, "coalesced": 0,
+        }
+
+    async def get(self, seller_id: str, fetch: ProfileFetcher) -> dict:
+        """返回卖家档案（副本，调用方可自由追加字段）；缓存缺失或过期时调用 fetch 采集"""
+        profile = self._lookup(seller_id)
+        if profile is not None:
+            self.stats["memory_hits"] += 1
+            return dict(profile)
+        task = self._inflight.get(seller_id)
+        owner = task is None
+        if owner:
+            task = asyncio.create_task(self._load(seller_id, fetch))
+            self._inflight[seller_id] = task
+            task.add_done_callback(lambda t: self._drop_inflight(seller_id, t))
+        else:
+            self.stats["coalesced"] += 1
+        try:
+            # asyncio.wait 不传播采集任务的异常 / 取消，合并等待方被取消也不影响采集任务
+            await asyncio.wait([task])
+        except asyncio.CancelledError:
+            if owner:
+                # 采集函数绑定在发起方运行的 BrowserContext 上，发起方被取消后该 context 随之关闭
+                task.cancel()
+                self._drop_inflight(seller_id, task)
+            raise
+        if task.cancelled() or task.exception() is not None:
+            if owner:
+                return dict(await task)  # 原样抛出
+            # 发起方的采集失败或被取消：用自己的采集函数（自己运行的 context）重新获取
+            self._drop_inflight(seller_id, task)
+            return await self.get(seller_id, fetch)
+        return dict(task.result())
+
+    def _drop_inflight(self, seller_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(seller_id) is task:
+            del self._inflight[seller_id]
+
+    def invalidate(self, seller_id: str) -> None:
+        self._entries.pop(seller_id, None)
+
+    def _lookup(self, seller_id: str) -> Optional[dict]:
+        entry = self._entries.get(seller_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._entries[seller_id]
+            return None
+        self._entries.move_to_end(seller_id)
+        return entry[1]
+
+    def _remember(self, seller_id: str, profile: dict, age_seconds: float = 0.0) -> None:
+        self._entries[seller_id] = (time.time() + self.ttl_seconds - age_seconds, profile)
+        self._entries.move_to_end(seller_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, seller_id: str, fetch: ProfileFetcher) -> dict:
+        previous, full = None, True
+        stored = await self._read(seller_id)
+        if stored is not None:
+            previous, age_seconds, full_age_seconds = stored
+            if age_seconds < self.ttl_seconds:
+                self.stats["db_hits"] += 1
+                self._remember(seller_id, previous, age_seconds)
+                return previous
+            full = self._full_refresh_due(full_age_seconds)
+
+        profile = await fetch(previous, full)
+        self.stats["fetched"] += 1
+        if profile:
+            partial = isinstance(profile, PartialProfile)
+            full = full and not partial
+            self.stats["full_fetched"] += 1 if full else 0
+            # 部分刷新仍按旧档案的时长计算过期，下次（新的运行）会再尝试完整刷新
+            age_seconds = age_seconds if stored is not None and partial else 0.0
+            profile = dict(profile)
+            self._remember(seller_id, profile, age_seconds)
+            await self._write(seller_id, profile, age_seconds, full)
+        return profile
+
+    def _full_refresh_due(self, full_age_seconds: Optional[float]) -> bool:
+        """从未完整采集过，或距上次完整采集已超过 full_refresh_ttls 个 TTL"""
+        if full_age_seconds is None:
+            return True
+        return self.full_refresh_ttls > 0 and full_age_seconds >= self.full_refresh_ttls * self.ttl_seconds
+
+    async def _read(self, seller_id: str) -> Optional[Tuple[dict, float, Optional[float]]]:
+        """读取已保存的档案（含已过期的）、其已存在的秒数与距上次完整采集的秒数（从未完整采集为 None）"""
+        async with read_db(self.db_path) as db:
+            cursor = await db.execute(
+                """SELECT profile_json,
+                          (julianday('now') - julianday(last_updated)) * 86400 AS age,
+                          (julianday('now') - julianday(full_refreshed_at)) * 86400 AS full_age
+                   FROM seller_profiles
+                   WHERE seller_id = ? AND profile_json IS NOT NULL""",
+                (seller_id,),
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        full_age = None if row[2] is None else max(float(row[2]), 0.0)
+        return json.loads(row[0]), max(float(row[1] or 0), 0.0), full_age
+
+    async def _write(self, seller_id: str, profile: dict, age_seconds: float = 0.0, full: bool = False) -> None:
+        try:
+            async with write_db(self.db_path) as db:
+                await db.execute(
+                    _UPSERT_SQL,
+                    (
+                        seller_id,
+                        profile.get("卖家昵称") or "",
+                        json.dumps(profile, ensure_ascii=False),
+                        f"-{age_seconds:.3f} seconds",
+                        full,
+                    ),
+                )
+        except Exception as e:
+            # 写库失败只影响跨运行复用，本次运行仍使用内存中的档案
+            print(f"   [卖家缓存] 保存卖家 {seller_id} 的档案失败: {e}")
+
+
+# 进程级注册表：{event_loop: {db_path: SellerProfileCache}}
+_caches: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, SellerProfileCache]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_seller_profile_cache(db_path: Optional[str] = None) -> SellerProfileCache:
+    """获取当前事件循环下指定数据库文件的卖家档案缓存（不存在则创建）"""
+    db_path = db_path or sqlite_manager.DB_PATH
+    caches = _caches.setdefault(asyncio.get_running_loop(), {})
+    cache = caches.get(db_path)
+    if cache is None:
+        cache = caches[db_path] = SellerProfileCache(db_path)
+    return cache
@@ -1,21 +1,348 @@
 """SQLite 数据库管理器"""
+import asyncio
 import aiosqlite
 import os
+from typing import AsyncContextManager, Optional
+
+from src.infrastructure.config.settings import database_settings
+from src.infrastructure.persistence.sqlite_pool import (
+    close_pools,
+    get_pool,
+    get_pool_stats,
+)
 
 DB_PATH = "data/monitor.db"
 
 
+def read_db(db_path: Optional[str] = None) -> AsyncContextManager[aiosqlite.Connection]:
+    """
+    从连接池借出一个只读连接。
+
+    用法: ``async with read_db() as db: ...``
+    """
+    return get_pool(db_path or DB_PATH).reader()
+
+
+def write_db(db_path: Optional[str] = None) -> AsyncContextManager[aiosqlite.Connection]:
+    """
+    获取串行化的写连接，作用域即一个事务（工作单元）：
+    正常退出自动提交，抛出异常自动回滚；嵌套调用复用同一事务。
+    """
+    return get_pool(db_path or DB_PATH).writer()
+
+
+# 跨多个 service 调用的写操作用 unit_of_work 包裹，使其在同一事务内提交
+unit_of_work = write_db
+
+
+def exclusive_write(db_path: Optional[str] = None) -> AsyncContextManager[None]:
+    """独占写锁但不借出写连接，供用独立连接写入的操作与池内写者串行（见 SqlitePool.exclusive）"""
+    return get_pool(db_path or DB_PATH).exclusive()
+
+
+async def checkpoint_db(db_path: Optional[str] = None) -> dict:
+    """
+    WAL 检查点：先 PASSIVE 写回（不阻塞读写），
+    WAL 文件仍超过 SQLITE_WAL_SIZE_LIMIT_MB 且已全部写回时再 TRUNCATE 截断文件。
+    """
+    pool = get_pool(db_path or DB_PATH)
+    result = await pool.checkpoint("PASSIVE")
+    limit = database_settings.wal_size_limit_mb * 1024 * 1024
+    if not result["busy"] and result["frames"] == result["checkpointed"] and pool.wal_size() > limit:
+        result = await pool.checkpoint("TRUNCATE")
+        result["truncated"] = not result["busy"]
+    return result
+
+
+async def run_checkpoint_periodically(interval_seconds: Optional[float] = None) -> None:
+    """后台任务：按间隔执行 WAL 检查点（应用生命周期内运行，取消即停止）"""
+    interval = (
+        interval_seconds if interval_seconds is not None
+        else database_settings.wal_checkpoint_interval_seconds
+    )
+    if interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await checkpoint_db()
+        except Exception as e:
+            print(f"[SQLite] WAL 检查点失败: {e}")
+
+
 async def get_db() -> aiosqlite.Connection:
+    """
+    打开一个独立连接（不经过连接池，调用方负责 close）。
+    仅供迁移脚本 / 测试等一次性场景使用，业务代码请使用 read_db / write_db。
+    """
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     db = await aiosqlite.connect(DB_PATH)
     db.row_factory = aiosqlite.Row
+    await db.execute("PRAGMA busy_timeout = 5000")
     return db
 
 
+# ==========================================
+# items_latest: 每个 item_id 一行的最新快照（物化表，触发器随 items 写入同步维护）
+# 跨平台比价 / 捡漏排行 / 溢价地图只关心商品当前状态，读它而不是扫描全部抓取历史
+# ==========================================
+_LATEST_COLUMNS = (
+    "item_id", "snapshot_id", "task_name", "keyword", "platform", "currency",
+    "title", "price", "crawl_time", "last_seen", "item_link", "image_url",
+    "is_recommended", "seller_name", "seller_credit",
+    "category_id", "category_name", "evaluation_status",
+    "purchase_range_low", "purchase_range_high",
+    "estimated_profit", "estimated_profit_rate", "premium_rate",
+)
+_LATEST_COLUMN_LIST = ", ".join(_LATEST_COLUMNS)
+# items 中对应的列：snapshot_id 即 items.id
+_LATEST_SOURCE_LIST = ", ".join("id AS snapshot_id" if c == "snapshot_id" else c for c in _LATEST_COLUMNS)
+# 整行回退时更新的列（item_id 为主键不变）
+_LATEST_UPDATE_LIST = ", ".join(c for c in _LATEST_COLUMNS if c != "item_id")
+_LATEST_UPDATE_SOURCE_LIST = ", ".join(
+    "id" if c == "snapshot_id" else c for c in _LATEST_COLUMNS if c != "item_id"
+)
+
+
+def _items_column(column: str, alias: str) -> str:
+    """items_latest 列在 items 行（NEW / OLD）上的取值表达式"""
+    return f"{alias}.id" if column == "snapshot_id" else f"{alias}.{column}"
+
+
+def _latest_values(alias: str) -> str:
+    return ", ".join(_items_column(c, alias) for c in _LATEST_COLUMNS)
+
+
+def _latest_assignments(source: str) -> str:
+    """UPDATE SET 子句；source 为 excluded 时取 items_latest 自身列名"""
+    return ",\n                ".join(
+        f"{c} = {source}.{c}" if source == "excluded" else f"{c} = {_items_column(c, source)}"
+        for c in _LATEST_COLUMNS if c != "item_id"
+    )
+
+
+_ITEMS_LATEST_TABLE = """
+    CREATE TABLE IF NOT EXISTS items_latest (
+        item_id TEXT PRIMARY KEY,
+        snapshot_id INTEGER NOT NULL,           -- 最新一次抓取对应的 items.id
+        task_name TEXT NOT NULL,
+        keyword TEXT NOT NULL,
+        platform TEXT DEFAULT 'xianyu',
+        currency TEXT DEFAULT 'CNY',
+        title TEXT,
+        price REAL,
+        crawl_time TEXT NOT NULL,
+        last_seen TEXT,                         -- 最新快照状态最后一次被看到的时间
+        first_seen TEXT,                        -- 该商品最早被抓取到的时间
+        item_link TEXT,
+        image_url TEXT,
+        is_recommended INTEGER DEFAULT 0,
+        seller_name TEXT,
+        seller_credit TEXT,
+        category_id TEXT,
+        category_name TEXT,
+        evaluation_status TEXT,
+        purchase_range_low REAL,
+        purchase_range_high REAL,
+        estimated_profit REAL,
+        estimated_profit_rate REAL,
+        premium_rate REAL
+    );
+    -- 覆盖 get_latest_prices（item_id 在表中不是 rowid，需放进索引）
+    CREATE INDEX IF NOT EXISTS idx_items_latest_keyword_price
+        ON items_latest(keyword, platform, price, item_id);
+    DROP INDEX IF EXISTS idx_items_latest_keyword;
+    -- 捡漏雷达: 按关键词 / 全部商品取最新抓取的若干条
+    CREATE INDEX IF NOT EXISTS idx_items_latest_keyword_crawl_time ON items_latest(keyword, crawl_time);
+    CREATE INDEX IF NOT EXISTS idx_items_latest_crawl_time ON items_latest(crawl_time);
+    CREATE INDEX IF NOT EXISTS idx_items_latest_category ON items_latest(category_id, platform);
+    CREATE INDEX IF NOT EXISTS idx_items_latest_platform_price ON items_latest(platform, price);
+    -- 捡漏雷达 / 溢价地图: 按已落库的评估列筛选、按利润率排序
+    CREATE INDEX IF NOT EXISTS idx_items_latest_evaluation
+        ON items_latest(evaluation_status, estimated_profit_rate);
+    CREATE INDEX IF NOT EXISTS idx_items_latest_profit_rate ON items_latest(estimated_profit_rate);
+    CREATE INDEX IF NOT EXISTS idx_items_latest_keyword_profit_rate
+        ON items_latest(keyword, estimated_profit_rate);
+    CREATE INDEX IF NOT EXISTS idx_items_latest_category_profit_rate
+        ON items_latest(category_id, estimated_profit_rate);
+    CREATE INDEX IF NOT EXISTS idx_items_latest_snapshot ON items_latest(snapshot_id);
+    -- 捡漏排行榜: 基准价关键词不区分大小写匹配，按价格取每个关键词最便宜的若干条
+    CREATE INDEX IF NOT EXISTS idx_items_latest_keyword_lower_price
+        ON items_latest(LOWER(keyword), price);
+    -- 竞品观察: 按卖家分组统计、每个卖家取最新的几条（覆盖分组与窗口排序）
+    CREATE INDEX IF NOT EXISTS idx_items_latest_keyword_seller
+        ON items_latest(keyword, seller_name, crawl_time, price);
+"""
+
+_ITEMS_LATEST_ADDED_COLUMNS = (
+    ("last_seen", "TEXT"),
+    ("first_seen", "TEXT"),
+)
+
+# 触发器每次启动重建，定义变更（新增列等）对老库同样生效
+_ITEMS_LATEST_TRIGGERS = f"""
+    DROP TRIGGER IF EXISTS trg_items_latest_insert;
+    DROP TRIGGER IF EXISTS trg_items_latest_update;
+    DROP TRIGGER IF EXISTS trg_items_latest_delete;
+
+    -- 新快照只在比已有的更新时覆盖（乱序补录的历史行不会回退当前状态），
+    -- first_seen 取所有快照中最早的抓取时间
+    CREATE TRIGGER trg_items_latest_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_latest ({_LATEST_COLUMN_LIST}, first_seen)
+        VALUES ({_latest_values("NEW")}, NEW.crawl_time)
+        ON CONFLICT(item_id) DO UPDATE SET
+                {_latest_assignments("excluded")}
+        WHERE excluded.crawl_time >= items_latest.crawl_time;
+        UPDATE items_latest SET first_seen = NEW.crawl_time
+        WHERE item_id = NEW.item_id AND first_seen > NEW.crawl_time;
+    END;
+    -- 最新快照本身被修改（如回写评估字段）时同步
+    CREATE TRIGGER trg_items_latest_update AFTER UPDATE ON items
+    WHEN EXISTS (SELECT 1 FROM items_latest WHERE item_id = NEW.item_id AND snapshot_id = NEW.id)
+    BEGIN
+        UPDATE items_latest SET
+                {_latest_assignments("NEW")}
+        WHERE item_id = NEW.item_id;
+    END;
+    -- 删除了最新快照时回退到剩余的最新一行（保留 first_seen；没有剩余则该商品从表中移除）
+    CREATE TRIGGER trg_items_latest_delete AFTER DELETE ON items
+    WHEN EXISTS (SELECT 1 FROM items_latest WHERE item_id = OLD.item_id AND snapshot_id = OLD.id)
+    BEGIN
+        UPDATE items_latest SET ({_LATEST_UPDATE_LIST}) = (
+            SELECT {_LATEST_UPDATE_SOURCE_LIST} FROM items
+            WHERE item_id = OLD.item_id
+            ORDER BY crawl_time DESC, id DESC LIMIT 1
+        )
+        WHERE item_id = OLD.item_id
+          AND EXISTS (SELECT 1 FROM items WHERE item_id = OLD.item_id);
+        DELETE FROM items_latest
+        WHERE item_id = OLD.item_id
+          AND NOT EXISTS (SELECT 1 FROM items WHERE item_id = OLD.item_id);
+    END;
+"""
+
+
+# 建表之后新增的 items 列：老库通过 ALTER TABLE 补齐
+_ITEMS_ADDED_COLUMNS = (
+    ("item_blob", "TEXT"),
+    ("seller_blob", "TEXT"),
+    ("ai_blob", "TEXT"),
+    ("summary_extras", "TEXT"),
+    ("seller_good_rate", "TEXT"),
+    ("last_seen", "TEXT"),
+    ("description", "TEXT"),
+)
+
+# seller_profiles 新增列：完整卖家档案 JSON（卖家档案缓存使用，见 seller_profile_cache）
+_SELLER_PROFILES_ADDED_COLUMNS = (
+    ("profile_json", "TEXT"),
+    ("full_refreshed_at", "TEXT"),  # 最近一次完整（非增量）采集的时间
+)
+
+# items_fts: 标题 / 描述全文索引（FTS5 trigram，中日文按 3 字切分做子串匹配），
+# 以 items 为外部内容表只存索引；检索语法见 item_search
+_ITEMS_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        title, description,
+        content='items', content_rowid='id',
+        tokenize='trigram'
+    );
+    CREATE TRIGGER IF NOT EXISTS trg_items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts (rowid, title, description)
+        VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts (items_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_items_fts_update AFTER UPDATE OF title, description ON items BEGIN
+        INSERT INTO items_fts (items_fts, rowid, title, description)
+        VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO items_fts (rowid, title, description)
+        VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+"""
+
+
+# 价格本评估落库：变更队列 + 关键词 → 条目视图（见 item_evaluation）
+_PRICE_BOOK_EVALUATION = """
+    -- price_book_reevaluation_pending: 价格本变更后待重评估的关键词（触发器写入，
+    -- item_evaluation 后台任务消费；重复入队会换新 id，处理期间再次变更不会漏掉）
+    CREATE TABLE IF NOT EXISTS price_book_reevaluation_pending (
+        id INTEGER PRIMARY KEY,
+        keyword TEXT NOT NULL UNIQUE
+    );
+    CREATE TRIGGER IF NOT EXISTS trg_price_book_reevaluate_insert AFTER INSERT ON price_book BEGIN
+        INSERT OR REPLACE INTO price_book_reevaluation_pending (keyword)
+        SELECT value FROM json_each(CASE WHEN json_valid(NEW.keywords) THEN NEW.keywords ELSE '[]' END);
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_price_book_reevaluate_update
+    AFTER UPDATE OF keywords, category_name, market_price, target_sell_price,
+                    shipping_fee, refurbish_fee, platform_fee_rate, other_fee,
+                    min_profit_rate, ideal_profit_rate, created_at
+    ON price_book BEGIN
+        INSERT OR REPLACE INTO price_book_reevaluation_pending (keyword)
+        SELECT value FROM json_each(CASE WHEN json_valid(OLD.keywords) THEN OLD.keywords ELSE '[]' END)
+        UNION
+        SELECT value FROM json_each(CASE WHEN json_valid(NEW.keywords) THEN NEW.keywords ELSE '[]' END);
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_price_book_reevaluate_delete AFTER DELETE ON price_book BEGIN
+        INSERT OR REPLACE INTO price_book_reevaluation_pending (keyword)
+        SELECT value FROM json_each(CASE WHEN json_valid(OLD.keywords) THEN OLD.keywords ELSE '[]' END);
+    END;
+
+    -- price_book_version: 价格本任意增删改即 +1（含其它进程的写入），
+    -- 各进程据此判断缓存的关键词匹配器是否过期（见 price_book_matcher）
+    CREATE TABLE IF NOT EXISTS price_book_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO price_book_version (id, version) VALUES (1, 0);
+    CREATE TRIGGER IF NOT EXISTS trg_price_book_version_insert AFTER INSERT ON price_book BEGIN
+        UPDATE price_book_version SET version = version + 1 WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_price_book_version_update AFTER UPDATE ON price_book BEGIN
+        UPDATE price_book_version SET version = version + 1 WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_price_book_version_delete AFTER DELETE ON price_book BEGIN
+        UPDATE price_book_version SET version = version + 1 WHERE id = 1;
+    END;
+
+    -- price_book_keywords: 关键词 → 价格本条目及派生的收购区间（与 PriceBookService._row_to_entry 一致）；
+    -- 同一关键词出现在多个条目时取最早创建的
+    DROP VIEW IF EXISTS price_book_keywords;
+    CREATE VIEW price_book_keywords AS
+    SELECT keyword, entry_id, category_name, target_sell_price, market_price, total_fees,
+           ROUND(target_sell_price - total_fees - target_sell_price * ideal_profit_rate, 2) AS purchase_ideal,
+           ROUND(target_sell_price - total_fees - target_sell_price * min_profit_rate, 2) AS purchase_upper
+    FROM (
+        SELECT k.value AS keyword, p.id AS entry_id, p.category_name,
+               p.target_sell_price, p.market_price, p.min_profit_rate, p.ideal_profit_rate,
+               ROUND(p.shipping_fee + p.refurbish_fee + p.other_fee
+                     + p.target_sell_price * p.platform_fee_rate, 2) AS total_fees,
+               ROW_NUMBER() OVER (PARTITION BY k.value ORDER BY p.created_at, p.id) AS rn
+        FROM price_book AS p,
+             json_each(CASE WHEN json_valid(p.keywords) THEN p.keywords ELSE '[]' END) AS k
+    )
+    WHERE rn = 1;
+"""
+
+
+async def _ensure_columns(db: aiosqlite.Connection, table: str, columns) -> list:
+    """老库按需 ALTER TABLE 补列，返回本次新增的列名"""
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in await cursor.fetchall()}
+    added = []
+    for name, col_type in columns:
+        if name not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+            added.append(name)
+    return added
+
+
 async def init_db():
     """初始化数据库表"""
-    db = await get_db()
-    try:
+    async with write_db() as db:
         await db.executescript("""
             -- ==========================================
             -- items: 商品主表（替代 JSONL 文件读取）
@@ -30,11 +357,13 @@ async def init_db():
 
                 -- 常查询字段（独立列 + 索引）
                 title TEXT,                             -- 商品标题
+                description TEXT,                       -- 商品描述（平台提供时）
                 price REAL,                             -- 当前售价（数字化）
                 original_price REAL,                    -- 原价
                 region TEXT,                            -- 发货地区
                 publish_time TEXT,                      -- 发布时间
-                crawl_time TEXT NOT NULL,               -- 爬取时间
+                crawl_time TEXT NOT NULL,               -- 爬取时间（状态相同的连续快照合并后为首次）
+                last_seen TEXT,                         -- 与本行状态相同的快照最后一次出现的时间
                 item_link TEXT,                         -- 商品链接
                 image_url TEXT,                         -- 主图链接
                 want_count INTEGER DEFAULT 0,           -- 想要人数
@@ -60,23 +389,151 @@ async def init_db():
                 seller_credit TEXT,                     -- 卖家信用等级
                 seller_registration TEXT,               -- 注册时长
 
-                -- "口袋"字段：存完整嵌套 JSON，不拆
-                raw_item_info TEXT,                     -- JSON: 完整商品信息
-                raw_seller_info TEXT,                   -- JSON: 完整卖家信息
-                raw_ai_analysis TEXT,                   -- JSON: 完整AI分析
+                -- "口袋"字段：完整嵌套 JSON 压缩后存入 item_blobs，这里只存内容哈希
+                item_blob TEXT,                         -- → item_blobs.hash: 完整商品信息
+                seller_blob TEXT,                       -- → item_blobs.hash: 完整卖家信息
+                ai_blob TEXT,                           -- → item_blobs.hash: 完整AI分析
+                summary_extras TEXT,                    -- JSON: [当前售价, 商品原价, 商品标签]（列表投影用）
+                seller_good_rate TEXT,                  -- 卖家好评率（列表投影用）
+                -- 旧版内联 JSON（新写入为 NULL，老数据可用 item_blob_store migrate 迁出）
+                raw_item_info TEXT,
+                raw_seller_info TEXT,
+                raw_ai_analysis TEXT,
 
                 created_at TEXT DEFAULT (datetime('now')),
                 UNIQUE(item_id, crawl_time)             -- 同一商品同一时间不重复
             );
-            CREATE INDEX IF NOT EXISTS idx_items_keyword ON items(keyword);
             CREATE INDEX IF NOT EXISTS idx_items_crawl_time ON items(crawl_time);
             CREATE INDEX IF NOT EXISTS idx_items_price ON items(price);
-            CREATE INDEX IF NOT EXISTS idx_items_recommended ON items(is_recommended);
             CREATE INDEX IF NOT EXISTS idx_items_task ON items(task_name);
-            CREATE INDEX IF NOT EXISTS idx_items_item_id ON items(item_id);
             CREATE INDEX IF NOT EXISTS idx_items_platform ON items(platform);
             CREATE INDEX IF NOT EXISTS idx_items_category_id ON items(category_id);
             CREATE INDEX IF NOT EXISTS idx_items_evaluation_status ON items(evaluation_status);
+            CREATE INDEX IF NOT EXISTS idx_items_seen ON items(keyword, platform, item_id);
+            -- 列表 / 键集分页: WHERE keyword = ? [AND is_recommended = 1] ORDER BY <col>, id
+            -- 末列之后即 rowid(id)，排序无需临时 B 树；keyword 单列查询也走这些索引
+            CREATE INDEX IF NOT EXISTS idx_items_keyword_crawl_time ON items(keyword, crawl_time);
+            CREATE INDEX IF NOT EXISTS idx_items_keyword_price ON items(keyword, price);
+            CREATE INDEX IF NOT EXISTS idx_items_keyword_publish_time ON items(keyword, publish_time);
+            -- 被上面的复合索引 / UNIQUE(item_id, crawl_time) 覆盖的单列索引；
+            -- is_recommended 只有 0/1，单列索引会让规划器放弃按排序列走索引
+            DROP INDEX IF EXISTS idx_items_keyword;
+            DROP INDEX IF EXISTS idx_items_item_id;
+            DROP INDEX IF EXISTS idx_items_recommended;
+
+            -- ==========================================
+            -- item_blobs: 原始 JSON 的内容寻址存储（sha256 → 压缩数据，重复内容只存一份）
+            -- ==========================================
+            CREATE TABLE IF NOT EXISTS item_blobs (
+                hash TEXT PRIMARY KEY,                  -- 原始 JSON 文本的 sha256
+                codec TEXT NOT NULL,                    -- 压缩方式: zlib
+                data BLOB NOT NULL,
+                raw_size INTEGER NOT NULL DEFAULT 0     -- 压缩前字节数
+            ) WITHOUT ROWID;
+
+            -- ==========================================
+            -- item_archives: 已归档月份清单（冷数据在 data/archive/items_YYYY_MM.db）
+            -- ==========================================
+            CREATE TABLE IF NOT EXISTS item_archives (
+                month TEXT PRIMARY KEY,                 -- YYYY-MM（按 crawl_time）
+                file_name TEXT NOT NULL,                -- 归档目录下的文件名
+                row_count INTEGER NOT NULL DEFAULT 0,
+                archived_at TEXT DEFAULT (datetime('now'))
+            );
+
+            -- ==========================================
+            -- item_counts: items 分维度计数（触发器增量维护，列表总数不再 COUNT(*)）
+            -- ==========================================
+            CREATE TABLE IF NOT EXISTS item_counts (
+                keyword TEXT NOT NULL,
+                task_name TEXT NOT NULL,
+                is_recommended INTEGER NOT NULL DEFAULT 0,
+                cnt INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (keyword, task_name, is_recommended)
+            );
+            CREATE TRIGGER IF NOT EXISTS trg_item_counts_insert AFTER INSERT ON items BEGIN
+                INSERT INTO item_counts (keyword, task_name, is_recommended, cnt)
+                VALUES (NEW.keyword, NEW.task_name, COALESCE(NEW.is_recommended, 0), 1)
+                ON CONFLICT(keyword, task_name, is_recommended) DO UPDATE SET cnt = cnt + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_item_counts_delete AFTER DELETE ON items BEGIN
+                UPDATE item_counts SET cnt = cnt - 1
+                WHERE keyword = OLD.keyword AND task_name = OLD.task_name
+                  AND is_recommended = COALESCE(OLD.is_recommended, 0);
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_item_counts_update
+            AFTER UPDATE OF keyword, task_name, is_recommended ON items BEGIN
+                UPDATE item_counts SET cnt = cnt - 1
+                WHERE keyword = OLD.keyword AND task_name = OLD.task_name
+                  AND is_recommended = COALESCE(OLD.is_recommended, 0);
+                INSERT INTO item_counts (keyword, task_name, is_recommended, cnt)
+                VALUES (NEW.keyword, NEW.task_name, COALESCE(NEW.is_recommended, 0), 1)
+                ON CONFLICT(keyword, task_name, is_recommended) DO UPDATE SET cnt = cnt + 1;
+            END;
+
+            -- ==========================================
+            -- price_daily_rollup: (keyword, platform, day) 价格日汇总
+            -- cnt/sum/min/max 之外的 sketch 为可合并的分位数草图（JSON: {桶序号: 计数}）
+            -- 由 price_rollup_repository 增量维护 / 全量重建
+            -- ==========================================
+            CREATE TABLE IF NOT EXISTS price_daily_rollup (
+                keyword TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                day TEXT NOT NULL,                      -- YYYY-MM-DD（取自 crawl_time）
+                cnt INTEGER NOT NULL DEFAULT 0,
+                price_sum REAL NOT NULL DEFAULT 0,
+                price_min REAL,
+                price_max REAL,
+                sketch TEXT NOT NULL DEFAULT '{}',
+                PRIMARY KEY (keyword, platform, day)
+            );
+            -- 按关键词取时间窗口（不限平台）: WHERE keyword IN (...) AND day >= ?
+            CREATE INDEX IF NOT EXISTS idx_price_daily_rollup_keyword_day ON price_daily_rollup(keyword, day);
+            -- 新插入的有效价格先记入待汇总队列，写事务提交前折叠进 price_daily_rollup
+            CREATE TABLE IF NOT EXISTS price_rollup_pending (
+                keyword TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                day TEXT NOT NULL,
+                price REAL NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS trg_price_rollup_pending AFTER INSERT ON items
+            WHEN NEW.price > 0 AND DATE(NEW.crawl_time) IS NOT NULL BEGIN
+                INSERT INTO price_rollup_pending (keyword, platform, day, price)
+                VALUES (NEW.keyword, COALESCE(NEW.platform, 'xianyu'), DATE(NEW.crawl_time), NEW.price);
+            END;
+
+            -- ==========================================
+            -- item_price_events: 商品价格变动日志（每次价格变化一行，不随快照合并 / 归档删除）
+            -- 单品价格历史直接读这张表
+            -- ==========================================
+            CREATE TABLE IF NOT EXISTS item_price_events (
+                item_id TEXT NOT NULL,
+                event_time TEXT NOT NULL,               -- 出现新价格的快照的 crawl_time
+                keyword TEXT NOT NULL,
+                platform TEXT NOT NULL DEFAULT 'xianyu',
+                task_name TEXT,
+                title TEXT,
+                price REAL,
+                prev_price REAL,                        -- 变动前价格（首次出现为 NULL）
+                PRIMARY KEY (item_id, event_time)
+            );
+            CREATE INDEX IF NOT EXISTS idx_item_price_events_keyword ON item_price_events(keyword);
+            CREATE TRIGGER IF NOT EXISTS trg_item_price_events AFTER INSERT ON items
+            WHEN NEW.price IS NOT (
+                SELECT price FROM item_price_events
+                WHERE item_id = NEW.item_id AND event_time < NEW.crawl_time
+                ORDER BY event_time DESC LIMIT 1
+            ) BEGIN
+                INSERT OR IGNORE INTO item_price_events
+                    (item_id, event_time, keyword, platform, task_name, title, price, prev_price)
+                VALUES (
+                    NEW.item_id, NEW.crawl_time, NEW.keyword, COALESCE(NEW.platform, 'xianyu'),
+                    NEW.task_name, NEW.title, NEW.price,
+                    (SELECT price FROM item_price_events
+                     WHERE item_id = NEW.item_id AND event_time < NEW.crawl_time
+                     ORDER BY event_time DESC LIMIT 1)
+                );
+            END;
 
             -- ==========================================
             -- 以下为原有业务表（保留）
@@ -370,6 +827,114 @@ async def init_db():
             CREATE INDEX IF NOT EXISTS idx_item_match_group ON item_product_match(product_group_id);
             CREATE INDEX IF NOT EXISTS idx_item_match_condition ON item_product_match(condition_tier);
         """)
-        await db.commit()
-    finally:
-        await db.close()
+        await _ensure_columns(db, "items", _ITEMS_ADDED_COLUMNS)
+        await _ensure_columns(db, "seller_profiles", _SELLER_PROFILES_ADDED_COLUMNS)
+        await db.executescript(_ITEMS_LATEST_TABLE)
+        if await _ensure_columns(db, "items_latest", _ITEMS_LATEST_ADDED_COLUMNS):
+            await _upgrade_items_latest_seen(db)
+        await db.executescript(_ITEMS_LATEST_TRIGGERS)
+        await _ensure_items_fts(db)
+        await _ensure_price_book_evaluation(db)
+        await _backfill_item_counts(db)
+        await _backfill_items_latest(db)
+        await _backfill_price_rollups(db)
+        await _backfill_price_events(db)
+
+
+async def _ensure_items_fts(db: aiosqlite.Connection) -> None:
+    """建全文索引；首次创建时（升级前的老库）按 items 现有数据重建索引"""
+    cursor = await db.execute(
+        "SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts')"
+    )
+    existed = (await cursor.fetchone())[0]
+    await db.executescript(_ITEMS_FTS)
+    if not existed:
+        await db.execute("INSERT INTO items_fts (items_fts) VALUES ('rebuild')")
+
+
+async def _ensure_price_book_evaluation(db: aiosqlite.Connection) -> None:
+    """建评估队列、版本号与视图；首次创建时（升级前的老库）把所有已配置的关键词排入重评估队列"""
+    cursor = await db.execute(
+        "SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_book_reevaluation_pending')"
+    )
+    existed = (await cursor.fetchone())[0]
+    await db.executescript(_PRICE_BOOK_EVALUATION)
+    if not existed:
+        await db.execute(
+            "INSERT OR IGNORE INTO price_book_reevaluation_pending (keyword) SELECT keyword FROM price_book_keywords"
+        )
+
+
+async def _backfill_item_counts(db: aiosqlite.Connection) -> None:
+    """计数表为空而 items 已有数据时（升级前的老库），一次性按现有数据重建"""
+    cursor = await db.execute(
+        "SELECT EXISTS(SELECT 1 FROM item_counts), EXISTS(SELECT 1 FROM items)"
+    )
+    has_counts, has_items = await cursor.fetchone()
+    if has_counts or not has_items:
+        return
+    await db.execute(
+        """
+        INSERT INTO item_counts (keyword, task_name, is_recommended, cnt)
+        SELECT keyword, task_name, COALESCE(is_recommended, 0), COUNT(*)
+        FROM items GROUP BY keyword, task_name, COALESCE(is_recommended, 0)
+        """
+    )
+
+
+async def _backfill_items_latest(db: aiosqlite.Connection) -> None:
+    """最新快照表为空而 items 已有数据时（升级前的老库），一次性按每个 item_id 的最新一行重建"""
+    cursor = await db.execute(
+        "SELECT EXISTS(SELECT 1 FROM items_latest), EXISTS(SELECT 1 FROM items)"
+    )
+    has_latest, has_items = await cursor.fetchone()
+    if has_latest or not has_items:
+        return
+    await db.execute(
+        f"""
+        INSERT INTO items_latest ({_LATEST_COLUMN_LIST}, first_seen)
+        SELECT {_LATEST_COLUMN_LIST}, first_seen FROM (
+            SELECT {_LATEST_SOURCE_LIST},
+                   MIN(crawl_time) OVER (PARTITION BY item_id) AS first_seen,
+                   ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY crawl_time DESC, id DESC) AS rn
+            FROM items
+        ) WHERE rn = 1
+        """
+    )
+
+
+async def _upgrade_items_latest_seen(db: aiosqlite.Connection) -> None:
+    """老库新增 first_seen / last_seen 列后按 items 补齐"""
+    await db.execute(
+        """
+        UPDATE items_latest SET
+            last_seen = COALESCE(last_seen, crawl_time),
+            first_seen = (SELECT MIN(crawl_time) FROM items WHERE items.item_id = items_latest.item_id)
+        """
+    )
+
+
+async def _backfill_price_rollups(db: aiosqlite.Connection) -> None:
+    """日汇总为空而 items 已有有效价格时（升级前的老库），一次性全量重建"""
+    cursor = await db.execute(
+        "SELECT EXISTS(SELECT 1 FROM price_daily_rollup), EXISTS(SELECT 1 FROM items WHERE price > 0)"
+    )
+    has_rollups, has_prices = await cursor.fetchone()
+    if has_rollups or not has_prices:
+        return
+    from src.infrastructure.persistence.price_rollup_repository import PriceRollupRepository
+
+    await PriceRollupRepository().rebuild()
+
+
+async def _backfill_price_events(db: aiosqlite.Connection) -> None:
+    """价格变动日志为空而 items 已有数据时（升级前的老库），一次性从快照重建"""
+    cursor = await db.execute(
+        "SELECT EXISTS(SELECT 1 FROM item_price_events), EXISTS(SELECT 1 FROM items)"
+    )
+    has_events, has_items = await cursor.fetchone()
+    if has_events or not has_items:
+        return
+    from src.infrastructure.persistence.item_compaction import rebuild_price_events
+
+    await rebuild_price_events()
@@ -1,10 +1,9 @@
 """基于 SQLite 的市场基准价仓储实现"""
-import os
-import aiosqlite
 from typing import List, Optional
 from datetime import datetime
 from src.domain.models.market_price import MarketPrice
 from src.domain.repositories.market_price_repository import MarketPriceRepository
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 CREATE_TABLE_SQL = """
@@ -32,13 +31,15 @@ class SqliteMarketPriceRepository(MarketPriceRepository):
 
     def __init__(self, db_path: str = "data/monitor.db"):
         self.db_path = db_path
+        self._table_ready = False
 
-    async def _get_db(self) -> aiosqlite.Connection:
-        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
-        db = await aiosqlite.connect(self.db_path)
-        db.row_factory = aiosqlite.Row
-        await db.executescript(CREATE_TABLE_SQL)
-        return db
+    async def _ensure_table(self) -> None:
+        """首次访问时建表（每个实例只执行一次）"""
+        if self._table_ready:
+            return
+        async with write_db(self.db_path) as db:
+            await db.executescript(CREATE_TABLE_SQL)
+        self._table_ready = True
 
     def _row_to_model(self, row: dict) -> MarketPrice:
         return MarketPrice(
@@ -57,38 +58,32 @@ class SqliteMarketPriceRepository(MarketPriceRepository):
         )
 
     async def get_all(self) -> List[MarketPrice]:
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with read_db(self.db_path) as db:
             cursor = await db.execute("SELECT * FROM market_prices ORDER BY created_at DESC")
             rows = await cursor.fetchall()
             return [self._row_to_model(dict(r)) for r in rows]
-        finally:
-            await db.close()
 
     async def get_by_id(self, id: str) -> Optional[MarketPrice]:
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with read_db(self.db_path) as db:
             cursor = await db.execute("SELECT * FROM market_prices WHERE id = ?", (id,))
             row = await cursor.fetchone()
             return self._row_to_model(dict(row)) if row else None
-        finally:
-            await db.close()
 
     async def get_by_task_id(self, task_id: int) -> List[MarketPrice]:
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with read_db(self.db_path) as db:
             cursor = await db.execute(
                 "SELECT * FROM market_prices WHERE task_id = ? ORDER BY created_at DESC",
                 (task_id,),
             )
             rows = await cursor.fetchall()
             return [self._row_to_model(dict(r)) for r in rows]
-        finally:
-            await db.close()
 
     async def create(self, price: MarketPrice) -> MarketPrice:
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with write_db(self.db_path) as db:
             await db.execute(
                 """INSERT INTO market_prices
                    (id, task_id, keyword, reference_price, fair_used_price,
@@ -103,9 +98,6 @@ class SqliteMarketPriceRepository(MarketPriceRepository):
                     price.created_at, price.updated_at,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
         return price
 
     async def update(self, id: str, data: dict) -> Optional[MarketPrice]:
@@ -131,23 +123,17 @@ class SqliteMarketPriceRepository(MarketPriceRepository):
         params.append(datetime.now().isoformat())
         params.append(id)
 
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with write_db(self.db_path) as db:
             await db.execute(
                 f"UPDATE market_prices SET {', '.join(fields)} WHERE id = ?",
                 params,
             )
-            await db.commit()
-        finally:
-            await db.close()
 
         return await self.get_by_id(id)
 
     async def delete(self, id: str) -> bool:
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with write_db(self.db_path) as db:
             cursor = await db.execute("DELETE FROM market_prices WHERE id = ?", (id,))
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
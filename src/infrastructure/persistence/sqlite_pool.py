@@ -0,0 +1,371 @@
+"""
+SQLite 连接池 —— 长连接复用 + 读写分离 + 工作单元
+
+- 每个数据库文件一组连接：若干只读连接 + 一个串行化的写连接
+- 读连接以 mode=ro 打开并设置 query_only，分析查询不会占用写锁
+- 连接打开时统一设置 WAL / synchronous=NORMAL / mmap_size / cache_size 等 PRAGMA
+- WAL 检查点：写连接按页数自动检查点并限制 WAL 文件大小，checkpoint() 供后台任务显式执行
+- write 作用域即一个工作单元：BEGIN IMMEDIATE → 正常退出 COMMIT，异常 ROLLBACK
+- 同一协程上下文内嵌套的 read/write 作用域复用已持有的连接，避免池内自锁
+- 连接池按事件循环隔离（asyncio 原语不能跨循环使用），循环关闭后自动回收
+"""
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiosqlite
+
+from src.infrastructure.config.settings import database_settings
+
+# 当前上下文已持有的连接: {db_path: (mode, connection, 持有连接的任务)}
+_bound: ContextVar[Optional[Dict[str, Tuple[str, aiosqlite.Connection, Optional[asyncio.Task]]]]] = ContextVar(
+    "sqlite_bound_connections", default=None
+)
+
+
+def _bind(db_path: str, mode: str, db: aiosqlite.Connection):
+    current = dict(_bound.get() or {})
+    current[db_path] = (mode, db, asyncio.current_task())
+    return _bound.set(current)
+
+
+def _bound_connection(db_path: str) -> Optional[Tuple[str, aiosqlite.Connection]]:
+    """
+    当前任务已持有的连接。在作用域内 create_task 出的任务会复制上下文，但不属于该作用域：
+    它可能在作用域结束（事务已提交、写锁已释放）后仍在运行，须按任务区分，让它自己借连接
+    """
+    current = _bound.get()
+    if not current:
+        return None
+    bound = current.get(db_path)
+    if bound is None or bound[2] is not asyncio.current_task():
+        return None
+    return bound[0], bound[1]
+
+
+class _WaitStats:
+    """单类连接的获取次数与等待耗时统计"""
+
+    def __init__(self):
+        self.acquires = 0
+        self.waiting = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def record(self, waited_ms: float) -> None:
+        self.acquires += 1
+        self.wait_total_ms += waited_ms
+        if waited_ms > self.wait_max_ms:
+            self.wait_max_ms = waited_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "acquires": self.acquires,
+            "waiting": self.waiting,
+            "wait_total_ms": round(self.wait_total_ms, 2),
+            "wait_avg_ms": round(self.wait_total_ms / self.acquires, 3) if self.acquires else 0.0,
+            "wait_max_ms": round(self.wait_max_ms, 2),
+        }
+
+
+class SqlitePool:
+    """单个数据库文件的连接池（绑定到创建它的事件循环）"""
+
+    def __init__(
+        self,
+        db_path: str,
+        read_size: Optional[int] = None,
+        busy_timeout_ms: Optional[int] = None,
+        mmap_size: Optional[int] = None,
+        cache_size_kb: Optional[int] = None,
+        wal_autocheckpoint_pages: Optional[int] = None,
+        wal_size_limit_mb: Optional[int] = None,
+    ):
+        cfg = database_settings
+        self.db_path = db_path
+        self.read_size = max(1, read_size or cfg.read_pool_size)
+        self.busy_timeout_ms = busy_timeout_ms if busy_timeout_ms is not None else cfg.busy_timeout_ms
+        self.mmap_size = mmap_size if mmap_size is not None else cfg.mmap_size
+        self.cache_size_kb = cache_size_kb if cache_size_kb is not None else cfg.cache_size_kb
+        self.wal_autocheckpoint_pages = (
+            wal_autocheckpoint_pages if wal_autocheckpoint_pages is not None else cfg.wal_autocheckpoint_pages
+        )
+        self.wal_size_limit_mb = wal_size_limit_mb if wal_size_limit_mb is not None else cfg.wal_size_limit_mb
+
+        self._read_slots = asyncio.Semaphore(self.read_size)
+        self._idle_readers: List[aiosqlite.Connection] = []
+        self._all_readers: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writer_lock = asyncio.Lock()
+        self._read_stats = _WaitStats()
+        self._write_stats = _WaitStats()
+        self._checkpoint_stats = {"runs": 0, "busy": 0, "truncated": 0, "last_frames": 0, "last_at": None}
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # 连接创建
+    # ------------------------------------------------------------------
+
+    def _pragmas(self) -> List[str]:
+        return [
+            f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}",
+            "PRAGMA synchronous = NORMAL",
+            f"PRAGMA mmap_size = {int(self.mmap_size)}",
+            f"PRAGMA cache_size = -{int(self.cache_size_kb)}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+
+    async def _open(self, is_writer: bool) -> aiosqlite.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        if is_writer or not os.path.exists(self.db_path):
+            # 库文件尚不存在时 mode=ro 无法打开，读连接退回普通连接（仍设 query_only）
+            conn = aiosqlite.connect(self.db_path, isolation_level=None)
+        else:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = aiosqlite.connect(uri, uri=True, isolation_level=None)
+        # 池内连接常驻，工作线程设为 daemon，避免未显式关闭时阻塞解释器退出
+        conn._thread.daemon = True
+        db = await conn
+        db.row_factory = aiosqlite.Row
+        if is_writer:
+            await db.execute("PRAGMA journal_mode = WAL")
+            await db.execute(f"PRAGMA wal_autocheckpoint = {int(self.wal_autocheckpoint_pages)}")
+            # 检查点重置 WAL 后把文件截回该大小，避免一次大批量写入后 WAL 文件长期占用磁盘
+            await db.execute(f"PRAGMA journal_size_limit = {int(self.wal_size_limit_mb) * 1024 * 1024}")
+        else:
+            await db.execute("PRAGMA query_only = ON")
+        for pragma in self._pragmas():
+            await db.execute(pragma)
+        return db
+
+    # ------------------------------------------------------------------
+    # 读 / 写作用域
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """借出一个只读连接；上下文内已持有连接时直接复用"""
+        bound = _bound_connection(self.db_path)
+        if bound:
+            yield bound[1]
+            return
+
+        started = time.perf_counter()
+        self._read_stats.waiting += 1
+        try:
+            await self._read_slots.acquire()
+        finally:
+            self._read_stats.waiting -= 1
+        self._read_stats.record((time.perf_counter() - started) * 1000)
+
+        db: Optional[aiosqlite.Connection] = None
+        try:
+            db = self._idle_readers.pop() if self._idle_readers else None
+            if db is None:
+                db = await self._open(is_writer=False)
+                self._all_readers.append(db)
+            token = _bind(self.db_path, "read", db)
+            try:
+                yield db
+            finally:
+                _bound.reset(token)
+        finally:
+            if db is not None and not self._closed:
+                self._idle_readers.append(db)
+            self._read_slots.release()
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """独占写连接并开启一个工作单元（事务）"""
+        bound = _bound_connection(self.db_path)
+        if bound and bound[0] == "write":
+            yield bound[1]
+            return
+
+        started = time.perf_counter()
+        self._write_stats.waiting += 1
+        try:
+            await self._writer_lock.acquire()
+        finally:
+            self._write_stats.waiting -= 1
+        self._write_stats.record((time.perf_counter() - started) * 1000)
+
+        try:
+            if self._writer is None:
+                self._writer = await self._open(is_writer=True)
+            db = self._writer
+            await db.execute("BEGIN IMMEDIATE")
+            token = _bind(self.db_path, "write", db)
+            try:
+                yield db
+            except BaseException:
+                if db.in_transaction:
+                    await db.rollback()
+                raise
+            else:
+                if db.in_transaction:
+                    await db.commit()
+            finally:
+                _bound.reset(token)
+        finally:
+            self._writer_lock.release()
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator[None]:
+        """
+        只持有写锁、不借出写连接：需要独立连接的写操作（如 ATTACH 归档库）在此作用域内
+        开自己的事务，与池内写者串行，池内写者排队等待而不是撞上 busy_timeout
+        """
+        if _bound_connection(self.db_path):
+            raise RuntimeError("不能在读写作用域内独占写锁")
+        started = time.perf_counter()
+        self._write_stats.waiting += 1
+        try:
+            await self._writer_lock.acquire()
+        finally:
+            self._write_stats.waiting -= 1
+        self._write_stats.record((time.perf_counter() - started) * 1000)
+        try:
+            yield
+        finally:
+            self._writer_lock.release()
+
+    def wal_size(self) -> int:
+        """当前 WAL 文件字节数（不存在时为 0）"""
+        try:
+            return os.path.getsize(self.db_path + "-wal")
+        except OSError:
+            return 0
+
+    async def checkpoint(self, mode: str = "PASSIVE") -> dict:
+        """
+        在写连接上执行一次 WAL 检查点（独占写连接，但不开启事务）。
+        PASSIVE 不等待读写；TRUNCATE 会等待读者读完并把 WAL 文件截断为 0。
+        返回 {"busy": 是否被读者阻塞, "frames": WAL 帧数, "checkpointed": 已写回帧数}
+        """
+        mode = mode.upper()
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"未知的检查点模式: {mode}")
+        if _bound_connection(self.db_path):
+            raise RuntimeError("不能在读写作用域内执行检查点")
+
+        async with self._writer_lock:
+            if self._writer is None:
+                self._writer = await self._open(is_writer=True)
+            cursor = await self._writer.execute(f"PRAGMA wal_checkpoint({mode})")
+            busy, frames, checkpointed = await cursor.fetchone()
+
+        stats = self._checkpoint_stats
+        stats["runs"] += 1
+        stats["busy"] += 1 if busy else 0
+        stats["truncated"] += 1 if mode == "TRUNCATE" and not busy else 0
+        stats["last_frames"] = frames
+        stats["last_at"] = time.time()
+        return {"busy": bool(busy), "frames": frames, "checkpointed": checkpointed}
+
+    # ------------------------------------------------------------------
+    # 生命周期 / 指标
+    # ------------------------------------------------------------------
+
+    def _connections(self) -> List[aiosqlite.Connection]:
+        conns = list(self._all_readers)
+        if self._writer is not None:
+            conns.append(self._writer)
+        return conns
+
+    async def close(self) -> None:
+        self._closed = True
+        for db in self._connections():
+            try:
+                await db.close()
+            except Exception:
+                pass
+        self._all_readers.clear()
+        self._idle_readers.clear()
+        self._writer = None
+
+    def close_abandoned(self) -> None:
+        """所属事件循环已关闭时同步释放连接（停止工作线程并等待其退出）"""
+        self._closed = True
+        for db in self._connections():
+            try:
+                db.stop()
+                db._thread.join(timeout=5)
+            except Exception:
+                pass
+        self._all_readers.clear()
+        self._idle_readers.clear()
+        self._writer = None
+
+    def stats(self) -> dict:
+        return {
+            "db_path": self.db_path,
+            "read_pool_size": self.read_size,
+            "readers_open": len(self._all_readers),
+            "readers_idle": len(self._idle_readers),
+            "readers_in_use": len(self._all_readers) - len(self._idle_readers),
+            "writer_open": self._writer is not None,
+            "writer_busy": self._writer_lock.locked(),
+            "read": self._read_stats.to_dict(),
+            "write": self._write_stats.to_dict(),
+            "wal_bytes": self.wal_size(),
+            "checkpoint": dict(self._checkpoint_stats),
+        }
+
+
+# ----------------------------------------------------------------------
+# 进程级注册表：{event_loop: {db_path: SqlitePool}}
+# ----------------------------------------------------------------------
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, SqlitePool]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _reap_closed_loops() -> None:
+    for loop in list(_pools.keys()):
+        if loop.is_closed():
+            for pool in _pools.pop(loop, {}).values():
+                pool.close_abandoned()
+
+
+def get_pool(db_path: str) -> SqlitePool:
+    """获取当前事件循环下指定数据库文件的连接池（不存在则创建）"""
+    loop = asyncio.get_running_loop()
+    pools = _pools.get(loop)
+    if pools is None:
+        _reap_closed_loops()
+        pools = _pools.setdefault(loop, {})
+    pool = pools.get(db_path)
+    if pool is None:
+        pool = SqlitePool(db_path)
+        pools[db_path] = pool
+    return pool
+
+
+async def close_pools() -> None:
+    """关闭当前事件循环下的全部连接池（应用 / 爬虫退出时调用）"""
+    loop = asyncio.get_running_loop()
+    for pool in _pools.pop(loop, {}).values():
+        await pool.close()
+    _reap_closed_loops()
+
+
+async def checkpoint_all(mode: str = "PASSIVE") -> Dict[str, dict]:
+    """对当前事件循环下的全部连接池执行检查点，返回 {db_path: 结果}"""
+    loop = asyncio.get_running_loop()
+    return {path: await pool.checkpoint(mode) for path, pool in list(_pools.get(loop, {}).items())}
+
+
+def get_pool_stats() -> List[dict]:
+    """当前事件循环下所有连接池的指标快照"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return []
+    return [pool.stats() for pool in _pools.get(loop, {}).values()]
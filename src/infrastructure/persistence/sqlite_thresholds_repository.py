@@ -1,7 +1,6 @@
 """基于 SQLite 的溢价阈值仓储"""
-import os
-import aiosqlite
 from typing import Optional
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 DEFAULT_THRESHOLDS = {
     "task_id": None,
@@ -26,17 +25,19 @@ class SqliteThresholdsRepository:
 
     def __init__(self, db_path: str = "data/monitor.db"):
         self.db_path = db_path
+        self._table_ready = False
 
-    async def _get_db(self) -> aiosqlite.Connection:
-        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
-        db = await aiosqlite.connect(self.db_path)
-        db.row_factory = aiosqlite.Row
-        await db.executescript(CREATE_TABLE_SQL)
-        return db
+    async def _ensure_table(self) -> None:
+        """首次访问时建表（每个实例只执行一次）"""
+        if self._table_ready:
+            return
+        async with write_db(self.db_path) as db:
+            await db.executescript(CREATE_TABLE_SQL)
+        self._table_ready = True
 
     async def get(self, task_id: Optional[int] = None) -> dict:
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with read_db(self.db_path) as db:
             # 先查指定 task_id
             if task_id is not None:
                 cursor = await db.execute(
@@ -56,8 +57,6 @@ class SqliteThresholdsRepository:
 
             # 都没有，返回默认值
             return dict(DEFAULT_THRESHOLDS)
-        finally:
-            await db.close()
 
     async def upsert(self, data: dict) -> dict:
         task_id = data.get("task_id")
@@ -65,8 +64,8 @@ class SqliteThresholdsRepository:
         fair_max = data.get("fair_max", 5.0)
         slight_premium_max = data.get("slight_premium_max", 20.0)
 
-        db = await self._get_db()
-        try:
+        await self._ensure_table()
+        async with write_db(self.db_path) as db:
             if task_id is None:
                 # SQLite 无法用 = 比较 NULL，用 IS NULL
                 await db.execute(
@@ -88,8 +87,5 @@ class SqliteThresholdsRepository:
                            slight_premium_max = excluded.slight_premium_max""",
                     (task_id, low_price_max, fair_max, slight_premium_max),
                 )
-            await db.commit()
-        finally:
-            await db.close()
 
         return await self.get(task_id=task_id)
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from typing import List, Optional
 
 from src.config import AI_DEBUG_MODE
 from src.utils import safe_get
@@ -64,12 +65,9 @@ async def _parse_search_results_json(json_data: dict, source: str) -> list:
         return []
 
 
-async def calculate_reputation_from_ratings(ratings_json: list) -> dict:
-    """从原始评价API数据列表中，计算作为卖家和买家的好评数与好评率。"""
-    seller_total = 0
-    seller_positive = 0
-    buyer_total = 0
-    buyer_positive = 0
+async def _count_reputation(ratings_json: list, counts: Optional[List[int]] = None) -> List[int]:
+    """统计原始评价中 [卖家好评数, 卖家评价数, 买家好评数, 买家评价数]，可在已有计数上累加。"""
+    seller_positive, seller_total, buyer_positive, buyer_total = counts or [0, 0, 0, 0]
 
     for card in ratings_json:
         # 使用 safe_get 保证安全访问
@@ -85,7 +83,11 @@ async def calculate_reputation_from_ratings(ratings_json: list) -> dict:
             buyer_total += 1
             if rate_type == 1:
                 buyer_positive += 1
+    return [seller_positive, seller_total, buyer_positive, buyer_total]
+
 
+def _format_reputation(counts: List[int]) -> dict:
+    seller_positive, seller_total, buyer_positive, buyer_total = counts
     # 计算比率，并处理除以零的情况
     seller_rate = f"{(seller_positive / seller_total * 100):.2f}%" if seller_total > 0 else "N/A"
     buyer_rate = f"{(buyer_positive / buyer_total * 100):.2f}%" if buyer_total > 0 else "N/A"
@@ -98,6 +100,28 @@ async def calculate_reputation_from_ratings(ratings_json: list) -> dict:
     }
 
 
+def _parse_reputation_counts(profile: dict) -> List[int]:
+    """从已保存档案的 "好评数/评价数" 文本还原计数，缺失或格式不对时按 0 计。"""
+    counts = []
+    for key in ("作为卖家的好评数", "作为买家的好评数"):
+        try:
+            positive, total = str(profile.get(key, "")).split("/")
+            counts.extend([int(positive), int(total)])
+        except ValueError:
+            counts.extend([0, 0])
+    return counts
+
+
+async def calculate_reputation_from_ratings(ratings_json: list) -> dict:
+    """从原始评价API数据列表中，计算作为卖家和买家的好评数与好评率。"""
+    return _format_reputation(await _count_reputation(ratings_json))
+
+
+async def merge_reputation_from_ratings(previous: dict, new_ratings_json: list) -> dict:
+    """增量更新好评数与好评率：在已保存档案的计数上只累加新增的原始评价。"""
+    return _format_reputation(await _count_reputation(new_ratings_json, _parse_reputation_counts(previous)))
+
+
 async def _parse_user_items_data(items_json: list) -> list:
     """解析用户主页的商品列表API的JSON数据。"""
     parsed_list = []
@@ -0,0 +1,159 @@
+"""
+爬虫浏览器 context 的网络资源策略 —— 按页面类型拦截用不到的资源，并统计每次运行的流量
+
+爬虫只消费 expect_response 捕获的 JSON 接口，商品图片之后由 download_all_images 单独下载，
+页面上的图片 / 视频 / 字体 / 埋点脚本都是白白消耗的带宽与渲染时间：
+- 通过 context.route 拦截：按资源类型（request.resource_type）与 URL 通配符决定是否 abort
+- 页面类型（search / detail / profile）由 assign() / mark_page() 登记，不同页面可拦截不同类型
+  （如详情页只等接口响应，样式表也可拦截；搜索页 / 主页需要滚动加载，保留样式表）
+- 统计：按资源类型的请求数与字节数（响应头 + 响应体）、被拦截的请求数、各类页面的平均 load 耗时
+- 任务配置 load_all_resources=true 时不拦截（调试页面加载问题），仍统计流量
+
+注意：Playwright 开启路由后该 context 不再使用 HTTP 缓存，脚本 / 样式表会重复下载，统计中可见。
+"""
+import fnmatch
+import time
+import weakref
+from typing import Dict, Iterable, Optional, Set
+
+from src.infrastructure.config.settings import scraper_settings
+
+# 未登记页面类型的页面（弹窗等）按该类型处理；"*" 规则对所有页面类型生效
+DEFAULT_PAGE_KIND = "search"
+
+# context → 策略，供只拿得到 page 的采集函数登记页面类型
+_policies: "weakref.WeakKeyDictionary[object, ResourcePolicy]" = weakref.WeakKeyDictionary()
+
+
+def parse_blocked_types(spec: str) -> Dict[str, Set[str]]:
+    """解析 "页面类型:资源类型,资源类型;..." 形式的配置，例如 "*:image,font;detail:stylesheet" """
+    rules: Dict[str, Set[str]] = {}
+    for part in (spec or "").split(";"):
+        kind, _, types = part.partition(":")
+        if kind.strip() and types.strip():
+            rules.setdefault(kind.strip(), set()).update(t.strip() for t in types.split(",") if t.strip())
+    return rules
+
+
+def _split_patterns(spec: str) -> list:
+    return [p.strip() for p in (spec or "").split(",") if p.strip()]
+
+
+class ResourcePolicy:
+    """单次运行（一个 BrowserContext）的资源拦截策略与流量统计"""
+
+    def __init__(
+        self,
+        blocked_types: Optional[Dict[str, Set[str]]] = None,
+        blocked_patterns: Iterable[str] = (),
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.blocked_types = blocked_types or {}
+        self.blocked_patterns = list(blocked_patterns)
+        self._kinds: "weakref.WeakKeyDictionary[object, str]" = weakref.WeakKeyDictionary()
+        self._navigations: "weakref.WeakKeyDictionary[object, float]" = weakref.WeakKeyDictionary()
+        # {资源类型: {"requests": n, "bytes": n}}
+        self.loaded: Dict[str, Dict[str, int]] = {}
+        self.blocked: Dict[str, int] = {}
+        # {页面类型: [累计秒数, 次数]}
+        self._load_times: Dict[str, list] = {}
+
+    @classmethod
+    def for_task(cls, task_config: dict) -> "ResourcePolicy":
+        """按全局配置构建策略；任务配置 load_all_resources 为真时只统计不拦截"""
+        return cls(
+            blocked_types=parse_blocked_types(scraper_settings.resource_block_types),
+            blocked_patterns=_split_patterns(scraper_settings.resource_block_urls),
+            enabled=scraper_settings.resource_policy_enabled and not task_config.get("load_all_resources", False),
+        )
+
+    def should_block(self, kind: str, resource_type: str, url: str) -> bool:
+        if not self.enabled:
+            return False
+        if resource_type == "document":
+            return False  # 页面本身始终放行
+        types = self.blocked_types.get("*", set()) | self.blocked_types.get(kind, set())
+        if resource_type in types:
+            return True
+        return any(fnmatch.fnmatch(url, pattern) for pattern in self.blocked_patterns)
+
+    async def attach(self, context) -> None:
+        """在 context 上安装路由与统计监听（需在打开页面前调用）"""
+        _policies[context] = self
+        await context.route("**/*", self._route)
+        context.on("requestfinished", self._on_request_finished)
+
+    def assign(self, page, kind: str) -> None:
+        """登记页面类型，之后该页面发出的请求按此类型的规则拦截"""
+        if page not in self._kinds:
+            page.on("load", self._on_load)
+        self._kinds[page] = kind
+
+    def _page_of(self, request):
+        try:
+            return request.frame.page
+        except Exception:
+            return None  # Service Worker 等不属于任何页面的请求
+
+    async def _route(self, route) -> None:
+        request = route.request
+        page = self._page_of(request)
+        kind = self._kinds.get(page, DEFAULT_PAGE_KIND) if page is not None else DEFAULT_PAGE_KIND
+        if page is not None and request.is_navigation_request() and request.frame.parent_frame is None:
+            self._navigations[page] = time.perf_counter()
+        if self.should_block(kind, request.resource_type, request.url):
+            self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _on_request_finished(self, request) -> None:
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return  # 页面已关闭等情况下取不到大小，不计入
+        stats = self.loaded.setdefault(request.resource_type, {"requests": 0, "bytes": 0})
+        stats["requests"] += 1
+        stats["bytes"] += max(sizes.get("responseHeadersSize", 0), 0) + max(sizes.get("responseBodySize", 0), 0)
+
+    def _on_load(self, page) -> None:
+        started = self._navigations.pop(page, None)
+        if started is None:
+            return
+        totals = self._load_times.setdefault(self._kinds.get(page, DEFAULT_PAGE_KIND), [0.0, 0])
+        totals[0] += time.perf_counter() - started
+        totals[1] += 1
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(stats["bytes"] for stats in self.loaded.values())
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "total_bytes": self.total_bytes,
+            "loaded": {t: dict(s) for t, s in sorted(self.loaded.items(), key=lambda kv: -kv[1]["bytes"])},
+            "blocked": dict(sorted(self.blocked.items())),
+            "avg_load_seconds": {k: round(total / count, 2) for k, (total, count) in self._load_times.items()},
+        }
+
+    def summary(self) -> str:
+        """一行可读的流量摘要，用于任务日志"""
+        snapshot = self.snapshot()
+        loaded = ", ".join(f"{t} {s['requests']} 个 / {s['bytes'] / 1024:.0f} KB" for t, s in snapshot["loaded"].items())
+        blocked = ", ".join(f"{t} {n}" for t, n in snapshot["blocked"].items()) or "无"
+        loads = ", ".join(f"{k} {v:.2f}s" for k, v in snapshot["avg_load_seconds"].items()) or "无"
+        mode = "拦截" if self.enabled else "仅统计"
+        return (
+            f"资源策略[{mode}] 共下载 {self.total_bytes / 1024 / 1024:.2f} MB（{loaded or '无'}）；"
+            f"已拦截: {blocked}；平均页面加载: {loads}"
+        )
+
+
+def mark_page(page, kind: str) -> None:
+    """登记页面类型（页面所属 context 未安装资源策略时什么也不做）"""
+    context = getattr(page, "context", None)
+    policy = _policies.get(context) if context is not None else None
+    if policy is not None:
+        policy.assign(page, kind)
@@ -11,7 +11,6 @@ import requests
 from playwright.async_api import (
     Response,
     TimeoutError as PlaywrightTimeoutError,
-    async_playwright,
 )
 
 from src.ai_handler import (
@@ -33,18 +32,25 @@ from src.parsers import (
     _parse_search_results_json,
     _parse_user_items_data,
     calculate_reputation_from_ratings,
+    merge_reputation_from_ratings,
     parse_ratings_data,
     parse_user_head_data,
 )
 from src.utils import (
     format_registration_days,
-    get_link_unique_key,
     random_sleep,
     safe_get,
     save_to_jsonl,
     log_time,
 )
+from src.browser_pool import open_browser
+from src.resource_policy import ResourcePolicy, mark_page
+from src.infrastructure.config.settings import scraper_settings
 from src.rotation import RotationPool, load_state_files, parse_proxy_pool, RotationItem
+from src.services.seen_item_service import SeenItemIndex
+from src.stage_pipeline import StagePipeline
+from src.infrastructure.persistence.item_write_buffer import ItemWriteBuffer
+from src.infrastructure.persistence.seller_profile_cache import PartialProfile, get_seller_profile_cache
 
 
 class RiskControlError(Exception):
@@ -186,13 +192,47 @@ def _build_extra_headers(raw_headers: Optional[dict]) -> dict:
     return headers
 
 
-async def scrape_user_profile(context, user_id: str) -> dict:
+def _known_ids(previous: Optional[dict], list_key: str, id_key: str) -> Optional[set]:
+    """已保存档案中某个列表的全部ID；没有该列表（从未完整采集过）时返回 None，表示需全量采集"""
+    if not previous or not scraper_settings.seller_profile_incremental or list_key not in previous:
+        return None
+    return {str(entry.get(id_key)) for entry in previous[list_key] if entry.get(id_key) is not None}
+
+
+def _split_known(cards: list, id_key: str, known: Optional[set]) -> tuple:
+    """按已知ID截断一页卡片：返回 (新卡片, 是否已到达已知部分)"""
+    if known is None:
+        return cards, False
+    new_cards = []
+    for card in cards:
+        if str(card.get('cardData', {}).get(id_key)) in known:
+            return new_cards, True
+        new_cards.append(card)
+    return new_cards, False
+
+
+def _merge_new_first(new_entries: list, old_entries: list, id_key: str) -> list:
+    """新采集的条目排在前面，旧条目中ID重复的被新条目替换"""
+    new_ids = {str(entry.get(id_key)) for entry in new_entries}
+    return new_entries + [entry for entry in old_entries if str(entry.get(id_key)) not in new_ids]
+
+
+async def scrape_user_profile(context, user_id: str, previous: Optional[dict] = None, full: bool = False) -> dict:
     """
     【新版】访问指定用户的个人主页，按顺序采集其摘要信息、完整的商品列表和完整的评价列表。
+
+    传入上次保存的档案 previous 时增量采集：商品 / 评价列表按新到旧翻页，遇到已知ID即停止，
+    新条目合并到旧列表前面，好评数在旧计数上累加（已知商品的在售 / 已售状态不更新）。
+    full=True 时即使有 previous 也完整翻页（由卖家档案缓存定期要求，校正商品状态）。
+    未能刷新的部分沿用 previous，此时返回 PartialProfile，卖家档案缓存不会把它当作新采集的档案续期。
     """
-    print(f"   -> 开始采集用户ID: {user_id} 的完整信息...")
+    known_item_ids = None if full else _known_ids(previous, "卖家发布的商品列表", "商品ID")
+    known_rating_ids = None if full else _known_ids(previous, "卖家收到的评价列表", "评价ID")
+    mode = "增量" if known_item_ids is not None or known_rating_ids is not None else "完整"
+    print(f"   -> 开始采集用户ID: {user_id} 的{mode}信息...")
     profile_data = {}
     page = await context.new_page()
+    mark_page(page, "profile")
 
     # 为各项异步任务准备Future和数据容器
     head_api_future = asyncio.get_event_loop().create_future()
@@ -213,9 +253,10 @@ async def scrape_user_profile(context, user_id: str) -> dict:
         elif "mtop.idle.web.xyh.item.list" in response.url:
             try:
                 data = await response.json()
-                all_items.extend(data.get('data', {}).get('cardList', []))
-                print(f"      [API捕获] 商品列表... 当前已捕获 {len(all_items)} 件")
-                if not data.get('data', {}).get('nextPage', True):
+                cards, reached_known = _split_known(data.get('data', {}).get('cardList', []), 'id', known_item_ids)
+                all_items.extend(cards)
+                print(f"      [API捕获] 商品列表... 当前已捕获 {len(all_items)} 件新商品")
+                if reached_known or not data.get('data', {}).get('nextPage', True):
                     stop_item_scrolling.set()
             except Exception as e:
                 stop_item_scrolling.set()
@@ -224,9 +265,10 @@ async def scrape_user_profile(context, user_id: str) -> dict:
         elif "mtop.idle.web.trade.rate.list" in response.url:
             try:
                 data = await response.json()
-                all_ratings.extend(data.get('data', {}).get('cardList', []))
-                print(f"      [API捕获] 评价列表... 当前已捕获 {len(all_ratings)} 条")
-                if not data.get('data', {}).get('nextPage', True):
+                cards, reached_known = _split_known(data.get('data', {}).get('cardList', []), 'rateId', known_rating_ids)
+                all_ratings.extend(cards)
+                print(f"      [API捕获] 评价列表... 当前已捕获 {len(all_ratings)} 条新评价")
+                if reached_known or not data.get('data', {}).get('nextPage', True):
                     stop_rating_scrolling.set()
             except Exception as e:
                 stop_rating_scrolling.set()
@@ -249,7 +291,10 @@ async def scrape_user_profile(context, user_id: str) -> dict:
             except asyncio.TimeoutError:
                 print("      [滚动超时] 商品列表可能已加载完毕。")
                 break
-        profile_data["卖家发布的商品列表"] = await _parse_user_items_data(all_items)
+        items = await _parse_user_items_data(all_items)
+        if known_item_ids is not None:
+            items = _merge_new_first(items, previous["卖家发布的商品列表"], "商品ID")
+        profile_data["卖家发布的商品列表"] = items
 
         # --- 任务3: 点击并采集所有评价 ---
         print("      [采集阶段] 开始采集该用户的评价列表...")
@@ -266,8 +311,13 @@ async def scrape_user_profile(context, user_id: str) -> dict:
                     print("      [滚动超时] 评价列表可能已加载完毕。")
                     break
 
-            profile_data['卖家收到的评价列表'] = await parse_ratings_data(all_ratings)
-            reputation_stats = await calculate_reputation_from_ratings(all_ratings)
+            ratings = await parse_ratings_data(all_ratings)
+            if known_rating_ids is not None:
+                profile_data['卖家收到的评价列表'] = _merge_new_first(ratings, previous["卖家收到的评价列表"], "评价ID")
+                reputation_stats = await merge_reputation_from_ratings(previous, all_ratings)
+            else:
+                profile_data['卖家收到的评价列表'] = ratings
+                reputation_stats = await calculate_reputation_from_ratings(all_ratings)
             profile_data.update(reputation_stats)
         else:
             print("      [警告] 未找到评价选项卡，跳过评价采集。")
@@ -277,15 +327,177 @@ async def scrape_user_profile(context, user_id: str) -> dict:
     finally:
         page.remove_listener("response", handle_response)
         await page.close()
-        print(f"   -> 用户 {user_id} 信息采集完成。")
+        print(f"   -> 用户 {user_id} 信息采集完成（新商品 {len(all_items)} 件，新评价 {len(all_ratings)} 条）。")
 
+    if previous and not {"卖家发布的商品列表", "卖家收到的评价列表"} <= profile_data.keys():
+        # 本次未能采到的部分（出错中断 / 没有评价选项卡）沿用上次保存的档案
+        for key, value in previous.items():
+            profile_data.setdefault(key, value)
+        return PartialProfile(profile_data)
     return profile_data
 
 
-async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
+def _remove_images(image_paths: list) -> None:
+    """删除下载的图片文件，节省空间"""
+    for img_path in image_paths:
+        try:
+            if os.path.exists(img_path):
+                os.remove(img_path)
+                print(f"   [图片] 已删除临时图片文件: {img_path}")
+        except Exception as e:
+            print(f"   [图片] 删除图片文件时出错: {e}")
+
+
+async def _post_new_item_event(final_record: dict, task_config: dict, keyword: str, instant_notify: bool) -> None:
+    """通过 HTTP 回调推送新商品事件到 WebSocket（失败不影响主流程）"""
+    item_data = final_record["商品信息"]
+    user_profile_data = final_record.get("卖家信息") or {}
+    try:
+        ai_result = final_record.get('ai_analysis', {})
+        _ws_event = {
+            "task_name": task_config.get('task_name', ''),
+            "keyword": keyword,
+            "item_id": item_data.get('商品ID', ''),
+            "title": item_data.get('商品标题', ''),
+            "price": float(str(item_data.get('当前售价', '0')).replace('¥', '').replace(',', '').strip() or 0),
+            "image_url": item_data.get('商品主图链接', ''),
+            "item_link": item_data.get('商品链接', ''),
+            "seller_name": user_profile_data.get('卖家昵称', ''),
+            "is_recommended": ai_result.get('is_recommended') if isinstance(ai_result, dict) else None,
+            "ai_reason": ai_result.get('reason', '') if isinstance(ai_result, dict) else '',
+            "instant_notify": instant_notify,
+        }
+        _server_port = os.environ.get('SERVER_PORT', '8000')
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None,
+            lambda: requests.post(
+                f"http://127.0.0.1:{_server_port}/api/internal/new-item-event",
+                json=_ws_event,
+                timeout=3
+            )
+        )
+    except Exception as _ws_err:
+        print(f"   [WebSocket推送] 发送新商品事件失败（不影响主流程）: {_ws_err}")
+
+
+def _build_item_pipeline(
+    task_config: dict, keyword: str, ai_prompt_text: str, instant_notify: bool, write_buffer: ItemWriteBuffer
+) -> StagePipeline:
+    """
+    取到详情与卖家信息之后的逐商品处理，拆成三个阶段并发执行（不占用浏览器）：
+    images: 秒推通知 + 下载图片；ai: AI 分析后删除临时图片；persist: 推荐通知、落库、WebSocket 事件。
+    各阶段并发数与阶段间队列长度见 ScraperSettings（SCRAPER_*_CONCURRENCY / SCRAPER_PIPELINE_QUEUE_SIZE）。
+    """
+    from src.config import SKIP_AI_ANALYSIS
+
+    task_name = task_config.get('task_name', 'default')
+
+    async def download_stage(work: dict) -> dict:
+        item_data = work["record"]["商品信息"]
+        # 新品秒推：先发通知让用户抢先看到，再做AI分析
+        if instant_notify:
+            log_time("[秒推模式] 发现新商品，立即推送通知...")
+            await send_ntfy_notification(item_data, "⚡ 新品速报（AI分析稍后补充）")
+        if SKIP_AI_ANALYSIS:
+            log_time("环境变量 SKIP_AI_ANALYSIS 已设置，跳过AI分析并直接发送通知...")
+        else:
+            log_time(f"开始对商品 #{item_data['商品ID']} 进行实时AI分析...")
+        image_urls = item_data.get('商品图片列表', [])
+        work["images"] = await download_all_images(item_data['商品ID'], image_urls, task_name)
+        return work
+
+    async def ai_stage(work: dict) -> dict:
+        final_record = work["record"]
+        work["ai"] = None
+        try:
+            if SKIP_AI_ANALYSIS:
+                pass
+            elif ai_prompt_text:
+                try:
+                    # 注意：这里我们将整个记录传给AI，让它拥有最全的上下文
+                    ai_analysis_result = await get_ai_analysis(final_record, work["images"], prompt_text=ai_prompt_text)
+                    if ai_analysis_result:
+                        final_record['ai_analysis'] = ai_analysis_result
+                        work["ai"] = ai_analysis_result
+                        log_time(f"AI分析完成。推荐状态: {ai_analysis_result.get('is_recommended')}")
+                    else:
+                        final_record['ai_analysis'] = {'error': 'AI analysis returned None after retries.'}
+                except Exception as e:
+                    print(f"   -> AI分析过程中发生严重错误: {e}")
+                    final_record['ai_analysis'] = {'error': str(e)}
+            else:
+                print("   -> 任务未配置AI prompt，跳过分析。")
+        finally:
+            _remove_images(work["images"])
+        return work
+
+    async def persist_stage(work: dict) -> None:
+        final_record = work["record"]
+        item_data = final_record["商品信息"]
+        ai_analysis_result = work["ai"]
+        if SKIP_AI_ANALYSIS:
+            # 如果未开启秒推，则在此发送通知
+            if not instant_notify:
+                log_time("商品已跳过AI分析，准备发送通知...")
+                await send_ntfy_notification(item_data, "商品已跳过AI分析，直接通知")
+        # Send notification if recommended (如果秒推已发送则发送AI分析结果更新)
+        elif ai_analysis_result and ai_analysis_result.get('is_recommended'):
+            if instant_notify:
+                log_time("[秒推模式] AI分析完成，商品被推荐，发送AI分析结果补充通知...")
+                await send_ntfy_notification(item_data, f"✅ AI确认推荐: {ai_analysis_result.get('reason', '无')}")
+            else:
+                log_time("商品被AI推荐，准备发送通知...")
+                await send_ntfy_notification(item_data, ai_analysis_result.get("reason", "无"))
+        elif instant_notify and ai_analysis_result and not ai_analysis_result.get('is_recommended'):
+            log_time("[秒推模式] AI分析完成，商品不推荐，发送撤回通知...")
+            await send_ntfy_notification(item_data, f"❌ AI不推荐: {ai_analysis_result.get('reason', '无')}")
+
+        # 保存包含AI结果的完整记录
+        await save_to_jsonl(final_record, keyword, buffer=write_buffer)
+        await _post_new_item_event(final_record, task_config, keyword, instant_notify)
+        log_time(f"商品 #{item_data['商品ID']} 处理流程完毕。")
+
+    cfg = scraper_settings
+    return StagePipeline(
+        [
+            ("images", download_stage, cfg.image_concurrency),
+            ("ai", ai_stage, cfg.ai_concurrency),
+            ("persist", persist_stage, cfg.persist_concurrency),
+        ],
+        queue_size=cfg.pipeline_queue_size,
+    )
+
+
+def _browser_launch_options(proxy_server: Optional[str]) -> dict:
+    """闲鱼爬虫的 Chromium 启动参数（浏览器池按该参数分组复用浏览器）"""
+    # 反检测启动参数
+    launch_args = [
+        '--disable-blink-features=AutomationControlled',
+        '--disable-dev-shm-usage',
+        '--no-sandbox',
+        '--disable-setuid-sandbox',
+        '--disable-web-security',
+        '--disable-features=IsolateOrigins,site-per-process'
+    ]
+
+    launch_kwargs = {"headless": RUN_HEADLESS, "args": launch_args}
+    if proxy_server:
+        launch_kwargs["proxy"] = {"server": proxy_server}
+
+    if LOGIN_IS_EDGE:
+        launch_kwargs["channel"] = "msedge"
+    else:
+        if not RUNNING_IN_DOCKER:
+            launch_kwargs["channel"] = "chrome"
+    return launch_kwargs
+
+
+async def scrape_xianyu(task_config: dict, debug_limit: int = 0, browser_pool=None):
     """
     【核心执行器】
     根据单个任务配置，异步爬取闲鱼商品数据，并对每个新发现的商品进行实时的、独立的AI分析和通知。
+    browser_pool（BrowserPool）由爬虫守护进程传入：复用预热的浏览器，每次运行只新建隔离的 context。
     """
     keyword = task_config['keyword']
     max_pages = task_config.get('max_pages', 1)
@@ -301,25 +513,17 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
     region_filter = (task_config.get('region') or '').strip()
     instant_notify = task_config.get('instant_notify', False)
 
-    processed_links = set()
-    output_filename = os.path.join("jsonl", f"{keyword.replace(' ', '_')}_full_data.jsonl")
-    if os.path.exists(output_filename):
-        print(f"LOG: 发现已存在文件 {output_filename}，正在加载历史记录以去重...")
-        try:
-            with open(output_filename, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        record = json.loads(line)
-                        link = record.get('商品信息', {}).get('商品链接', '')
-                        if link:
-                            processed_links.add(get_link_unique_key(link))
-                    except json.JSONDecodeError:
-                        print(f"   [警告] 文件中有一行无法解析为JSON，已跳过。")
-            print(f"LOG: 加载完成，已记录 {len(processed_links)} 个已处理过的商品。")
-        except IOError as e:
-            print(f"   [警告] 读取历史文件时发生错误: {e}")
-    else:
-        print(f"LOG: 输出文件 {output_filename} 不存在，将创建新文件。")
+    # 已见商品索引：启动时从 items 表一次性预加载，详情页打开前即可判重
+    try:
+        seen_index = await SeenItemIndex.load(keyword)
+        print(f"LOG: 已从数据库加载 {len(seen_index)} 个已处理过的商品用于去重。")
+    except Exception as e:
+        print(f"   [警告] 加载已处理商品索引失败，本次将不做历史去重: {e}")
+        seen_index = SeenItemIndex(keyword)
+    # 写缓冲：商品记录攒批落库（按条数 / 时间 / 结束时刷新）；
+    # 高频监控反复抓到未变化的商品，写入时合并为一行
+    high_frequency = task_config.get('monitor_mode') == 'high_frequency'
+    write_buffer = ItemWriteBuffer(compact=True if high_frequency else None)
 
     rotation_settings = _get_rotation_settings(task_config)
     forced_account = task_config.get("account_state_file") or None
@@ -362,7 +566,7 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
         return picked or selected_proxy
 
     async def _run_scrape_attempt(state_file: str, proxy_server: Optional[str]) -> int:
-        processed_item_count = 0
+        submitted_count = 0
         stop_scraping = False
 
         if not os.path.exists(state_file):
@@ -375,29 +579,7 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
         except Exception as e:
             print(f"警告：读取登录状态文件失败，将直接按路径使用: {e}")
 
-        async with async_playwright() as p:
-            # 反检测启动参数
-            launch_args = [
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-web-security',
-                '--disable-features=IsolateOrigins,site-per-process'
-            ]
-
-            launch_kwargs = {"headless": RUN_HEADLESS, "args": launch_args}
-            if proxy_server:
-                launch_kwargs["proxy"] = {"server": proxy_server}
-
-            if LOGIN_IS_EDGE:
-                launch_kwargs["channel"] = "msedge"
-            else:
-                if not RUNNING_IN_DOCKER:
-                    launch_kwargs["channel"] = "chrome"
-
-            browser = await p.chromium.launch(**launch_kwargs)
-
+        async with open_browser(_browser_launch_options(proxy_server), browser_pool) as browser:
             context_kwargs = _default_context_options()
             storage_state_arg = state_file
 
@@ -440,7 +622,14 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                 );
             """)
 
+            # 只放行爬虫需要的请求（图片另行下载），并统计本次运行的流量
+            resource_policy = ResourcePolicy.for_task(task_config)
+            await resource_policy.attach(context)
+
             page = await context.new_page()
+            resource_policy.assign(page, "search")
+            pipeline = _build_item_pipeline(task_config, keyword, ai_prompt_text, instant_notify, write_buffer)
+            seller_profiles = get_seller_profile_cache()
 
             try:
                 # 步骤 0 - 模拟真实用户：先访问首页（重要的反检测措施）
@@ -671,13 +860,12 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
 
                     total_items_on_page = len(basic_items)
                     for i, item_data in enumerate(basic_items, 1):
-                        if debug_limit > 0 and processed_item_count >= debug_limit:
+                        if debug_limit > 0 and submitted_count >= debug_limit:
                             log_time(f"已达到调试上限 ({debug_limit})，停止获取新商品。")
                             stop_scraping = True
                             break
 
-                        unique_key = get_link_unique_key(item_data["商品链接"])
-                        if unique_key in processed_links:
+                        if seen_index.contains(item_data.get("商品ID"), item_data["商品链接"]):
                             log_time(f"[页内进度 {i}/{total_items_on_page}] 商品 '{item_data['商品标题'][:20]}...' 已存在，跳过。")
                             continue
 
@@ -686,6 +874,7 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                         await random_sleep(2, 4) # 原来是 (2, 4)
 
                         detail_page = await context.new_page()
+                        resource_policy.assign(detail_page, "detail")
                         try:
                             async with detail_page.expect_response(lambda r: DETAIL_API_URL_PATTERN in r.url, timeout=25000) as detail_info:
                                 await detail_page.goto(item_data["商品链接"], wait_until="domcontentloaded", timeout=25000)
@@ -737,8 +926,11 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                                 user_profile_data = {}
                                 user_id = await safe_get(seller_do, 'sellerId')
                                 if user_id:
-                                    # 新的、高效的调用方式:
-                                    user_profile_data = await scrape_user_profile(context, str(user_id))
+                                    # TTL 内已采集过的卖家直接复用档案，不再打开其主页
+                                    user_profile_data = await seller_profiles.get(
+                                        str(user_id),
+                                        lambda previous, full: scrape_user_profile(context, str(user_id), previous, full=full),
+                                    )
                                 else:
                                     print("   [警告] 未能从详情API中获取到卖家ID。")
                                 user_profile_data['卖家芝麻信用'] = zhima_credit_text
@@ -753,114 +945,11 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                                     "卖家信息": user_profile_data
                                 }
 
-                                # --- START: Real-time AI Analysis & Notification ---
-                                from src.config import SKIP_AI_ANALYSIS
-
-                                # 新品秒推：先发通知让用户抢先看到，再做AI分析
-                                if instant_notify:
-                                    log_time("[秒推模式] 发现新商品，立即推送通知...")
-                                    await send_ntfy_notification(item_data, "⚡ 新品速报（AI分析稍后补充）")
-
-                                # 检查是否跳过AI分析并直接发送通知
-                                if SKIP_AI_ANALYSIS:
-                                    log_time("环境变量 SKIP_AI_ANALYSIS 已设置，跳过AI分析并直接发送通知...")
-                                    # 下载图片
-                                    image_urls = item_data.get('商品图片列表', [])
-                                    downloaded_image_paths = await download_all_images(item_data['商品ID'], image_urls, task_config.get('task_name', 'default'))
-
-                                    # 删除下载的图片文件，节省空间
-                                    for img_path in downloaded_image_paths:
-                                        try:
-                                            if os.path.exists(img_path):
-                                                os.remove(img_path)
-                                                print(f"   [图片] 已删除临时图片文件: {img_path}")
-                                        except Exception as e:
-                                            print(f"   [图片] 删除图片文件时出错: {e}")
-
-                                    # 如果未开启秒推，则在此发送通知
-                                    if not instant_notify:
-                                        log_time("商品已跳过AI分析，准备发送通知...")
-                                        await send_ntfy_notification(item_data, "商品已跳过AI分析，直接通知")
-                                else:
-                                    log_time(f"开始对商品 #{item_data['商品ID']} 进行实时AI分析...")
-                                    # 1. Download images
-                                    image_urls = item_data.get('商品图片列表', [])
-                                    downloaded_image_paths = await download_all_images(item_data['商品ID'], image_urls, task_config.get('task_name', 'default'))
-
-                                    # 2. Get AI analysis
-                                    ai_analysis_result = None
-                                    if ai_prompt_text:
-                                        try:
-                                            # 注意：这里我们将整个记录传给AI，让它拥有最全的上下文
-                                            ai_analysis_result = await get_ai_analysis(final_record, downloaded_image_paths, prompt_text=ai_prompt_text)
-                                            if ai_analysis_result:
-                                                final_record['ai_analysis'] = ai_analysis_result
-                                                log_time(f"AI分析完成。推荐状态: {ai_analysis_result.get('is_recommended')}")
-                                            else:
-                                                final_record['ai_analysis'] = {'error': 'AI analysis returned None after retries.'}
-                                        except Exception as e:
-                                            print(f"   -> AI分析过程中发生严重错误: {e}")
-                                            final_record['ai_analysis'] = {'error': str(e)}
-                                    else:
-                                        print("   -> 任务未配置AI prompt，跳过分析。")
-
-                                    # 删除下载的图片文件，节省空间
-                                    for img_path in downloaded_image_paths:
-                                        try:
-                                            if os.path.exists(img_path):
-                                                os.remove(img_path)
-                                                print(f"   [图片] 已删除临时图片文件: {img_path}")
-                                        except Exception as e:
-                                            print(f"   [图片] 删除图片文件时出错: {e}")
-
-                                    # 3. Send notification if recommended (如果秒推已发送则发送AI分析结果更新)
-                                    if ai_analysis_result and ai_analysis_result.get('is_recommended'):
-                                        if instant_notify:
-                                            log_time("[秒推模式] AI分析完成，商品被推荐，发送AI分析结果补充通知...")
-                                            await send_ntfy_notification(item_data, f"✅ AI确认推荐: {ai_analysis_result.get('reason', '无')}")
-                                        else:
-                                            log_time("商品被AI推荐，准备发送通知...")
-                                            await send_ntfy_notification(item_data, ai_analysis_result.get("reason", "无"))
-                                    elif instant_notify and ai_analysis_result and not ai_analysis_result.get('is_recommended'):
-                                        log_time("[秒推模式] AI分析完成，商品不推荐，发送撤回通知...")
-                                        await send_ntfy_notification(item_data, f"❌ AI不推荐: {ai_analysis_result.get('reason', '无')}")
-                                # --- END: Real-time AI Analysis & Notification ---
-
-                                # 4. 保存包含AI结果的完整记录
-                                await save_to_jsonl(final_record, keyword)
-
-                                # 5. 通过 HTTP 回调推送新商品事件到 WebSocket（非阻塞）
-                                try:
-                                    ai_result = final_record.get('ai_analysis', {})
-                                    _ws_event = {
-                                        "task_name": task_config.get('task_name', ''),
-                                        "keyword": keyword,
-                                        "item_id": item_data.get('商品ID', ''),
-                                        "title": item_data.get('商品标题', ''),
-                                        "price": float(str(item_data.get('当前售价', '0')).replace('¥', '').replace(',', '').strip() or 0),
-                                        "image_url": item_data.get('商品主图链接', ''),
-                                        "item_link": item_data.get('商品链接', ''),
-                                        "seller_name": user_profile_data.get('卖家昵称', ''),
-                                        "is_recommended": ai_result.get('is_recommended') if isinstance(ai_result, dict) else None,
-                                        "ai_reason": ai_result.get('reason', '') if isinstance(ai_result, dict) else '',
-                                        "instant_notify": instant_notify,
-                                    }
-                                    _server_port = os.environ.get('SERVER_PORT', '8000')
-                                    loop = asyncio.get_running_loop()
-                                    await loop.run_in_executor(
-                                        None,
-                                        lambda: requests.post(
-                                            f"http://127.0.0.1:{_server_port}/api/internal/new-item-event",
-                                            json=_ws_event,
-                                            timeout=3
-                                        )
-                                    )
-                                except Exception as _ws_err:
-                                    print(f"   [WebSocket推送] 发送新商品事件失败（不影响主流程）: {_ws_err}")
-
-                                processed_links.add(unique_key)
-                                processed_item_count += 1
-                                log_time(f"商品处理流程完毕。累计处理 {processed_item_count} 个新商品。")
+                                # AI 分析 / 通知 / 落库交给后续阶段，浏览器继续翻页取详情（队列满时在此等待）
+                                await pipeline.submit({"record": final_record})
+                                seen_index.add(item_data.get("商品ID"), item_data["商品链接"])
+                                submitted_count += 1
+                                log_time(f"商品详情已采集，交给后续处理阶段。累计 {submitted_count} 个新商品，排队中 {pipeline.pending} 个。")
 
                                 # --- 修改: 增加单个商品处理后的主要延迟 ---
                                 log_time("[反爬] 执行一次主要的随机延迟以模拟用户浏览间隔...")
@@ -894,68 +983,85 @@ async def scrape_xianyu(task_config: dict, debug_limit: int = 0):
                 raise
             except asyncio.CancelledError:
                 log_time("收到取消信号，正在终止当前爬虫任务...")
+                pipeline.abort()
                 raise
             except Exception as e:
-                if type(e).__name__ == "TargetClosedError":
-                    log_time("浏览器已关闭，忽略后续异常（可能是任务被停止）。")
-                    return processed_item_count
-                print(f"\n爬取过程中发生未知错误: {e}")
-                raise
+                if type(e).__name__ != "TargetClosedError":
+                    print(f"\n爬取过程中发生未知错误: {e}")
+                    raise
+                log_time("浏览器已关闭，忽略后续异常（可能是任务被停止）。")
             finally:
-                log_time("任务执行完毕，浏览器将在5秒后自动关闭...")
-                await asyncio.sleep(5)
-                if debug_limit:
-                    input("按回车键关闭浏览器...")
-                await browser.close()
-
-        return processed_item_count
+                if not RUN_HEADLESS and browser_pool is None:
+                    # 有界面运行时留几秒便于观察；无头 / 守护进程模式直接收尾
+                    log_time("任务执行完毕，浏览器将在5秒后自动关闭...")
+                    await asyncio.sleep(5)
+                    if debug_limit:
+                        input("按回车键关闭浏览器...")
+                # 浏览器由 open_browser 关闭或归还浏览器池，这里只关闭本次运行的 context
+                try:
+                    await context.close()
+                except Exception:
+                    pass  # 浏览器已断开（任务被停止）时 context 随之失效
+                log_time(resource_policy.summary())
+                # 浏览器阶段结束（含出错）：等已取到详情的商品走完后续阶段
+                if submitted_count:
+                    log_time(f"等待后续阶段处理剩余的 {pipeline.pending} 个商品...")
+                await pipeline.close()
+
+        log_time(f"本次共处理 {pipeline.completed} 个新商品，各阶段: {pipeline.stats}")
+        log_time(f"卖家档案缓存（进程内累计）: {seller_profiles.stats}")
+        return pipeline.completed
 
     processed_item_count = 0
     attempt_limit = max(rotation_settings["account_retry_limit"], rotation_settings["proxy_retry_limit"], 1)
     last_error = ""
 
-    for attempt in range(1, attempt_limit + 1):
-        if attempt == 1:
-            selected_account = _select_account()
-            selected_proxy = _select_proxy()
-        else:
-            if rotation_settings["account_enabled"] and rotation_settings["account_mode"] == "on_failure":
-                account_pool.mark_bad(selected_account, last_error)
-                selected_account = _select_account(force_new=True)
-            if rotation_settings["proxy_enabled"] and rotation_settings["proxy_mode"] == "on_failure":
-                proxy_pool.mark_bad(selected_proxy, last_error)
-                selected_proxy = _select_proxy(force_new=True)
-
-        if rotation_settings["account_enabled"] and not selected_account:
-            print("未找到可用的登录状态文件，无法继续执行任务。")
-            break
-        if not rotation_settings["account_enabled"] and not selected_account:
-            print("未找到可用的登录状态文件，无法继续执行任务。")
-            break
-        if rotation_settings["proxy_enabled"] and not selected_proxy:
-            print("未找到可用的代理地址，无法继续执行任务。")
-            break
-
-        state_path = selected_account.value if selected_account else STATE_FILE
-        proxy_server = selected_proxy.value if selected_proxy else None
-        if rotation_settings["account_enabled"]:
-            print(f"账号轮换：使用登录状态 {state_path}")
-        if rotation_settings["proxy_enabled"] and proxy_server:
-            print(f"IP 轮换：使用代理 {proxy_server}")
+    try:
+        for attempt in range(1, attempt_limit + 1):
+            if attempt == 1:
+                selected_account = _select_account()
+                selected_proxy = _select_proxy()
+            else:
+                if rotation_settings["account_enabled"] and rotation_settings["account_mode"] == "on_failure":
+                    account_pool.mark_bad(selected_account, last_error)
+                    selected_account = _select_account(force_new=True)
+                if rotation_settings["proxy_enabled"] and rotation_settings["proxy_mode"] == "on_failure":
+                    proxy_pool.mark_bad(selected_proxy, last_error)
+                    selected_proxy = _select_proxy(force_new=True)
+
+            if rotation_settings["account_enabled"] and not selected_account:
+                print("未找到可用的登录状态文件，无法继续执行任务。")
+                break
+            if not rotation_settings["account_enabled"] and not selected_account:
+                print("未找到可用的登录状态文件，无法继续执行任务。")
+                break
+            if rotation_settings["proxy_enabled"] and not selected_proxy:
+                print("未找到可用的代理地址，无法继续执行任务。")
+                break
 
-        try:
-            processed_item_count += await _run_scrape_attempt(state_path, proxy_server)
-            break
-        except RiskControlError as e:
-            last_error = str(e)
-            print(f"检测到风控或验证触发: {e}")
-            if attempt < attempt_limit:
-                print("将尝试轮换账号/IP 后重试...")
-        except Exception as e:
-            last_error = f"{type(e).__name__}: {e}"
-            print(f"本次尝试失败: {last_error}")
-            if attempt < attempt_limit:
-                print("将尝试轮换账号/IP 后重试...")
+            state_path = selected_account.value if selected_account else STATE_FILE
+            proxy_server = selected_proxy.value if selected_proxy else None
+            if rotation_settings["account_enabled"]:
+                print(f"账号轮换：使用登录状态 {state_path}")
+            if rotation_settings["proxy_enabled"] and proxy_server:
+                print(f"IP 轮换：使用代理 {proxy_server}")
+
+            try:
+                processed_item_count += await _run_scrape_attempt(state_path, proxy_server)
+                break
+            except RiskControlError as e:
+                last_error = str(e)
+                print(f"检测到风控或验证触发: {e}")
+                if attempt < attempt_limit:
+                    print("将尝试轮换账号/IP 后重试...")
+            except Exception as e:
+                last_error = f"{type(e).__name__}: {e}"
+                print(f"本次尝试失败: {last_error}")
+                if attempt < attempt_limit:
+                    print("将尝试轮换账号/IP 后重试...")
+    finally:
+        # 运行结束 / 被取消时把缓冲区中剩余的商品写入数据库
+        await write_buffer.close()
 
     # 清理任务图片目录
     cleanup_task_images(task_config.get('task_name', 'default'))
@@ -16,7 +16,6 @@ from playwright.async_api import (
     BrowserContext,
     Response,
     TimeoutError as PlaywrightTimeoutError,
-    async_playwright,
 )
 
 from src.ai_handler import (
@@ -31,6 +30,8 @@ from src.utils import (
     save_to_jsonl,
     log_time,
 )
+from src.browser_pool import open_browser
+from src.infrastructure.persistence.item_write_buffer import ItemWriteBuffer
 
 
 # ─── 常量 ──────────────────────────────────────────────────────
@@ -512,7 +513,7 @@ async def _parse_search_dom(page: Page, keyword: str, task_name: str) -> list[di
     return items
 
 
-async def scrape_mercari(task_config: dict, debug_limit: int = 0) -> int:
+async def scrape_mercari(task_config: dict, debug_limit: int = 0, browser_pool=None) -> int:
     """
     Mercari 爬虫核心入口。与 scrape_xianyu 对等。
     
@@ -524,6 +525,7 @@ async def scrape_mercari(task_config: dict, debug_limit: int = 0) -> int:
             - max_pages: 最大翻页数（默认 3）
             - ai_prompt_text: AI 分析 Prompt（可选）
         debug_limit: 调试模式限制处理的商品数（0=无限制）
+        browser_pool: 爬虫守护进程传入的 BrowserPool（复用预热的浏览器）
         
     Returns:
         本次处理的新商品数量
@@ -542,17 +544,19 @@ async def scrape_mercari(task_config: dict, debug_limit: int = 0) -> int:
     print(f"{'='*50}")
 
     processed_count = 0
-
-    async with async_playwright() as p:
-        # Mercari 不需要登录态，直接启动无头浏览器
-        headless = os.getenv("RUN_HEADLESS", "true").lower() in ("1", "true", "yes")
-        browser = await p.chromium.launch(
-            headless=headless,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-            ],
-        )
+    # 写缓冲：逐条处理的商品攒批后一次事务落库
+    write_buffer = ItemWriteBuffer()
+
+    # Mercari 不需要登录态，直接启动无头浏览器
+    headless = os.getenv("RUN_HEADLESS", "true").lower() in ("1", "true", "yes")
+    launch_kwargs = {
+        "headless": headless,
+        "args": [
+            "--disable-blink-features=AutomationControlled",
+            "--no-sandbox",
+        ],
+    }
+    async with open_browser(launch_kwargs, browser_pool) as browser:
         context = await browser.new_context(
             viewport={"width": 1280, "height": 900},
             locale="ja-JP",
@@ -632,7 +636,7 @@ async def scrape_mercari(task_config: dict, debug_limit: int = 0) -> int:
                         }
 
                 # 保存到数据库（统一走 save_to_jsonl）
-                await save_to_jsonl(item_record, keyword)
+                await save_to_jsonl(item_record, keyword, buffer=write_buffer)
                 processed_count += 1
 
                 # 非即时推送模式，且 AI 推荐的，发送通知
@@ -651,8 +655,8 @@ async def scrape_mercari(task_config: dict, debug_limit: int = 0) -> int:
             import traceback
             traceback.print_exc()
         finally:
+            await write_buffer.close()
             await context.close()
-            await browser.close()
             try:
                 cleanup_task_images(task_name)
             except Exception:
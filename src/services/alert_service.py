@@ -5,7 +5,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 
 from src.domain.models.alert_rule import AlertRule, AlertRuleCreate, AlertRuleUpdate, AlertCondition
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 # 操作符映射
@@ -25,8 +25,7 @@ class AlertService:
 
     async def get_all_rules(self, task_id: Optional[int] = None) -> List[AlertRule]:
         """获取所有提醒规则，可按 task_id 筛选"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             if task_id is not None:
                 cursor = await db.execute(
                     "SELECT * FROM alert_rules WHERE task_id = ? ORDER BY created_at DESC",
@@ -38,13 +37,10 @@ class AlertService:
                 )
             rows = await cursor.fetchall()
             return [self._row_to_rule(dict(row)) for row in rows]
-        finally:
-            await db.close()
 
     async def get_rule_by_id(self, rule_id: str) -> Optional[AlertRule]:
         """按 ID 获取单条规则"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 "SELECT * FROM alert_rules WHERE id = ?", (rule_id,)
             )
@@ -52,8 +48,6 @@ class AlertService:
             if row is None:
                 return None
             return self._row_to_rule(dict(row))
-        finally:
-            await db.close()
 
     async def create_rule(self, data: AlertRuleCreate) -> AlertRule:
         """创建新规则"""
@@ -69,8 +63,7 @@ class AlertService:
             updated_at=now,
         )
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 """
                 INSERT INTO alert_rules (id, task_id, name, enabled, conditions, channels, created_at, updated_at)
@@ -87,9 +80,6 @@ class AlertService:
                     rule.updated_at,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
         return rule
 
@@ -113,8 +103,7 @@ class AlertService:
 
         existing.updated_at = now
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 """
                 UPDATE alert_rules
@@ -130,23 +119,16 @@ class AlertService:
                     rule_id,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
         return existing
 
     async def delete_rule(self, rule_id: str) -> bool:
         """删除规则"""
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute(
                 "DELETE FROM alert_rules WHERE id = ?", (rule_id,)
             )
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     # ===== 条件评估引擎 =====
 
@@ -5,7 +5,7 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from src.domain.models.user import User, UserCreate, UserInfo, TokenResponse
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 from src.infrastructure.config.settings import settings
 
 # JWT 配置
@@ -48,8 +48,7 @@ def decode_token(token: str) -> Optional[dict]:
 
 async def register(data: UserCreate) -> TokenResponse:
     """用户注册"""
-    db = await get_db()
-    try:
+    async with write_db() as db:
         # 检查用户名是否已存在
         cursor = await db.execute(
             "SELECT id FROM users WHERE username = ?", (data.username,)
@@ -66,7 +65,6 @@ async def register(data: UserCreate) -> TokenResponse:
                VALUES (?, ?, ?)""",
             (data.username, password_hash, display_name),
         )
-        await db.commit()
         user_id = cursor.lastrowid
 
         # 生成 Token
@@ -82,65 +80,60 @@ async def register(data: UserCreate) -> TokenResponse:
                 created_at=datetime.now().isoformat(),
             ),
         )
-    finally:
-        await db.close()
 
 
 async def login(username: str, password: str) -> TokenResponse:
     """用户登录"""
-    db = await get_db()
-    try:
+    async with read_db() as db:
         cursor = await db.execute(
             "SELECT id, username, password_hash, display_name, is_active, created_at FROM users WHERE username = ?",
             (username,),
         )
         row = await cursor.fetchone()
 
-        if not row:
-            # 向下兼容：如果没有注册用户，尝试用 .env 的旧密码
-            if username == settings.web_username and password == settings.web_password:
-                # 自动为旧用户创建一条记录
-                return await _migrate_legacy_user(db, username, password)
-            raise ValueError("用户名或密码错误")
+    if not row:
+        # 向下兼容：如果没有注册用户，尝试用 .env 的旧密码
+        if username == settings.web_username and password == settings.web_password:
+            # 自动为旧用户创建一条记录（只读连接不能写，迁移走写连接）
+            return await _migrate_legacy_user(username, password)
+        raise ValueError("用户名或密码错误")
 
-        if not row["is_active"]:
-            raise ValueError("该账户已被禁用")
+    if not row["is_active"]:
+        raise ValueError("该账户已被禁用")
 
-        if not _verify_password(password, row["password_hash"]):
-            raise ValueError("用户名或密码错误")
+    if not _verify_password(password, row["password_hash"]):
+        raise ValueError("用户名或密码错误")
 
-        user_id = row["id"]
-        token, expires_in = _create_token(user_id, row["username"])
-        return TokenResponse(
-            access_token=token,
-            expires_in=expires_in,
-            user=UserInfo(
-                id=user_id,
-                username=row["username"],
-                display_name=row["display_name"] or row["username"],
-                is_active=bool(row["is_active"]),
-                created_at=row["created_at"] or "",
-            ),
-        )
-    finally:
-        await db.close()
+    user_id = row["id"]
+    token, expires_in = _create_token(user_id, row["username"])
+    return TokenResponse(
+        access_token=token,
+        expires_in=expires_in,
+        user=UserInfo(
+            id=user_id,
+            username=row["username"],
+            display_name=row["display_name"] or row["username"],
+            is_active=bool(row["is_active"]),
+            created_at=row["created_at"] or "",
+        ),
+    )
 
 
-async def _migrate_legacy_user(db, username: str, password: str) -> TokenResponse:
+async def _migrate_legacy_user(username: str, password: str) -> TokenResponse:
     """将 .env 中的旧用户迁移到 SQLite"""
     password_hash = _hash_password(password)
-    cursor = await db.execute(
-        """INSERT OR IGNORE INTO users (username, password_hash, display_name)
-           VALUES (?, ?, ?)""",
-        (username, password_hash, "管理员"),
-    )
-    await db.commit()
+    async with write_db() as db:
+        await db.execute(
+            """INSERT OR IGNORE INTO users (username, password_hash, display_name)
+               VALUES (?, ?, ?)""",
+            (username, password_hash, "管理员"),
+        )
 
-    # 获取用户 ID
-    cursor = await db.execute(
-        "SELECT id, created_at FROM users WHERE username = ?", (username,)
-    )
-    row = await cursor.fetchone()
+        # 获取用户 ID
+        cursor = await db.execute(
+            "SELECT id, created_at FROM users WHERE username = ?", (username,)
+        )
+        row = await cursor.fetchone()
     user_id = row["id"]
 
     token, expires_in = _create_token(user_id, username)
@@ -159,8 +152,7 @@ async def _migrate_legacy_user(db, username: str, password: str) -> TokenRespons
 
 async def get_user_by_id(user_id: int) -> Optional[UserInfo]:
     """通过 ID 获取用户信息"""
-    db = await get_db()
-    try:
+    async with read_db() as db:
         cursor = await db.execute(
             "SELECT id, username, display_name, is_active, created_at FROM users WHERE id = ?",
             (user_id,),
@@ -187,14 +179,11 @@ async def get_user_by_id(user_id: int) -> Optional[UserInfo]:
             created_at=row["created_at"] or "",
             role=role,
         )
-    finally:
-        await db.close()
 
 
 async def change_password(user_id: int, old_password: str, new_password: str) -> bool:
     """修改密码"""
-    db = await get_db()
-    try:
+    async with write_db() as db:
         cursor = await db.execute(
             "SELECT password_hash FROM users WHERE id = ?", (user_id,)
         )
@@ -210,18 +199,12 @@ async def change_password(user_id: int, old_password: str, new_password: str) ->
             "UPDATE users SET password_hash = ?, updated_at = datetime('now') WHERE id = ?",
             (new_hash, user_id),
         )
-        await db.commit()
         return True
-    finally:
-        await db.close()
 
 
 async def get_user_count() -> int:
     """获取注册用户数量"""
-    db = await get_db()
-    try:
+    async with read_db() as db:
         cursor = await db.execute("SELECT COUNT(*) as cnt FROM users")
         row = await cursor.fetchone()
         return row["cnt"] if row else 0
-    finally:
-        await db.close()
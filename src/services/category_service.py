@@ -1,10 +1,11 @@
 """品类树服务 — 管理品类层级（最多三级）"""
 import json
-import os
 from uuid import uuid4
 
 import aiosqlite
 
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
 _DEFAULT_DB_PATH = "data/monitor.db"
 
 _CREATE_TABLE_SQL = """
@@ -26,19 +27,9 @@ class CategoryService:
     def __init__(self, db_path: str | None = None):
         self.db_path = db_path or _DEFAULT_DB_PATH
 
-    async def _get_db(self) -> aiosqlite.Connection:
-        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
-        db = await aiosqlite.connect(self.db_path)
-        db.row_factory = aiosqlite.Row
-        return db
-
     async def init_tables(self) -> None:
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
             await db.executescript(_CREATE_TABLE_SQL)
-            await db.commit()
-        finally:
-            await db.close()
 
     # ------------------------------------------------------------------
     # CRUD
@@ -54,15 +45,11 @@ class CategoryService:
         cat_id = str(uuid4())
         kw_json = json.dumps(keywords or [], ensure_ascii=False)
 
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
             await db.execute(
                 "INSERT INTO category_tree (id, name, parent_id, level, keywords) VALUES (?, ?, ?, ?, ?)",
                 (cat_id, name, parent_id, level, kw_json),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
         return {
             "id": cat_id,
@@ -73,8 +60,7 @@ class CategoryService:
         }
 
     async def get_category(self, category_id: str) -> dict | None:
-        db = await self._get_db()
-        try:
+        async with read_db(self.db_path) as db:
             cursor = await db.execute(
                 "SELECT * FROM category_tree WHERE id = ?", (category_id,)
             )
@@ -82,18 +68,13 @@ class CategoryService:
             if row is None:
                 return None
             return self._row_to_dict(row)
-        finally:
-            await db.close()
 
     async def get_category_tree(self) -> list[dict]:
-        db = await self._get_db()
-        try:
+        async with read_db(self.db_path) as db:
             cursor = await db.execute(
                 "SELECT * FROM category_tree ORDER BY level, created_at"
             )
             rows = await cursor.fetchall()
-        finally:
-            await db.close()
 
         nodes: dict[str, dict] = {}
         for row in rows:
@@ -133,32 +114,23 @@ class CategoryService:
         params.append(category_id)
         sql = f"UPDATE category_tree SET {', '.join(sets)} WHERE id = ?"
 
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
             await db.execute(sql, params)
-            await db.commit()
-        finally:
-            await db.close()
 
         return await self.get_category(category_id)  # type: ignore[return-value]
 
     async def delete_category(self, category_id: str) -> bool:
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
             cursor = await db.execute(
                 "DELETE FROM category_tree WHERE id = ?", (category_id,)
             )
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     async def get_category_path(self, category_id: str) -> str:
         parts: list[str] = []
         current_id: str | None = category_id
 
-        db = await self._get_db()
-        try:
+        async with read_db(self.db_path) as db:
             while current_id is not None:
                 cursor = await db.execute(
                     "SELECT id, name, parent_id FROM category_tree WHERE id = ?",
@@ -169,8 +141,6 @@ class CategoryService:
                     break
                 parts.append(row["name"])
                 current_id = row["parent_id"]
-        finally:
-            await db.close()
 
         parts.reverse()
         return "/".join(parts)
@@ -1,7 +1,8 @@
 """跨平台比价分析服务"""
 import statistics
 from typing import List, Dict, Any, Optional
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+from src.infrastructure.persistence.item_search import like_conditions, split_search_terms
 from src.domain.models.platform import PLATFORMS
 
 BASE_CURRENCY = "CNY"
@@ -31,8 +32,7 @@ class CrossPlatformService:
 
     async def get_exchange_rates(self) -> Dict[str, float]:
         """获取所有汇率配置"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 "SELECT key, value FROM cross_platform_config WHERE key LIKE 'exchange_rate_%'"
             )
@@ -47,22 +47,16 @@ class CrossPlatformService:
                 except (ValueError, TypeError):
                     pass
             return rates
-        finally:
-            await db.close()
 
     async def set_exchange_rate(self, from_currency: str, to_currency: str, rate: float) -> None:
         """设置汇率"""
         key = f"exchange_rate_{from_currency}_to_{to_currency}"
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 "INSERT OR REPLACE INTO cross_platform_config (key, value, updated_at) "
                 "VALUES (?, ?, datetime('now'))",
                 (key, str(rate)),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
     async def convert_price(self, price: float, currency: str) -> float:
         """将价格换算为基准货币 (CNY)"""
@@ -77,8 +71,7 @@ class CrossPlatformService:
 
     async def get_keyword_mappings(self) -> List[Dict[str, Any]]:
         """获取所有关键词-品类映射"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 """SELECT m.id, m.keyword, m.platform, m.category_id,
                           COALESCE(p.category_name, '') as category_name
@@ -88,64 +81,69 @@ class CrossPlatformService:
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def set_keyword_mapping(self, keyword: str, platform: str, category_id: str) -> None:
         """设置关键词→品类映射"""
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 "INSERT OR REPLACE INTO keyword_category_map (keyword, platform, category_id) "
                 "VALUES (?, ?, ?)",
                 (keyword, platform, category_id),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
     async def delete_keyword_mapping(self, mapping_id: int) -> None:
         """删除关键词映射"""
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute("DELETE FROM keyword_category_map WHERE id = ?", (mapping_id,))
-            await db.commit()
-        finally:
-            await db.close()
 
     # ── 品类聚合对比 ─────────────────────────────────────────
 
-    async def _resolve_category_for_items(self) -> Dict[str, List[Dict[str, Any]]]:
+    async def _resolve_category_for_items(
+        self, q: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
         """按品类聚合所有平台商品。返回 {category_id: [items...]}
 
         优先使用 keyword_category_map 手动映射，兜底使用 items.category_id 自动匹配。
+        读取 items_latest，同一商品只计入最新一次抓取。
+        传入 q 时只取标题 / 描述命中全文检索的商品（按最新快照），并附带相关度 score。
         """
-        db = await get_db()
-        try:
+        source = "items_latest"
+        conditions = ["price IS NOT NULL", "price > 0"]
+        params: list = []
+        if q and q.strip():
+            match, short_terms = split_search_terms(q)
+            if match:
+                source = (
+                    "(SELECT rowid AS hit_id, rank AS score FROM items_fts WHERE items_fts MATCH ?) AS hits "
+                    "CROSS JOIN items_latest ON items_latest.snapshot_id = hits.hit_id"
+                )
+                params.append(match)
+            likes, like_params = like_conditions(short_terms, ["items_latest.title"])
+            conditions += likes
+            params += like_params
+        score = "score" if source != "items_latest" else "0.0 AS score"
+
+        async with read_db() as db:
             # 获取手动映射
             cursor = await db.execute("SELECT keyword, platform, category_id FROM keyword_category_map")
             manual_maps = {(dict(r)["keyword"], dict(r)["platform"]): dict(r)["category_id"]
                           for r in await cursor.fetchall()}
 
-            # 获取所有有价格的商品
+            # 每个商品只取当前状态（items_latest 每个 item_id 一行）
             cursor = await db.execute(
-                """SELECT item_id, title, keyword, platform, price, image_url, item_link,
-                          seller_credit, is_recommended, category_id, crawl_time
-                   FROM items
-                   WHERE price IS NOT NULL AND price > 0
-                   ORDER BY crawl_time DESC"""
+                f"""SELECT item_id, title, keyword, platform, price, image_url, item_link,
+                          seller_credit, is_recommended, category_id, crawl_time, {score}
+                   FROM {source}
+                   WHERE {" AND ".join(conditions)}
+                   ORDER BY crawl_time DESC""",
+                params,
             )
             rows = await cursor.fetchall()
 
-            # 按品类聚合，去重（同 item_id 只保留最新一条）
-            seen_items = set()
             category_items: Dict[str, List[Dict[str, Any]]] = {}
 
             for r in rows:
                 item = dict(r)
-                if item["item_id"] in seen_items:
-                    continue
-                seen_items.add(item["item_id"])
 
                 # 确定品类 ID：手动映射优先
                 cat_id = manual_maps.get(
@@ -160,15 +158,12 @@ class CrossPlatformService:
                 category_items[cat_id].append(item)
 
             return category_items
-        finally:
-            await db.close()
 
     async def _get_category_names(self, category_ids: List[str]) -> Dict[str, str]:
         """批量获取品类名称"""
         if not category_ids:
             return {}
-        db = await get_db()
-        try:
+        async with read_db() as db:
             placeholders = ",".join(["?"] * len(category_ids))
             cursor = await db.execute(
                 f"SELECT id, category_name FROM price_book WHERE id IN ({placeholders})",
@@ -176,8 +171,6 @@ class CrossPlatformService:
             )
             rows = await cursor.fetchall()
             return {dict(r)["id"]: dict(r)["category_name"] for r in rows}
-        finally:
-            await db.close()
 
     async def get_comparable_categories(self) -> List[Dict[str, Any]]:
         """获取有多平台数据的品类对比列表"""
@@ -263,9 +256,10 @@ class CrossPlatformService:
         sort_by: str = "converted_price",
         platforms: Optional[List[str]] = None,
         limit: int = 200,
+        q: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """获取跨平台混排商品列表（统一货币排序）"""
-        category_items = await self._resolve_category_for_items()
+        """获取跨平台混排商品列表（统一货币排序；q 为标题 / 描述全文检索，可按 relevance 排序）"""
+        category_items = await self._resolve_category_for_items(q)
         rates = await self.get_exchange_rates()
 
         # 筛选品类
@@ -303,6 +297,7 @@ class CrossPlatformService:
                 "seller_credit": item.get("seller_credit", ""),
                 "ai_recommended": bool(item.get("is_recommended", 0)),
                 "keyword": item.get("keyword", ""),
+                "score": item.get("score", 0.0),
             })
 
         # 计算对比指标
@@ -321,5 +316,8 @@ class CrossPlatformService:
             result.sort(key=lambda x: x.get("vs_category_avg", 0))
         elif sort_by == "price":
             result.sort(key=lambda x: x["price"])
+        elif sort_by == "relevance":
+            # bm25 越小越相关
+            result.sort(key=lambda x: x["score"])
 
         return result[:limit]
@@ -77,63 +77,22 @@ class DashboardService:
     async def get_bargain_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         捡漏排行榜：按溢价率从低到高排列 Top N 商品。
-        数据源：SQLite items 表 + 基准价。
+        数据源：SQLite items_latest 表（每个商品的最新快照）+ 基准价，溢价率与 Top N 在 SQL 中计算。
         """
-        from src.infrastructure.persistence.sqlite_market_price_repository import SqliteMarketPriceRepository
-        from src.infrastructure.persistence.sqlite_manager import get_db
-        from src.services.pricing_service import PricingService
-
-        pricing_service = PricingService()
-        market_repo = SqliteMarketPriceRepository()
-        all_market_prices = await market_repo.get_all()
-
-        if not all_market_prices:
-            return []
-
-        # keyword -> reference_price map
-        ref_map: Dict[str, float] = {}
-        for mp in all_market_prices:
-            kw = mp.keyword.strip().lower()
-            if hasattr(mp, 'fair_used_price') and mp.fair_used_price:
-                ref_map[kw] = mp.fair_used_price
-            else:
-                ref_map[kw] = mp.reference_price
-
-        if not ref_map:
-            return []
-
-        # 从 SQLite 查询所有有基准价的关键词商品
-        bargains: list = []
-        db = await get_db()
-        try:
-            for kw, ref_price in ref_map.items():
-                cursor = await db.execute(
-                    """
-                    SELECT title, price, item_link, image_url, platform, keyword
-                    FROM items
-                    WHERE LOWER(keyword) = ? AND price > 0
-                    """,
-                    (kw,),
-                )
-                rows = await cursor.fetchall()
-                for row in rows:
-                    r = dict(row)
-                    rate = pricing_service.calculate_premium_rate(r["price"], ref_price)
-                    bargains.append({
-                        "title": r["title"] or "",
-                        "price": r["price"],
-                        "reference_price": ref_price,
-                        "premium_rate": rate,
-                        "link": r["item_link"] or "",
-                        "image": r["image_url"] or "",
-                        "platform": r["platform"] or "xianyu",
-                        "keyword": r["keyword"] or "",
-                    })
-        finally:
-            await db.close()
-
-        bargains.sort(key=lambda x: x["premium_rate"])
-        return bargains[:limit]
+        rows = await self.item_repo.get_bargain_leaderboard(limit=limit)
+        return [
+            {
+                "title": r["title"] or "",
+                "price": r["price"],
+                "reference_price": r["reference_price"],
+                "premium_rate": r["premium_rate"],
+                "link": r["item_link"] or "",
+                "image": r["image_url"] or "",
+                "platform": r["platform"] or "xianyu",
+                "keyword": r["keyword"] or "",
+            }
+            for r in rows
+        ]
 
     async def get_top_keywords(self, limit: int = 10) -> List[Dict[str, Any]]:
         """热门关键词统计（直接查 SQLite）"""
@@ -4,7 +4,7 @@ import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 class FavoriteService:
@@ -14,8 +14,7 @@ class FavoriteService:
 
     async def get_all(self, task_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """获取收藏列表，可按 task_id 筛选"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             if task_id is not None:
                 cursor = await db.execute(
                     "SELECT * FROM favorites WHERE task_id = ? ORDER BY created_at DESC",
@@ -27,13 +26,10 @@ class FavoriteService:
                 )
             rows = await cursor.fetchall()
             return [self._row_to_dict(dict(row)) for row in rows]
-        finally:
-            await db.close()
 
     async def get_by_id(self, fav_id: str) -> Optional[Dict[str, Any]]:
         """按 ID 获取收藏"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 "SELECT * FROM favorites WHERE id = ?", (fav_id,)
             )
@@ -41,8 +37,6 @@ class FavoriteService:
             if row is None:
                 return None
             return self._row_to_dict(dict(row))
-        finally:
-            await db.close()
 
     async def create(
         self,
@@ -55,8 +49,7 @@ class FavoriteService:
         fav_id = str(uuid.uuid4())
         now = datetime.now().isoformat()
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 """
                 INSERT OR REPLACE INTO favorites (id, item_id, task_id, item_snapshot, note, created_at)
@@ -71,9 +64,6 @@ class FavoriteService:
                     now,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
         return {
             "id": fav_id,
@@ -86,15 +76,11 @@ class FavoriteService:
 
     async def delete(self, fav_id: str) -> bool:
         """删除收藏"""
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute(
                 "DELETE FROM favorites WHERE id = ?", (fav_id,)
             )
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     # ===== 对比 =====
 
@@ -104,8 +90,7 @@ class FavoriteService:
         提取共同字段，按列对齐，方便前端展示。
         """
         items: List[Dict[str, Any]] = []
-        db = await get_db()
-        try:
+        async with read_db() as db:
             for fav_id in fav_ids:
                 cursor = await db.execute(
                     "SELECT * FROM favorites WHERE id = ?", (fav_id,)
@@ -113,8 +98,6 @@ class FavoriteService:
                 row = await cursor.fetchone()
                 if row:
                     items.append(self._row_to_dict(dict(row)))
-        finally:
-            await db.close()
 
         if not items:
             return {"items": [], "comparison": {}}
@@ -3,7 +3,7 @@ import json
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 class HistoryService:
@@ -19,9 +19,8 @@ class HistoryService:
         记录一批商品的价格到 price_history 表。
         返回成功插入的条数。
         """
-        db = await get_db()
         inserted = 0
-        try:
+        async with write_db() as db:
             for item in items:
                 info = item.get("商品信息", {})
                 item_id = str(info.get("商品ID", ""))
@@ -54,10 +53,6 @@ class HistoryService:
                     # 跳过重复或异常记录
                     continue
 
-            await db.commit()
-        finally:
-            await db.close()
-
         return inserted
 
     async def get_item_history(
@@ -66,8 +61,7 @@ class HistoryService:
         limit: int = 100,
     ) -> List[Dict[str, Any]]:
         """获取某商品的价格历史，按时间正序"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 """
                 SELECT id, item_id, task_id, task_name, title, price,
@@ -81,8 +75,6 @@ class HistoryService:
             )
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
-        finally:
-            await db.close()
 
     async def get_batch_history(
         self,
@@ -91,8 +83,7 @@ class HistoryService:
     ) -> Dict[str, List[Dict[str, Any]]]:
         """批量获取多个商品的价格历史"""
         result: Dict[str, List[Dict[str, Any]]] = {}
-        db = await get_db()
-        try:
+        async with read_db() as db:
             for item_id in item_ids:
                 cursor = await db.execute(
                     """
@@ -107,8 +98,6 @@ class HistoryService:
                 )
                 rows = await cursor.fetchall()
                 result[item_id] = [dict(row) for row in rows]
-        finally:
-            await db.close()
 
         return result
 
@@ -120,8 +109,7 @@ class HistoryService:
         检测某商品是否降价。
         对比最近两条价格记录，返回降价信息或 None。
         """
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 """
                 SELECT price, crawl_time
@@ -162,5 +150,3 @@ class HistoryService:
                 "current_time": current["crawl_time"],
                 "previous_time": previous["crawl_time"],
             }
-        finally:
-            await db.close()
@@ -2,7 +2,7 @@
 import uuid
 from datetime import datetime
 from typing import List, Optional
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 class InventoryService:
@@ -13,8 +13,7 @@ class InventoryService:
         assignee: Optional[str] = None,
         keyword: Optional[str] = None,
     ) -> List[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             conditions = []
             params = []
             if status:
@@ -42,12 +41,9 @@ class InventoryService:
                     item["age_days"] = 0
                 result.append(item)
             return result
-        finally:
-            await db.close()
 
     async def get_by_id(self, item_id: str) -> Optional[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute("SELECT * FROM inventory_items WHERE id = ?", (item_id,))
             row = await cursor.fetchone()
             if not row:
@@ -59,8 +55,6 @@ class InventoryService:
             except (ValueError, TypeError):
                 item["age_days"] = 0
             return item
-        finally:
-            await db.close()
 
     async def create(self, data: dict) -> dict:
         item_id = str(uuid.uuid4())
@@ -73,8 +67,7 @@ class InventoryService:
         other_fee = data.get("other_fee", 0)
         total_cost = round(purchase_price + shipping_fee + refurbish_fee + platform_fee + other_fee, 2)
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 """INSERT INTO inventory_items (
                     id, title, platform, keyword, image_url, item_link,
@@ -92,9 +85,6 @@ class InventoryService:
                     now, now,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
         return await self.get_by_id(item_id)
 
     async def update(self, item_id: str, data: dict) -> Optional[dict]:
@@ -136,14 +126,10 @@ class InventoryService:
         params.append(datetime.now().isoformat())
         params.append(item_id)
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 f"UPDATE inventory_items SET {', '.join(fields)} WHERE id = ?", params
             )
-            await db.commit()
-        finally:
-            await db.close()
         return await self.get_by_id(item_id)
 
     async def mark_sold(self, item_id: str, sold_price: float, sold_channel: str = "") -> Optional[dict]:
@@ -185,20 +171,15 @@ class InventoryService:
         return await self.get_by_id(item_id)
 
     async def delete(self, item_id: str) -> bool:
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute("DELETE FROM inventory_items WHERE id = ?", (item_id,))
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     async def get_summary(self, assignee: Optional[str] = None) -> dict:
         """返回格式匹配前端 InventorySummary 类型：
         {total_count, total_cost, estimated_value, by_status, by_assignee}
         """
-        db = await get_db()
-        try:
+        async with read_db() as db:
             condition = "WHERE assignee = ?" if assignee else ""
             params = [assignee] if assignee else []
 
@@ -247,8 +228,6 @@ class InventoryService:
                 "by_status": by_status,
                 "by_assignee": by_assignee,
             }
-        finally:
-            await db.close()
 
     async def get_aging_alerts(self, days_threshold: int = 7, assignee: Optional[str] = None) -> List[dict]:
         """获取库龄超期预警"""
@@ -0,0 +1,126 @@
+"""
+价格本关键词匹配器 —— 所有价格本关键词编译成一个 Aho-Corasick 自动机
+
+- 标题 / 任务关键词扫描一遍即可找出命中的全部价格本关键词（不区分大小写的子串匹配），
+  不再逐条目、逐关键词做子串判断
+- 多个条目命中时取 get_all 顺序（最新创建）中最靠前的，与原先逐条匹配的结果一致
+- 按关键词精确查找时同一关键词取最早创建的条目，与视图 price_book_keywords 一致
+
+编译结果按进程缓存，以 price_book_version（价格本写入触发器递增）为版本号：
+每次取匹配器只读一行版本号，版本变化（含其它进程修改价格本）才重新加载编译。
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiosqlite
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.sqlite_manager import read_db
+
+
+class KeywordMatcher:
+    """由价格本条目编译出的匹配器；entries 须按 get_all 顺序（created_at DESC）传入"""
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        # 自动机：状态转移 / 失败指针 / 该状态命中的最高优先级（条目下标，越小越优先）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[int]] = [None]
+        self._exact: Dict[str, dict] = {}
+
+        for rank, entry in enumerate(entries):
+            for keyword in entry.get("keywords") or []:
+                if not keyword:
+                    # 空关键词作子串会命中一切，不参与匹配
+                    continue
+                self._add(keyword.lower(), rank)
+        for entry in reversed(entries):
+            for keyword in entry.get("keywords") or []:
+                self._exact.setdefault(keyword, entry)
+        self._build()
+
+    def _add(self, pattern: str, rank: int) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            state = nxt
+        best = self._best[state]
+        self._best[state] = rank if best is None else min(best, rank)
+
+    def _build(self) -> None:
+        """按 BFS 填失败指针，并把后缀状态的命中合并进来（匹配时无需沿输出链回溯）"""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                inherited = self._best[self._fail[nxt]]
+                if inherited is not None:
+                    own = self._best[nxt]
+                    self._best[nxt] = inherited if own is None else min(own, inherited)
+
+    def _scan(self, text: str, best: Optional[int]) -> Optional[int]:
+        goto, fail, outputs = self._goto, self._fail, self._best
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = outputs[state]
+            if hit is not None and (best is None or hit < best):
+                best = hit
+                if best == 0:
+                    break
+        return best
+
+    def match(self, title: str, task_keyword: str = "") -> Optional[dict]:
+        """标题或任务关键词中包含某价格本关键词即命中，返回优先级最高的条目"""
+        best = self._scan(title or "", None)
+        if best != 0:
+            best = self._scan(task_keyword or "", best)
+        return self.entries[best] if best is not None else None
+
+    def match_many(self, pairs: Iterable[Tuple[str, str]]) -> List[Optional[dict]]:
+        """批量匹配 (标题, 任务关键词)，结果与输入一一对应"""
+        return [self.match(title, task_keyword) for title, task_keyword in pairs]
+
+    def by_keyword(self, keyword: str) -> Optional[dict]:
+        """按关键词精确查找价格本条目"""
+        return self._exact.get(keyword)
+
+
+_cached: Optional[Tuple[Tuple[str, int], KeywordMatcher]] = None
+
+
+async def get_matcher() -> KeywordMatcher:
+    """取当前价格本的匹配器（版本号未变时复用进程内缓存）"""
+    global _cached
+    try:
+        async with read_db() as db:
+            cursor = await db.execute("SELECT version FROM price_book_version WHERE id = 1")
+            row = await cursor.fetchone()
+        key = (sqlite_manager.DB_PATH, row[0] if row else 0)
+    except aiosqlite.OperationalError:
+        # 尚未执行 init_db 的老库没有版本表：不缓存，每次重新加载
+        key = None
+    if key is not None and _cached is not None and _cached[0] == key:
+        return _cached[1]
+
+    from src.services.price_book_service import PriceBookService
+
+    # 加载期间价格本若又被修改，缓存标记的是旧版本号，下次调用会重新加载
+    matcher = KeywordMatcher(await PriceBookService().get_all())
+    if key is not None:
+        _cached = (key, matcher)
+    return matcher
+
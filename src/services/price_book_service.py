@@ -1,55 +1,47 @@
 """价格本服务"""
 import json
 import uuid
-import statistics
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Optional, Dict, Any
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+from src.infrastructure.persistence.item_evaluation import (
+    config_from_entry,
+    evaluate_prices,
+    schedule_reevaluation,
+)
 
 
 class PriceBookService:
+    """
+    价格本增删改后，price_book 上的触发器把涉及的关键词写入重评估队列，
+    这里只负责唤醒后台任务（见 item_evaluation）
+    """
 
     async def get_all(self) -> List[dict]:
         """获取所有价格本条目，附带计算字段"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute("SELECT * FROM price_book ORDER BY created_at DESC")
             rows = await cursor.fetchall()
             return [self._row_to_entry(dict(r)) for r in rows]
-        finally:
-            await db.close()
 
     async def get_by_id(self, entry_id: str) -> Optional[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute("SELECT * FROM price_book WHERE id = ?", (entry_id,))
             row = await cursor.fetchone()
             return self._row_to_entry(dict(row)) if row else None
-        finally:
-            await db.close()
 
     async def get_by_keyword(self, keyword: str) -> Optional[dict]:
-        """通过关键词查找匹配的价格本条目"""
-        db = await get_db()
-        try:
-            cursor = await db.execute("SELECT * FROM price_book")
-            rows = await cursor.fetchall()
-            for row in rows:
-                entry = dict(row)
-                keywords = json.loads(entry.get("keywords") or "[]")
-                if keyword in keywords:
-                    return self._row_to_entry(entry)
-            return None
-        finally:
-            await db.close()
+        """通过关键词查找匹配的价格本条目（同一关键词取最早创建的）"""
+        from src.services.price_book_matcher import get_matcher
+
+        return (await get_matcher()).by_keyword(keyword)
 
     async def create(self, data: dict) -> dict:
         entry_id = str(uuid.uuid4())
         now = datetime.now().isoformat()
         keywords_json = json.dumps(data.get("keywords", []), ensure_ascii=False)
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 """INSERT INTO price_book (
                     id, category_name, keywords, new_price, market_price,
@@ -75,9 +67,7 @@ class PriceBookService:
                     now, now,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
+        schedule_reevaluation()
 
         return await self.get_by_id(entry_id)
 
@@ -117,26 +107,21 @@ class PriceBookService:
         params.append(datetime.now().isoformat())
         params.append(entry_id)
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 f"UPDATE price_book SET {', '.join(fields)} WHERE id = ?",
                 params,
             )
-            await db.commit()
-        finally:
-            await db.close()
+        schedule_reevaluation()
 
         return await self.get_by_id(entry_id)
 
     async def delete(self, entry_id: str) -> bool:
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute("DELETE FROM price_book WHERE id = ?", (entry_id,))
-            await db.commit()
-            return cursor.rowcount > 0
-        finally:
-            await db.close()
+            deleted = cursor.rowcount > 0
+        schedule_reevaluation()
+        return deleted
 
     async def batch_update(self, ids: List[str], data: dict) -> int:
         """批量更新多个价格本条目的共同字段"""
@@ -167,60 +152,19 @@ class PriceBookService:
         placeholders = ",".join("?" * len(ids))
         params.extend(ids)
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute(
                 f"UPDATE price_book SET {', '.join(fields)} WHERE id IN ({placeholders})",
                 params,
             )
-            await db.commit()
-            return cursor.rowcount
-        finally:
-            await db.close()
+            updated = cursor.rowcount
+        schedule_reevaluation()
+        return updated
 
     async def evaluate_item(self, keyword: str, item_price: float) -> dict:
         """评估单个商品"""
         entry = await self.get_by_keyword(keyword)
-        if not entry:
-            return {"status": "no_config", "purchase_range": [None, None], "profit": 0, "profit_rate": 0}
-
-        target = entry.get("target_sell_price")
-        if not target:
-            return {"status": "no_config", "purchase_range": [None, None], "profit": 0, "profit_rate": 0}
-
-        ideal = entry.get("purchase_ideal")
-        upper = entry.get("purchase_upper")
-
-        # Calculate profit
-        total_fees = entry.get("total_fees", 0)
-        total_cost = item_price + total_fees
-        profit = target - total_cost
-        profit_rate = round(profit / target * 100, 2) if target > 0 else 0
-
-        if ideal is None or upper is None:
-            status = "no_config"
-        elif item_price <= ideal:
-            status = "great_deal"
-        elif item_price <= upper:
-            status = "good_deal"
-        else:
-            status = "overpriced"
-
-        market_diff = None
-        market_price = entry.get("market_price")
-        if market_price and market_price > 0:
-            market_diff = round((item_price - market_price) / market_price * 100, 2)
-
-        return {
-            "status": status,
-            "purchase_range": [ideal, upper],
-            "profit": round(profit, 2),
-            "profit_rate": profit_rate,
-            "total_cost": round(total_cost, 2),
-            "total_fees": total_fees,
-            "market_diff_pct": market_diff,
-            "price_book_id": entry["id"],
-        }
+        return self._evaluate_with([entry], [item_price])[0]
 
     async def evaluate_items_batch(self, items: List[dict]) -> List[dict]:
         """批量评估商品列表"""
@@ -231,61 +175,62 @@ class PriceBookService:
             for kw in entry.get("keywords", []):
                 keyword_map[kw] = entry
 
-        results = []
+        entries, prices = [], []
         for item in items:
             keyword = item.get("keyword", "") or item.get("搜索关键字", "")
             price = item.get("price", 0)
             if isinstance(price, str):
                 price = float(price.replace("¥", "").replace(",", "").strip() or "0")
-
-            entry = keyword_map.get(keyword)
-            if not entry or not entry.get("target_sell_price"):
-                results.append({
-                    "item": item,
-                    "evaluation": {"status": "no_config", "purchase_range": [None, None], "profit": 0, "profit_rate": 0}
-                })
+            entries.append(keyword_map.get(keyword))
+            prices.append(price)
+
+        evaluations = self._evaluate_with(entries, prices)
+        for entry, evaluation in zip(entries, evaluations):
+            if evaluation["status"] != "no_config":
+                evaluation["category_name"] = entry.get("category_name", "")
+        return [{"item": item, "evaluation": ev} for item, ev in zip(items, evaluations)]
+
+    @staticmethod
+    def _evaluate_with(entries: List[Optional[dict]], prices: List[float]) -> List[dict]:
+        """按各自匹配到的价格本条目整批评估（item_evaluation.evaluate_prices），利润率等为百分比"""
+        configs = {
+            entry["id"]: config_from_entry(entry)
+            for entry in entries if entry and entry.get("target_sell_price")
+        }
+        evaluations = evaluate_prices(
+            prices, [entry["id"] if entry else None for entry in entries], configs, rounded=False
+        )
+        results = []
+        for entry, price, evaluation in zip(entries, prices, evaluations):
+            status = evaluation["evaluation_status"] if evaluation else None
+            if status in (None, "no_config"):
+                results.append(
+                    {"status": "no_config", "purchase_range": [None, None], "profit": 0, "profit_rate": 0}
+                )
                 continue
-
-            target = entry["target_sell_price"]
-            ideal = entry.get("purchase_ideal")
-            upper = entry.get("purchase_upper")
-            total_fees = entry.get("total_fees", 0)
-            total_cost = price + total_fees
-            profit = target - total_cost
-            profit_rate = round(profit / target * 100, 2) if target > 0 else 0
-
-            if ideal is None or upper is None:
-                status = "no_config"
-            elif price <= ideal:
-                status = "great_deal"
-            elif price <= upper:
-                status = "good_deal"
-            else:
-                status = "overpriced"
-
-            market_diff = None
-            if entry.get("market_price") and entry["market_price"] > 0:
-                market_diff = round((price - entry["market_price"]) / entry["market_price"] * 100, 2)
-
+            premium = evaluation["premium_rate"]
             results.append({
-                "item": item,
-                "evaluation": {
-                    "status": status,
-                    "purchase_range": [ideal, upper],
-                    "profit": round(profit, 2),
-                    "profit_rate": profit_rate,
-                    "total_cost": round(total_cost, 2),
-                    "total_fees": total_fees,
-                    "market_diff_pct": market_diff,
-                    "price_book_id": entry["id"],
-                    "category_name": entry.get("category_name", ""),
-                }
+                "status": status,
+                "purchase_range": [evaluation["purchase_range_low"], evaluation["purchase_range_high"]],
+                "profit": round(evaluation["estimated_profit"], 2),
+                "profit_rate": round(evaluation["estimated_profit_rate"] * 100, 2),
+                "total_cost": round(price + entry["total_fees"], 2),
+                "total_fees": entry["total_fees"],
+                "market_diff_pct": round(premium * 100, 2) if premium is not None else None,
+                "price_book_id": entry["id"],
             })
-
         return results
 
     async def auto_update_market_prices(self):
-        """自动更新行情价（取最近7天中位价）"""
+        """自动更新行情价（取最近7天中位价，由价格日汇总的分位数草图合并得出）"""
+        from src.infrastructure.persistence.price_rollup_repository import (
+            PriceRollupRepository,
+            RollupBucket,
+            since_day,
+        )
+
+        rollup_repo = PriceRollupRepository()
+        since = since_day(7)
         entries = await self.get_all()
         for entry in entries:
             if entry.get("market_price_source") != "auto_7d_median":
@@ -294,27 +239,18 @@ class PriceBookService:
             if not keywords:
                 continue
 
-            db = await get_db()
-            try:
-                since = (datetime.now() - timedelta(days=7)).isoformat()
-                prices = []
-                for kw in keywords:
-                    cursor = await db.execute(
-                        "SELECT price FROM items WHERE keyword = ? AND crawl_time >= ? AND price > 0",
-                        (kw, since),
-                    )
-                    rows = await cursor.fetchall()
-                    prices.extend([dict(r)["price"] for r in rows])
-
-                if prices:
-                    median = round(statistics.median(prices), 2)
+            merged = RollupBucket()
+            for bucket in (await rollup_repo.get_by_platform(keywords, since=since)).values():
+                merged.merge(bucket)
+            if merged.count:
+                median = round(merged.median, 2)
+                async with write_db() as db:
                     await db.execute(
                         "UPDATE price_book SET market_price = ?, updated_at = ? WHERE id = ?",
                         (median, datetime.now().isoformat(), entry["id"]),
                     )
-                    await db.commit()
-            finally:
-                await db.close()
+        # 行情价变化影响溢价率
+        schedule_reevaluation()
 
     def _row_to_entry(self, row: dict) -> dict:
         """将DB行转为带计算字段的dict"""
@@ -1,6 +1,7 @@
 """
 进程管理服务
 负责管理爬虫进程的启动和停止
+启用爬虫守护进程（SCRAPER_WORKER_ENABLED）时任务交给守护进程运行，守护进程不可用时退回子进程
 """
 import asyncio
 import sys
@@ -9,15 +10,21 @@ import signal
 import psutil
 from datetime import datetime
 from typing import Dict, Optional
+from src.infrastructure.config.settings import scraper_settings
+from src.services.scraper_worker_client import ScraperWorkerClient, WorkerRun
 from src.utils import build_task_log_path
 
 
 class ProcessService:
     """进程管理服务"""
 
-    def __init__(self):
-        self.processes: Dict[int, asyncio.subprocess.Process] = {}
+    def __init__(self, worker_client: Optional[ScraperWorkerClient] = None):
+        # 子进程或守护进程中的运行（WorkerRun 与 Process 一样提供 pid / returncode / wait）
+        self.processes: Dict[int, asyncio.subprocess.Process | WorkerRun] = {}
         self.log_paths: Dict[int, str] = {}
+        if worker_client is None and scraper_settings.worker_enabled:
+            worker_client = ScraperWorkerClient()
+        self.worker_client = worker_client
 
     def _find_task_process_by_name(self, task_name: str) -> Optional[int]:
         """通过任务名查找正在运行的进程PID"""
@@ -50,6 +57,16 @@ class ProcessService:
         try:
             os.makedirs("logs", exist_ok=True)
             log_file_path = build_task_log_path(task_id, task_name)
+
+            if self.worker_client is not None:
+                run = await self.worker_client.start_run(task_id, task_name, log_file_path)
+                if run is not None:
+                    self.processes[task_id] = run
+                    self.log_paths[task_id] = log_file_path
+                    print(f"启动任务 '{task_name}' (爬虫守护进程 PID: {run.pid})")
+                    return True
+                print("爬虫守护进程未运行，改用子进程启动任务")
+
             log_file_handle = open(log_file_path, 'a', encoding='utf-8')
 
             preexec_fn = os.setsid if sys.platform != "win32" else None
@@ -91,6 +108,12 @@ class ProcessService:
         process = self.processes.pop(task_id, None)
         log_path = self.log_paths.pop(task_id, None)
         
+        # 内存中没有进程对象时（如应用重启后），先请求守护进程停止该任务
+        if not process and self.worker_client is not None and await self.worker_client.stop_run(task_id):
+            self._append_stop_marker(log_path)
+            print(f"爬虫守护进程中的任务 (ID: {task_id}) 已终止")
+            return True
+
         # 如果内存中没有进程对象，尝试通过任务名查找孤儿进程
         if not process and task_name:
             pid = self._find_task_process_by_name(task_name)
@@ -136,6 +159,16 @@ class ProcessService:
             print(f"任务进程 {process.pid} (ID: {task_id}) 已退出，略过停止")
             return False
 
+        if isinstance(process, WorkerRun):
+            await process.stop()
+            try:
+                await asyncio.wait_for(process.wait(), timeout=20)
+            except asyncio.TimeoutError:
+                print(f"爬虫守护进程中的任务 (ID: {task_id}) 未在 20 秒内结束")
+            self._append_stop_marker(log_path)
+            print(f"爬虫守护进程中的任务 (ID: {task_id}) 已终止")
+            return True
+
         try:
             if sys.platform != "win32":
                 os.killpg(os.getpgid(process.pid), signal.SIGTERM)
@@ -1,9 +1,11 @@
 """商品匹配服务 — 管理商品组与商品↔组映射"""
-import os
+import sqlite3
 from uuid import uuid4
 
 import aiosqlite
 
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
 _DEFAULT_DB_PATH = "data/monitor.db"
 
 _CREATE_TABLES_SQL = """
@@ -43,20 +45,16 @@ class ProductMatchService:
     def __init__(self, db_path: str | None = None):
         self.db_path = db_path or _DEFAULT_DB_PATH
 
-    async def _get_db(self) -> aiosqlite.Connection:
-        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
-        db = await aiosqlite.connect(self.db_path)
-        db.row_factory = aiosqlite.Row
-        await db.execute("PRAGMA foreign_keys = ON")
-        return db
+    @staticmethod
+    async def _require_group(db: aiosqlite.Connection, group_id: str) -> None:
+        """连接池连接未开启 foreign_keys，写映射前显式校验商品组存在"""
+        cursor = await db.execute("SELECT 1 FROM product_groups WHERE id = ?", (group_id,))
+        if await cursor.fetchone() is None:
+            raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
 
     async def init_tables(self) -> None:
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
             await db.executescript(_CREATE_TABLES_SQL)
-            await db.commit()
-        finally:
-            await db.close()
 
     # ------------------------------------------------------------------
     # Product Groups CRUD
@@ -73,17 +71,13 @@ class ProductMatchService:
         group_id = str(uuid4())
         normalized_name = name.strip().lower()
 
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
             await db.execute(
                 """INSERT INTO product_groups
                    (id, name, normalized_name, category_path, brand, model, spec_summary)
                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
                 (group_id, name, normalized_name, category_path, brand, model, spec_summary),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
         return {
             "id": group_id,
@@ -96,8 +90,7 @@ class ProductMatchService:
         }
 
     async def get_product_group(self, group_id: str) -> dict | None:
-        db = await self._get_db()
-        try:
+        async with read_db(self.db_path) as db:
             cursor = await db.execute(
                 "SELECT * FROM product_groups WHERE id = ?", (group_id,)
             )
@@ -105,8 +98,6 @@ class ProductMatchService:
             if row is None:
                 return None
             return dict(row)
-        finally:
-            await db.close()
 
     async def list_product_groups(
         self,
@@ -130,13 +121,10 @@ class ProductMatchService:
         where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
         sql = f"SELECT * FROM product_groups{where} ORDER BY created_at DESC"
 
-        db = await self._get_db()
-        try:
+        async with read_db(self.db_path) as db:
             cursor = await db.execute(sql, params)
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def find_similar_groups(
         self,
@@ -159,17 +147,13 @@ class ProductMatchService:
         where = " AND ".join(conditions)
         sql = f"SELECT * FROM product_groups WHERE {where} ORDER BY created_at DESC"
 
-        db = await self._get_db()
-        try:
+        async with read_db(self.db_path) as db:
             cursor = await db.execute(sql, params)
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def delete_product_group(self, group_id: str) -> bool:
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
             await db.execute(
                 "DELETE FROM item_product_match WHERE product_group_id = ?",
                 (group_id,),
@@ -177,10 +161,7 @@ class ProductMatchService:
             cursor = await db.execute(
                 "DELETE FROM product_groups WHERE id = ?", (group_id,)
             )
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     # ------------------------------------------------------------------
     # Item ↔ Group Mapping
@@ -197,17 +178,14 @@ class ProductMatchService:
     ) -> dict:
         link_id = str(uuid4())
 
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
+            await self._require_group(db, product_group_id)
             await db.execute(
                 """INSERT INTO item_product_match
                    (id, item_id, product_group_id, condition_tier, condition_detail, confidence, matched_by)
                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
                 (link_id, item_id, product_group_id, condition_tier, condition_detail, confidence, matched_by),
             )
-            await db.commit()
-        finally:
-            await db.close()
 
         return {
             "id": link_id,
@@ -220,28 +198,22 @@ class ProductMatchService:
         }
 
     async def get_group_items(self, group_id: str) -> list[dict]:
-        db = await self._get_db()
-        try:
+        async with read_db(self.db_path) as db:
             cursor = await db.execute(
                 "SELECT * FROM item_product_match WHERE product_group_id = ? ORDER BY created_at DESC",
                 (group_id,),
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def move_item(self, item_id: str, new_group_id: str) -> bool:
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
+            await self._require_group(db, new_group_id)
             cursor = await db.execute(
                 "UPDATE item_product_match SET product_group_id = ? WHERE item_id = ?",
                 (new_group_id, item_id),
             )
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     async def merge_groups(
         self,
@@ -251,8 +223,8 @@ class ProductMatchService:
         if not source_group_ids:
             return False
 
-        db = await self._get_db()
-        try:
+        async with write_db(self.db_path) as db:
+            await self._require_group(db, target_group_id)
             for source_id in source_group_ids:
                 await db.execute(
                     "UPDATE item_product_match SET product_group_id = ? WHERE product_group_id = ?",
@@ -262,7 +234,4 @@ class ProductMatchService:
                     "DELETE FROM product_groups WHERE id = ?",
                     (source_id,),
                 )
-            await db.commit()
             return True
-        finally:
-            await db.close()
@@ -2,7 +2,7 @@
 import uuid
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 class ProfitService:
@@ -10,8 +10,7 @@ class ProfitService:
     async def create_sale_record(self, data: dict) -> dict:
         record_id = str(uuid.uuid4())
         now = datetime.now().isoformat()
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 """INSERT INTO sale_records (
                     id, inventory_item_id, title, keyword, platform,
@@ -28,19 +27,13 @@ class ProfitService:
                     data.get("assignee"), data.get("sold_at", now), now,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
         return await self.get_sale_record(record_id)
 
     async def get_sale_record(self, record_id: str) -> Optional[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute("SELECT * FROM sale_records WHERE id = ?", (record_id,))
             row = await cursor.fetchone()
             return self._normalize_record(dict(row)) if row else None
-        finally:
-            await db.close()
 
     @staticmethod
     def _normalize_record(r: dict) -> dict:
@@ -58,8 +51,7 @@ class ProfitService:
         keyword: Optional[str] = None,
         assignee: Optional[str] = None,
     ) -> List[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             conditions = []
             params = []
             if start_date:
@@ -80,8 +72,6 @@ class ProfitService:
             )
             rows = await cursor.fetchall()
             return [self._normalize_record(dict(r)) for r in rows]
-        finally:
-            await db.close()
 
     async def get_summary(
         self,
@@ -90,8 +80,7 @@ class ProfitService:
         assignee: Optional[str] = None,
     ) -> dict:
         """获取利润汇总"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             conditions = []
             params = []
             if start_date:
@@ -120,8 +109,6 @@ class ProfitService:
                 "total_sold": 0, "total_revenue": 0, "total_cost": 0,
                 "net_profit": 0, "avg_profit_rate": 0,
             }
-        finally:
-            await db.close()
 
     async def get_profit_by_keyword(
         self,
@@ -129,8 +116,7 @@ class ProfitService:
         end_date: Optional[str] = None,
     ) -> List[dict]:
         """按品类统计利润"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             conditions = []
             params = []
             if start_date:
@@ -156,8 +142,6 @@ class ProfitService:
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def get_profit_by_assignee(
         self,
@@ -165,8 +149,7 @@ class ProfitService:
         end_date: Optional[str] = None,
     ) -> List[dict]:
         """按成员统计利润"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             conditions = []
             params = []
             if start_date:
@@ -192,14 +175,11 @@ class ProfitService:
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def get_daily_profit(self, days: int = 30, assignee: Optional[str] = None) -> List[dict]:
         """获取每日利润趋势"""
         since = (datetime.now() - timedelta(days=days)).isoformat()
-        db = await get_db()
-        try:
+        async with read_db() as db:
             condition = "AND assignee = ?" if assignee else ""
             params = [since] + ([assignee] if assignee else [])
 
@@ -218,5 +198,3 @@ class ProfitService:
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
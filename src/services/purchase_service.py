@@ -3,14 +3,13 @@ import json
 import uuid
 from datetime import datetime
 from typing import List, Optional
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 class PurchaseService:
 
     async def get_all(self, status: Optional[str] = None, assignee: Optional[str] = None) -> List[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             conditions = []
             params = []
             if status:
@@ -25,23 +24,17 @@ class PurchaseService:
             )
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
-        finally:
-            await db.close()
 
     async def get_by_id(self, item_id: str) -> Optional[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute("SELECT * FROM purchase_items WHERE id = ?", (item_id,))
             row = await cursor.fetchone()
             return dict(row) if row else None
-        finally:
-            await db.close()
 
     async def create(self, data: dict) -> dict:
         item_id = str(uuid.uuid4())
         now = datetime.now().isoformat()
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 """INSERT INTO purchase_items (
                     id, item_id, title, price, image_url, item_link, platform, keyword,
@@ -60,9 +53,6 @@ class PurchaseService:
                     now, now,
                 ),
             )
-            await db.commit()
-        finally:
-            await db.close()
         return await self.get_by_id(item_id)
 
     async def update(self, item_id: str, data: dict) -> Optional[dict]:
@@ -84,39 +74,27 @@ class PurchaseService:
         params.append(datetime.now().isoformat())
         params.append(item_id)
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             await db.execute(
                 f"UPDATE purchase_items SET {', '.join(fields)} WHERE id = ?", params
             )
-            await db.commit()
-        finally:
-            await db.close()
         return await self.get_by_id(item_id)
 
     async def delete(self, item_id: str) -> bool:
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute("DELETE FROM purchase_items WHERE id = ?", (item_id,))
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     async def batch_assign(self, ids: List[str], assignee: str) -> int:
         if not ids:
             return 0
         placeholders = ",".join("?" * len(ids))
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute(
                 f"UPDATE purchase_items SET assignee = ?, updated_at = ? WHERE id IN ({placeholders})",
                 [assignee, datetime.now().isoformat()] + ids,
             )
-            await db.commit()
             return cursor.rowcount
-        finally:
-            await db.close()
 
     async def mark_purchased(self, item_id: str, actual_price: float) -> Optional[dict]:
         """标记已收货，同时创建库存项"""
@@ -172,8 +150,7 @@ class PurchaseService:
         """返回格式匹配前端 PurchaseStats 类型：
         {total, by_status, by_assignee, total_estimated_profit, total_actual_cost}
         """
-        db = await get_db()
-        try:
+        async with read_db() as db:
             condition = "WHERE assignee = ?" if assignee else ""
             params = [assignee] if assignee else []
 
@@ -213,5 +190,3 @@ class PurchaseService:
                 "total_estimated_profit": summary["total_estimated_profit"],
                 "total_actual_cost": summary["total_actual_cost"],
             }
-        finally:
-            await db.close()
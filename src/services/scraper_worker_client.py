@@ -0,0 +1,97 @@
+"""
+爬虫守护进程客户端
+ProcessService 通过本地 Unix socket 把任务运行交给 scraper_worker.py 守护进程；
+守护进程未启动（或平台不支持 Unix socket）时返回 None，由调用方退回子进程模式。
+"""
+import asyncio
+import json
+import os
+from typing import Optional, Tuple
+
+from src.infrastructure.config.settings import scraper_settings
+
+
+class WorkerRun:
+    """
+    守护进程中的一次任务运行。
+    与 asyncio.subprocess.Process 对齐 pid / returncode / wait()，ProcessService 可与子进程一并管理。
+    """
+
+    def __init__(self, client: "ScraperWorkerClient", task_id: int, pid: int,
+                 reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.task_id = task_id
+        self.pid = pid
+        self.returncode: Optional[int] = None
+        self._client = client
+        self._finished = asyncio.Event()
+        self._watcher = asyncio.create_task(self._watch(reader, writer))
+
+    async def _watch(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            line = await reader.readline()
+            message = json.loads(line) if line else {}
+            # 连接在运行结束前断开说明守护进程已退出
+            self.returncode = message.get("returncode", -1) if message.get("event") == "finished" else -1
+        except (ConnectionError, json.JSONDecodeError):
+            self.returncode = -1
+        finally:
+            writer.close()
+            self._finished.set()
+
+    async def wait(self) -> int:
+        await self._finished.wait()
+        return self.returncode
+
+    async def stop(self) -> bool:
+        return await self._client.stop_run(self.task_id)
+
+
+class ScraperWorkerClient:
+    """爬虫守护进程客户端"""
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or scraper_settings.worker_socket
+
+    async def _request(self, payload: dict) -> Optional[Tuple[asyncio.StreamReader, asyncio.StreamWriter, dict]]:
+        if not hasattr(asyncio, "open_unix_connection") or not os.path.exists(self.socket_path):
+            return None
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            writer.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+            line = await reader.readline()
+        except (ConnectionError, FileNotFoundError):
+            return None
+        if not line:
+            writer.close()
+            return None
+        return reader, writer, json.loads(line)
+
+    async def start_run(self, task_id: int, task_name: str, log_path: str) -> Optional[WorkerRun]:
+        """交给守护进程运行；守护进程不可用时返回 None，任务已在守护进程中运行时抛 RuntimeError"""
+        response = await self._request(
+            {"op": "run", "task_id": task_id, "task_name": task_name, "log_path": os.path.abspath(log_path)}
+        )
+        if response is None:
+            return None
+        reader, writer, message = response
+        if message.get("event") != "started":
+            writer.close()
+            raise RuntimeError(message.get("reason") or message.get("error") or "爬虫守护进程拒绝运行")
+        return WorkerRun(self, task_id, message["pid"], reader, writer)
+
+    async def _call(self, payload: dict) -> Optional[dict]:
+        response = await self._request(payload)
+        if response is None:
+            return None
+        _, writer, message = response
+        writer.close()
+        return message
+
+    async def stop_run(self, task_id: int) -> bool:
+        """请求守护进程取消运行（等到运行收尾后返回）"""
+        message = await self._call({"op": "stop", "task_id": task_id})
+        return bool(message and message.get("ok"))
+
+    async def status(self) -> Optional[dict]:
+        return await self._call({"op": "status"})
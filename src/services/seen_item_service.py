@@ -0,0 +1,48 @@
+"""已见商品索引 — 爬虫跨运行去重（替代原 jsonl/<keyword>_full_data.jsonl 去重文件）"""
+from typing import Optional, Set
+
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.utils import get_link_unique_key
+
+
+class SeenItemIndex:
+    """
+    某关键词下已处理商品的内存索引。
+
+    每次运行启动时从 items 表一次性预加载商品ID，之后的判重全部在内存中完成，
+    在打开详情页之前即可跳过已入库的商品。本次运行新处理的商品通过 add() 加入。
+    """
+
+    def __init__(self, keyword: str, platform: str = "xianyu"):
+        self.keyword = keyword
+        self.platform = platform
+        self._item_ids: Set[str] = set()
+        # 缺少商品ID的记录退化为按链接去重
+        self._link_keys: Set[str] = set()
+
+    @classmethod
+    async def load(
+        cls,
+        keyword: str,
+        platform: str = "xianyu",
+        repo: Optional[ItemRepository] = None,
+    ) -> "SeenItemIndex":
+        """从数据库预加载索引"""
+        index = cls(keyword, platform)
+        repo = repo or ItemRepository()
+        index._item_ids.update(await repo.get_seen_item_ids(keyword, platform))
+        return index
+
+    def contains(self, item_id: Optional[str], link: str = "") -> bool:
+        if item_id and str(item_id) in self._item_ids:
+            return True
+        return bool(link) and get_link_unique_key(link) in self._link_keys
+
+    def add(self, item_id: Optional[str], link: str = "") -> None:
+        if item_id:
+            self._item_ids.add(str(item_id))
+        if link:
+            self._link_keys.add(get_link_unique_key(link))
+
+    def __len__(self) -> int:
+        return len(self._item_ids)
@@ -3,7 +3,7 @@
 基于多维度指标计算卖家信用分，提供黑白名单管理。
 """
 from typing import Dict, Optional, Any
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 # 评分权重
@@ -71,33 +71,27 @@ class SellerCreditService:
     ) -> bool:
         """保存到黑/白名单"""
         from datetime import datetime
-        db = await get_db()
         try:
-            await db.execute(
-                """INSERT OR REPLACE INTO seller_lists
-                   (seller_id, seller_name, list_type, reason, created_at)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (seller_id, seller_name, list_type, reason, datetime.now().isoformat()),
-            )
-            await db.commit()
+            async with write_db() as db:
+                await db.execute(
+                    """INSERT OR REPLACE INTO seller_lists
+                       (seller_id, seller_name, list_type, reason, created_at)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (seller_id, seller_name, list_type, reason, datetime.now().isoformat()),
+                )
             return True
         except Exception as e:
             print(f"保存卖家名单失败: {e}")
             return False
-        finally:
-            await db.close()
 
     async def _get_list_entry(self, seller_id: str) -> Optional[Dict]:
         """获取卖家名单信息"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 "SELECT * FROM seller_lists WHERE seller_id = ?", (seller_id,)
             )
             row = await cursor.fetchone()
             return dict(row) if row else None
-        finally:
-            await db.close()
 
     async def add_to_blacklist(self, seller_id: str, seller_name: str, reason: str = "") -> bool:
         return await self._save_list_entry(seller_id, seller_name, "blacklist", reason)
@@ -106,13 +100,9 @@ class SellerCreditService:
         return await self._save_list_entry(seller_id, seller_name, "whitelist", reason)
 
     async def remove_from_list(self, seller_id: str) -> bool:
-        db = await get_db()
-        try:
+        async with write_db() as db:
             cursor = await db.execute("DELETE FROM seller_lists WHERE seller_id = ?", (seller_id,))
-            await db.commit()
             return cursor.rowcount > 0
-        finally:
-            await db.close()
 
     async def check_seller_status(self, seller_id: str) -> Dict[str, bool]:
         """检查卖家是否在黑/白名单中"""
@@ -126,32 +116,23 @@ class SellerCreditService:
 
     async def get_seller_profile(self, seller_id: str) -> Optional[Dict[str, Any]]:
         """获取卖家信用概况（从缓存/数据库）"""
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 "SELECT * FROM seller_profiles WHERE seller_id = ?", (seller_id,)
             )
             row = await cursor.fetchone()
             return dict(row) if row else None
-        finally:
-            await db.close()
 
     async def get_blacklist(self) -> list:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 "SELECT * FROM seller_lists WHERE list_type = 'blacklist' ORDER BY created_at DESC"
             )
             return [dict(r) for r in await cursor.fetchall()]
-        finally:
-            await db.close()
 
     async def get_whitelist(self) -> list:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 "SELECT * FROM seller_lists WHERE list_type = 'whitelist' ORDER BY created_at DESC"
             )
             return [dict(r) for r in await cursor.fetchall()]
-        finally:
-            await db.close()
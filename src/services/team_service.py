@@ -2,14 +2,13 @@
 import json
 from datetime import datetime
 from typing import List, Optional
-from src.infrastructure.persistence.sqlite_manager import get_db
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
 
 
 class TeamService:
 
     async def get_all_members(self) -> List[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 """SELECT u.id as user_id, u.username, u.display_name, u.is_active, u.created_at,
                           COALESCE(t.role, 'member') as role,
@@ -26,12 +25,9 @@ class TeamService:
                 member["focus_keywords"] = json.loads(member.get("focus_keywords") or "[]")
                 result.append(member)
             return result
-        finally:
-            await db.close()
 
     async def get_member(self, user_id: int) -> Optional[dict]:
-        db = await get_db()
-        try:
+        async with read_db() as db:
             cursor = await db.execute(
                 """SELECT u.id as user_id, u.username, u.display_name, u.is_active, u.created_at,
                           COALESCE(t.role, 'member') as role,
@@ -47,16 +43,13 @@ class TeamService:
             member = dict(row)
             member["focus_keywords"] = json.loads(member.get("focus_keywords") or "[]")
             return member
-        finally:
-            await db.close()
 
     async def update_member(self, user_id: int, data: dict) -> Optional[dict]:
         member = await self.get_member(user_id)
         if not member:
             return None
 
-        db = await get_db()
-        try:
+        async with write_db() as db:
             # Upsert team_members row
             role = data.get("role", member.get("role", "member"))
             focus_keywords = data.get("focus_keywords", member.get("focus_keywords", []))
@@ -79,10 +72,6 @@ class TeamService:
                     (data["display_name"], user_id),
                 )
 
-            await db.commit()
-        finally:
-            await db.close()
-
         return await self.get_member(user_id)
 
     async def get_member_performance(self, user_id: Optional[int] = None, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[dict]:
@@ -96,8 +85,7 @@ class TeamService:
             username = member["username"]
 
             # Purchase stats
-            db = await get_db()
-            try:
+            async with read_db() as db:
                 date_cond = ""
                 date_params = []
                 if start_date:
@@ -143,8 +131,6 @@ class TeamService:
                 )
                 inv_row = await cursor.fetchone()
                 inv_stats = dict(inv_row) if inv_row else {"count": 0, "value": 0}
-            finally:
-                await db.close()
 
             results.append({
                 "user_id": member["user_id"],
@@ -0,0 +1,80 @@
+"""
+有界多阶段异步流水线
+
+各阶段之间用有界 asyncio.Queue 连接，每个阶段按各自的并发数启动工作协程：
+- submit() 在第一阶段队列已满时等待，下游处理不过来时自然对上游（浏览器翻页 / 取详情）施加背压
+- 阶段处理函数返回下一阶段的输入；返回 None 表示该条目到此结束（不再往下传）
+- 单个条目在某阶段出错只记录并丢弃该条目，不影响其它条目与流水线本身
+- close() 等全部已提交条目走完所有阶段后停止工作协程；abort() 立即停止（丢弃未完成条目）
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+StageHandler = Callable[[Any], Awaitable[Optional[Any]]]
+
+
+class StagePipeline:
+    """按阶段串联的有界异步流水线（绑定到创建它的事件循环）"""
+
+    def __init__(self, stages: Sequence[Tuple[str, StageHandler, int]], queue_size: int = 4):
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.names = [name for name, _, _ in stages]
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self.stats: Dict[str, Dict[str, int]] = {name: {"done": 0, "failed": 0} for name in self.names}
+        self.completed = 0
+        self._aborted = False
+        self._workers = [
+            asyncio.create_task(self._work(index, handler))
+            for index, (_, handler, concurrency) in enumerate(stages)
+            for _ in range(max(1, concurrency))
+        ]
+
+    @property
+    def pending(self) -> int:
+        """已提交但尚未走完全部阶段的条目数（不含正在处理中的）"""
+        return sum(q.qsize() for q in self._queues)
+
+    async def submit(self, item: Any) -> None:
+        await self._queues[0].put(item)
+
+    async def _work(self, index: int, handler: StageHandler) -> None:
+        name = self.names[index]
+        queue = self._queues[index]
+        last = index == len(self._queues) - 1
+        while True:
+            item = await queue.get()
+            try:
+                result = await handler(item)
+                self.stats[name]["done"] += 1
+                if last:
+                    self.completed += 1
+                elif result is not None:
+                    # 下游队列满时在此等待，先 put 再 task_done，join 时条目不会"漏掉"
+                    await self._queues[index + 1].put(result)
+            except Exception as e:
+                self.stats[name]["failed"] += 1
+                print(f"   [流水线] 阶段 '{name}' 处理失败，已跳过该商品: {e}")
+            finally:
+                queue.task_done()
+
+    async def join(self) -> None:
+        """等待已提交的条目全部处理完（按阶段顺序逐个 join）"""
+        for queue in self._queues:
+            await queue.join()
+
+    def abort(self) -> None:
+        """立即停止：取消工作协程，队列中未处理的条目被丢弃"""
+        self._aborted = True
+        self._stop_workers()
+
+    def _stop_workers(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+    async def close(self) -> None:
+        # abort() 之后队列里剩下的条目不会再 task_done，join 会永远等下去
+        if not self._aborted:
+            await self.join()
+        self._stop_workers()
+        await asyncio.gather(*self._workers, return_exceptions=True)
@@ -117,10 +117,11 @@ def get_link_unique_key(link: str) -> str:
     return link.split('&', 1)[0]
 
 
-async def save_to_jsonl(data_record: dict, keyword: str):
+async def save_to_jsonl(data_record: dict, keyword: str, buffer=None):
     """
     将商品记录写入 SQLite items 表。
     自动调用价格匹配服务进行评估。
+    传入 buffer (ItemWriteBuffer) 时记录进入写缓冲，由缓冲区批量落库。
     """
     try:
         # 1. 调用价格匹配服务进行评估
@@ -132,6 +133,9 @@ async def save_to_jsonl(data_record: dict, keyword: str):
         data_record.update(evaluation)
         
         # 3. 保存到数据库
+        if buffer is not None:
+            await buffer.add(data_record)
+            return True
         from src.infrastructure.persistence.item_repository import ItemRepository
         repo = ItemRepository()
         return await repo.insert(data_record)
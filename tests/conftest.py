@@ -102,3 +102,13 @@ def api_context(tmp_path):
 @pytest.fixture()
 def api_client(api_context):
     return TestClient(api_context["app"])
+
+
+@pytest.fixture()
+def temp_db(tmp_path, monkeypatch):
+    """把 sqlite_manager 的默认数据库切到临时文件（测试内需自行 await init_db()）"""
+    from src.infrastructure.persistence import sqlite_manager
+
+    db_path = str(tmp_path / "monitor.db")
+    monkeypatch.setattr(sqlite_manager, "DB_PATH", db_path)
+    return db_path
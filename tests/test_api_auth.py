@@ -199,3 +199,44 @@ async def test_check_auth(app):
         assert data["valid"] is True
         assert data["username"] == "testuser"
     app.dependency_overrides.clear()
+
+
+# ── Legacy .env login ─────────────────────────────────────
+
+
+@pytest.mark.anyio
+async def test_legacy_env_login_migrates_user(temp_db, monkeypatch):
+    """首次用 .env 旧账号登录：读连接只读，迁移写入走写连接"""
+    from src.infrastructure.persistence import sqlite_manager
+    from src.services import auth_service
+
+    await sqlite_manager.init_db()
+    monkeypatch.setattr(auth_service.settings, "web_username", "legacy")
+    monkeypatch.setattr(auth_service.settings, "web_password", "legacy-pass")
+
+    first = await auth_service.login("legacy", "legacy-pass")
+    assert first.user.username == "legacy" and first.user.display_name == "管理员"
+    assert await auth_service.get_user_count() == 1
+
+    # 迁移后按库中的哈希校验
+    second = await auth_service.login("legacy", "legacy-pass")
+    assert second.user.id == first.user.id
+    with pytest.raises(ValueError):
+        await auth_service.login("legacy", "wrong")
+
+
+@pytest.mark.anyio
+async def test_auth_service_writes_use_writer_connection(temp_db):
+    """注册 / 改密写在写连接上，查询走只读连接：读连接上的任何写入都会报错"""
+    from src.domain.models.user import UserCreate
+    from src.infrastructure.persistence import sqlite_manager
+    from src.services import auth_service
+
+    await sqlite_manager.init_db()
+    registered = await auth_service.register(
+        UserCreate(username="alice", password="password123", display_name="Alice")
+    )
+    assert await auth_service.change_password(registered.user.id, "password123", "newpass456")
+    assert (await auth_service.login("alice", "newpass456")).user.id == registered.user.id
+    assert (await auth_service.get_user_by_id(registered.user.id)).display_name == "Alice"
+    assert await auth_service.get_user_count() == 1
@@ -1,8 +1,13 @@
 """后端 API 路由 results 的单元测试"""
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 from httpx import AsyncClient, ASGITransport
+from datetime import datetime, timedelta
 from src.app import app
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.price_rollup_repository import RollupBucket
 
 
 @pytest.fixture
@@ -10,6 +15,17 @@ def anyio_backend():
     return "asyncio"
 
 
+def _trend_record(item_id: str, crawl_time: datetime, price: str) -> dict:
+    return {
+        "爬取时间": crawl_time.isoformat(),
+        "搜索关键字": "test",
+        "任务名称": "test",
+        "商品信息": {"商品ID": item_id, "当前售价": price},
+        "卖家信息": {},
+        "ai_analysis": {},
+    }
+
+
 @pytest.fixture
 async def client():
     """创建测试客户端"""
@@ -63,17 +79,11 @@ async def test_premium_map_overview(client):
         "purchase_range": [6870, 7870],
         "new_price": 14999,
     }]
-    mock_query_result = {
-        "total_items": 2,
-        "page": 1,
-        "limit": 10000,
-        "items": [
-            {"商品信息": {"当前售价": "¥8000"}, "卖家信息": {}, "ai_analysis": {}},
-            {"商品信息": {"当前售价": "¥7500"}, "卖家信息": {}, "ai_analysis": {}},
-        ],
-    }
-    with patch("src.api.routes.results.item_repo") as mock_repo:
-        mock_repo.query = AsyncMock(return_value=mock_query_result)
+    bucket = RollupBucket()
+    for price in (8000, 7500):
+        bucket.add(price)
+    with patch("src.api.routes.results.rollup_repo") as mock_rollups:
+        mock_rollups.get_by_platform = AsyncMock(return_value={"xianyu": bucket})
         with patch(
             "src.services.price_book_service.PriceBookService.get_all",
             new_callable=AsyncMock,
@@ -92,18 +102,16 @@ async def test_premium_map_overview(client):
 @pytest.mark.anyio
 async def test_premium_map_distribution(client):
     """测试溢价地图分布"""
-    mock_query_result = {
-        "total_items": 3,
-        "page": 1,
-        "limit": 10000,
-        "items": [
-            {"商品信息": {"当前售价": "¥100"}, "卖家信息": {}, "ai_analysis": {}},
-            {"商品信息": {"当前售价": "¥200"}, "卖家信息": {}, "ai_analysis": {}},
-            {"商品信息": {"当前售价": "¥300"}, "卖家信息": {}, "ai_analysis": {}},
+    mock_histogram = {
+        "total": 3,
+        "bins": [
+            {"range_low": low, "range_high": low + 40, "count": 1 if low in (100, 180, 260) else 0,
+             "label": f"¥{low}-{low + 40}"}
+            for low in range(100, 300, 40)
         ],
     }
     with patch("src.api.routes.results.item_repo") as mock_repo:
-        mock_repo.query = AsyncMock(return_value=mock_query_result)
+        mock_repo.get_price_histogram = AsyncMock(return_value=mock_histogram)
         with patch(
             "src.services.price_book_service.PriceBookService.get_by_keyword",
             new_callable=AsyncMock,
@@ -122,14 +130,8 @@ async def test_premium_map_distribution(client):
 @pytest.mark.anyio
 async def test_premium_map_distribution_empty(client):
     """测试溢价地图分布 — 无数据时返回空"""
-    mock_query_result = {
-        "total_items": 0,
-        "page": 1,
-        "limit": 10000,
-        "items": [],
-    }
     with patch("src.api.routes.results.item_repo") as mock_repo:
-        mock_repo.query = AsyncMock(return_value=mock_query_result)
+        mock_repo.get_price_histogram = AsyncMock(return_value={"total": 0, "bins": []})
         with patch(
             "src.services.price_book_service.PriceBookService.get_by_keyword",
             new_callable=AsyncMock,
@@ -145,88 +147,80 @@ async def test_premium_map_distribution_empty(client):
 
 
 @pytest.mark.anyio
-async def test_market_trend(client):
-    """测试行情走势"""
-    # mock get_db 返回的 aiosqlite 连接
-    mock_db = AsyncMock()
-    mock_cursor = AsyncMock()
-
-    # 构造可被 dict(row) 消费的 Row-like 对象
-    def _make_row(day, price):
-        row = MagicMock()
-        row.keys = MagicMock(return_value=["day", "price"])
-        row.__getitem__ = lambda self, key, _d=day, _p=price: {"day": _d, "price": _p}[key]
-        row.__iter__ = MagicMock(return_value=iter([("day", day), ("price", price)]))
-        return row
-
-    mock_rows = [
-        _make_row("2026-01-15", 8000.0),
-        _make_row("2026-01-15", 9000.0),
-        _make_row("2026-01-16", 8500.0),
+async def test_market_trend(client, temp_db):
+    """测试行情走势（价格日汇总随写入增量维护）"""
+    await sqlite_manager.init_db()
+    day1 = (datetime.now() - timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+    day2 = day1 + timedelta(days=1)
+    records = [
+        _trend_record("1", day1, "¥8000"),
+        _trend_record("2", day1 + timedelta(hours=1), "¥9000"),
+        _trend_record("3", day2, "¥8500"),
     ]
-    mock_cursor.fetchall = AsyncMock(return_value=mock_rows)
-    mock_db.execute = AsyncMock(return_value=mock_cursor)
-    mock_db.close = AsyncMock()
-
-    with patch(
-        "src.infrastructure.persistence.sqlite_manager.get_db",
-        new_callable=AsyncMock,
-        return_value=mock_db,
-    ):
-        response = await client.get("/api/results/market-trend?keyword=test&days=30")
-        assert response.status_code == 200
-        data = response.json()
-        assert data["keyword"] == "test"
-        assert data["days"] == 30
-        assert "trend" in data
-        assert len(data["trend"]) == 2  # 两个不同日期
-        # 检查聚合逻辑
-        day15 = next(t for t in data["trend"] if t["date"] == "2026-01-15")
-        assert day15["count"] == 2
-        assert day15["avg_price"] == 8500.0
+    await ItemRepository().insert_batch(records)
 
+    response = await client.get("/api/results/market-trend?keyword=test&days=30")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["keyword"] == "test"
+    assert data["days"] == 30
+    assert "trend" in data
+    assert len(data["trend"]) == 2  # 两个不同日期
+    # 检查聚合逻辑
+    first = next(t for t in data["trend"] if t["date"] == day1.date().isoformat())
+    assert first["count"] == 2
+    assert first["avg_price"] == 8500.0
+    assert first["min_price"] == 8000.0
+    assert first["max_price"] == 9000.0
 
-@pytest.mark.anyio
-async def test_competitor_analysis(client):
-    """测试竞品观察"""
-    mock_query_result = {
-        "total_items": 2,
-        "page": 1,
-        "limit": 10000,
-        "items": [
-            {
-                "商品信息": {
-                    "商品标题": "商品A",
-                    "当前售价": "¥100",
-                    "商品链接": "http://a.com",
-                },
-                "卖家信息": {"卖家昵称": "卖家1"},
-                "ai_analysis": {},
-                "爬取时间": "2026-01-01",
-            },
-            {
-                "商品信息": {
-                    "商品标题": "商品B",
-                    "当前售价": "¥200",
-                    "商品链接": "http://b.com",
-                },
-                "卖家信息": {"卖家昵称": "卖家1"},
-                "ai_analysis": {},
-                "爬取时间": "2026-01-02",
-            },
-        ],
+
+def _seller_record(item_id: str, seller: str, price: str, minute: int) -> dict:
+    return {
+        "爬取时间": f"2026-01-01T10:{minute:02d}:00",
+        "搜索关键字": "test",
+        "任务名称": "test",
+        "商品信息": {"商品ID": item_id, "商品标题": f"商品{item_id}", "当前售价": price,
+                     "商品链接": f"http://{item_id}.com"},
+        "卖家信息": {"卖家昵称": seller},
+        "ai_analysis": {},
     }
-    with patch("src.api.routes.results.item_repo") as mock_repo:
-        mock_repo.query = AsyncMock(return_value=mock_query_result)
-        response = await client.get("/api/results/competitor-analysis?keyword=test")
-        assert response.status_code == 200
-        data = response.json()
-        assert "sellers" in data
-        assert "total_sellers" in data
-        assert data["total_sellers"] == 1  # 同一个卖家
-        assert data["sellers"][0]["seller_name"] == "卖家1"
-        assert data["sellers"][0]["item_count"] == 2
-        assert data["sellers"][0]["avg_price"] == 150.0
+
+
+@pytest.mark.anyio
+async def test_competitor_analysis(client, temp_db):
+    """测试竞品观察（按卖家分组统计，卖家分页）"""
+    await sqlite_manager.init_db()
+    records = [_seller_record(str(i), "卖家1", f"¥{100 * (i + 1)}", i) for i in range(7)]
+    records += [
+        _seller_record("b1", "卖家2", "¥50", 10),
+        _seller_record("b2", "卖家2", "¥70", 11),
+        _seller_record("c1", "", "¥80", 12),
+        _seller_record("z", "卖家3", "0", 13),  # 无价格不计入
+    ]
+    # 同一商品的旧快照只按当前价格计一次
+    records.append(_seller_record("0", "卖家1", "¥999", 0) | {"爬取时间": "2025-12-01T10:00:00"})
+    await ItemRepository().insert_batch(records)
+
+    response = await client.get("/api/results/competitor-analysis?keyword=test")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_sellers"] == 3
+    assert data["total_items"] == 10
+    assert data["price_stats"] == {"avg": 300.0, "min": 50.0, "max": 700.0}
+    first = data["sellers"][0]
+    assert first["seller_name"] == "卖家1"
+    assert first["item_count"] == 7
+    assert first["avg_price"] == 400.0
+    assert (first["min_price"], first["max_price"]) == (100.0, 700.0)
+    # 每个卖家取最新抓取的 5 条
+    assert [i["title"] for i in first["items"]] == ["商品6", "商品5", "商品4", "商品3", "商品2"]
+    assert [s["seller_name"] for s in data["sellers"][1:]] == ["卖家2", "未知卖家"]
+
+    response = await client.get("/api/results/competitor-analysis?keyword=test&page=2&limit=2")
+    data = response.json()
+    assert data["total_sellers"] == 3
+    assert [s["seller_name"] for s in data["sellers"]] == ["未知卖家"]
+    assert data["sellers"][0]["items"][0]["item_link"] == "http://c1.com"
 
 
 @pytest.mark.anyio
@@ -240,47 +234,69 @@ async def test_delete_result_data(client):
         assert "5" in data["message"]
 
 
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
 @pytest.mark.anyio
 async def test_export_csv(client):
     """测试导出 CSV"""
-    mock_query_result = {
-        "total_items": 1,
-        "page": 1,
-        "limit": 10000,
-        "items": [
-            {
-                "商品信息": {
-                    "商品ID": "abc123",
-                    "商品标题": "测试商品",
-                    "当前售价": "¥999",
-                    "发货地区": "上海",
-                    "发布时间": "2026-01-01",
-                    "商品链接": "http://example.com",
-                    "商品主图链接": "http://example.com/img.jpg",
-                },
-                "卖家信息": {"卖家昵称": "TestSeller", "卖家信用等级": "5"},
-                "ai_analysis": {"is_recommended": True, "reason": "不错"},
-                "爬取时间": "2026-01-02",
-            }
-        ],
+    record = {
+        "商品信息": {
+            "商品ID": "abc123",
+            "商品标题": "测试商品",
+            "当前售价": "¥999",
+            "发货地区": "上海",
+            "发布时间": "2026-01-01",
+            "商品链接": "http://example.com",
+            "商品主图链接": "http://example.com/img.jpg",
+        },
+        "卖家信息": {"卖家昵称": "TestSeller", "卖家信用等级": "5"},
+        "ai_analysis": {"is_recommended": True, "reason": "不错"},
+        "爬取时间": "2026-01-02",
     }
     with patch("src.api.routes.results.item_repo") as mock_repo:
-        mock_repo.query = AsyncMock(return_value=mock_query_result)
+        mock_repo.iter_export = MagicMock(return_value=_chunks([record]))
         response = await client.get("/api/results/export?keyword=test")
         assert response.status_code == 200
         assert "text/csv" in response.headers["content-type"]
+        lines = response.content.decode("utf-8-sig").splitlines()
+        assert lines[0].startswith("商品ID,商品标题,当前售价")
+        assert lines[1].startswith("abc123,测试商品,¥999,上海")
 
 
 @pytest.mark.anyio
 async def test_export_csv_empty_returns_404(client):
     """测试导出 CSV — 无数据时返回 404"""
-    mock_query_result = {
-        "total_items": 0,
-        "page": 1,
-        "limit": 10000,
-        "items": [],
-    }
     with patch("src.api.routes.results.item_repo") as mock_repo:
-        mock_repo.query = AsyncMock(return_value=mock_query_result)
+        mock_repo.iter_export = MagicMock(return_value=_chunks())
         response = await client.get("/api/results/export?keyword=nonexist")
         assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_export_streams_all_rows_with_filters(client, temp_db):
+    """测试流式导出：不限条数、按时间范围过滤、选择列、NDJSON"""
+    await sqlite_manager.init_db()
+    start = datetime(2026, 1, 1, 10)
+    records = [_trend_record(str(i), start + timedelta(days=i), f"¥{1000 + i}") for i in range(40)]
+    await ItemRepository().insert_batch(records)
+
+    chunks = [c async for c in ItemRepository().iter_export("test", chunk_size=7)]
+    assert [len(c) for c in chunks] == [7, 7, 7, 7, 7, 5]
+    exported = [r["商品信息"]["商品ID"] for c in chunks for r in c]
+    assert exported == [str(i) for i in range(39, -1, -1)]
+
+    response = await client.get(
+        "/api/results/export?keyword=test&format=ndjson&columns=item_id,price,crawl_time"
+        "&since=2026-01-10&until=2026-01-20"
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["item_id"] for r in rows] == [str(i) for i in range(18, 8, -1)]
+    assert set(rows[0]) == {"item_id", "price", "crawl_time"}
+
+    response = await client.get("/api/results/export?keyword=test&columns=item_id,nope")
+    assert response.status_code == 400
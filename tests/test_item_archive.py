@@ -0,0 +1,151 @@
+"""冷热分层：旧快照按月归档到 archive/ 下的独立 SQLite 文件"""
+import asyncio
+import os
+
+import pytest
+
+from src.infrastructure.config.settings import database_settings
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_archive import (
+    archive_dir,
+    archive_old_items,
+    list_archives,
+)
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.price_rollup_repository import PriceRollupRepository
+from src.infrastructure.persistence.sqlite_manager import read_db
+from src.infrastructure.persistence.sqlite_pool import get_pool
+
+
+def _record(item_id: str, crawl_time: str, price: float, keyword: str = "switch") -> dict:
+    return {
+        "爬取时间": crawl_time,
+        "搜索关键字": keyword,
+        "任务名称": keyword,
+        "商品信息": {"商品ID": item_id, "商品标题": f"{keyword} {item_id}", "当前售价": str(price)},
+        "卖家信息": {"卖家昵称": "seller"},
+        "ai_analysis": {},
+    }
+
+
+async def _seed(repo: ItemRepository) -> None:
+    await repo.insert_batch([
+        _record("1", "2020-01-05T10:00:00", 100),
+        _record("1", "2020-02-05T10:00:00", 95),
+        _record("1", "2099-01-01T10:00:00", 90),
+        _record("2", "2020-01-06T10:00:00", 200, keyword="ps5"),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_old_months_out_of_hot_db(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await _seed(repo)
+
+    moved = await archive_old_items(days=30)
+
+    assert moved == {"2020-01": 2, "2020-02": 1}
+    assert await repo.count() == 1
+    assert sorted(os.listdir(archive_dir())) == ["items_2020_01.db", "items_2020_02.db"]
+    assert [a["month"] for a in await list_archives()] == ["2020-01", "2020-02"]
+    async with read_db() as db:
+        cursor = await db.execute("SELECT item_id FROM items_latest ORDER BY item_id")
+        assert [r["item_id"] for r in await cursor.fetchall()] == ["1"]
+        # 只剩热库那一行引用的商品 JSON 与卖家 JSON
+        cursor = await db.execute("SELECT COUNT(*) FROM item_blobs")
+        assert (await cursor.fetchone())[0] == 2
+
+    # 再次归档没有新数据
+    assert await archive_old_items(days=30) == {}
+
+
+@pytest.mark.asyncio
+async def test_price_history_reads_through_archives(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await _seed(repo)
+    await archive_old_items(days=30)
+
+    history = await repo.get_item_price_history("1")
+    assert [h["price"] for h in history] == [100, 95, 90]
+    assert [h["price"] for h in await repo.get_item_price_history("1", limit=2)] == [100, 95]
+
+    batch = await repo.get_batch_price_history(["1", "2", "3"], limit_per_item=2)
+    assert [h["price"] for h in batch["1"]] == [100, 95]
+    assert [h["price"] for h in batch["2"]] == [200]
+    assert batch["3"] == []
+
+
+@pytest.mark.asyncio
+async def test_rollups_and_delete_cover_archived_rows(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await _seed(repo)
+    await archive_old_items(days=30)
+
+    rollups = PriceRollupRepository()
+    await rollups.rebuild()
+    daily = await rollups.get_daily(["switch"])
+    assert [d["date"] for d in daily] == ["2020-01-05", "2020-02-05", "2099-01-01"]
+
+    assert await repo.delete_by_keyword("switch") == 3
+    assert await repo.get_item_price_history("1") == []
+    assert sum(a["row_count"] for a in await list_archives()) == 1
+
+
+@pytest.mark.asyncio
+async def test_export_includes_archived_months(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await _seed(repo)
+    await archive_old_items(days=30)
+
+    async def export(**kwargs):
+        return [
+            (r["商品信息"]["商品ID"], r["爬取时间"][:7])
+            for chunk in [c async for c in repo.iter_export("switch", chunk_size=1, **kwargs)]
+            for r in chunk
+        ]
+
+    # 热库在前，归档月份从新到旧
+    assert await export() == [("1", "2099-01"), ("1", "2020-02"), ("1", "2020-01")]
+    # 范围完全落在归档月份内
+    assert await export(since="2020-01-01", until="2020-02-01") == [("1", "2020-01")]
+    assert await export(since="2020-02-01", until="2021-01-01") == [("1", "2020-02")]
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_in_batches_alongside_pool_writers(temp_db, monkeypatch):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch([_record(str(n), f"2020-01-{n:02d}T10:00:00", 100 + n) for n in range(1, 8)])
+    monkeypatch.setattr(database_settings, "archive_batch_size", 2)
+    writes_before = get_pool(temp_db).stats()["write"]["acquires"]
+
+    # 归档与入库并发：每批持有池写锁，入库排队而不是 database is locked
+    moved, _ = await asyncio.gather(
+        archive_old_items(days=30),
+        repo.insert_batch([_record("new", "2099-01-01T10:00:00", 1)]),
+    )
+
+    assert moved == {"2020-01": 7}
+    assert await repo.count() == 1
+    assert (await list_archives())[0]["row_count"] == 7
+    # 7 行分 4 批，每批经过一次池写锁（另有入库与清理 blob 的写作用域）
+    assert get_pool(temp_db).stats()["write"]["acquires"] - writes_before >= 4 + 2
+
+
+@pytest.mark.asyncio
+async def test_item_detail_falls_back_to_archives(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await _seed(repo)
+    await archive_old_items(days=30)
+
+    # 热库里有的取热库最新快照；全部归档的商品从归档文件取（含原始 JSON）
+    assert (await repo.get_item("1"))["爬取时间"].startswith("2099-01")
+    archived = await repo.get_item("2")
+    assert archived["爬取时间"].startswith("2020-01") and archived["卖家信息"]["卖家昵称"] == "seller"
+    assert await repo.get_item("missing") is None
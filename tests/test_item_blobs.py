@@ -0,0 +1,71 @@
+"""item_blobs：原始 JSON 压缩去重存储"""
+import json
+
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_blob_store import migrate_legacy_rows
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+
+def _record(item_id: str, crawl_time: str, price: str = "100") -> dict:
+    return {
+        "爬取时间": crawl_time,
+        "搜索关键字": "switch",
+        "任务名称": "switch",
+        "商品信息": {"商品ID": item_id, "商品标题": "Switch 续航版", "当前售价": price},
+        "卖家信息": {"卖家昵称": "张三", "作为卖家的好评率": "99%", "卖家收到的评价列表": [{"评价内容": "好"}] * 20},
+        "ai_analysis": {"is_recommended": True, "reason": "价格低"},
+    }
+
+
+async def _scalar(sql: str):
+    async with read_db() as db:
+        cursor = await db.execute(sql)
+        return (await cursor.fetchone())[0]
+
+
+@pytest.mark.asyncio
+async def test_repeated_snapshots_share_compressed_blobs(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch([_record("1", "2026-01-01T10:00:00"), _record("1", "2026-01-02T10:00:00")])
+    await repo.insert(_record("1", "2026-01-03T10:00:00", price="90"))
+
+    # 商品信息第三次价格变了，卖家 / AI 三次都相同：2 + 1 + 1
+    assert await _scalar("SELECT COUNT(*) FROM item_blobs") == 4
+    assert await _scalar("SELECT COUNT(*) FROM items WHERE raw_seller_info IS NOT NULL") == 0
+
+    full = await repo.get_item("1")
+    assert full["商品信息"]["当前售价"] == "90"
+    assert len(full["卖家信息"]["卖家收到的评价列表"]) == 20
+    summary = (await repo.query(keyword="switch", limit=1))["items"][0]
+    assert summary["卖家信息"]["作为卖家的好评率"] == "99%"
+
+    await repo.delete_by_keyword("switch")
+    assert await _scalar("SELECT COUNT(*) FROM item_blobs") == 0
+
+
+@pytest.mark.asyncio
+async def test_migrate_moves_inline_json_out_of_items(temp_db):
+    await sqlite_manager.init_db()
+    record = _record("7", "2026-01-01T10:00:00")
+    async with write_db() as db:
+        # 模拟升级前写入的老行：原始 JSON 内联在 raw_* 列
+        await db.execute(
+            """
+            INSERT INTO items (item_id, task_name, keyword, crawl_time, price,
+                               raw_item_info, raw_seller_info, raw_ai_analysis)
+            VALUES ('7', 'switch', 'switch', '2026-01-01T10:00:00', 100, ?, ?, ?)
+            """,
+            tuple(json.dumps(record[k], ensure_ascii=False) for k in ("商品信息", "卖家信息", "ai_analysis")),
+        )
+    repo = ItemRepository()
+    before = await repo.get_item("7")
+
+    assert await migrate_legacy_rows(chunk_size=1) == 1
+    assert await _scalar("SELECT COUNT(*) FROM items WHERE raw_item_info IS NOT NULL") == 0
+    assert await repo.get_item("7") == before
+    summary = (await repo.query(keyword="switch"))["items"][0]
+    assert summary["商品信息"]["当前售价"] == "100"
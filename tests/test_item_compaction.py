@@ -0,0 +1,105 @@
+"""快照合并：状态未变的连续快照只保留一行，价格历史读价格变动日志"""
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_compaction import compact_snapshots, rebuild_price_events
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+
+def _record(item_id: str, crawl_time: str, price: float, keyword: str = "switch") -> dict:
+    return {
+        "爬取时间": crawl_time,
+        "搜索关键字": keyword,
+        "任务名称": keyword,
+        "商品信息": {"商品ID": item_id, "商品标题": f"{keyword} {item_id}", "当前售价": str(price)},
+        "卖家信息": {},
+        "ai_analysis": {},
+    }
+
+
+# 价格 100 → 100 → 90 → 90 → 100
+_SNAPSHOTS = [
+    _record("1", "2026-01-01T10:00:00", 100),
+    _record("1", "2026-01-01T10:00:30", 100),
+    _record("1", "2026-01-01T10:01:00", 90),
+    _record("1", "2026-01-01T10:01:30", 90),
+    _record("1", "2026-01-01T10:02:00", 100),
+]
+
+
+async def _snapshots() -> list:
+    async with read_db() as db:
+        cursor = await db.execute(
+            "SELECT price, crawl_time, last_seen FROM items WHERE item_id = '1' ORDER BY crawl_time"
+        )
+        return [tuple(r) for r in await cursor.fetchall()]
+
+
+async def _latest() -> tuple:
+    async with read_db() as db:
+        cursor = await db.execute(
+            "SELECT price, first_seen, last_seen FROM items_latest WHERE item_id = '1'"
+        )
+        return tuple(await cursor.fetchone())
+
+
+_COMPACTED = [
+    (100, "2026-01-01T10:00:00", "2026-01-01T10:00:30"),
+    (90, "2026-01-01T10:01:00", "2026-01-01T10:01:30"),
+    (100, "2026-01-01T10:02:00", "2026-01-01T10:02:00"),
+]
+
+
+@pytest.mark.asyncio
+async def test_ingest_compaction_extends_last_seen(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+
+    result = await repo.insert_batch(_SNAPSHOTS[:2], compact=True)
+    assert result == {"inserted": 1, "compacted": 1, "ignored": 0, "invalid": 0}
+    result = await repo.insert_batch(_SNAPSHOTS[2:] + [_SNAPSHOTS[3]], compact=True)
+    assert result == {"inserted": 2, "compacted": 1, "ignored": 1, "invalid": 0}
+
+    assert await _snapshots() == _COMPACTED
+    assert await _latest() == (100, "2026-01-01T10:00:00", "2026-01-01T10:02:00")
+    # 被合并的观测仍计入日汇总
+    daily = await repo.rollups.get_daily(["switch"])
+    assert daily[0]["count"] == 5
+
+
+@pytest.mark.asyncio
+async def test_compaction_job_collapses_existing_snapshots(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch(_SNAPSHOTS, compact=False)
+
+    assert await compact_snapshots() == {"switch": 2}
+    assert await _snapshots() == _COMPACTED
+    assert await _latest() == (100, "2026-01-01T10:00:00", "2026-01-01T10:02:00")
+    assert await compact_snapshots() == {}
+
+
+@pytest.mark.asyncio
+async def test_price_history_reads_event_log(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch(_SNAPSHOTS, compact=False)
+
+    history = await repo.get_item_price_history("1")
+    assert [(h["price"], h["crawl_time"]) for h in history] == [
+        (100, "2026-01-01T10:00:00"),
+        (90, "2026-01-01T10:01:00"),
+        (100, "2026-01-01T10:02:00"),
+    ]
+    batch = await repo.get_batch_price_history(["1", "2"], limit_per_item=2)
+    assert [h["price"] for h in batch["1"]] == [100, 90]
+    assert batch["2"] == []
+
+    # 重建结果与触发器增量维护一致
+    async with write_db() as db:
+        await db.execute("UPDATE item_price_events SET prev_price = -1")
+    assert await rebuild_price_events() == 3
+    async with read_db() as db:
+        cursor = await db.execute("SELECT prev_price FROM item_price_events ORDER BY event_time")
+        assert [r[0] for r in await cursor.fetchall()] == [None, 100, 90]
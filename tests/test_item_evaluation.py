@@ -0,0 +1,165 @@
+"""价格本评估落库：写入时评估，价格本变更后后台按关键词重算，读接口直接按评估列查询"""
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_evaluation import (
+    benchmark,
+    config_from_entry,
+    drain_reevaluation_queue,
+    evaluate_price,
+    evaluate_prices,
+    keyword_configs,
+)
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+from src.services.price_book_service import PriceBookService
+
+
+def _record(item_id: str, price: float, keyword: str = "switch") -> dict:
+    return {
+        "爬取时间": f"2026-01-01T10:00:{int(item_id):02d}",
+        "搜索关键字": keyword,
+        "任务名称": keyword,
+        "商品信息": {"商品ID": item_id, "商品标题": f"{keyword} {item_id}", "当前售价": str(price)},
+        "卖家信息": {},
+        "ai_analysis": {},
+    }
+
+
+_ENTRY = {
+    "category_name": "Switch",
+    "keywords": ["switch"],
+    "market_price": 1200,
+    "target_sell_price": 1500,
+    "fees": {"shipping_fee": 20, "refurbish_fee": 0, "platform_fee_rate": 0.05, "other_fee": 0},
+    "min_profit_rate": 0.15,
+    "ideal_profit_rate": 0.25,
+}
+
+
+@pytest.fixture(autouse=True)
+def _manual_drain(monkeypatch):
+    """不启动后台重评估任务，由测试显式处理队列（否则两者并发，处理行数不确定）"""
+    monkeypatch.setattr("src.services.price_book_service.schedule_reevaluation", lambda: None)
+
+
+async def _statuses() -> dict:
+    async with read_db() as db:
+        cursor = await db.execute("SELECT item_id, evaluation_status FROM items ORDER BY item_id")
+        return {r["item_id"]: r["evaluation_status"] for r in await cursor.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_ingest_evaluates_with_current_price_book(temp_db):
+    await sqlite_manager.init_db()
+    entry = await PriceBookService().create(_ENTRY)
+    await drain_reevaluation_queue()
+
+    repo = ItemRepository()
+    await repo.insert_batch([_record("1", 900), _record("2", 1100), _record("3", 1400), _record("4", 50, "ps5")])
+
+    assert await _statuses() == {"1": "great_deal", "2": "good_deal", "3": "overpriced", "4": None}
+    # 与 PriceBookService 的收购区间一致
+    assert entry["purchase_range"] == [1030.0, 1180.0]
+    item = (await repo.query(keyword="switch", sort_by="price", sort_order="asc"))["items"][0]
+    assert item["category_id"] == entry["id"]
+    assert item["estimated_profit"] == 1500 - 900 - entry["total_fees"]
+    assert item["premium_rate"] == -0.25
+
+
+@pytest.mark.asyncio
+async def test_price_book_edits_reevaluate_affected_keywords(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch([_record("1", 900), _record("2", 1100), _record("4", 50, "ps5")])
+    assert set((await _statuses()).values()) == {None}
+
+    service = PriceBookService()
+    entry = await service.create(_ENTRY)
+    assert await drain_reevaluation_queue() == {"switch": 2}
+    assert await _statuses() == {"1": "great_deal", "2": "good_deal", "4": None}
+
+    # 提高目标售价：两件都变成超值；关键词改名前后的都重算
+    await service.update(entry["id"], {"target_sell_price": 2000, "keywords": ["switch", "ps5"]})
+    assert await drain_reevaluation_queue() == {"switch": 2, "ps5": 1}
+    assert await _statuses() == {"1": "great_deal", "2": "great_deal", "4": "great_deal"}
+
+    await service.batch_update([entry["id"]], {"min_profit_rate": 0.5, "ideal_profit_rate": 0.6})
+    assert (await drain_reevaluation_queue()).keys() == {"switch", "ps5"}
+    assert await _statuses() == {"1": "overpriced", "2": "overpriced", "4": "great_deal"}
+
+    # 删除条目后评估列清空
+    await service.delete(entry["id"])
+    await drain_reevaluation_queue()
+    assert set((await _statuses()).values()) == {None}
+    latest = await repo.query_latest_evaluated()
+    assert latest["total"] == 3 and all(i["category_id"] is None for i in latest["items"])
+
+
+@pytest.mark.asyncio
+async def test_sql_reevaluation_matches_python_rules(temp_db):
+    await sqlite_manager.init_db()
+    await PriceBookService().create(_ENTRY)
+    await drain_reevaluation_queue()
+    repo = ItemRepository()
+    records = [_record(str(n), price) for n, price in enumerate([0, 333.3, 1030, 1099.99, 1180, 1777], 1)]
+    await repo.insert_batch(records)
+
+    async with read_db() as db:
+        config = (await keyword_configs(db, ["switch"]))["switch"]
+    columns = list(evaluate_price(config, 1).keys())
+    async with read_db() as db:
+        cursor = await db.execute(f"SELECT price, {', '.join(columns)} FROM items ORDER BY price")
+        ingested = [dict(r) for r in await cursor.fetchall()]
+
+    # 配置不变，SQL 重算结果应与写入时的 Python 评估一致
+    async with write_db() as db:
+        await db.execute("UPDATE price_book SET target_sell_price = target_sell_price")
+    assert await drain_reevaluation_queue() == {"switch": 6}
+    async with read_db() as db:
+        cursor = await db.execute(f"SELECT price, {', '.join(columns)} FROM items ORDER BY price")
+        reevaluated = [dict(r) for r in await cursor.fetchall()]
+
+    assert reevaluated == ingested
+    for row in reevaluated:
+        assert {c: row[c] for c in columns} == evaluate_price(config, row["price"])
+
+
+@pytest.mark.asyncio
+async def test_query_latest_evaluated_filters_and_sorts(temp_db):
+    await sqlite_manager.init_db()
+    entry = await PriceBookService().create(_ENTRY)
+    await drain_reevaluation_queue()
+    repo = ItemRepository()
+    await repo.insert_batch([_record("1", 900), _record("2", 1100), _record("3", 1400)])
+
+    data = await repo.query_latest_evaluated(
+        category_id=entry["id"], statuses=["good_deal", "great_deal"], priced_only=True
+    )
+    assert data["total"] == 2
+    assert [i["商品信息"]["商品ID"] for i in data["items"]] == ["1", "2"]
+    data = await repo.query_latest_evaluated(order_by="price", limit=1)
+    assert data["total"] == 3 and data["items"][0]["商品信息"]["商品ID"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_batch_engine_matches_price_book_service(temp_db):
+    await sqlite_manager.init_db()
+    service = PriceBookService()
+    entry = await service.create(_ENTRY)
+    async with read_db() as db:
+        config = (await keyword_configs(db, ["switch"]))["switch"]
+    # 视图行与 PriceBookService 条目得到相同的评估参数
+    assert config_from_entry(entry) == {k: config[k] for k in config_from_entry(entry)}
+
+    prices = [900, None, 1100, 0, 1400]
+    evaluations = evaluate_prices(prices, ["switch", "switch", "ps5", "switch", "switch"], {"switch": config})
+    assert [e and e["evaluation_status"] for e in evaluations] == [
+        "great_deal", "no_config", None, "no_config", "overpriced"
+    ]
+    assert evaluations[0] == evaluate_price(config, 900)
+
+    results = await service.evaluate_items_batch([{"keyword": "switch", "price": "¥1,100"}])
+    assert results[0]["evaluation"]["status"] == "good_deal"
+    assert results[0]["evaluation"]["profit_rate"] == round((1500 - 1100 - entry["total_fees"]) / 1500 * 100, 2)
+    assert set(benchmark(2000, 5)) == {"per_row", "batch"}
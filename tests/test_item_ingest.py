@@ -0,0 +1,105 @@
+"""商品批量写入：insert_batch、写缓冲与入库队列"""
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_ingest_queue import benchmark, get_ingest_queue, ingest
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.item_write_buffer import ItemWriteBuffer
+
+
+def _record(item_id: str, crawl_time: str = "2026-01-01T10:00:00", price: str = "100") -> dict:
+    return {
+        "爬取时间": crawl_time,
+        "搜索关键字": "switch",
+        "任务名称": "Switch",
+        "商品信息": {"商品ID": item_id, "商品标题": f"Switch {item_id}", "当前售价": price},
+        "卖家信息": {},
+        "ai_analysis": {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_insert_batch_reports_inserted_and_ignored(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+
+    first = await repo.insert_batch([_record("1"), _record("2"), _record("")], chunk_size=1)
+    assert first == {"inserted": 2, "compacted": 0, "ignored": 0, "invalid": 1}
+
+    # 同一商品同一抓取时间被 INSERT OR IGNORE 忽略
+    second = await repo.insert_batch([_record("1"), _record("3")])
+    assert second == {"inserted": 1, "compacted": 0, "ignored": 1, "invalid": 0}
+    assert await repo.count() == 3
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_flushes_on_size_and_close():
+    repo = MagicMock()
+    repo.insert_batch = AsyncMock(side_effect=lambda batch, **kwargs: {"inserted": len(batch), "ignored": 0, "invalid": 0})
+    buffer = ItemWriteBuffer(repo=repo, max_items=2, flush_interval=0)
+
+    await buffer.add(_record("1"))
+    repo.insert_batch.assert_not_awaited()
+    await buffer.add(_record("2"))
+    assert repo.insert_batch.await_count == 1
+    assert buffer.pending == 0
+
+    await buffer.add(_record("3"))
+    await buffer.close()
+    assert repo.insert_batch.await_count == 2
+    assert buffer.stats["inserted"] == 3
+    assert buffer.stats["flushes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_write_buffer_flushes_on_interval():
+    repo = MagicMock()
+    repo.insert_batch = AsyncMock(return_value={"inserted": 1, "ignored": 0, "invalid": 0})
+    buffer = ItemWriteBuffer(repo=repo, max_items=100, flush_interval=0.01)
+
+    await buffer.add(_record("1"))
+    await asyncio.sleep(0.05)
+    assert repo.insert_batch.await_count == 1
+    await buffer.close()
+
+
+class _FailingRepo(ItemRepository):
+    async def insert_batch(self, records, **kwargs):
+        if any(r["商品信息"]["商品ID"] == "bad" for r in records):
+            raise ValueError("bad batch")
+        return await super().insert_batch(records, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_ingest_queue_groups_batches_and_isolates_failures(temp_db):
+    await sqlite_manager.init_db()
+    repo = _FailingRepo()
+    batches = [[_record(f"{n}a"), _record(f"{n}b")] for n in range(4)]
+    results = await asyncio.gather(*(ingest(b, repo=repo) for b in batches))
+    assert [r["inserted"] for r in results] == [2, 2, 2, 2]
+    # 同时排队的批次合并进一个事务
+    stats = get_ingest_queue().stats
+    assert stats["batches"] == 4 and stats["transactions"] == 1
+
+    # 合并事务中有坏批次时逐批重试，其它批次照常写入
+    outcomes = await asyncio.gather(
+        ingest([_record("x")], repo=repo),
+        ingest([_record("y")], repo=repo),
+        ingest([_record("bad")], repo=repo),
+        ingest([_record("z")], repo=repo),
+        return_exceptions=True,
+    )
+    assert isinstance(outcomes[2], ValueError)
+    assert [o["inserted"] for i, o in enumerate(outcomes) if i != 2] == [1, 1, 1]
+    assert await repo.count() == 11
+
+
+@pytest.mark.asyncio
+async def test_ingest_benchmark_runs_under_analytics_load():
+    results = await benchmark(200, batch_size=20, writers=2, readers=1, keywords=4)
+    assert results["idle"]["items_per_sec"] > 0
+    assert results["under_load"]["analytics_queries"] > 0
+    assert results["queue"]["batches"] == 20
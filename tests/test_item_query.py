@@ -0,0 +1,117 @@
+"""ItemRepository.query：游标分页与计数表"""
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_repository import ItemRepository
+
+
+def _record(item_id: str, crawl_time: str, price: float, keyword: str = "switch", recommended: bool = False) -> dict:
+    return {
+        "爬取时间": crawl_time,
+        "搜索关键字": keyword,
+        "任务名称": keyword,
+        "商品信息": {"商品ID": item_id, "商品标题": f"{keyword} {item_id}", "当前售价": str(price)},
+        "卖家信息": {},
+        "ai_analysis": {"is_recommended": recommended},
+    }
+
+
+async def _seed(repo: ItemRepository) -> None:
+    await sqlite_manager.init_db()
+    records = [
+        # 价格有重复，用于验证 (price, id) 复合游标不丢不重
+        _record(str(i), f"2026-01-{i + 1:02d}T10:00:00", price=100 + (i // 2) * 10, recommended=i % 3 == 0)
+        for i in range(9)
+    ]
+    records.append(_record("x", "2026-01-01T10:00:00", 50, keyword="ps5"))
+    await repo.insert_batch(records)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by,sort_order", [("crawl_time", "desc"), ("price", "asc"), ("price", "desc")])
+async def test_cursor_pages_match_offset_pages(temp_db, sort_by, sort_order):
+    repo = ItemRepository()
+    await _seed(repo)
+
+    full = await repo.query(keyword="switch", sort_by=sort_by, sort_order=sort_order, limit=100)
+    expected = [r["商品信息"]["商品ID"] for r in full["items"]]
+
+    seen, after = [], None
+    while True:
+        page = await repo.query(keyword="switch", sort_by=sort_by, sort_order=sort_order, limit=4, after=after)
+        seen += [r["商品信息"]["商品ID"] for r in page["items"]]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert seen == expected
+    assert len(seen) == 9
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", ["publish_time", "price"])
+@pytest.mark.parametrize("sort_order", ["desc", "asc"])
+async def test_cursor_pages_keep_null_sort_values(temp_db, sort_by, sort_order):
+    repo = ItemRepository()
+    await _seed(repo)
+    async with sqlite_manager.write_db() as db:
+        await db.execute("UPDATE items SET publish_time = crawl_time")
+        # 一半的行排序列为 NULL，跨越多页
+        await db.execute(f"UPDATE items SET {sort_by} = NULL WHERE CAST(item_id AS INTEGER) % 2 = 1 OR item_id = '0'")
+
+    full = await repo.query(keyword="switch", sort_by=sort_by, sort_order=sort_order, limit=100)
+    expected = [r["商品信息"]["商品ID"] for r in full["items"]]
+
+    seen, after = [], None
+    while True:
+        page = await repo.query(keyword="switch", sort_by=sort_by, sort_order=sort_order, limit=2, after=after)
+        assert page["total_items"] == 9
+        seen += [r["商品信息"]["商品ID"] for r in page["items"]]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert seen == expected and len(seen) == 9
+
+
+@pytest.mark.asyncio
+async def test_total_comes_from_incremental_counts(temp_db):
+    repo = ItemRepository()
+    await _seed(repo)
+
+    assert (await repo.query(keyword="switch"))["total_items"] == 9
+    assert (await repo.query(keyword="switch", recommended_only=True))["total_items"] == 3
+    assert (await repo.query())["total_items"] == 10
+
+    await repo.delete_by_keyword("ps5")
+    assert (await repo.query())["total_items"] == 9
+
+
+@pytest.mark.asyncio
+async def test_cursor_rejects_mismatched_sort(temp_db):
+    repo = ItemRepository()
+    await _seed(repo)
+    page = await repo.query(keyword="switch", sort_by="price", limit=2)
+    with pytest.raises(ValueError):
+        await repo.query(keyword="switch", sort_by="crawl_time", after=page["next_cursor"])
+
+
+@pytest.mark.asyncio
+async def test_summary_projection_skips_raw_blobs(temp_db):
+    repo = ItemRepository()
+    await sqlite_manager.init_db()
+    record = _record("42", "2026-01-05T10:00:00", 199, recommended=True)
+    record["商品信息"].update({"当前售价": "¥199", "商品标签": ["包邮"], "商品主图链接": "http://img/42.jpg"})
+    record["卖家信息"] = {"卖家昵称": "张三", "作为卖家的好评率": "99%", "卖家收到的评价列表": [{"评价内容": "好"}] * 50}
+    record["ai_analysis"]["reason"] = "价格低"
+    await repo.insert_batch([record])
+
+    summary = (await repo.query(keyword="switch"))["items"][0]
+    assert summary["商品信息"]["当前售价"] == "¥199"
+    assert summary["商品信息"]["商品标签"] == ["包邮"]
+    assert summary["商品信息"]["商品图片列表"] == ["http://img/42.jpg"]
+    assert summary["卖家信息"]["作为卖家的好评率"] == "99%"
+    assert "卖家收到的评价列表" not in summary["卖家信息"]
+    assert summary["ai_analysis"] == {"is_recommended": True, "reason": "价格低", "risk_tags": []}
+
+    full = await repo.get_item("42")
+    assert len(full["卖家信息"]["卖家收到的评价列表"]) == 50
+    assert (await repo.query(keyword="switch", projection="full"))["items"][0] == full
@@ -0,0 +1,90 @@
+"""标题全文检索：items_fts（FTS5 trigram）随 items 同步，results / 跨平台列表支持 q="""
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.item_search import like_conditions, split_search_terms
+from src.infrastructure.persistence.sqlite_manager import write_db
+from src.services.cross_platform_service import CrossPlatformService
+
+
+def _record(item_id: str, title: str, keyword: str, platform: str = "xianyu", **info) -> dict:
+    return {
+        "爬取时间": f"2026-01-01T10:00:{int(item_id):02d}",
+        "搜索关键字": keyword,
+        "任务名称": keyword,
+        "platform": platform,
+        "category_id": "cam",
+        "商品信息": {"商品ID": item_id, "商品标题": title, "当前售价": "8000", **info},
+        "卖家信息": {},
+        "ai_analysis": {},
+    }
+
+
+_RECORDS = [
+    _record("1", "索尼 A7M4 单机 快门数 3000", "a7m4"),
+    _record("2", "Sony A7M4 快门数少 成色新 A7M4", "sony 相机"),
+    _record("3", "ソニー α7IV A7M4 ボディ 快门数", "a7m4", platform="mercari"),
+    _record("4", "索尼 A7M3 单机", "a7m3", 商品描述="快门数 2 万，A7M4 换下来的"),
+    _record("5", "佳能 R6 快门", "r6"),
+]
+
+
+def test_split_search_terms_quotes_phrases():
+    assert split_search_terms('A7M4  快门数 "x" 机') == ('"A7M4" "快门数" """x"""', ["机"])
+    assert split_search_terms("   ") == (None, [])
+    assert like_conditions(["5%"], ["title"])[1] == ["%5\\%%"]
+
+
+@pytest.mark.asyncio
+async def test_search_across_keywords(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch(_RECORDS)
+
+    data = await repo.query(q="a7m4 快门数", sort_by="relevance")
+    assert data["total_items"] == 4
+    assert {i["商品信息"]["商品ID"] for i in data["items"]} == {"1", "2", "3", "4"}
+    # 标题命中的排在只有描述命中的前面
+    assert data["items"][-1]["商品信息"]["商品ID"] == "4"
+
+    data = await repo.query(q="A7M4 快门数", keyword="a7m4", sort_by="price", limit=1)
+    assert data["total_items"] == 2
+    page2 = await repo.query(
+        q="A7M4 快门数", keyword="a7m4", sort_by="price", limit=1, after=data["next_cursor"]
+    )
+    ids = [page["items"][0]["商品信息"]["商品ID"] for page in (data, page2)]
+    assert sorted(ids) == ["1", "3"]
+
+    # 不足 3 字的词走 LIKE
+    assert (await repo.query(q="快门 佳能"))["total_items"] == 1
+    assert (await repo.query(q="nothing-here"))["total_items"] == 0
+    with pytest.raises(ValueError):
+        await repo.query(q="A7M4", sort_by="relevance", after=data["next_cursor"])
+
+
+@pytest.mark.asyncio
+async def test_index_follows_updates_and_deletes(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch(_RECORDS)
+
+    async with write_db() as db:
+        await db.execute("UPDATE items SET title = '佳能 R5 单机' WHERE item_id = '1'")
+    assert (await repo.query(q="R5 单机"))["total_items"] == 1
+    assert (await repo.query(q="A7M4"))["total_items"] == 3
+
+    await repo.delete_by_keyword("a7m4")
+    assert (await repo.query(q="A7M4"))["total_items"] == 2
+    assert (await repo.query(q="R5 单机"))["total_items"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cross_platform_items_filter_by_q(temp_db):
+    await sqlite_manager.init_db()
+    await ItemRepository().insert_batch(_RECORDS)
+
+    items = await CrossPlatformService().get_cross_platform_items(q="A7M4 快门数", sort_by="relevance")
+    assert {i["item_id"] for i in items} == {"1", "2", "3", "4"}
+    assert items[-1]["item_id"] == "4"
+    assert {i["platform"] for i in items} == {"xianyu", "mercari"}
@@ -0,0 +1,142 @@
+"""items_latest：每个 item_id 一行的最新快照"""
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+
+def _record(item_id: str, crawl_time: str, price: float, keyword: str = "switch") -> dict:
+    return {
+        "爬取时间": crawl_time,
+        "搜索关键字": keyword,
+        "任务名称": keyword,
+        "商品信息": {"商品ID": item_id, "商品标题": f"{keyword} {item_id}", "当前售价": str(price)},
+        "卖家信息": {},
+        "ai_analysis": {},
+    }
+
+
+async def _latest() -> dict:
+    async with read_db() as db:
+        cursor = await db.execute("SELECT item_id, price, crawl_time FROM items_latest")
+        return {r["item_id"]: (r["price"], r["crawl_time"]) for r in await cursor.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_latest_tracks_newest_snapshot(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch([
+        _record("1", "2026-01-02T10:00:00", 100),
+        _record("1", "2026-01-03T10:00:00", 90),
+        # 乱序补录的旧快照不会覆盖当前状态
+        _record("1", "2026-01-01T10:00:00", 120),
+        _record("2", "2026-01-01T10:00:00", 200),
+    ])
+
+    assert await _latest() == {
+        "1": (90, "2026-01-03T10:00:00"),
+        "2": (200, "2026-01-01T10:00:00"),
+    }
+    prices = await repo.get_latest_prices(["switch"])
+    assert sorted(r["price"] for r in prices) == [90, 200]
+    latest_items = await repo.query_items(filters={"keyword": "switch"}, latest_only=True)
+    assert len(latest_items) == 2
+
+
+@pytest.mark.asyncio
+async def test_latest_follows_update_and_delete(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch([
+        _record("1", "2026-01-01T10:00:00", 100),
+        _record("1", "2026-01-02T10:00:00", 90),
+        _record("2", "2026-01-01T10:00:00", 50, keyword="ps5"),
+    ])
+
+    async with write_db() as db:
+        await db.execute(
+            "UPDATE items SET evaluation_status = 'great_deal' WHERE item_id = '1' AND price = 90"
+        )
+        await db.execute("DELETE FROM items WHERE item_id = '1' AND crawl_time = '2026-01-02T10:00:00'")
+    assert (await _latest())["1"] == (100, "2026-01-01T10:00:00")
+
+    await repo.delete_by_keyword("ps5")
+    assert "2" not in await _latest()
+
+
+@pytest.mark.asyncio
+async def test_init_db_backfills_latest_for_existing_items(temp_db):
+    await sqlite_manager.init_db()
+    await ItemRepository().insert_batch([
+        _record("1", "2026-01-01T10:00:00", 100),
+        _record("1", "2026-01-02T10:00:00", 80),
+    ])
+    async with write_db() as db:
+        await db.execute("DELETE FROM items_latest")
+
+    await sqlite_manager.init_db()
+    assert await _latest() == {"1": (80, "2026-01-02T10:00:00")}
+
+
+@pytest.mark.asyncio
+async def test_price_histogram_and_premium_distribution(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    prices = [100, 150, 199, 200, 250, 300, 1000, 0]
+    await repo.insert_batch([_record(str(i), "2026-01-01T10:00:00", p) for i, p in enumerate(prices)])
+    # 旧快照不计入当前价格直方图
+    await repo.insert_batch([_record("0", "2025-12-01T10:00:00", 5000)])
+
+    histogram = await repo.get_price_histogram(["switch"])
+    assert histogram["total"] == 7
+    assert len(histogram["bins"]) == 5
+    assert [b["count"] for b in histogram["bins"]] == [5, 1, 0, 0, 1]
+    assert histogram["bins"][0]["range_low"] == 100 and histogram["bins"][-1]["range_high"] == 1000
+    assert (await repo.get_price_histogram(["none"])) == {"total": 0, "bins": []}
+
+    same = await repo.get_price_histogram(["ps5"])
+    assert same["total"] == 0
+    await repo.insert_batch([_record("p", "2026-01-01T10:00:00", 80, keyword="ps5")])
+    assert [b["count"] for b in (await repo.get_price_histogram(["ps5"]))["bins"]] == [0, 0, 0, 0, 1]
+
+    # 分布按全部快照统计（含旧快照 5000）：均价 = 7199 / 8
+    dist = await repo.get_premium_distribution("switch")
+    assert dist["total"] == 8 and dist["avg_price"] == 899.88
+    assert [d["count"] for d in dist["distribution"]] == [6, 0, 1, 0, 1]
+    assert sum(d["percentage"] for d in dist["distribution"]) == 100
+
+
+@pytest.mark.asyncio
+async def test_bargain_leaderboard_top_k(temp_db):
+    from src.services.dashboard_service import DashboardService
+
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch(
+        [_record(f"s{p}", "2026-01-01T10:00:00", p, keyword="Switch") for p in (800, 900, 1000, 1100)]
+        + [_record(f"p{p}", "2026-01-01T10:00:00", p, keyword="ps5") for p in (1500, 3000)]
+        + [_record("x", "2026-01-01T10:00:00", 1, keyword="no-ref")]
+        # 旧快照价格更低，但只按当前价格参与排行
+        + [_record("s800", "2025-12-01T10:00:00", 10, keyword="Switch")]
+    )
+    async with write_db() as db:
+        await db.executemany(
+            "INSERT INTO market_prices (id, task_id, keyword, reference_price, fair_used_price, created_at) "
+            "VALUES (?, 1, ?, ?, ?, ?)",
+            [
+                ("a", " switch ", 1200, None, "2026-01-01"),
+                ("b", "SWITCH", 5000, None, "2026-01-02"),  # 同一关键词取最早录入的
+                ("c", "ps5", 4000, 3000, "2026-01-01"),     # 有二手公允价时优先
+            ],
+        )
+
+    board = await DashboardService().get_bargain_leaderboard(limit=3)
+    assert [(b["keyword"], b["price"], b["premium_rate"]) for b in board] == [
+        ("ps5", 1500, -50.0),
+        ("Switch", 800, -33.33),
+        ("Switch", 900, -25.0),
+    ]
+    assert board[0]["reference_price"] == 3000
+    assert len(await DashboardService().get_bargain_leaderboard(limit=10)) == 6
@@ -68,69 +68,48 @@ class TestResultsKeywordOptional:
 # ═══════════════════════════════════════════════════════════════
 
 # ═══════════════════════════════════════════════════════════════
-# 修复5: 捡漏雷达应动态评估 evaluation_status
+# 修复5: 捡漏雷达读落库的 evaluation_status（价格本变更后后台重算）
 # ═══════════════════════════════════════════════════════════════
 
 class TestBargainRadarEvaluation:
     """捡漏雷达返回的商品应有 evaluation_status"""
 
-    def test_evaluate_items_with_price_book(self):
-        """_evaluate_items_with_price_book 应正确设置评估字段"""
-        from src.api.routes.bargain_radar import _evaluate_items_with_price_book
-
-        items = [
-            {
-                "搜索关键字": "科比手办",
-                "商品信息": {"商品标题": "科比手办测试", "当前售价": "¥60"},
-            },
-            {
-                "搜索关键字": "科比手办",
-                "商品信息": {"商品标题": "另一个手办", "当前售价": "¥150"},
-            },
-        ]
-        entries = [
-            {
-                "id": "entry-1",
-                "category_name": "科比手办",
-                "keywords": ["科比手办"],
-                "target_sell_price": 200,
-                "purchase_ideal": 80,
-                "purchase_upper": 120,
-                "total_fees": 10,
-                "market_price": 100,
-            }
-        ]
-
-        result = _evaluate_items_with_price_book(items, entries)
-
-        # 第一个商品 60 元 <= ideal(80)，应为 great_deal
-        assert result[0]["evaluation_status"] == "great_deal"
-        assert result[0]["category_id"] == "entry-1"
-        assert result[0]["estimated_profit"] > 0
-
-        # 第二个商品 150 元 > upper(120)，应为 overpriced
-        assert result[1]["evaluation_status"] == "overpriced"
-
-    def test_evaluate_items_without_price_book(self):
+    def test_evaluate_price_with_price_book(self):
+        """evaluate_price 应按价格本配置正确设置评估字段"""
+        from src.infrastructure.persistence.item_evaluation import evaluate_price
+
+        config = {
+            "entry_id": "entry-1",
+            "category_name": "科比手办",
+            "target_sell_price": 200,
+            "purchase_ideal": 80,
+            "purchase_upper": 120,
+            "total_fees": 10,
+            "market_price": 100,
+        }
+
+        # 60 元 <= ideal(80)，应为 great_deal
+        result = evaluate_price(config, 60)
+        assert result["evaluation_status"] == "great_deal"
+        assert result["category_id"] == "entry-1"
+        assert result["estimated_profit"] > 0
+
+        # 150 元 > upper(120)，应为 overpriced
+        assert evaluate_price(config, 150)["evaluation_status"] == "overpriced"
+
+    def test_evaluate_price_without_price_book(self):
         """没有价格本时，evaluation_status 不应被设置"""
-        from src.api.routes.bargain_radar import _evaluate_items_with_price_book
-
-        items = [
-            {
-                "搜索关键字": "无匹配关键字",
-                "商品信息": {"商品标题": "测试", "当前售价": "¥60"},
-            },
-        ]
-        result = _evaluate_items_with_price_book(items, [])
-        assert result[0].get("evaluation_status") is None
-
-    def test_bargain_radar_route_has_price_book_import(self):
-        """捡漏雷达路由应包含 PriceBookService 动态评估"""
+        from src.infrastructure.persistence.item_evaluation import evaluate_price
+
+        assert evaluate_price(None, 60)["evaluation_status"] is None
+
+    def test_bargain_radar_route_reads_persisted_evaluation(self):
+        """捡漏雷达路由应直接按落库的评估列查询，不再逐条实时计算"""
         import inspect
         from src.api.routes import bargain_radar
         source = inspect.getsource(bargain_radar.get_bargain_items)
-        assert "PriceBookService" in source, \
-            "捡漏雷达路由中缺少动态评估逻辑（PriceBookService）"
+        assert "query_latest_evaluated" in source
+        assert "PriceBookService" not in source
 
 
 # ═══════════════════════════════════════════════════════════════
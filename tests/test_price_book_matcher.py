@@ -0,0 +1,71 @@
+"""价格本关键词匹配器：Aho-Corasick 一遍扫描，与逐条子串匹配结果一致；价格本写入后缓存失效"""
+import random
+
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.sqlite_manager import write_db
+from src.services.price_book_matcher import KeywordMatcher, get_matcher
+from src.services.price_book_service import PriceBookService
+from src.services.price_matching_service import PriceMatchingService
+
+
+def _naive(entries, title, task_keyword):
+    """原先的逐条目、逐关键词子串匹配"""
+    for entry in entries:
+        for keyword in entry.get("keywords") or []:
+            if keyword and (keyword.lower() in title.lower() or keyword.lower() in task_keyword.lower()):
+                return entry
+    return None
+
+
+def test_matches_like_naive_substring_scan():
+    random.seed(3)
+    alphabet = "abcAB索尼"
+    words = lambda n: "".join(random.choice(alphabet) for _ in range(n))
+    entries = [
+        {"id": str(i), "keywords": [words(random.randint(1, 4)) for _ in range(random.randint(0, 3))]}
+        for i in range(30)
+    ]
+    matcher = KeywordMatcher(entries)
+    pairs = [(words(random.randint(0, 20)), words(random.randint(0, 5))) for _ in range(500)]
+    assert matcher.match_many(pairs) == [_naive(entries, t, k) for t, k in pairs]
+
+
+def test_priority_and_exact_lookup():
+    newer = {"id": "new", "keywords": ["A7M4", "sony"]}
+    older = {"id": "old", "keywords": ["a7m4 单机", "A7M4"]}
+    matcher = KeywordMatcher([newer, older])
+    # 子串匹配：多个条目命中取更新的；精确查找：同一关键词取最早创建的
+    assert matcher.match("索尼 a7m4 单机 快门少")["id"] == "new"
+    assert matcher.match("佳能", "Sony 相机")["id"] == "new"
+    assert matcher.match("佳能 R6") is None
+    assert matcher.by_keyword("A7M4")["id"] == "old"
+    assert matcher.by_keyword("sony")["id"] == "new"
+    assert matcher.by_keyword("a7m4") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_follows_price_book_writes(temp_db):
+    await sqlite_manager.init_db()
+    service = PriceBookService()
+    entry = await service.create({"category_name": "A7M4", "keywords": ["a7m4"], "target_sell_price": 10000})
+
+    matcher = await get_matcher()
+    assert await get_matcher() is matcher
+    assert (await service.get_by_keyword("a7m4"))["id"] == entry["id"]
+
+    await service.update(entry["id"], {"keywords": ["a7m3"]})
+    assert await get_matcher() is not matcher
+    assert await service.get_by_keyword("a7m4") is None
+    result = await PriceMatchingService().match_and_evaluate(
+        {"搜索关键字": "相机", "商品信息": {"商品标题": "索尼 A7M3 单机", "当前售价": "¥5000"}}
+    )
+    assert result["category_id"] == entry["id"]
+
+    # 绕过服务层的写入（如其它进程）同样使缓存失效
+    matcher = await get_matcher()
+    async with write_db() as db:
+        await db.execute("DELETE FROM price_book")
+    assert await get_matcher() is not matcher
+    assert await service.get_by_keyword("a7m3") is None
@@ -0,0 +1,87 @@
+"""价格日汇总：分位数草图与增量维护"""
+import random
+import statistics
+
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.item_repository import ItemRepository
+from src.infrastructure.persistence.price_rollup_repository import (
+    SKETCH_ALPHA,
+    PriceRollupRepository,
+    PriceSketch,
+    RollupBucket,
+)
+from src.infrastructure.persistence.sqlite_manager import read_db
+
+
+def _record(item_id: str, crawl_time: str, price: float, platform: str = "xianyu") -> dict:
+    return {
+        "爬取时间": crawl_time,
+        "搜索关键字": "switch",
+        "任务名称": "switch",
+        "platform": platform,
+        "商品信息": {"商品ID": item_id, "当前售价": str(price)},
+        "卖家信息": {},
+        "ai_analysis": {},
+    }
+
+
+def test_sketch_median_within_relative_error_and_mergeable():
+    rng = random.Random(7)
+    prices = [rng.uniform(500, 5000) for _ in range(2000)]
+    left, right = PriceSketch(), PriceSketch()
+    for i, p in enumerate(prices):
+        (left if i % 2 else right).add(p)
+
+    merged = PriceSketch.from_json(left.to_json()).merge(right)
+    assert merged.count == len(prices)
+    true_median = statistics.median(prices)
+    assert abs(merged.quantile(0.5) - true_median) / true_median <= SKETCH_ALPHA * 1.5
+
+
+def test_bucket_single_value_is_exact():
+    bucket = RollupBucket()
+    bucket.add(199.0)
+    assert bucket.to_stats() == {
+        "count": 1, "avg_price": 199.0, "median_price": 199.0, "min_price": 199.0, "max_price": 199.0,
+    }
+    assert bucket.count_at_most(199.0) == 1
+    assert bucket.count_at_most(100.0) == 0
+
+
+@pytest.mark.asyncio
+async def test_rollups_follow_ingest_and_match_rebuild(temp_db):
+    await sqlite_manager.init_db()
+    repo = ItemRepository()
+    await repo.insert_batch([
+        _record("1", "2026-01-01T10:00:00", 100),
+        _record("2", "2026-01-01T12:00:00", 300),
+        _record("3", "2026-01-01T12:00:00", 2000, platform="mercari"),
+        _record("4", "2026-01-02T09:00:00", 0),
+    ])
+    # 重复抓取被 INSERT OR IGNORE 忽略，不应重复计入汇总
+    await repo.insert_batch([_record("1", "2026-01-01T10:00:00", 100), _record("5", "2026-01-02T09:00:00", 150)])
+
+    rollups = PriceRollupRepository()
+    daily = await rollups.get_daily(["switch"], platform="xianyu")
+    assert [(d["date"], d["count"], d["avg_price"], d["min_price"], d["max_price"]) for d in daily] == [
+        ("2026-01-01", 2, 200.0, 100.0, 300.0),
+        ("2026-01-02", 1, 150.0, 150.0, 150.0),
+    ]
+    by_platform = await rollups.get_by_platform(["switch"])
+    assert by_platform["mercari"].count == 1
+
+    async with read_db() as db:
+        cursor = await db.execute("SELECT * FROM price_daily_rollup ORDER BY keyword, platform, day")
+        incremental = [dict(r) for r in await cursor.fetchall()]
+        cursor = await db.execute("SELECT COUNT(*) FROM price_rollup_pending")
+        assert (await cursor.fetchone())[0] == 0
+
+    assert await rollups.rebuild() == 3
+    async with read_db() as db:
+        cursor = await db.execute("SELECT * FROM price_daily_rollup ORDER BY keyword, platform, day")
+        assert [dict(r) for r in await cursor.fetchall()] == incremental
+
+    await repo.delete_by_keyword("switch")
+    assert await rollups.get_daily(["switch"]) == []
@@ -0,0 +1,185 @@
+"""
+查询计划回归：在合成的大库上对仓储层的每条读查询执行 EXPLAIN QUERY PLAN，
+出现大表全表扫描或临时 B 树排序即失败（新增查询 / 调整索引时跑一遍）。
+
+查询语句通过连接的 trace 回调捕获（参数已内联），与业务实际执行的 SQL 完全一致。
+"""
+import asyncio
+import random
+import re
+import sqlite3
+
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager, sqlite_pool
+from src.infrastructure.persistence.item_repository import ItemRepository
+
+# 随抓取历史增长的表：不允许全表 / 全索引扫描
+LARGE_TABLES = {"items", "items_latest", "item_price_events", "item_blobs", "price_daily_rollup"}
+
+_KEYWORDS = 40
+_ITEMS = 2000
+_SNAPSHOTS = 20000
+
+
+def _record(n: int) -> dict:
+    item_id = n % _ITEMS
+    day = n // _ITEMS
+    return {
+        "爬取时间": f"2026-{1 + day // 28:02d}-{1 + day % 28:02d}T10:{n % 60:02d}:00",
+        "搜索关键字": f"kw{item_id % _KEYWORDS}",
+        "任务名称": f"kw{item_id % _KEYWORDS}",
+        "platform": "xianyu" if item_id % 5 else "mercari",
+        "商品信息": {
+            "商品ID": str(item_id),
+            "商品标题": f"商品 {item_id}",
+            "当前售价": str(random.randint(50, 5000)),
+            "发布时间": f"2026-01-{1 + item_id % 28:02d} 08:00",
+        },
+        "卖家信息": {"卖家昵称": f"seller{item_id % 300}"},
+        "ai_analysis": {"is_recommended": item_id % 7 == 0},
+    }
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["no-stats", "analyzed"])
+def large_db(request, tmp_path_factory):
+    """合成大库；analyzed 变体执行过 ANALYZE，验证有统计信息时计划同样成立"""
+    db_path = str(tmp_path_factory.mktemp("query_plans") / "monitor.db")
+
+    async def build():
+        await sqlite_manager.init_db()
+        random.seed(7)
+        await ItemRepository().insert_batch([_record(n) for n in range(_SNAPSHOTS)])
+        if request.param:
+            async with sqlite_manager.write_db() as db:
+                await db.execute("ANALYZE")
+        await sqlite_pool.close_pools()
+
+    original = sqlite_manager.DB_PATH
+    sqlite_manager.DB_PATH = db_path
+    try:
+        asyncio.run(build())
+    finally:
+        sqlite_manager.DB_PATH = original
+    return db_path
+
+
+@pytest.fixture()
+def traced(large_db, monkeypatch):
+    """切到合成大库，并记录池内连接执行的每条语句"""
+    monkeypatch.setattr(sqlite_manager, "DB_PATH", large_db)
+    statements: list = []
+    original_open = sqlite_pool.SqlitePool._open
+
+    async def _open(self, is_writer):
+        db = await original_open(self, is_writer)
+        await db.set_trace_callback(statements.append)
+        return db
+
+    monkeypatch.setattr(sqlite_pool.SqlitePool, "_open", _open)
+    return statements
+
+
+def _plan_problems(db_path: str, sql: str, allow_scan=(), allow_temp_btree=False) -> list:
+    with sqlite3.connect(db_path) as conn:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    problems = []
+    for detail in plan:
+        scan = re.match(r"SCAN (\w+)", detail)
+        if scan and scan.group(1) in LARGE_TABLES and scan.group(1) not in allow_scan:
+            problems.append(detail)
+        if "USE TEMP B-TREE" in detail and not allow_temp_btree:
+            problems.append(detail)
+    return problems
+
+
+async def _kw_cursor(repo: ItemRepository) -> str:
+    return (await repo.query(keyword="kw3", limit=5))["next_cursor"]
+
+
+async def _second_page(repo: ItemRepository):
+    return await repo.query(keyword="kw3", limit=5, after=await _kw_cursor(repo))
+
+
+async def _drain(chunks):
+    return [chunk async for chunk in chunks]
+
+
+# (名称, 调用, 允许项)；允许项须写明理由
+QUERY_CASES = [
+    *[
+        (f"query[{sort}-{order}{'-rec' if rec else ''}]",
+         lambda r, s=sort, o=order, rec=rec: r.query(
+             keyword="kw3", sort_by=s, sort_order=o, recommended_only=rec),
+         {})
+        for sort in ("crawl_time", "price", "publish_time")
+        for order in ("asc", "desc")
+        for rec in (False, True)
+    ],
+    ("query[cursor]", _second_page, {}),
+    ("query[full]", lambda r: r.query(keyword="kw3", projection="full"), {}),
+    # 相关度排序需对命中集合排序（命中数远小于全表，回表走主键）
+    ("query[q-relevance]",
+     lambda r: r.query(q="商品 1234", sort_by="relevance"), {"allow_temp_btree": True}),
+    ("query[q-keyword-price]",
+     lambda r: r.query(q="商品 1234", keyword="kw3", sort_by="price"), {"allow_temp_btree": True}),
+    ("get_keywords", lambda r: r.get_keywords(), {}),
+    ("get_seen_item_ids", lambda r: r.get_seen_item_ids("kw3"), {}),
+    # 商品去重数 = items_latest 行数，COUNT(*) 只能遍历（最小的索引）
+    ("get_stats", lambda r: r.get_stats(), {"allow_scan": {"items_latest"}}),
+    ("count", lambda r: r.count(), {}),
+    ("get_price_trend", lambda r: r.get_price_trend("kw3", days=3650), {}),
+    ("get_premium_distribution", lambda r: r.get_premium_distribution("kw3"), {}),
+    # 排序的是按关键词聚合后的 item_counts 结果（行数 = 关键词数）
+    ("get_top_keywords", lambda r: r.get_top_keywords(), {"allow_temp_btree": True}),
+    ("get_all_for_keyword", lambda r: r.get_all_for_keyword("kw3"), {}),
+    ("iter_export",
+     lambda r: _drain(r.iter_export("kw3", since="2026-01-05", until="2026-02-01", chunk_size=20)), {}),
+    ("get_latest_for_keywords", lambda r: r.get_latest_for_keywords(["kw3", "kw4"]), {}),
+    ("get_latest_prices", lambda r: r.get_latest_prices(["kw3", "kw4"]), {}),
+    # 按桶号分组（桶数不超过 20）
+    ("get_price_histogram",
+     lambda r: r.get_price_histogram(["kw3", "kw4"]), {"allow_temp_btree": True}),
+    # 卖家按商品数排序需对分组结果排序（行数 = 该关键词的卖家数）
+    ("get_competitor_analysis",
+     lambda r: r.get_competitor_analysis("kw3"), {"allow_temp_btree": True}),
+    # 基准价表很小；外层只对各关键词取出的前 N 条候选排序
+    ("get_bargain_leaderboard", lambda r: r.get_bargain_leaderboard(), {"allow_temp_btree": True}),
+    ("get_item", lambda r: r.get_item("3"), {}),
+    ("get_item_price_history", lambda r: r.get_item_price_history("3"), {}),
+    ("get_batch_price_history", lambda r: r.get_batch_price_history(["3", "4"]), {}),
+    ("query_items[latest-keyword]",
+     lambda r: r.query_items(filters={"keyword": "kw3"}, latest_only=True), {}),
+    ("query_items[latest-recommended]",
+     lambda r: r.query_items(filters={"keyword": "kw3", "is_recommended": 1}, latest_only=True), {}),
+    # 不限关键词时按 crawl_time 索引倒序走到 LIMIT 为止
+    ("query_items[latest-all]",
+     lambda r: r.query_items(latest_only=True), {"allow_scan": {"items_latest"}}),
+    ("query_items[keyword]", lambda r: r.query_items(filters={"keyword": "kw3"}), {}),
+    # 不加筛选：总数需 COUNT(*) 遍历，列表按利润率索引走到 LIMIT 为止
+    ("query_latest_evaluated[all]",
+     lambda r: r.query_latest_evaluated(), {"allow_scan": {"items_latest"}}),
+    ("query_latest_evaluated[status]",
+     lambda r: r.query_latest_evaluated(statuses=["great_deal"]), {}),
+    ("query_latest_evaluated[keyword]",
+     lambda r: r.query_latest_evaluated(keyword="kw3", statuses=["great_deal"]), {}),
+    ("query_latest_evaluated[category]",
+     lambda r: r.query_latest_evaluated(
+         category_id="c1", statuses=["good_deal", "great_deal"], priced_only=True), {}),
+    ("get_similar_prices", lambda r: r.get_similar_prices("kw3", days=3650), {}),
+    ("rollups.get_daily", lambda r: r.rollups.get_daily(["kw3", "kw4"], since="2026-01-01"), {}),
+    ("rollups.get_by_platform",
+     lambda r: r.rollups.get_by_platform(["kw3"], since="2026-01-01"), {}),
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name,call,allow", QUERY_CASES, ids=[c[0] for c in QUERY_CASES])
+async def test_repository_query_plan(traced, large_db, name, call, allow):
+    await call(ItemRepository())
+
+    selects = [s for s in traced if re.match(r"\s*(SELECT|WITH)\b", s, re.IGNORECASE)]
+    assert selects, f"{name} 没有执行任何查询"
+    for sql in selects:
+        problems = _plan_problems(large_db, sql, **allow)
+        assert not problems, f"{name}: {problems}\n{sql}"
@@ -0,0 +1,115 @@
+"""爬虫网络资源策略：按页面类型拦截与流量统计"""
+import pytest
+
+from src.resource_policy import ResourcePolicy, mark_page, parse_blocked_types
+
+
+class _FakeFrame:
+    def __init__(self, page, parent=None):
+        self.page = page
+        self.parent_frame = parent
+
+
+class _FakeRequest:
+    def __init__(self, page, url: str, resource_type: str, body: int = 0, navigation: bool = False):
+        self.frame = _FakeFrame(page)
+        self.url = url
+        self.resource_type = resource_type
+        self._body = body
+        self._navigation = navigation
+
+    def is_navigation_request(self):
+        return self._navigation
+
+    async def sizes(self):
+        return {"responseHeadersSize": 100, "responseBodySize": self._body}
+
+
+class _FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+
+class _FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+
+class _FakeContext:
+    def __init__(self):
+        self.handlers = {}
+        self.route_handler = None
+
+    async def route(self, pattern, handler):
+        self.route_handler = handler
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def request(self, page, url, resource_type, body=0, navigation=False) -> str:
+        """模拟一次请求：经过路由，放行的请求完成后触发 requestfinished"""
+        request = _FakeRequest(page, url, resource_type, body, navigation)
+        route = _FakeRoute(request)
+        await self.route_handler(route)
+        if route.outcome == "continued":
+            await self.handlers["requestfinished"](request)
+        return route.outcome
+
+
+def test_parse_blocked_types():
+    assert parse_blocked_types("*:image, font;detail:stylesheet;;bad") == {
+        "*": {"image", "font"},
+        "detail": {"stylesheet"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_policy_blocks_per_page_kind_and_accounts_bytes():
+    policy = ResourcePolicy(
+        blocked_types=parse_blocked_types("*:image,font;detail:stylesheet"),
+        blocked_patterns=["*mmstat.com*"],
+    )
+    context = _FakeContext()
+    await policy.attach(context)
+    search, detail = _FakePage(context), _FakePage(context)
+    policy.assign(search, "search")
+    mark_page(detail, "detail")  # 采集函数只拿得到 page 时经 context 找到策略
+
+    assert await context.request(search, "https://www.goofish.com/search", "document", 5000, navigation=True) == "continued"
+    assert await context.request(search, "https://img.alicdn.com/a.jpg", "image", 90000) == "aborted"
+    assert await context.request(search, "https://g.alicdn.com/app.css", "stylesheet", 2000) == "continued"
+    assert await context.request(search, "https://log.mmstat.com/v.gif?x=1", "script") == "aborted"
+    assert await context.request(detail, "https://g.alicdn.com/app.css", "stylesheet", 2000) == "aborted"
+    assert await context.request(detail, "https://h5api.m.goofish.com/h5/mtop.taobao.idle.pc.detail/1.0/", "fetch", 800) == "continued"
+
+    search.handlers["load"](search)
+    snapshot = policy.snapshot()
+    assert snapshot["blocked"] == {"image": 1, "script": 1, "stylesheet": 1}
+    assert snapshot["loaded"]["document"] == {"requests": 1, "bytes": 5100}
+    assert snapshot["total_bytes"] == 5100 + 2100 + 900
+    assert list(snapshot["avg_load_seconds"]) == ["search"]
+    assert "已拦截: image 1, script 1, stylesheet 1" in policy.summary()
+
+
+@pytest.mark.asyncio
+async def test_load_all_resources_task_only_accounts():
+    policy = ResourcePolicy.for_task({"load_all_resources": True})
+    context = _FakeContext()
+    await policy.attach(context)
+    page = _FakePage(context)
+    policy.assign(page, "detail")
+
+    assert await context.request(page, "https://img.alicdn.com/a.jpg", "image", 90000) == "continued"
+    assert policy.blocked == {} and policy.loaded["image"] == {"requests": 1, "bytes": 90100}
+    assert ResourcePolicy.for_task({}).should_block("detail", "image", "https://img.alicdn.com/a.jpg")
@@ -0,0 +1,180 @@
+"""爬虫守护进程：浏览器池复用 / 回收，socket 协议与 ProcessService 接入"""
+import asyncio
+import json
+import sys
+
+import pytest
+
+import scraper_worker
+from src import browser_pool
+from src.browser_pool import BrowserPool
+from src.services.process_service import ProcessService
+from src.services.scraper_worker_client import ScraperWorkerClient
+
+
+class _FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def close(self):
+        self.browser.contexts.remove(self)
+
+
+class _FakeBrowser:
+    def __init__(self, launch_kwargs):
+        self.launch_kwargs = launch_kwargs
+        self.contexts = []
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        context = _FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class _FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+        self.stopped = False
+
+    async def launch(self, **kwargs):
+        browser = _FakeBrowser(kwargs)
+        self.launched.append(browser)
+        return browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture()
+def fake_playwright(monkeypatch):
+    playwright = _FakePlaywright()
+    monkeypatch.setattr(browser_pool, "async_playwright", lambda: playwright)
+    monkeypatch.setattr(browser_pool, "browser_rss_mb", lambda: 0.0)
+    return playwright
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_reuses_recycles_and_evicts(fake_playwright, monkeypatch):
+    pool = BrowserPool(size=1, max_runs=2, max_rss_mb=0)
+    headless = {"headless": True}
+
+    async with pool.browser(headless) as first:
+        await first.new_context()  # 运行遗留的 context 归还时被关闭
+    async with pool.browser(headless) as second:
+        assert second is first and second.contexts == []
+    # 运行满 max_runs 次后回收，下次重新启动
+    assert not first.is_connected()
+    async with pool.browser(headless) as third:
+        assert third is not first
+
+    # 池满时需要新的启动参数（如换代理）：关闭空闲的旧浏览器
+    async with pool.browser({"headless": True, "proxy": {"server": "http://p:1"}}):
+        assert not third.is_connected()
+    assert pool.stats == {"launched": 3, "reused": 1, "recycled": 1, "evicted": 1}
+
+    # 浏览器进程内存超限时归还即回收
+    pool.max_rss_mb = 100
+    monkeypatch.setattr(browser_pool, "browser_rss_mb", lambda: 500.0)
+    async with pool.browser(headless) as browser:
+        pass
+    assert not browser.is_connected() and pool.stats["recycled"] == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_process_service_runs_tasks_in_worker(tmp_path, monkeypatch, fake_playwright):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps([
+        {"task_name": "Switch", "enabled": True, "keyword": "switch"},
+        {"task_name": "Slow", "enabled": True, "keyword": "slow"},
+    ]), encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    async def fake_scrape(task_config, debug_limit, browser_pool):
+        async with browser_pool.browser({"headless": True}) as browser:
+            await browser.new_context()
+            print(f"scraping {task_config['keyword']}")
+            if task_config["keyword"] == "slow":
+                await asyncio.sleep(60)
+        return 3
+
+    monkeypatch.setattr(sys, "stdout", scraper_worker._RunOutput(sys.stdout))
+    worker = scraper_worker.ScraperWorker(str(config_path), BrowserPool(size=1), {"xianyu": fake_scrape})
+    socket_path = str(tmp_path / "w.sock")
+    server = await worker.serve(socket_path)
+    try:
+        service = ProcessService(ScraperWorkerClient(socket_path))
+        assert await service.start_task(1, "Switch")
+        run = service.processes[1]
+        assert await run.wait() == 0
+        assert not service.is_running(1)
+        log = (tmp_path / "logs" / "Switch_1.log").read_text(encoding="utf-8")
+        assert "scraping switch" in log and "共处理了 3 个新商品" in log
+
+        # 第二次运行复用同一个浏览器
+        assert await service.start_task(1, "Switch")
+        await service.processes[1].wait()
+        assert worker.pool.stats["launched"] == 1 and worker.pool.stats["reused"] == 1
+
+        assert await service.start_task(2, "Slow")
+        await asyncio.sleep(0.05)
+        assert service.is_running(2)
+        assert (await ScraperWorkerClient(socket_path).status())["running"] == [2]
+        assert await service.stop_task(2, "Slow")
+        assert not service.is_running(2) and worker.runs == {}
+        assert "任务已被终止" in (tmp_path / "logs" / "Slow_2.log").read_text(encoding="utf-8")
+    finally:
+        server.close()
+        await worker.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stop_gives_up_on_stuck_run_and_pool_stops_after_release(tmp_path, fake_playwright):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps([{"task_name": "Stuck", "enabled": True, "keyword": "stuck"}]), encoding="utf-8")
+    release = asyncio.Event()
+
+    async def stuck_scrape(task_config, debug_limit, browser_pool):
+        async with browser_pool.browser({"headless": True}):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                # 收尾卡住（如页面关闭无响应），再次取消也不结束
+                while not release.is_set():
+                    try:
+                        await release.wait()
+                    except asyncio.CancelledError:
+                        pass
+                raise
+
+    worker = scraper_worker.ScraperWorker(str(config_path), BrowserPool(size=1), {"xianyu": stuck_scrape}, stop_timeout=0.05)
+    run = asyncio.create_task(worker._execute("Stuck", str(tmp_path / "stuck.log")))
+    worker.runs[1] = run
+    await asyncio.sleep(0.01)
+
+    assert await worker.stop(1) is False
+    await worker.shutdown()  # 不会一直等卡住的运行
+    assert worker.pool.snapshot()["in_use"] == 1 and not fake_playwright.stopped
+
+    # 卡住的运行最终归还浏览器：池已关闭，最后一个借出的浏览器归还后停止 Playwright
+    release.set()
+    await asyncio.wait([run])
+    assert not fake_playwright.launched[0].is_connected() and fake_playwright.stopped
+
+
+@pytest.mark.asyncio
+async def test_worker_client_reports_unavailable_daemon(tmp_path):
+    client = ScraperWorkerClient(str(tmp_path / "missing.sock"))
+    assert await client.start_run(1, "Switch", str(tmp_path / "x.log")) is None
+    assert await client.stop_run(1) is False
@@ -0,0 +1,295 @@
+"""卖家档案缓存：LRU / seller_profiles 两级复用、TTL 过期、并发合并与增量刷新"""
+import asyncio
+
+import pytest
+
+from src.infrastructure.persistence import sqlite_manager
+from src.infrastructure.persistence.seller_profile_cache import (
+    PartialProfile,
+    SellerProfileCache,
+    get_seller_profile_cache,
+)
+from src.infrastructure.persistence.sqlite_manager import read_db, write_db
+
+
+def _fetcher(calls: list, seller_id: str, delay: float = 0.0):
+    async def fetch(previous=None, full=False):
+        calls.append(seller_id)
+        await asyncio.sleep(delay)
+        return {"卖家昵称": f"seller-{seller_id}", "卖家收到的评价列表": [{"评价ID": "r1"}]}
+    return fetch
+
+
+@pytest.mark.asyncio
+async def test_profiles_are_reused_from_memory_and_database(temp_db):
+    await sqlite_manager.init_db()
+    calls = []
+    cache = get_seller_profile_cache()
+
+    first = await cache.get("u1", _fetcher(calls, "u1"))
+    first["卖家芝麻信用"] = "极好"  # 调用方追加的字段不写回缓存
+    second = await cache.get("u1", _fetcher(calls, "u1"))
+    assert calls == ["u1"] and "卖家芝麻信用" not in second
+    assert second["卖家收到的评价列表"] == [{"评价ID": "r1"}]
+
+    # 新进程（新的缓存实例）从 seller_profiles 读取，不再采集
+    fresh = SellerProfileCache(temp_db)
+    assert (await fresh.get("u1", _fetcher(calls, "u1")))["卖家昵称"] == "seller-u1"
+    assert calls == ["u1"] and fresh.stats["db_hits"] == 1
+    async with read_db() as db:
+        cursor = await db.execute("SELECT seller_name FROM seller_profiles WHERE seller_id = 'u1'")
+        assert (await cursor.fetchone())[0] == "seller-u1"
+
+
+@pytest.mark.asyncio
+async def test_stale_and_empty_profiles_are_fetched_again(temp_db):
+    await sqlite_manager.init_db()
+    calls = []
+    cache = SellerProfileCache(temp_db, ttl_seconds=3600, max_entries=1)
+    await cache.get("u1", _fetcher(calls, "u1"))
+    await cache.get("u2", _fetcher(calls, "u2"))  # LRU 只留 1 个，u1 被挤出内存
+
+    async with write_db() as db:
+        await db.execute("UPDATE seller_profiles SET last_updated = datetime('now', '-2 hours') WHERE seller_id = 'u1'")
+    previous_seen = []
+
+    async def refresh(previous=None, full=False):
+        previous_seen.append(previous)
+        return await _fetcher(calls, "u1")()
+
+    await cache.get("u1", refresh)
+    assert calls == ["u1", "u2", "u1"]
+    # 过期档案交给采集函数做增量刷新
+    assert previous_seen[0]["卖家收到的评价列表"] == [{"评价ID": "r1"}]
+
+    async def empty(previous=None, full=False):
+        calls.append("u3")
+        return {}
+
+    await cache.get("u3", empty)
+    await cache.get("u3", empty)
+    assert calls[-2:] == ["u3", "u3"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_for_same_seller_are_coalesced(temp_db):
+    await sqlite_manager.init_db()
+    calls = []
+    cache = SellerProfileCache(temp_db)
+    results = await asyncio.gather(*(cache.get("u1", _fetcher(calls, "u1", delay=0.02)) for _ in range(5)))
+    assert calls == ["u1"]
+    assert all(r["卖家昵称"] == "seller-u1" for r in results)
+    assert cache.stats["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_waiters_fetch_themselves_when_owning_run_fails(temp_db):
+    await sqlite_manager.init_db()
+    calls = []
+    cache = SellerProfileCache(temp_db)
+
+    async def closed_context(previous=None, full=False):
+        calls.append("owner")
+        await asyncio.sleep(0.02)
+        raise RuntimeError("Target page, context or browser has been closed")
+
+    owner = asyncio.create_task(cache.get("u1", closed_context))
+    await asyncio.sleep(0)
+    waiter = await cache.get("u1", _fetcher(calls, "u1"))
+    assert waiter["卖家昵称"] == "seller-u1" and calls == ["owner", "u1"]
+    with pytest.raises(RuntimeError):
+        await owner
+
+    # 发起方的运行被取消：采集随之取消，等待方改用自己的采集函数
+    cache.invalidate("u1")
+    async with write_db() as db:
+        await db.execute("DELETE FROM seller_profiles")
+    calls.clear()
+    owner = asyncio.create_task(cache.get("u1", _fetcher(calls, "owner", delay=60)))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get("u1", _fetcher(calls, "u1")))
+    await asyncio.sleep(0.01)
+    owner.cancel()
+    assert (await waiter)["卖家昵称"] == "seller-u1"
+    assert calls == ["owner", "u1"] and cache._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_partial_refresh_keeps_stale_age(temp_db):
+    await sqlite_manager.init_db()
+    calls = []
+    cache = SellerProfileCache(temp_db, ttl_seconds=3600)
+    await cache.get("u1", _fetcher(calls, "u1"))
+    cache.invalidate("u1")
+    async with write_db() as db:
+        await db.execute("UPDATE seller_profiles SET last_updated = datetime('now', '-2 hours') WHERE seller_id = 'u1'")
+
+    async def partial(previous=None, full=False):
+        calls.append("partial")
+        return PartialProfile(previous, 卖家昵称="renamed")
+
+    assert (await cache.get("u1", partial))["卖家昵称"] == "renamed"
+    async with read_db() as db:
+        cursor = await db.execute(
+            "SELECT seller_name, (julianday('now') - julianday(last_updated)) * 24 FROM seller_profiles WHERE seller_id = 'u1'"
+        )
+        name, age_hours = await cursor.fetchone()
+    assert name == "renamed" and age_hours > 1.9
+    # 仍按过期处理：下次获取再尝试完整刷新
+    await cache.get("u1", _fetcher(calls, "u1"))
+    assert calls == ["u1", "partial", "u1"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_refreshes_force_a_periodic_full_refresh(temp_db):
+    await sqlite_manager.init_db()
+    requested = []
+    cache = SellerProfileCache(temp_db, ttl_seconds=3600, full_refresh_ttls=3)
+
+    def fetcher(result=dict):
+        async def fetch(previous=None, full=False):
+            requested.append(full)
+            return result({"卖家昵称": "s", "卖家发布的商品列表": []})
+        return fetch
+
+    async def age(hours: float, full_hours: float):
+        cache.invalidate("u1")
+        async with write_db() as db:
+            await db.execute(
+                "UPDATE seller_profiles SET last_updated = datetime('now', ?), full_refreshed_at = datetime('now', ?)",
+                (f"-{hours} hours", f"-{full_hours} hours"),
+            )
+
+    await cache.get("u1", fetcher())  # 首次采集即完整采集
+    await age(2, 2)
+    await cache.get("u1", fetcher())  # 过期但距完整采集不到 3 个 TTL：增量
+    await age(2, 4)
+    await cache.get("u1", fetcher(PartialProfile))  # 该完整采集了，但只采到一部分
+    await age(2, 4)
+    await cache.get("u1", fetcher())  # 上次没完整采集成功，仍要求完整采集
+    await age(2, 2)
+    await cache.get("u1", fetcher())
+    assert requested == [True, False, True, True, False]
+    assert cache.stats["full_fetched"] == 2
+
+
+class _FakeResponse:
+    def __init__(self, url: str, payload: dict):
+        self.url = url
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+
+class _FakeLocator:
+    def __init__(self, page):
+        self._page = page
+
+    async def count(self):
+        return 1 if self._page.pages["rate"] else 0  # 没有评价时页面上不出现评价选项卡
+
+    async def click(self):
+        self._page.tab = "rate"
+        await self._page.emit_next()
+
+
+class _FakeProfilePage:
+    """按页返回商品 / 评价列表 API 响应的卖家主页：打开时给第一页商品，每次滚动给下一页"""
+
+    def __init__(self, items: list, ratings: list, page_size: int = 4):
+        self.pages = {
+            "item": [items[i:i + page_size] for i in range(0, len(items), page_size)],
+            "rate": [ratings[i:i + page_size] for i in range(0, len(ratings), page_size)],
+        }
+        self.served = {"item": 0, "rate": 0}
+        self.tab = "item"
+        self.handler = None
+
+    def on(self, event, handler):
+        self.handler = handler
+
+    def remove_listener(self, event, handler):
+        self.handler = None
+
+    async def goto(self, url, **kwargs):
+        await self.handler(_FakeResponse("mtop.idle.web.user.page.head", {"data": {"module": {"base": {"displayName": "s"}}}}))
+        await self.emit_next()
+
+    async def emit_next(self):
+        pages, index = self.pages[self.tab], self.served[self.tab]
+        if index >= len(pages):
+            return
+        self.served[self.tab] += 1
+        api = "mtop.idle.web.xyh.item.list" if self.tab == "item" else "mtop.idle.web.trade.rate.list"
+        await self.handler(_FakeResponse(api, {"data": {"cardList": pages[index], "nextPage": index + 1 < len(pages)}}))
+
+    async def evaluate(self, script):
+        await self.emit_next()
+
+    def locator(self, selector):
+        return _FakeLocator(self)
+
+    async def close(self):
+        pass
+
+
+class _FakeProfileContext:
+    def __init__(self, items: list, ratings: list):
+        self.items, self.ratings = items, ratings
+        self.opened = []
+
+    async def new_page(self):
+        page = _FakeProfilePage(self.items, self.ratings)
+        self.opened.append(page)
+        return page
+
+
+def _item(n: int) -> dict:
+    return {"cardData": {"id": str(n), "title": f"item {n}", "itemStatus": 0}}
+
+
+def _rating(n: int, rate: int = 1) -> dict:
+    return {"cardData": {"rateId": str(n), "rate": rate, "rateTagList": [{"text": "来自卖家"}]}}
+
+
+@pytest.mark.asyncio
+async def test_stale_profile_is_refreshed_incrementally(monkeypatch):
+    from src import scraper
+
+    async def no_sleep(*args):
+        pass
+
+    monkeypatch.setattr(scraper, "random_sleep", no_sleep)
+    # 列表按新到旧返回
+    items = [_item(n) for n in range(6, 0, -1)]
+    ratings = [_rating(n, rate=1 if n % 2 else -1) for n in range(4, 0, -1)]
+    first = await scraper.scrape_user_profile(_FakeProfileContext(items, ratings), "u1")
+    assert first["作为卖家的好评数"] == "2/4" and len(first["卖家发布的商品列表"]) == 6
+
+    # 卖家新上架 1 件、新收到 1 条好评：只取第一页，遇到已知条目即停止
+    context = _FakeProfileContext([_item(7)] + items, [_rating(5)] + ratings)
+    refreshed = await scraper.scrape_user_profile(context, "u1", previous=first)
+    assert context.opened[0].served == {"item": 1, "rate": 1}
+    assert [i["商品ID"] for i in refreshed["卖家发布的商品列表"]] == ["7", "6", "5", "4", "3", "2", "1"]
+    assert [r["评价ID"] for r in refreshed["卖家收到的评价列表"]] == ["5", "4", "3", "2", "1"]
+    assert refreshed["作为卖家的好评数"] == "3/5" and refreshed["作为卖家的好评率"] == "60.00%"
+    assert not isinstance(refreshed, PartialProfile)
+
+    # 评价列表没能刷新（评价选项卡不见了）：沿用旧评价，并标记为部分刷新
+    partial = await scraper.scrape_user_profile(_FakeProfileContext([_item(7)] + items, []), "u1", previous=first)
+    assert isinstance(partial, PartialProfile) and len(partial["卖家发布的商品列表"]) == 7
+    assert partial["卖家收到的评价列表"] == first["卖家收到的评价列表"]
+
+    # 卖家档案缓存定期要求完整采集：即使有 previous 也全量翻页，已知商品的状态随之更新
+    context = _FakeProfileContext([_item(7)] + items, [_rating(5)] + ratings)
+    forced = await scraper.scrape_user_profile(context, "u1", previous=first, full=True)
+    assert context.opened[0].served == {"item": 2, "rate": 2}
+    assert forced["作为卖家的好评数"] == "3/5" and not isinstance(forced, PartialProfile)
+
+    # 关闭增量模式时全量翻页
+    monkeypatch.setattr(scraper.scraper_settings, "seller_profile_incremental", False)
+    context = _FakeProfileContext([_item(7)] + items, [_rating(5)] + ratings)
+    full = await scraper.scrape_user_profile(context, "u1", previous=first)
+    assert context.opened[0].served == {"item": 2, "rate": 2}
+    assert full["作为卖家的好评数"] == "3/5"
@@ -0,0 +1,151 @@
+"""SQLite 连接池：PRAGMA、只读连接、工作单元提交/回滚、嵌套复用、检查点与指标"""
+import asyncio
+
+import aiosqlite
+import pytest
+
+from src.infrastructure.persistence.sqlite_pool import SqlitePool
+
+
+async def _make_pool(tmp_path) -> SqlitePool:
+    pool = SqlitePool(str(tmp_path / "pool.db"), read_size=2)
+    async with pool.writer() as db:
+        await db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    return pool
+
+
+async def _count(pool: SqlitePool) -> int:
+    async with pool.reader() as db:
+        cursor = await db.execute("SELECT COUNT(*) FROM t")
+        return (await cursor.fetchone())[0]
+
+
+@pytest.mark.asyncio
+async def test_connections_use_wal_and_tuned_pragmas(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        async with pool.reader() as db:
+            assert (await (await db.execute("PRAGMA journal_mode")).fetchone())[0] == "wal"
+            # NORMAL = 1
+            assert (await (await db.execute("PRAGMA synchronous")).fetchone())[0] == 1
+            assert (await (await db.execute("PRAGMA busy_timeout")).fetchone())[0] == pool.busy_timeout_ms
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_commits_on_success(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        async with pool.writer() as db:
+            await db.execute("INSERT INTO t (v) VALUES ('a')")
+        assert await _count(pool) == 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_rolls_back_on_error(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        with pytest.raises(RuntimeError):
+            async with pool.writer() as db:
+                await db.execute("INSERT INTO t (v) VALUES ('a')")
+                raise RuntimeError("boom")
+        assert await _count(pool) == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_tasks_spawned_in_write_scope_take_their_own_connection(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        started = asyncio.Event()
+
+        async def background():
+            started.set()
+            # 复制了作用域的上下文，但不能复用其写连接：等作用域提交、释放写锁后自己开事务
+            async with pool.writer() as db:
+                await db.execute("INSERT INTO t (v) VALUES ('background')")
+                return db.in_transaction
+
+        async with pool.writer() as db:
+            await db.execute("INSERT INTO t (v) VALUES ('scope')")
+            task = asyncio.create_task(background())
+            await started.wait()
+            await asyncio.sleep(0.01)
+            assert not task.done()  # 在排队等写锁，而不是写进本作用域的事务
+        assert await task is True
+        assert await _count(pool) == 2
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_nested_scopes_share_one_transaction(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        with pytest.raises(RuntimeError):
+            async with pool.writer() as outer:
+                await outer.execute("INSERT INTO t (v) VALUES ('a')")
+                async with pool.writer() as inner:
+                    assert inner is outer
+                    await inner.execute("INSERT INTO t (v) VALUES ('b')")
+                async with pool.reader() as reader:
+                    # 事务内读取复用写连接，能看到未提交数据
+                    assert reader is outer
+                raise RuntimeError("boom")
+        assert await _count(pool) == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_readers_are_reused_and_counted(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        for _ in range(3):
+            await _count(pool)
+        stats = pool.stats()
+        assert stats["readers_open"] == 1
+        assert stats["readers_in_use"] == 0
+        assert stats["read"]["acquires"] == 3
+        assert stats["write"]["acquires"] == 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_readers_are_read_only(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        async with pool.reader() as db:
+            assert (await (await db.execute("PRAGMA query_only")).fetchone())[0] == 1
+            with pytest.raises(aiosqlite.OperationalError):
+                await db.execute("INSERT INTO t (v) VALUES ('a')")
+        assert await _count(pool) == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_writes_back_and_truncates_wal(tmp_path):
+    pool = await _make_pool(tmp_path)
+    try:
+        async with pool.writer() as db:
+            await db.executemany("INSERT INTO t (v) VALUES (?)", [("x" * 500,) for _ in range(200)])
+        assert pool.wal_size() > 0
+
+        passive = await pool.checkpoint()
+        assert not passive["busy"] and passive["frames"] == passive["checkpointed"]
+        await pool.checkpoint("TRUNCATE")
+        assert pool.wal_size() == 0
+        assert await _count(pool) == 200
+        assert pool.stats()["checkpoint"]["truncated"] == 1
+
+        with pytest.raises(RuntimeError):
+            async with pool.writer():
+                await pool.checkpoint()
+    finally:
+        await pool.close()
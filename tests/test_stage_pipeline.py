@@ -0,0 +1,122 @@
+"""有界多阶段流水线与闲鱼爬虫的详情后处理阶段"""
+import asyncio
+
+import pytest
+
+from src import scraper
+from src.stage_pipeline import StagePipeline
+
+
+@pytest.mark.asyncio
+async def test_stages_run_concurrently_within_limits():
+    running = {"slow": 0}
+    peak = {"slow": 0}
+    done = []
+
+    async def slow(item):
+        running["slow"] += 1
+        peak["slow"] = max(peak["slow"], running["slow"])
+        await asyncio.sleep(0.02)
+        running["slow"] -= 1
+        return item * 10
+
+    async def sink(item):
+        done.append(item)
+
+    pipeline = StagePipeline([("slow", slow, 3), ("sink", sink, 1)], queue_size=2)
+    started = asyncio.get_running_loop().time()
+    for i in range(9):
+        await pipeline.submit(i)
+    await pipeline.close()
+
+    assert sorted(done) == [i * 10 for i in range(9)]
+    assert peak["slow"] == 3
+    # 9 个条目、3 并发：约 3 轮而不是 9 轮
+    assert asyncio.get_running_loop().time() - started < 9 * 0.02
+    assert pipeline.completed == 9 and pipeline.stats["slow"] == {"done": 9, "failed": 0}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure_and_failures_are_isolated():
+    release = asyncio.Event()
+
+    async def blocked(item):
+        if item == "bad":
+            raise ValueError("boom")
+        await release.wait()
+        return item
+
+    async def sink(item):
+        pass
+
+    pipeline = StagePipeline([("blocked", blocked, 1), ("sink", sink, 1)], queue_size=1)
+    await pipeline.submit("bad")
+    await pipeline.submit("a")  # 被工作协程取走后阻塞在 release
+    await pipeline.submit("b")  # 占满队列
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(pipeline.submit("c"), timeout=0.05)
+
+    release.set()
+    await pipeline.close()
+    assert pipeline.stats["blocked"] == {"done": 2, "failed": 1}
+    assert pipeline.completed == 2
+
+
+@pytest.mark.asyncio
+async def test_xianyu_item_pipeline_analyses_notifies_and_saves(monkeypatch):
+    calls = []
+
+    async def fake_download(item_id, urls, task_name):
+        calls.append(("download", item_id))
+        return []
+
+    async def fake_ai(record, images, prompt_text):
+        calls.append(("ai", record["商品信息"]["商品ID"]))
+        return {"is_recommended": record["商品信息"]["商品ID"] == "1", "reason": "ok"}
+
+    async def fake_notify(item, reason):
+        calls.append(("notify", item["商品ID"]))
+
+    async def fake_save(record, keyword, buffer=None):
+        calls.append(("save", record["商品信息"]["商品ID"], record["ai_analysis"]["is_recommended"]))
+
+    async def fake_event(*args):
+        pass
+
+    monkeypatch.setattr(scraper, "download_all_images", fake_download)
+    monkeypatch.setattr(scraper, "get_ai_analysis", fake_ai)
+    monkeypatch.setattr(scraper, "send_ntfy_notification", fake_notify)
+    monkeypatch.setattr(scraper, "save_to_jsonl", fake_save)
+    monkeypatch.setattr(scraper, "_post_new_item_event", fake_event)
+    monkeypatch.setattr("src.config.SKIP_AI_ANALYSIS", False)
+
+    pipeline = scraper._build_item_pipeline({"task_name": "t"}, "switch", "prompt", False, write_buffer=None)
+    for item_id in ("1", "2"):
+        await pipeline.submit({"record": {"商品信息": {"商品ID": item_id}, "卖家信息": {}}})
+    await pipeline.close()
+
+    assert pipeline.completed == 2
+    assert ("notify", "1") in calls and ("notify", "2") not in calls
+    assert {c for c in calls if c[0] == "save"} == {("save", "1", True), ("save", "2", False)}
+
+
+@pytest.mark.asyncio
+async def test_close_after_abort_returns_without_draining():
+    started = asyncio.Event()
+
+    async def stuck(item):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def sink(item):
+        pass
+
+    pipeline = StagePipeline([("stuck", stuck, 1), ("sink", sink, 1)], queue_size=4)
+    for i in range(3):
+        await pipeline.submit(i)
+    await started.wait()
+
+    # 运行被取消时：abort 后 close 不应等待排队中的条目
+    pipeline.abort()
+    await asyncio.wait_for(pipeline.close(), timeout=1)
+    assert pipeline.completed == 0 and pipeline.pending == 2
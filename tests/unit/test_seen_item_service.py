@@ -0,0 +1,28 @@
+"""测试已见商品索引（爬虫跨运行去重）"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.services.seen_item_service import SeenItemIndex
+
+
+@pytest.mark.asyncio
+async def test_load_preloads_item_ids_from_repository():
+    repo = MagicMock()
+    repo.get_seen_item_ids = AsyncMock(return_value=["111", "222"])
+
+    index = await SeenItemIndex.load("MacBook", repo=repo)
+
+    repo.get_seen_item_ids.assert_awaited_once_with("MacBook", "xianyu")
+    assert len(index) == 2
+    assert index.contains("111", "https://www.goofish.com/item?id=111&spm=a")
+    assert not index.contains("333", "https://www.goofish.com/item?id=333")
+
+
+def test_add_marks_item_as_seen_by_id_and_link():
+    index = SeenItemIndex("MacBook")
+    index.add("444", "https://www.goofish.com/item?id=444&spm=x")
+
+    assert index.contains(444)
+    # 缺少商品ID时按链接唯一键判重
+    assert index.contains(None, "https://www.goofish.com/item?id=444&spm=y")
+    assert not index.contains(None, "https://www.goofish.com/item?id=555")
@@ -34,3 +34,8 @@ export function exportResultCsv(keyword: string): void {
   const url = `/api/results/export?keyword=${encodeURIComponent(keyword)}`
   window.open(url, '_blank')
 }
+
+/** 商品详情（完整原始信息，列表接口只返回轻量投影） */
+export async function getResultItem(itemId: string): Promise<ResultItem> {
+  return await http(`/api/results/items/${encodeURIComponent(itemId)}`)
+}
@@ -32,6 +32,7 @@ import { LayoutGrid, List, ShoppingCart, ExternalLink, Tag, GitCompareArrows, X,
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from '@/components/ui/table'
 import { Badge } from '@/components/ui/badge'
 import { createPurchase } from '@/api/purchases'
+import { getResultItem } from '@/api/results'
 
 // ─── Price Level Config ──────────────────────────────────────
 const PRICE_LEVEL_CONFIG: Record<string, { label: string; className: string; barColor: string }> = {
@@ -254,10 +255,13 @@ interface ResultCardProps {
 
 function ResultCard({ item, onSetPrice, onAddToPurchase, selected, onToggleSelect }: ResultCardProps) {
   const [expanded, setExpanded] = useState(false)
+  // 列表接口只返回轻量投影，首次展开时再按需加载完整记录
+  const [detail, setDetail] = useState<ResultItem | null>(null)
+  const [detailLoading, setDetailLoading] = useState(false)
 
   const info = item.商品信息
-  const seller = item.卖家信息
-  const ai = item.ai_analysis
+  const seller = detail?.卖家信息 || item.卖家信息
+  const ai = detail?.ai_analysis || item.ai_analysis
   const platform = item.platform || 'xianyu'
   const currency = item.currency || getPlatformCurrency(platform)
   const crawlTime = item.爬取时间 || ''
@@ -272,6 +276,24 @@ function ResultCard({ item, onSetPrice, onAddToPurchase, selected, onToggleSelec
   const hasEvaluation = item.evaluation_status && item.evaluation_status !== 'no_config'
   const profitRate = item.estimated_profit_rate != null ? (item.estimated_profit_rate * 100).toFixed(1) : null
 
+  const handleToggleExpand = () => {
+    if (!expanded && !detail && !detailLoading && info.商品ID) {
+      setDetailLoading(true)
+      getResultItem(info.商品ID)
+        .then(setDetail)
+        .catch(() => {})
+        .finally(() => setDetailLoading(false))
+    }
+    setExpanded(!expanded)
+  }
+
+  const sellerDetails: [string, string | undefined][] = detail ? [
+    ['芝麻信用', seller.卖家芝麻信用],
+    ['好评率', seller.作为卖家的好评率],
+    ['在售/已售', seller['卖家在售/已售商品数']],
+    ['注册时长', seller.卖家注册时长],
+  ].filter((entry): entry is [string, string] => !!entry[1]) : []
+
   return (
     <Card className={cn(
       'group flex h-full flex-col overflow-hidden transition-all hover:shadow-lg',
@@ -388,7 +410,7 @@ function ResultCard({ item, onSetPrice, onAddToPurchase, selected, onToggleSelec
       {/* ── 第4层：AI 理由（可展开） ── */}
       {ai?.reason && (
         <div className="px-4 pt-2">
-          <button onClick={() => setExpanded(!expanded)} className="w-full text-left">
+          <button onClick={handleToggleExpand} className="w-full text-left">
             <p className={cn('text-xs text-muted-foreground leading-relaxed', !expanded && 'line-clamp-2')}>
               {ai.reason}
             </p>
@@ -396,6 +418,15 @@ function ResultCard({ item, onSetPrice, onAddToPurchase, selected, onToggleSelec
               {expanded ? '收起' : '展开详情'}
             </span>
           </button>
+          {expanded && (detailLoading ? (
+            <p className="mt-1 text-[10px] text-muted-foreground">加载详情...</p>
+          ) : sellerDetails.length > 0 && (
+            <div className="mt-1 grid grid-cols-2 gap-x-2 text-[10px] text-muted-foreground">
+              {sellerDetails.map(([label, value]) => (
+                <span key={label} className="truncate">{label}: {value}</span>
+              ))}
+            </div>
+          ))}
         </div>
       )}
 
@@ -18,6 +18,10 @@ vi.mock('@/api/pricing', () => ({
   createMarketPrice: vi.fn().mockResolvedValue({}),
 }))
 
+vi.mock('@/api/results', () => ({
+  getResultItem: vi.fn(),
+}))
+
 vi.mock('@/lib/platforms', () => ({
   getAllPlatforms: () => [{ id: 'xianyu', name: '闲鱼', color: '#FFE400', enabled: true }],
   getPlatform: (id: string) => ({ id, name: '闲鱼', color: '#FFE400', enabled: true }),
@@ -25,6 +29,7 @@ vi.mock('@/lib/platforms', () => ({
 }))
 
 import { useResults } from '@/hooks/results/useResults'
+import { getResultItem } from '@/api/results'
 
 const baseHookReturn = {
   keywords: ['test'],
@@ -84,4 +89,19 @@ describe('ResultsPage', () => {
     render(<ResultsPage />)
     expect(screen.getByText('测试商品')).toBeInTheDocument()
   })
+
+  it('loads full item detail when the card is expanded', async () => {
+    vi.mocked(useResults).mockReturnValue({
+      ...baseHookReturn,
+      results: [mockItem],
+    } as any)
+    vi.mocked(getResultItem).mockResolvedValue({
+      ...mockItem,
+      卖家信息: { 卖家昵称: '测试卖家', 卖家芝麻信用: '极好' },
+    } as any)
+    render(<ResultsPage />)
+    fireEvent.click(screen.getByText('展开详情'))
+    expect(getResultItem).toHaveBeenCalledWith('123')
+    expect(await screen.findByText('芝麻信用: 极好')).toBeInTheDocument()
+  })
 })